@@ -9,8 +9,13 @@ from PyQt6.QtCore import Qt, QCoreApplication
 from PyQt6.QtGui import QIcon, QPixmap
 from PyQt6.QtWidgets import QApplication, QMessageBox, QSplashScreen
 
-from core.db import DB_PATH
+from core.db import DB_PATH, close_all_connections, ensure_schema
 from app.main_window import MainWindow
+from app.url_scheme import (
+    install_arcsys_scheme_handler,
+    register_arcsys_scheme,
+    unsupported_qt_reason,
+)
 
 
 def create_app():
@@ -23,8 +28,26 @@ def create_app():
         )
         return None, None
 
+    # arcsys:// şeması QApplication'dan önce tanıtılmalı
+    register_arcsys_scheme()
+
     app = QApplication(sys.argv)
 
+    # Eski QtWebEngine'de harita dosyaları başlıksız sunulurdu: açıkça dur
+    reason = unsupported_qt_reason()
+    if reason:
+        QMessageBox.critical(None, "Desteklenmeyen Qt Sürümü", reason)
+        return None, None
+
+    # Harita sayfası ve yerel katman dosyaları bu handler'dan sunulur
+    install_arcsys_scheme_handler(app)
+
+    # Şema ekleri (cache kolonları, trigger'lar) – idempotent
+    ensure_schema()
+
+    # Havuzdaki SQLite bağlantıları uygulama kapanırken gerçekten kapansın
+    app.aboutToQuit.connect(close_all_connections)
+
     # Splash
     base_dir = Path(__file__).resolve().parent.parent
     icon_path = base_dir / "assets" / "logo" / "logo_1024.png"
@@ -1,26 +1,375 @@
 # app/layer_tree.py
 
+from __future__ import annotations
+
+from array import array
+from typing import Any, Iterable, Mapping
+
 from PyQt6 import QtCore, QtGui, QtWidgets
 from PyQt6.QtCore import Qt
 
+from core.theme import THEME
+
+# Harita payload'ı için rol: ("trench", id) / ("find", id) / ("level", ad) ...
+MAP_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class _ChildList:
+    """
+    Bir düğümün çocuk listesi. QModelIndex.internalPointer() bu nesneyi
+    (yani index'in EBEVEYNİNİN çocuk listesini) gösterir; sadece çocuğu
+    olan düğümler için oluşturulur.
+    """
+
+    __slots__ = ("entry", "items")
+
+    def __init__(self, entry: int):
+        self.entry = entry  # sahibi olan kayıt (-1 = görünmez kök)
+        self.items: list[int] = []
+
+
+class LayerTreeModel(QtCore.QAbstractItemModel):
+    """
+    Katman ağacının verisi, düz diziler halinde:
+      - etiket / layer_key / payload listeleri
+      - ebeveyn ve satır numarası (array('i'))
+      - görünürlük (bytearray, kayıt başına 1 bayt)
+
+    Çocuklar view'a FETCH_BATCH'lik parçalar halinde açılır
+    (canFetchMore / fetchMore); kapalı bir grubun on binlerce buluntusu
+    için view tarafında hiçbir şey oluşturulmaz.
+    """
+
+    FETCH_BATCH = 500
+
+    # layer_key, visible → kullanıcının tıkladığı öğe için (tek sefer)
+    layerVisibilityChanged = QtCore.pyqtSignal(str, bool)
+    # {layer_key: visible} → bir işlemde etkilenen TÜM anahtarlar (tek sefer)
+    layersVisibilityChanged = QtCore.pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Tüm satırlar aynı iki fırçayı paylaşır
+        self._brush_visible = QtGui.QBrush(QtGui.QColor(THEME["tree_text"]))
+        self._brush_hidden = QtGui.QBrush(QtGui.QColor(THEME["tree_text_hidden"]))
+
+        self._clear_entries()
+
+    def _clear_entries(self) -> None:
+        self._labels: list[str] = []
+        self._keys: list[str] = []
+        self._payloads: list[Any] = []
+        self._parents = array("i")
+        self._rows = array("i")
+        self._fetched = array("i")
+        self._visible = bytearray()
+        self._root = _ChildList(-1)
+        self._child_lists: dict[int, _ChildList] = {}
+
+    # ---- Kayıt yardımcıları ----
+
+    def _append_entry(
+        self,
+        parent_entry: int,
+        label: str,
+        layer_key: str,
+        visible: bool,
+        payload: Any,
+    ) -> int:
+        entry = len(self._labels)
+        container = self._container(parent_entry, create=True)
+
+        self._labels.append(label)
+        self._keys.append(layer_key)
+        self._payloads.append(payload)
+        self._parents.append(parent_entry)
+        self._rows.append(len(container.items))
+        self._fetched.append(0)
+        self._visible.append(1 if visible else 0)
+
+        container.items.append(entry)
+        return entry
+
+    def _container(self, parent_entry: int, create: bool = False) -> _ChildList | None:
+        if parent_entry < 0:
+            return self._root
+        container = self._child_lists.get(parent_entry)
+        if container is None and create:
+            container = _ChildList(parent_entry)
+            self._child_lists[parent_entry] = container
+        return container
+
+    def entry_for_index(self, index: QtCore.QModelIndex) -> int:
+        """Geçerli bir index'in kayıt numarası; geçersizse -1."""
+        if not index.isValid():
+            return -1
+        container: _ChildList = index.internalPointer()
+        return container.items[index.row()]
+
+    def index_for_entry(self, entry: int, column: int = 0) -> QtCore.QModelIndex:
+        if entry < 0:
+            return QtCore.QModelIndex()
+        container = self._container(self._parents[entry])
+        return self.createIndex(self._rows[entry], column, container)
+
+    def _visible_count(self, entry: int) -> int:
+        """View'a açılmış çocuk sayısı (kökler her zaman açıktır)."""
+        if entry < 0:
+            return len(self._root.items)
+        return self._fetched[entry]
+
+    # ---- Dışarıdan doldurma ----
+
+    def add_entry(
+        self,
+        parent_entry: int,
+        label: str,
+        layer_key: str,
+        visible: bool = True,
+        payload: Any = None,
+    ) -> int:
+        """
+        Tek kayıt ekler. Ebeveynin çocukları view'a tamamen açılmışsa satır
+        hemen görünür; değilse fetchMore ile sırası geldiğinde açılır.
+        """
+        container = self._container(parent_entry)
+        row = len(container.items) if container is not None else 0
+
+        if parent_entry < 0 or self._fetched[parent_entry] == row:
+            self.beginInsertRows(self.index_for_entry(parent_entry), row, row)
+            entry = self._append_entry(parent_entry, label, layer_key, visible, payload)
+            if parent_entry >= 0:
+                self._fetched[parent_entry] += 1
+            self.endInsertRows()
+            return entry
+
+        return self._append_entry(parent_entry, label, layer_key, visible, payload)
+
+    def set_payload(self, entry: int, payload: Any) -> None:
+        self._payloads[entry] = payload
+
+    def replace_children(self, groups: Mapping[int, Iterable[Any]]) -> None:
+        """
+        Kök grupların altını toptan yeniden kurar.
+
+        groups: {kök kayıt: [düğüm, ...]}. Düğümler label / layer_key /
+        payload / children niteliklerine sahip olmalı (ör. TreeNode).
+        Kökler (etiket, anahtar, görünürlük) korunur ve 0..k-1 numaralarını
+        alır; bu yüzden kökler çocuklardan önce oluşturulmalıdır.
+
+        Kullanıcının gizlediği anahtarlar yeni ağaçta da gizli kalır; gizli
+        bir kökün ya da alt grubun altına gelen düğümler de gizli kurulur. Gizli
+        anahtarların tamamı sonunda layersVisibilityChanged ile haritaya
+        yeniden bildirilir.
+        """
+        hidden = {
+            self._keys[e]
+            for e in range(len(self._labels))
+            if self._parents[e] >= 0 and not self._visible[e] and self._keys[e]
+        }
+        roots = [
+            (
+                self._labels[e],
+                self._keys[e],
+                self._payloads[e],
+                bool(self._visible[e]),
+                groups.get(e, ()),
+            )
+            for e in self._root.items
+        ]
+
+        self.beginResetModel()
+        self._clear_entries()
+
+        for label, key, payload, visible, _nodes in roots:
+            self._append_entry(-1, label, key, visible, payload)
+
+        changes: dict[str, bool] = {}
+        for root_entry, (*_root, nodes) in enumerate(roots):
+            stack = [(root_entry, iter(nodes))]
+            while stack:
+                parent_entry, it = stack[-1]
+                node = next(it, None)
+                if node is None:
+                    stack.pop()
+                    continue
+                visible = node.layer_key not in hidden and bool(
+                    self._visible[parent_entry]
+                )
+                entry = self._append_entry(
+                    parent_entry, node.label, node.layer_key, visible, node.payload
+                )
+                if not visible and node.layer_key:
+                    changes[node.layer_key] = False
+                if node.children:
+                    stack.append((entry, iter(node.children)))
+
+        self.endResetModel()
+
+        if changes:
+            self.layersVisibilityChanged.emit(changes)
+
+    # ---- Görünürlük ----
+
+    def is_visible(self, entry: int) -> bool:
+        return bool(self._visible[entry])
+
+    def set_visible_recursive(self, entry: int, visible: bool) -> None:
+        """
+        Kaydı ve tüm alt kayıtlarını (view'a açılmamış olanlar dahil) günceller.
+
+        Etkilenen anahtarlar toplanır ve işlem sonunda tek bir
+        layersVisibilityChanged sinyaliyle haritaya bildirilir.
+        """
+        value = 1 if visible else 0
+        changes: dict[str, bool] = {}
+        stack = [entry]
+        while stack:
+            e = stack.pop()
+            self._visible[e] = value
+
+            layer_key = self._keys[e]
+            if layer_key:
+                changes[layer_key] = visible
+
+            container = self._child_lists.get(e)
+            if container is None:
+                continue
+            stack.extend(container.items)
+
+            # View'da görünen çocuk satırları için tek dataChanged
+            count = self._fetched[e]
+            if count:
+                self.dataChanged.emit(
+                    self.createIndex(0, 0, container),
+                    self.createIndex(count - 1, 1, container),
+                )
+
+        self.dataChanged.emit(
+            self.index_for_entry(entry, 0), self.index_for_entry(entry, 1)
+        )
+
+        # Harita tarafına haber ver (işlem başına bir kez)
+        if self._keys[entry]:
+            self.layerVisibilityChanged.emit(self._keys[entry], visible)
+        if changes:
+            self.layersVisibilityChanged.emit(changes)
+
+    def toggle_visibility(self, index: QtCore.QModelIndex) -> None:
+        entry = self.entry_for_index(index)
+        if entry >= 0:
+            self.set_visible_recursive(entry, not self._visible[entry])
+
+    # ---- QAbstractItemModel ----
+
+    def index(self, row: int, column: int, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+        container = self._container(self.entry_for_index(parent))
+        return self.createIndex(row, column, container)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        container: _ChildList = index.internalPointer()
+        return self.index_for_entry(container.entry)
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return self._visible_count(self.entry_for_index(parent))
 
-class LayerTreeWidget(QtWidgets.QTreeWidget):
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        # 2 kolon: 0 = label, 1 = göz
+        return 2
+
+    def hasChildren(self, parent=QtCore.QModelIndex()) -> bool:
+        if parent.column() > 0:
+            return False
+        container = self._container(self.entry_for_index(parent))
+        return bool(container is not None and container.items)
+
+    def canFetchMore(self, parent) -> bool:
+        entry = self.entry_for_index(parent)
+        if entry < 0:
+            return False
+        container = self._child_lists.get(entry)
+        return container is not None and self._fetched[entry] < len(container.items)
+
+    def fetchMore(self, parent) -> None:
+        entry = self.entry_for_index(parent)
+        if entry < 0:
+            return
+        container = self._child_lists.get(entry)
+        if container is None:
+            return
+        start = self._fetched[entry]
+        count = min(self.FETCH_BATCH, len(container.items) - start)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent.siblingAtColumn(0), start, start + count - 1)
+        self._fetched[entry] = start + count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        entry = self.entry_for_index(index)
+        if entry < 0:
+            return None
+        column = index.column()
+        visible = bool(self._visible[entry])
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return self._labels[entry]
+            # Renkli emoji yok; sade metin simgesi:
+            # görünür: [●]  gizli: [ ]
+            return "[●]" if visible else "[ ]"
+
+        if role == Qt.ItemDataRole.ForegroundRole and column == 0:
+            # Gizliyken label rengini biraz açalım (gri)
+            return self._brush_visible if visible else self._brush_hidden
+
+        if role == Qt.ItemDataRole.UserRole:
+            # 0. kolon: layer_key, 1. kolon: visible bilgisi
+            return self._keys[entry] if column == 0 else visible
+
+        if role == MAP_ROLE and column == 0:
+            return self._payloads[entry]
+
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        # Mouse ile seçilebilsin ama edit edilemesin
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+
+class LayerTreeWidget(QtWidgets.QTreeView):
     """
-    Soldaki 'Katmanlar' paneli için özel ağaç:
+    Soldaki 'Katmanlar' paneli için özel ağaç (LayerTreeModel üzerinde):
     - 0. kolon: katman adı
     - 1. kolon: göz ikonu ([●] / [ ])
     - Göz ikonuna tıklayınca görünürlük toggle
     - Parent gizlenirse tüm child'lar da gizlenir (Photoshop mantığı)
+
+    Öğeler kayıt numarasıyla (int) temsil edilir; QTreeWidgetItem yoktur.
     """
 
-    # layer_key, visible
+    # layer_key, visible (tıklanan öğe)
     layerVisibilityChanged = QtCore.pyqtSignal(str, bool)
+    # {layer_key: visible} (işlemdeki tüm öğeler, tek sinyal)
+    layersVisibilityChanged = QtCore.pyqtSignal(dict)
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        # 2 kolon: 0 = label, 1 = göz
-        self.setColumnCount(2)
+        self._model = LayerTreeModel(self)
+        self.setModel(self._model)
+        self._model.layerVisibilityChanged.connect(self.layerVisibilityChanged)
+        self._model.layersVisibilityChanged.connect(self.layersVisibilityChanged)
+
         self.setHeaderHidden(True)
         self.setRootIsDecorated(True)
         self.setIndentation(16)
@@ -39,39 +388,37 @@ class LayerTreeWidget(QtWidgets.QTreeWidget):
             header.setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
             header.setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
 
-    # ---- Dışarıdan item eklemek için yardımcı ----
+    def layer_model(self) -> LayerTreeModel:
+        return self._model
+
+    # ---- Dışarıdan item eklemek için yardımcılar ----
     def add_layer_item(
         self,
-        parent_item: QtWidgets.QTreeWidgetItem | None,
+        parent_item: int | None,
         label: str,
         layer_key: str,
         visible: bool = True,
-    ) -> QtWidgets.QTreeWidgetItem:
+        payload: Any = None,
+    ) -> int:
         """
         parent_item None ise root'a ekler.
         layer_key: harita tarafında bu grubu/layer'ı tanımak için string.
+        Dönüş: öğenin kayıt numarası (parent_item olarak kullanılabilir).
         """
-        if parent_item is None:
-            item = QtWidgets.QTreeWidgetItem(self)
-        else:
-            item = QtWidgets.QTreeWidgetItem(parent_item)
+        parent_entry = -1 if parent_item is None else parent_item
+        return self._model.add_entry(parent_entry, label, layer_key, visible, payload)
 
-        # 0. kolon label
-        item.setText(0, label)
+    def set_item_payload(self, item: int, payload: Any) -> None:
+        self._model.set_payload(item, payload)
 
-        # 0. kolon UserRole: layer_key
-        item.setData(0, Qt.ItemDataRole.UserRole, layer_key)
-        # 1. kolon UserRole: visible bilgisi
-        item.setData(1, Qt.ItemDataRole.UserRole, visible)
+    def replace_children(self, groups: Mapping[int, Iterable[Any]]) -> None:
+        """Kök grupların altını toptan kurar (bkz. LayerTreeModel.replace_children)."""
+        self._model.replace_children(groups)
 
-        # Mouse ile seçilebilsin ama edit edilemesin
-        flags = item.flags()
-        flags &= ~QtCore.Qt.ItemFlag.ItemIsEditable
-        flags |= QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEnabled
-        item.setFlags(flags)
-
-        self._update_eye_icon(item)
-        return item
+    def expand_roots(self) -> None:
+        """Sadece kök grupları açar; alt gruplar kullanıcı açınca yüklenir."""
+        for row in range(self._model.rowCount()):
+            self.expand(self._model.index(row, 0))
 
     # ---- Göz kolonuna tıklandığını yakala ----
     def mousePressEvent(self, event: QtGui.QMouseEvent):
@@ -83,48 +430,12 @@ class LayerTreeWidget(QtWidgets.QTreeWidget):
 
         # SADECE 1. KOLON (göz kolonu) toggle yapsın
         if index.column() == 1:
-            item = self.itemFromIndex(index)
-            self.toggle_item_visibility(item)
+            self._model.toggle_visibility(index)
             return
 
         # Diğer kolonlar normal davranır (expand/collapse + selection)
         super().mousePressEvent(event)
 
-    def toggle_item_visibility(self, item: QtWidgets.QTreeWidgetItem):
-        """Tek bir item'in görünürlüğünü tersine çevir ve çocuklara uygula."""
-        current_visible = bool(item.data(1, Qt.ItemDataRole.UserRole))
-        new_visible = not current_visible
-        self._set_item_visible_recursive(item, new_visible)
-
-    def _set_item_visible_recursive(
-        self, item: QtWidgets.QTreeWidgetItem, visible: bool
-    ):
-        # Bu item
-        item.setData(1, Qt.ItemDataRole.UserRole, visible)
-        self._update_eye_icon(item)
-
-        layer_key = item.data(0, Qt.ItemDataRole.UserRole)
-        if layer_key:
-            # Harita tarafına haber ver
-            self.layerVisibilityChanged.emit(str(layer_key), visible)
-
-        # Çocukları da aynı moda geçir
-        for i in range(item.childCount()):
-            child = item.child(i)
-            self._set_item_visible_recursive(child, visible)
-
-    def _update_eye_icon(self, item: QtWidgets.QTreeWidgetItem):
-        visible = bool(item.data(1, Qt.ItemDataRole.UserRole))
-
-        # Renkli emoji yok; sade metin simgesi:
-        # görünür: [●]  gizli: [ ]
-        item.setText(1, "[●]" if visible else "[ ]")
-
-        # Gizliyken label rengini biraz açalım (gri)
-        from core.theme import THEME
-
-        color = QtGui.QColor(
-            THEME["tree_text"] if visible else THEME["tree_text_hidden"]
-        )
-        brush = QtGui.QBrush(color)
-        item.setForeground(0, brush)
+    def toggle_item_visibility(self, item: int):
+        """Tek bir öğenin görünürlüğünü tersine çevir ve çocuklara uygula."""
+        self._model.set_visible_recursive(item, not self._model.is_visible(item))
@@ -1,6 +1,7 @@
 # app/loading_bar.py
 
-from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QToolButton
 
 
 class LoadingBarWidget(QWidget):
@@ -8,8 +9,11 @@ class LoadingBarWidget(QWidget):
     StatusBar içinde kullanılacak basit loading bar.
     - solda mesaj
     - sağda progress bar
+    - iptal edilebilir işlerde "Durdur" düğmesi
     """
 
+    cancelRequested = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -24,8 +28,14 @@ class LoadingBarWidget(QWidget):
         layout = QHBoxLayout(self)
         layout.setContentsMargins(4, 0, 4, 0)
         layout.setSpacing(6)
+        self.cancel_button = QToolButton()
+        self.cancel_button.setText("Durdur")
+        self.cancel_button.clicked.connect(self._on_cancel_clicked)
+        self.cancel_button.hide()
+
         layout.addWidget(self.label)
         layout.addWidget(self.progress)
+        layout.addWidget(self.cancel_button)
 
     def set_message(self, text: str) -> None:
         self.label.setText(text)
@@ -36,3 +46,12 @@ class LoadingBarWidget(QWidget):
 
     def set_value(self, value: int) -> None:
         self.progress.setValue(value)
+
+    def set_cancellable(self, cancellable: bool) -> None:
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.setVisible(cancellable)
+
+    def _on_cancel_clicked(self) -> None:
+        # İşlem bir sonraki ilerleme adımında durur; çift tıklamayı engelle
+        self.cancel_button.setEnabled(False)
+        self.cancelRequested.emit()
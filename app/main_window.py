@@ -141,6 +141,7 @@ class MainWindow(QMainWindow):
 
         self.lbl_project = QLabel("Proje: yok")
         self.loading_bar = LoadingBarWidget(self)
+        self.loading_bar.cancelRequested.connect(self._on_loading_cancel_requested)
         self.lbl_message = QLabel("")
         self.lbl_coords = QLabel("")
 
@@ -215,8 +216,14 @@ class MainWindow(QMainWindow):
 
     # ---------- Loading bar yönetimi ----------
 
-    def show_loading(self, message: str = "") -> None:
-        """Herhangi bir uzun işlem başlamadan önce çağrılır."""
+    def show_loading(self, message: str = "", cancellable: bool = False) -> None:
+        """
+        Herhangi bir uzun işlem başlamadan önce çağrılır.
+        cancellable=True ise "Durdur" düğmesi gösterilir; işlem
+        loading_cancel_requested() ile durdurulup durdurulmayacağını sorar.
+        """
+        self._loading_cancel_requested = False
+        self.loading_bar.set_cancellable(cancellable)
         if message:
             self.loading_bar.set_message(message)
         self.loading_bar.set_range(0, 0)  # belirsiz başlangıç
@@ -237,8 +244,17 @@ class MainWindow(QMainWindow):
         self.loading_bar.show()
         QCoreApplication.processEvents()
 
+    def loading_cancel_requested(self) -> bool:
+        """Kullanıcı loading bar'daki "Durdur"a bastı mı?"""
+        return getattr(self, "_loading_cancel_requested", False)
+
+    def _on_loading_cancel_requested(self) -> None:
+        self._loading_cancel_requested = True
+        self.loading_bar.set_message("Durduruluyor...")
+
     def hide_loading(self) -> None:
         """İşlem bittiğinde çağrılır."""
+        self.loading_bar.set_cancellable(False)
         self.loading_bar.hide()
         self.loading_bar.set_message("")
         self.loading_bar.set_value(0)
@@ -0,0 +1,283 @@
+# app/map_bridge.py
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+from core.map_data import MapData, encode_finds_columnar
+from core.services.search_service import search_project
+
+from app.url_scheme import publish_payload
+
+# Bu boyutun üstündeki mesajlar QWebChannel yerine arcsys:// üzerinden
+# (JS fetch ile) okunur
+INLINE_MESSAGE_MAX_BYTES = 256 * 1024
+
+# Filtre kutusuna yazarken arama ancak bu kadar duraksamadan sonra çalışır
+SEARCH_DEBOUNCE_MS = 150
+
+
+def _entity_key(item: Dict[str, Any]) -> Any:
+    """Harita varlığının kimliği (id yoksa ad)."""
+    key = item.get("id")
+    return key if key is not None else item.get("name")
+
+
+def _diff_entities(
+    previous: Dict[Any, Dict[str, Any]],
+    current: List[Dict[str, Any]],
+) -> Dict[str, list]:
+    """
+    Önceki / güncel listeleri id'ye göre karşılaştırır.
+
+    Dönüş:
+        {"add": [...], "update": [...], "remove": [id, ...]}
+    """
+    add: List[Dict[str, Any]] = []
+    update: List[Dict[str, Any]] = []
+    seen = set()
+
+    for item in current:
+        key = _entity_key(item)
+        seen.add(key)
+        old = previous.get(key)
+        if old is None:
+            add.append(item)
+        elif old is not item and old != item:
+            update.append(item)
+
+    remove = [key for key in previous if key not in seen]
+    return {"add": add, "update": update, "remove": remove}
+
+
+@dataclass(frozen=True)
+class SentMapState:
+    """
+    Sayfaya son gönderilen durum (id → dict).
+    Değiştirilmez; her sync yeni bir örnek üretir.
+    """
+
+    project_id: Optional[int] = None
+    finds: Dict[Any, Dict[str, Any]] = field(default_factory=dict)
+    trenches: Dict[Any, Dict[str, Any]] = field(default_factory=dict)
+    layers: Dict[Any, Dict[str, Any]] = field(default_factory=dict)
+    error: str = ""
+
+
+def build_sync_message(
+    state: SentMapState,
+    md: MapData,
+) -> Tuple[Optional[str], SentMapState]:
+    """
+    state → md geçişi için JSON "sync" mesajını ve yeni durumu üretir.
+
+    Qt nesnelerine dokunmaz; arka plan thread'inde çalıştırılabilir.
+    Değişiklik yoksa mesaj None döner.
+    """
+    project_changed = md.project_id != state.project_id
+
+    finds = _diff_entities(state.finds, md.finds)
+    trenches = _diff_entities(state.trenches, md.trenches)
+    layers = _diff_entities(state.layers, md.layers)
+
+    error = md.error_message or ""
+    changed = (
+        project_changed
+        or error != state.error
+        or any(
+            d["add"] or d["update"] or d["remove"] for d in (finds, trenches, layers)
+        )
+    )
+
+    new_state = SentMapState(
+        project_id=md.project_id,
+        finds={_entity_key(f): f for f in md.finds},
+        trenches={_entity_key(t): t for t in md.trenches},
+        layers={_entity_key(l): l for l in md.layers},
+        error=error,
+    )
+
+    if not changed:
+        return None, new_state
+
+    message = {
+        "op": "sync",
+        # Proje değiştiyse JS haritayı yeni merkeze / ilk rastera odaklar
+        "fit": project_changed,
+        "center": [md.center_lat, md.center_lon],
+        "error": error,
+        # Buluntular sütunlu formatta (bkz. core.map_data.encode_finds_columnar)
+        "finds": {
+            "add": encode_finds_columnar(finds["add"]),
+            "update": encode_finds_columnar(finds["update"]),
+            "remove": finds["remove"],
+        },
+        "trenches": trenches,
+        "layers": layers,
+    }
+    return json.dumps(message, ensure_ascii=False), new_state
+
+
+class MapBridge(QObject):
+    """
+    Leaflet sayfası ile Python arasındaki QWebChannel köprüsü.
+
+    Sayfa bir kez yüklenir; sonraki yenilemelerde sadece değişen
+    buluntu / açma / katmanlar tek bir "sync" mesajıyla gönderilir.
+
+    JS tarafı:
+      - bridge.mapMessage.connect(handler) → JSON string mesajları alır;
+        büyük mesajlar yerine {"op": "fetch", "url": ...} gelir
+      - bridge.pageReady()                 → sayfa hazır; tam durum istenir
+      - bridge.searchProject(query)        → filtre metni; sonuç "search"
+        mesajıyla (eşleşen buluntu / açma id'leri) gelir
+    """
+
+    # JSON string:
+    # {"op": "sync" | "fetch" | "visibility" | "config" | "search", ...}
+    mapMessage = pyqtSignal(str)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._page_ready = False
+        self._map_data: Optional[MapData] = None
+        # Görüntüleme ayarları (ör. kümeleme eşiği); her pageReady'de gider
+        self._config: Dict[str, Any] = {}
+
+        # Sayfaya son gönderilen durum
+        self._sent = SentMapState()
+
+        # Filtre araması: her tuşta yeniden başlayan tek atımlık zamanlayıcı
+        self._search_query = ""
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._run_search)
+
+    # ------------------ JS → Python ------------------
+
+    @pyqtSlot()
+    def pageReady(self) -> None:
+        """
+        Sayfa (yeniden) yüklendi. JS tarafında hiçbir varlık yok kabul edilir;
+        eldeki MapData varsa tamamı gönderilir.
+        """
+        self._page_ready = True
+        self._sent = SentMapState()
+        if self._config:
+            self._emit_config()
+        if self._map_data is not None:
+            self.sync(self._map_data)
+
+    @pyqtSlot(str)
+    def searchProject(self, query: str) -> None:
+        """
+        Harita filtre metni değişti. Arama (FTS, core.services.search_project)
+        yazma duraksayınca bir kez, yalnızca son metin için çalışır.
+        """
+        self._search_query = query
+        self._search_timer.start()
+
+    def _run_search(self) -> None:
+        query = self._search_query
+        project_id = self._map_data.project_id if self._map_data else None
+
+        result: Dict[str, List[int]] = {"find_ids": [], "trench_ids": []}
+        if project_id is not None:
+            try:
+                result = search_project(project_id, query)
+            except sqlite3.Error:
+                # Arama yapılamazsa filtre hiçbir şeyle eşleşmez
+                pass
+
+        if not self._page_ready:
+            return
+        message = {"op": "search", "query": query, **result}
+        self.mapMessage.emit(json.dumps(message, ensure_ascii=False))
+
+    # ------------------ Python → JS ------------------
+
+    def sync(self, map_data: MapData) -> None:
+        """
+        Verilen MapData'yı sayfaya yansıtır. Sayfa henüz hazır değilse
+        saklanır ve pageReady geldiğinde gönderilir.
+        """
+        self._map_data = map_data
+        if not self._page_ready:
+            return
+        message, self._sent = build_sync_message(self._sent, map_data)
+        if message is not None:
+            self._emit_sync(message)
+
+    def set_config(self, config: Dict[str, Any]) -> None:
+        """
+        Harita görüntüleme ayarlarını günceller (ör. find_cluster_threshold)
+        ve sayfa hazırsa hemen gönderir.
+        """
+        self._config.update(config)
+        if self._page_ready:
+            self._emit_config()
+
+    def _emit_config(self) -> None:
+        message = {"op": "config", "config": self._config}
+        self.mapMessage.emit(json.dumps(message, ensure_ascii=False))
+
+    def send_visibility(self, changes: Dict[str, bool]) -> None:
+        """
+        Katman ağacındaki bir görünürlük işlemini ({layer_key: visible})
+        sayfaya tek mesajla iletir.
+        """
+        if not self._page_ready or not changes:
+            return
+        message = {"op": "visibility", "changes": changes}
+        self.mapMessage.emit(json.dumps(message, ensure_ascii=False))
+
+    def sent_state(self) -> Optional[SentMapState]:
+        """
+        Mesajı arka planda hazırlamak için mevcut gönderilmiş durum.
+        Sayfa hazır değilse None (o durumda sync() kullanılmalı).
+        """
+        return self._sent if self._page_ready else None
+
+    def apply_prepared(
+        self,
+        base_state: Optional[SentMapState],
+        message: Optional[str],
+        new_state: SentMapState,
+        map_data: MapData,
+    ) -> None:
+        """
+        build_sync_message ile arka planda hazırlanmış mesajı gönderir.
+
+        Hazırlandığı durum bu arada değiştiyse (sayfa yeniden yüklendi,
+        başka bir sync gitti) mesaj atılır ve fark burada yeniden hesaplanır.
+        """
+        if not self._page_ready or base_state is not self._sent:
+            self.sync(map_data)
+            return
+        self._map_data = map_data
+        self._sent = new_state
+        if message is not None:
+            self._emit_sync(message)
+
+    def _emit_sync(self, message: str) -> None:
+        """
+        Sync mesajını gönderir. Büyük mesajlar şema handler'ına bırakılır ve
+        sayfaya sadece adresi gider; JS mesajları sırayla uyguladığı için
+        sonraki görünürlük / config mesajları bunu beklemiş olur.
+        """
+        data = message.encode("utf-8")
+        if len(data) <= INLINE_MESSAGE_MAX_BYTES:
+            self.mapMessage.emit(message)
+            return
+        url = publish_payload(data)
+        self.mapMessage.emit(json.dumps({"op": "fetch", "url": url}))
+
+    def page_unloaded(self) -> None:
+        """Sayfa yeniden yüklenecekse çağrılır; pageReady'ye kadar mesaj gitmez."""
+        self._page_ready = False
+        self._sent = SentMapState()
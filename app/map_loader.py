@@ -0,0 +1,271 @@
+# app/map_loader.py
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from core.map_data import MapData, load_map_data
+
+from app.map_bridge import SentMapState, build_sync_message
+
+# Worker'ın raporladığı adım sayısı (GUI'deki son uygulama adımı dahil)
+MAP_LOAD_STEPS = 3
+
+# ---------------------------------------------------------------------------
+# Sol ağaç için hazır veri (Qt'siz; arka planda üretilir)
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class TreeNode:
+    """Katman ağacındaki tek satır: etiket, görünürlük anahtarı, harita payload'ı."""
+
+    label: str
+    layer_key: str
+    payload: Optional[tuple] = None
+    children: List["TreeNode"] = field(default_factory=list)
+
+
+@dataclass
+class LayerTreeSpec:
+    """
+    Kök grupların (Açmalar / Buluntular / Seviyeler / Harita Katmanları)
+    çocukları.
+    """
+
+    trenches: List[TreeNode]
+    finds: List[TreeNode]
+    levels: List[TreeNode]
+    layers: List[TreeNode]
+    map_layers_by_id: Dict[int, Dict[str, Any]]
+
+
+def _trench_label(trench: Dict[str, Any]) -> str:
+    label = trench["code"]
+    if trench.get("name"):
+        label += f" – {trench['name']}"
+    return label
+
+
+def build_layer_tree_spec(md: MapData) -> LayerTreeSpec:
+    """MapData'dan sol ağacın satırlarını üretir (Qt nesnesi oluşturmaz)."""
+    trenches_by_id: Dict[int, Dict[str, Any]] = {t["id"]: t for t in md.trenches}
+
+    # --- Açmalar ---
+    trench_nodes = [
+        TreeNode(_trench_label(t), f"trench_{t['id']}", ("trench", t["id"]))
+        for t in md.trenches
+    ]
+
+    # --- Buluntular → açmalara göre grupla ---
+    finds_by_trench: Dict[int, List[Dict[str, Any]]] = {}
+    for f in md.finds:
+        finds_by_trench.setdefault(f["trench_id"], []).append(f)
+
+    find_nodes: List[TreeNode] = []
+    for trench_id, flist in finds_by_trench.items():
+        tinfo = trenches_by_id.get(trench_id)
+        tlabel = _trench_label(tinfo) if tinfo else f"Açma {trench_id}"
+
+        group = TreeNode(tlabel, f"finds_trench_{trench_id}", ("trench", trench_id))
+        for f in flist:
+            label = f"{f['code']}"
+            if f.get("description"):
+                label += f" – {f['description'][:30]}"
+            group.children.append(
+                TreeNode(label, f"find_{f['id']}", ("find", f["id"]))
+            )
+        find_nodes.append(group)
+
+    # --- Seviyeler ---
+    levels_map: Dict[int, Dict[str, Any]] = {}
+    for f in md.finds:
+        lid = f["level_id"]
+        lname = f["level_name"]
+        if lid is None or lname is None:
+            continue
+        if lid not in levels_map:
+            levels_map[lid] = {"name": lname, "trenches": set()}
+        levels_map[lid]["trenches"].add(f["trench_code"])
+
+    level_nodes: List[TreeNode] = []
+    for lid, info in levels_map.items():
+        t_codes = ", ".join(sorted(info["trenches"]))
+        label = info["name"]
+        if t_codes:
+            label += f" – Açmalar: {t_codes}"
+        level_nodes.append(TreeNode(label, f"level_{lid}", ("level", info["name"])))
+
+    # --- Harita katmanları (tile + image + vector) ---
+    layer_nodes: List[TreeNode] = []
+    map_layers_by_id: Dict[int, Dict[str, Any]] = {}
+    for l in md.layers:
+        lid = l.get("id")
+        label = l.get("name", f"Katman {lid}")
+        kind = l.get("kind", "layer")
+        if kind == "tile":
+            label += " (Tile)"
+        elif kind == "image":
+            label += " (Görüntü)"
+        elif kind == "vector":
+            label += " (Vektör)"
+
+        layer_nodes.append(TreeNode(label, f"overlay_{lid}", ("overlay", lid)))
+        if lid is not None:
+            map_layers_by_id[lid] = l
+
+    return LayerTreeSpec(
+        trenches=trench_nodes,
+        finds=find_nodes,
+        levels=level_nodes,
+        layers=layer_nodes,
+        map_layers_by_id=map_layers_by_id,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Arka plan yükleme
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class MapLoadResult:
+    """
+    Worker'ın GUI thread'ine teslim ettiği sonuç.
+
+    tree None ise veri son çizilenle aynıdır (MapData cache'i aynı nesneyi
+    döndü); ağaç ve harita olduğu gibi kalır.
+    """
+
+    generation: int
+    map_data: Optional[MapData] = None
+    tree: Optional[LayerTreeSpec] = None
+    base_state: Optional[SentMapState] = None
+    message: Optional[str] = None
+    new_state: Optional[SentMapState] = None
+    error: str = ""
+
+
+class _MapLoadSignals(QObject):
+    # generation, step, total, message
+    progress = pyqtSignal(int, int, int, str)
+    # MapLoadResult
+    finished = pyqtSignal(object)
+
+
+class _MapLoadTask(QRunnable):
+    """load_map_data + ağaç verisi + JSON mesajını thread pool'da hazırlar."""
+
+    def __init__(
+        self,
+        loader: "MapLoader",
+        generation: int,
+        project_id: Optional[int],
+        base_state: Optional[SentMapState],
+        rendered: Optional[MapData],
+    ):
+        super().__init__()
+        self.loader = loader
+        self.generation = generation
+        self.project_id = project_id
+        self.base_state = base_state
+        self.rendered = rendered
+        self.signals = _MapLoadSignals()
+
+    def _cancelled(self) -> bool:
+        return not self.loader.is_current(self.generation)
+
+    def _progress(self, step: int, message: str) -> None:
+        self.signals.progress.emit(self.generation, step, MAP_LOAD_STEPS, message)
+
+    def run(self) -> None:
+        result = MapLoadResult(generation=self.generation, base_state=self.base_state)
+        try:
+            if self._cancelled():
+                return
+            self._progress(0, "Harita verisi yükleniyor...")
+            md = load_map_data(self.project_id)
+            result.map_data = md
+
+            if md is self.rendered:
+                self.signals.finished.emit(result)
+                return
+
+            if self._cancelled():
+                return
+            self._progress(1, "Katman ağacı hazırlanıyor...")
+            result.tree = build_layer_tree_spec(md)
+
+            if self._cancelled():
+                return
+            self._progress(2, "Harita güncellemesi hazırlanıyor...")
+            if self.base_state is not None:
+                result.message, result.new_state = build_sync_message(
+                    self.base_state, md
+                )
+        except Exception as e:
+            result.error = str(e)
+
+        if not self._cancelled():
+            self.signals.finished.emit(result)
+
+
+class MapLoader(QObject):
+    """
+    Harita verisini arka planda yükler; sonucu `loaded` sinyaliyle GUI
+    thread'ine verir.
+
+    Her request() yeni bir nesil (generation) başlatır. Eski istekler
+    adımlar arasında kendini iptal eder; yine de yetişen eski sonuçlar
+    ve ilerleme mesajları burada süzülür.
+    """
+
+    # MapLoadResult (sadece güncel nesil)
+    loaded = pyqtSignal(object)
+    # step, total, message (sadece güncel nesil)
+    progress = pyqtSignal(int, int, str)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        # Tek worker: aynı anda tek yükleme; kuyruktaki eski istekler atılır
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._generations = itertools.count(1)
+        self._current = 0
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self._current
+
+    def request(
+        self,
+        project_id: Optional[int],
+        base_state: Optional[SentMapState],
+        rendered: Optional[MapData],
+    ) -> int:
+        """Yeni yükleme başlatır, önceki (bekleyen / çalışan) isteği geçersiz kılar."""
+        self._current = next(self._generations)
+        self._pool.clear()
+
+        task = _MapLoadTask(self, self._current, project_id, base_state, rendered)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        self._pool.start(task)
+        return self._current
+
+    def cancel(self) -> None:
+        """Bekleyen isteği iptal eder (sonucu teslim edilmez)."""
+        self._current = next(self._generations)
+        self._pool.clear()
+
+    @pyqtSlot(int, int, int, str)
+    def _on_progress(self, generation: int, step: int, total: int, message: str):
+        if self.is_current(generation):
+            self.progress.emit(step, total, message)
+
+    @pyqtSlot(object)
+    def _on_finished(self, result: MapLoadResult) -> None:
+        if self.is_current(result.generation):
+            self.loaded.emit(result)
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import json
-import os
 from pathlib import Path
 
 from PyQt6.QtCore import Qt, QUrl
@@ -15,20 +14,26 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QSizePolicy,
 )
+from PyQt6.QtWebChannel import QWebChannel
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 
-from core.map_data import load_map_data, MapData
+from core.db import (
+    MAP_CLUSTER_THRESHOLD_DEFAULT,
+    get_active_project_id,
+    get_map_cluster_threshold,
+)
+from core.map_data import MapData
 from core.theme import build_map_css_vars
+from core.utils import arcsys_url
 
-from app.layer_tree import LayerTreeWidget
+from app.layer_tree import MAP_ROLE, LayerTreeWidget
+from app.map_bridge import MapBridge
+from app.map_loader import MAP_LOAD_STEPS, LayerTreeSpec, MapLoader, MapLoadResult
 from app.ui_actions import (
     action_download_tiles,
     action_import_geotiff,
 )
 
-# Haritada kullanacağımız payload için ayrı bir rol:
-MAP_ROLE = Qt.ItemDataRole.UserRole + 1
-
 # Bu dosyanın konumuna göre web klasörünü bulalım
 BASE_DIR = Path(__file__).resolve().parent.parent
 WEB_DIR = BASE_DIR / "web"
@@ -40,6 +45,10 @@ class MapPanel(QWidget):
         super().__init__(parent)
         self.main_window = main_window
 
+        # Son çizilen MapData; load_map_data cache'ten aynı nesneyi dönerse
+        # ağaç ve harita yeniden kurulmaz.
+        self._rendered_map_data: MapData | None = None
+
         # Map panel QSS için isim
         self.setObjectName("MapPanel")
 
@@ -76,14 +85,16 @@ class MapPanel(QWidget):
             visible=True,
         )
 
-        self.layers_tree.expandAll()
+        self.layers_tree.expand_roots()
 
         # Seçim değişince haritada odaklama
-        self.layers_tree.currentItemChanged.connect(self.on_layer_item_selected)
+        self.layers_tree.selectionModel().currentChanged.connect(
+            self.on_layer_item_selected
+        )
 
         # Göz ikonları (visibility) değişince haritaya yansıtmak için sinyal
-        self.layers_tree.layerVisibilityChanged.connect(
-            self.on_layer_visibility_changed
+        self.layers_tree.layersVisibilityChanged.connect(
+            self.on_layers_visibility_changed
         )
 
         # ------------------------------------------------------------------
@@ -92,6 +103,13 @@ class MapPanel(QWidget):
         self.map_view = QWebEngineView()
         self.map_view.setObjectName("MapWebView")
 
+        # Python ↔ Leaflet köprüsü: sayfa bir kez yüklenir, sonraki
+        # yenilemeler sadece değişen varlıkları mesajla gönderir.
+        self.map_bridge = MapBridge(self)
+        self._web_channel = QWebChannel(self.map_view.page())
+        self._web_channel.registerObject("arcsysBridge", self.map_bridge)
+        self.map_view.page().setWebChannel(self._web_channel)
+
         splitter = QSplitter(Qt.Orientation.Horizontal)
         splitter.setObjectName("MapSplitter")
         splitter.addWidget(self.layers_tree)
@@ -150,7 +168,13 @@ class MapPanel(QWidget):
         # Python tarafında da saklamak istersen hazır dursun
         self._map_layers_by_id: dict[int, dict] = {}
 
+        # Harita verisi arka planda yüklenir (bkz. refresh_map)
+        self._map_loader = MapLoader(self)
+        self._map_loader.progress.connect(self._on_map_load_progress)
+        self._map_loader.loaded.connect(self._on_map_loaded)
+
         # İlk yükleme
+        self._load_map_page()
         self.refresh_map()
 
     # ------------------ UI eventleri ------------------
@@ -179,15 +203,16 @@ class MapPanel(QWidget):
 
     def on_layer_item_selected(self, current, previous):
         """Soldaki ağaçta seçim değişince haritayı odakla / filtrele."""
-        if current is None:
+        if current is None or not current.isValid():
             return
+        current = current.siblingAtColumn(0)
 
         # Harita payload'ını MAP_ROLE'den okuyoruz
-        data = current.data(0, MAP_ROLE)
+        data = current.data(MAP_ROLE)
 
         # Root grup tıklandıysa (Açmalar / Buluntular / Seviyeler / Harita Katmanları)
         if data is None:
-            text = current.text(1) if current.text(1) else current.text(0)
+            text = current.data(Qt.ItemDataRole.DisplayRole) or ""
 
             if text == "Açmalar":
                 js = (
@@ -237,148 +262,25 @@ class MapPanel(QWidget):
             js_code = js_code.replace("); }}", "); }")
             self.map_view.page().runJavaScript(js_code)
 
-    def on_layer_visibility_changed(self, layer_key: str, visible: bool):
+    def on_layers_visibility_changed(self, changes: dict) -> None:
         """
         Photoshop mantığı: Soldaki göz ikonları değişince çağrılır.
-        Buradan Leaflet tarafına "şu layer grubu / layer görünür/gizli" sinyali gönderiyoruz.
-        Örnek:
+        Bir tıklamadan etkilenen tüm anahtarlar ({layer_key: visible}) tek
+        mesajla Leaflet tarafına gider. Örnek anahtarlar:
           - group_trenches
           - trench_5
           - overlay_3
           - group_layers
         """
-        js = (
-            "if (window.setLayerVisibilityFromQt) "
-            f"setLayerVisibilityFromQt({json.dumps(layer_key)}, {str(visible).lower()});"
-        )
-        self.map_view.page().runJavaScript(js)
+        self.map_bridge.send_visibility(changes)
 
     # ------------------ Harita yenileme ------------------
 
-    def refresh_map(self) -> None:
-        """Aktif proje için verileri yükler, sol ağaç panelini ve haritayı yeniler."""
-        md: MapData = load_map_data()
-
-        trenches_data = md.trenches
-        finds_data = md.finds
-        layers_data = md.layers
-        center_lat = md.center_lat
-        center_lon = md.center_lon
-        error_message = md.error_message or ""
-
-        # --------------------------------------------------
-        # SOL AĞAÇ (Açmalar / Buluntular / Seviyeler)
-        # --------------------------------------------------
-        # Eski çocukları temizle
-        self.trenches_root.takeChildren()
-        self.finds_root.takeChildren()
-        self.levels_root.takeChildren()
-        self.maplayers_root.takeChildren()
-
-        trenches_by_id: dict[int, dict] = {t["id"]: t for t in trenches_data}
-
-        # --- Açmalar ---
-        for t in trenches_data:
-            label = t["code"]
-            if t.get("name"):
-                label += f" – {t['name']}"
-            item = self.layers_tree.add_layer_item(
-                parent_item=self.trenches_root,
-                label=label,
-                layer_key=f"trench_{t['id']}",
-                visible=True,
-            )
-            item.setData(0, MAP_ROLE, ("trench", t["id"]))
-
-        # --- Buluntular → açmalara göre grupla ---
-        finds_by_trench: dict[int, list[dict]] = {}
-        for f in finds_data:
-            finds_by_trench.setdefault(f["trench_id"], []).append(f)
-
-        for trench_id, flist in finds_by_trench.items():
-            tinfo = trenches_by_id.get(trench_id)
-            if tinfo:
-                tlabel = tinfo["code"]
-                if tinfo.get("name"):
-                    tlabel += f" – {tinfo['name']}"
-            else:
-                tlabel = f"Açma {trench_id}"
-
-            trench_item = self.layers_tree.add_layer_item(
-                parent_item=self.finds_root,
-                label=tlabel,
-                layer_key=f"finds_trench_{trench_id}",
-                visible=True,
-            )
-            trench_item.setData(0, MAP_ROLE, ("trench", trench_id))
-
-            for f in flist:
-                label = f"{f['code']}"
-                if f.get("description"):
-                    label += f" – {f['description'][:30]}"
-                find_item = self.layers_tree.add_layer_item(
-                    parent_item=trench_item,
-                    label=label,
-                    layer_key=f"find_{f['id']}",
-                    visible=True,
-                )
-                find_item.setData(0, MAP_ROLE, ("find", f["id"]))
-
-        # --- Seviyeler ---
-        levels_map: dict[int, dict] = {}
-        for f in finds_data:
-            lid = f["level_id"]
-            lname = f["level_name"]
-            if lid is None or lname is None:
-                continue
-            if lid not in levels_map:
-                levels_map[lid] = {"name": lname, "trenches": set()}
-            levels_map[lid]["trenches"].add(f["trench_code"])
-
-        for lid, info in levels_map.items():
-            t_codes = ", ".join(sorted(info["trenches"]))
-            label = info["name"]
-            if t_codes:
-                label += f" – Açmalar: {t_codes}"
-            item = self.layers_tree.add_layer_item(
-                parent_item=self.levels_root,
-                label=label,
-                layer_key=f"level_{lid}",
-                visible=True,
-            )
-            item.setData(0, MAP_ROLE, ("level", info["name"]))
-
-        # --- Harita katmanları (tile + image + vector) ---
-        self._map_layers_by_id.clear()
-        for l in layers_data:
-            lid = l.get("id")
-            lname = l.get("name", f"Katman {lid}")
-            kind = l.get("kind", "layer")
-
-            label = lname
-            if kind == "tile":
-                label += " (Tile)"
-            elif kind == "image":
-                label += " (Görüntü)"
-            elif kind == "vector":
-                label += " (Vektör)"
-
-            item = self.layers_tree.add_layer_item(
-                parent_item=self.maplayers_root,
-                label=label,
-                layer_key=f"overlay_{lid}",
-                visible=True,
-            )
-            # Şimdilik payload’a sadece id koyuyoruz
-            item.setData(0, MAP_ROLE, ("overlay", lid))
-            if lid is not None:
-                self._map_layers_by_id[lid] = l
-
-        self.layers_tree.expandAll()
-
-        # --------------------------------------------------
-        # HTML TEMPLATE YÜKLE VE PLACEHOLDER'LARI DOLDUR
-        # --------------------------------------------------
+    def _load_map_page(self) -> None:
+        """
+        Leaflet sayfasını (tema değişkenleriyle) bir kez yükler.
+        Veri sayfaya MapBridge üzerinden gönderilir.
+        """
         try:
             with open(MAP_TEMPLATE_PATH, "r", encoding="utf-8") as f:
                 template_html = f.read()
@@ -392,28 +294,103 @@ class MapPanel(QWidget):
 
         # Tema değişkenleri (:root içindeki CSS var'lar)
         theme_vars = build_map_css_vars()
+        html = template_html.replace("__THEME_CSS_VARS__", theme_vars)
 
-        # JSON veriler
-        trenches_json = json.dumps(trenches_data, ensure_ascii=False)
-        finds_json = json.dumps(finds_data, ensure_ascii=False)
-        layers_json = json.dumps(layers_data, ensure_ascii=False)
-
-        # Eski JS’te kalan window.vectorLayers bloğu boşa hata vermesin diye:
-        vector_layers = [l for l in layers_data if l.get("kind") == "vector"]
-        vector_layers_json = json.dumps(vector_layers, ensure_ascii=False)
-
-        error_msg_sanitized = (error_message or "").replace('"', '\\"')
-
-        html = (
-            template_html.replace("__THEME_CSS_VARS__", theme_vars)
-            .replace("__TRENCHES_JSON__", trenches_json)
-            .replace("__FINDS_JSON__", finds_json)
-            .replace("__LAYERS_JSON__", layers_json)
-            .replace("__VECTOR_LAYERS_JSON__", vector_layers_json)
-            .replace("__CENTER_LAT__", str(center_lat))
-            .replace("__CENTER_LON__", str(center_lon))
-            .replace("__ERROR_MSG__", error_msg_sanitized)
-        )
+        self.map_bridge.page_unloaded()
+
+        try:
+            cluster_threshold = get_map_cluster_threshold()
+        except Exception:
+            cluster_threshold = MAP_CLUSTER_THRESHOLD_DEFAULT
+        self.map_bridge.set_config({"find_cluster_threshold": cluster_threshold})
 
-        base_url = QUrl.fromLocalFile(str(WEB_DIR) + os.sep)
+        # Sayfa arcsys://local origin'inde çalışır; leaflet/, JS, CSS ve tüm
+        # katman dosyaları app/url_scheme.py üzerinden gelir.
+        base_url = QUrl(arcsys_url("web") + "/")
         self.map_view.setHtml(html, base_url)
+
+    def refresh_map(self) -> None:
+        """
+        Aktif proje için harita verisini arka planda yükler.
+
+        Yükleme, ağaç verisi ve JSON hazırlığı MapLoader'ın worker thread'inde
+        yapılır; sonuç geldiğinde (_on_map_loaded) sol ağaç yenilenir ve
+        değişiklikler açık haritaya gönderilir. Yeni bir çağrı, bitmemiş
+        eski yüklemeyi iptal eder.
+        """
+        try:
+            project_id = get_active_project_id()
+        except Exception:
+            # Hata mesajını worker'daki load_map_data üretsin
+            project_id = None
+
+        self._call_loading("show_loading", "Harita yükleniyor...")
+        self._map_loader.request(
+            project_id,
+            self.map_bridge.sent_state(),
+            self._rendered_map_data,
+        )
+
+    def _call_loading(self, name: str, *args) -> None:
+        """MainWindow'daki loading bar metodlarını (varsa / hazırsa) çağırır."""
+        if getattr(self.main_window, "loading_bar", None) is None:
+            return
+        method = getattr(self.main_window, name, None)
+        if method is not None:
+            method(*args)
+
+    def _on_map_load_progress(self, step: int, total: int, message: str) -> None:
+        self._call_loading("update_loading", step, total, message)
+
+    def _on_map_loaded(self, result: MapLoadResult) -> None:
+        """Worker sonucunu GUI thread'inde uygular."""
+        try:
+            if result.error:
+                QMessageBox.warning(
+                    self,
+                    "Harita Hatası",
+                    f"Harita verisi hazırlanamadı:\n{result.error}",
+                )
+                return
+
+            md = result.map_data
+            if result.tree is None or md is None:
+                # Veri son çizilenle aynı
+                return
+            self._rendered_map_data = md
+
+            self._call_loading(
+                "update_loading",
+                MAP_LOAD_STEPS,
+                MAP_LOAD_STEPS,
+                "Harita güncelleniyor...",
+            )
+            self._populate_layer_tree(result.tree)
+
+            # Sadece değişen varlıklar sayfaya gider
+            if result.new_state is not None:
+                self.map_bridge.apply_prepared(
+                    result.base_state, result.message, result.new_state, md
+                )
+            else:
+                self.map_bridge.sync(md)
+        finally:
+            self._call_loading("hide_loading")
+
+    def _populate_layer_tree(self, tree: LayerTreeSpec) -> None:
+        """
+        Hazır ağaç verisinden sol paneli kurar. Model toptan yenilenir;
+        alt grupların satırları ancak açıldıklarında view'a yüklenir.
+        """
+        self.layers_tree.replace_children(
+            {
+                self.trenches_root: tree.trenches,
+                self.finds_root: tree.finds,
+                self.levels_root: tree.levels,
+                self.maplayers_root: tree.layers,
+            }
+        )
+        self.layers_tree.expand_roots()
+
+        self._map_layers_by_id.clear()
+        self._map_layers_by_id.update(tree.map_layers_by_id)
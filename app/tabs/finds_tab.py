@@ -8,11 +8,13 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QListWidget,
     QListWidgetItem,
+    QLineEdit,
     QTextEdit,
     QSplitter,
 )
 
 from core.db import get_connection, get_active_project_id
+from core.services import search_finds
 
 if TYPE_CHECKING:
     from app.map_panel import MapPanel
@@ -21,7 +23,7 @@ if TYPE_CHECKING:
 class FindsTab(QWidget):
     """
     Buluntular sekmesi:
-    - Solda: buluntu listesi (kod + kısa açıklama + açma + seviye)
+    - Solda: arama kutusu (FTS5) + buluntu listesi (kod + kısa açıklama + açma + seviye)
     - Sağda: seçilen buluntunun detay yazısı
     - Çift tıklayınca haritada focusOnFind(find_id)
     """
@@ -31,6 +33,10 @@ class FindsTab(QWidget):
 
         self.map_panel = map_panel
 
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Ara: buluntu / açma / seviye")
+        self.search_input.setClearButtonEnabled(True)
+
         self.finds_list = QListWidget()
         self.find_detail = QTextEdit()
         self.find_detail.setReadOnly(True)
@@ -38,8 +44,14 @@ class FindsTab(QWidget):
             "Seçilen buluntunun detayları burada görünecek..."
         )
 
+        left = QWidget()
+        left_layout = QVBoxLayout(left)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+        left_layout.addWidget(self.search_input)
+        left_layout.addWidget(self.finds_list)
+
         splitter = QSplitter(Qt.Orientation.Horizontal)
-        splitter.addWidget(self.finds_list)
+        splitter.addWidget(left)
         splitter.addWidget(self.find_detail)
         splitter.setStretchFactor(0, 2)
         splitter.setStretchFactor(1, 3)
@@ -53,6 +65,7 @@ class FindsTab(QWidget):
 
         self.finds_list.currentItemChanged.connect(self.on_find_selected)
         self.finds_list.itemDoubleClicked.connect(self.on_find_double_clicked)
+        self.search_input.textChanged.connect(self.apply_search)
 
     # ------------------------------------------------------------------ #
     # Buluntuları yükleme
@@ -133,6 +146,33 @@ class FindsTab(QWidget):
         else:
             self.find_detail.setPlainText("Bu projeye ait buluntu bulunamadı.")
 
+        if self.search_input.text().strip():
+            self.apply_search(self.search_input.text())
+
+    # ------------------------------------------------------------------ #
+    # Arama (FTS5)
+    # ------------------------------------------------------------------ #
+    def apply_search(self, text: str) -> None:
+        """
+        Arama kutusuna göre listeyi süzer. Eşleşmeler veritabanındaki FTS5
+        index'inden id olarak gelir; liste yeniden yüklenmez, sadece gizlenir.
+        """
+        query = (text or "").strip()
+        project_id = get_active_project_id()
+
+        visible_ids: set[int] | None = None
+        if query and project_id is not None:
+            try:
+                visible_ids = set(search_finds(project_id, query))
+            except Exception as e:
+                self.find_detail.setPlainText(f"Arama yapılırken hata: {e}")
+                return
+
+        for i in range(self.finds_list.count()):
+            item = self.finds_list.item(i)
+            fid = item.data(Qt.ItemDataRole.UserRole)
+            item.setHidden(visible_ids is not None and fid not in visible_ids)
+
     # ------------------------------------------------------------------ #
     # Seçim / detay
     # ------------------------------------------------------------------ #
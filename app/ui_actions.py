@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import math
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -11,9 +12,25 @@ from PyQt6.QtWidgets import (
     QInputDialog,
 )
 
+from core.db import get_tile_download_settings, set_tile_download_settings
 from core.geotiff import import_geotiff_for_project
+from core.geotiff_tiler import TilingCancelled
 from core.vector_import import import_vector_file
-from core.tiles_offline import download_osm_tiles_for_active_project
+from core.tile_coverage import DEEP_ZOOM_DEFAULT, plan_coverage
+from core.tile_jobs import (
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_PAUSED,
+    TileDownloadJob,
+    list_unfinished_jobs,
+)
+from core.tiles_offline import (
+    TileBudgetError,
+    download_osm_tiles_for_active_project,
+    estimate_tile_download,
+    list_folder_tile_layers,
+    migrate_folder_layers_to_mbtiles,
+    run_tile_download_job,
+)
 
 if TYPE_CHECKING:
     from app.main_window import MainWindow
@@ -39,8 +56,8 @@ def action_import_geotiff(window: "MainWindow") -> None:
 
     file_path = Path(file_path)
 
-    # Status bar'da loading barı göster
-    window.show_loading("GeoTIFF içe aktarılıyor...")
+    # Status bar'da loading barı göster (tile piramidi uzun sürebilir)
+    window.show_loading("GeoTIFF içe aktarılıyor...", cancellable=True)
 
     def progress_cb(step: int, total: int, message: str) -> None:
         window.update_loading(step, total, message)
@@ -50,7 +67,12 @@ def action_import_geotiff(window: "MainWindow") -> None:
             project_id=project_id,
             tiff_path=file_path,
             progress_cb=progress_cb,
+            should_cancel=window.loading_cancel_requested,
         )
+    except TilingCancelled:
+        window.hide_loading()
+        window.show_message("GeoTIFF içe aktarma durduruldu.")
+        return
     except Exception as e:
         window.hide_loading()
         QMessageBox.critical(
@@ -107,12 +129,87 @@ def action_import_vector(window: "MainWindow") -> None:
 # ----------------------------------------------------------------------
 # Offline tile indirme
 # ----------------------------------------------------------------------
+def _report_tile_job(window: "MainWindow", job: TileDownloadJob) -> None:
+    """İş bitince (tamam / durduruldu / hatalı tile'lar) kullanıcıya bildirir."""
+    if job.status == JOB_STATUS_COMPLETED:
+        window.show_message(f"Offline tile indirildi: {job.layer_name}")
+    elif job.status == JOB_STATUS_PAUSED:
+        window.show_message(
+            f"Tile indirme durduruldu ({job.done_tiles}/{job.total_tiles}); "
+            "'Çevrimdışı Harita Ekle' ile devam edebilirsiniz."
+        )
+    else:
+        QMessageBox.warning(
+            window,
+            "Eksik Tile'lar",
+            f"{job.layer_name}: {job.failed_tiles} tile indirilemedi "
+            f"({job.done_tiles}/{job.total_tiles} tamam).\n\n"
+            "İşi daha sonra sürdürerek sadece eksik tile'ları yeniden "
+            "deneyebilirsiniz.",
+        )
+
+
+def _report_tile_budget(window: "MainWindow", error: TileBudgetError) -> None:
+    """Disk bütçesi yüzünden başlatılmayan / durdurulan iş."""
+    window.hide_loading()
+    window.map_panel.refresh_map()
+    QMessageBox.warning(window, "Disk Bütçesi", str(error))
+
+
+def _resume_tile_job(window: "MainWindow", job_id: int) -> None:
+    window.show_loading("Tile indirme sürdürülüyor...", cancellable=True)
+
+    def progress_cb(step: int, total: int, message: str) -> None:
+        window.update_loading(step, total, message)
+
+    try:
+        job = run_tile_download_job(
+            job_id,
+            progress_cb=progress_cb,
+            should_cancel=window.loading_cancel_requested,
+        )
+    except TileBudgetError as e:
+        _report_tile_budget(window, e)
+        return
+    except Exception as e:
+        window.hide_loading()
+        QMessageBox.critical(
+            window,
+            "Offline Tile Hatası",
+            f"Tile indirme sürdürülürken hata oluştu:\n{e}",
+        )
+        return
+
+    window.hide_loading()
+    _report_tile_job(window, job)
+    window.map_panel.refresh_map()
+
+
 def action_download_tiles(window: "MainWindow") -> None:
     project_id = window.current_project_id
     if not project_id:
         QMessageBox.warning(window, "Proje Yok", "Önce bir proje seçmelisiniz.")
         return
 
+    # Yarım kalan işler varsa önce onları sun
+    unfinished = list_unfinished_jobs(project_id)
+    if unfinished:
+        new_choice = "Yeni indirme başlat"
+        choices = [job.summary() for job in unfinished] + [new_choice]
+        choice, ok = QInputDialog.getItem(
+            window,
+            "Yarım Kalan İndirmeler",
+            "Sürdürülecek iş (yalnızca eksik / hatalı tile'lar indirilir):",
+            choices,
+            0,
+            False,
+        )
+        if not ok:
+            return
+        if choice != new_choice:
+            _resume_tile_job(window, unfinished[choices.index(choice)].id)
+            return
+
     sources = {
         "ArcGIS World Imagery": (
             "https://services.arcgisonline.com/ArcGIS/rest/services/"
@@ -138,8 +235,30 @@ def action_download_tiles(window: "MainWindow") -> None:
     tile_template = sources[source_name]
     layer_name = f"{source_name} (Offline)"
 
-    buffer_km, ok = QInputDialog.getDouble(
-        window, "Buffer (km)", "Buffer değeri (km):", 0.2, 0.0, 1000.0, 2
+    # Kapsama: açma / vektör çevresi (yalnızca gereken tile'lar) ya da
+    # eski davranış olan merkez etrafında kare
+    coverage_features = "Açmalar ve vektör katmanlarının çevresi"
+    coverage_center = "Proje merkezi etrafında kare"
+    coverage_mode, ok = QInputDialog.getItem(
+        window,
+        "Kapsama Alanı",
+        "İndirilecek alan:",
+        [coverage_features, coverage_center],
+        0,
+        False,
+    )
+    if not ok:
+        return
+    use_features = coverage_mode == coverage_features
+
+    buffer_m, ok = QInputDialog.getDouble(
+        window,
+        "Buffer (m)",
+        "Buffer değeri (m):",
+        100.0 if use_features else 200.0,
+        0.0,
+        1000000.0,
+        0,
     )
     if not ok:
         return
@@ -153,20 +272,141 @@ def action_download_tiles(window: "MainWindow") -> None:
         QMessageBox.warning(window, "Hata", "Zoom aralığı hatalı.")
         return
 
-    window.show_loading("Offline tile indiriliyor...")
+    # Derin zoom'larda tile sayısı 4 kat artar; daha dar buffer yeterli
+    deep_buffer_m = None
+    if max_zoom >= DEEP_ZOOM_DEFAULT:
+        deep_buffer_m, ok = QInputDialog.getDouble(
+            window,
+            "Derin Zoom Buffer (m)",
+            f"z{DEEP_ZOOM_DEFAULT} ve üstü için buffer (m):",
+            min(buffer_m, 30.0),
+            0.0,
+            buffer_m,
+            0,
+        )
+        if not ok:
+            return
+
+    try:
+        plan = plan_coverage(
+            project_id,
+            min_zoom,
+            max_zoom,
+            buffer_m,
+            deep_buffer_m=deep_buffer_m,
+            use_features=use_features,
+        )
+    except Exception as e:
+        QMessageBox.critical(
+            window,
+            "Kapsama Hatası",
+            f"İndirilecek tile'lar hesaplanırken hata oluştu:\n{e}",
+        )
+        return
+
+    if plan.total_tiles == 0:
+        QMessageBox.warning(window, "Hata", "Belirlenen alan için tile bulunamadı.")
+        return
+
+    # Ön tahmin: birkaç örnek tile ile boyut ve süre, disk bütçesi
+    window.show_loading("İndirme tahmini hesaplanıyor...")
+    try:
+        estimate = estimate_tile_download(plan, tile_template)
+    except Exception as e:
+        window.hide_loading()
+        QMessageBox.critical(
+            window,
+            "Tahmin Hatası",
+            f"İndirme tahmini yapılırken hata oluştu:\n{e}",
+        )
+        return
+    window.hide_loading()
+
+    note = ""
+    if use_features and plan.source == "center":
+        note = (
+            "Projede açma / vektör katman bulunamadı; "
+            "proje merkezi kullanıldı.\n\n"
+        )
+    summary = f"{note}{layer_name}\n\n{estimate.describe()}"
+
+    if not estimate.fits_budget:
+        needed = estimate.disk.budget_needed_for(estimate.estimated_bytes)
+        if needed is None:
+            QMessageBox.critical(
+                window,
+                "Disk Alanı Yetersiz",
+                f"{summary}\n\nDiskte bu indirme için yeterli boş alan yok. "
+                "Alanı ya da zoom aralığını küçültün.",
+            )
+            return
+        needed_mb = math.ceil(needed / (1024 * 1024))
+        answer = QMessageBox.question(
+            window,
+            "Disk Bütçesi Aşılıyor",
+            f"{summary}\n\nİndirme tile disk bütçesini aşıyor. "
+            f"Bütçe {needed_mb} MB'a yükseltilip indirme başlatılsın mı?",
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        settings = get_tile_download_settings()
+        settings.disk_budget_mb = float(needed_mb)
+        set_tile_download_settings(settings)
+    else:
+        answer = QMessageBox.question(
+            window,
+            "İndirme Tahmini",
+            f"{summary}\n\nİndirme başlatılsın mı?",
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
 
     def progress_cb(step: int, total: int, message: str) -> None:
         window.update_loading(step, total, message)
 
+    # Eski klasör önbelleklerini (binlerce küçük PNG) MBTiles'a taşı
+    folder_layers = list_folder_tile_layers(project_id)
+    if folder_layers:
+        names = "\n".join(f"• {name}" for _id, name, _folder in folder_layers)
+        answer = QMessageBox.question(
+            window,
+            "Tile Önbelleği",
+            "Bu projede klasör olarak saklanan offline katmanlar var:\n"
+            f"{names}\n\n"
+            "Tek dosyalık MBTiles'a taşınsın mı? (Eski klasörler silinir.)",
+        )
+        if answer == QMessageBox.StandardButton.Yes:
+            window.show_loading("Tile klasörleri MBTiles'a taşınıyor...")
+            try:
+                migrate_folder_layers_to_mbtiles(
+                    project_id, progress_cb=progress_cb, remove_source=True
+                )
+            except Exception as e:
+                window.hide_loading()
+                QMessageBox.critical(
+                    window,
+                    "Tile Önbelleği Hatası",
+                    f"Tile klasörleri taşınırken hata oluştu:\n{e}",
+                )
+                return
+
+    window.show_loading("Offline tile indiriliyor...", cancellable=True)
+
     try:
-        download_osm_tiles_for_active_project(
-            buffer_km=buffer_km,
+        job = download_osm_tiles_for_active_project(
+            buffer_km=buffer_m / 1000.0,
             zoom_min=min_zoom,
             zoom_max=max_zoom,
             progress_cb=progress_cb,
             tile_template=tile_template,
             layer_name=layer_name,
+            should_cancel=window.loading_cancel_requested,
+            coverage=plan,
+            estimate=estimate,
         )
+    except TileBudgetError as e:
+        _report_tile_budget(window, e)
+        return
     except Exception as e:
         window.hide_loading()
         QMessageBox.critical(
@@ -177,5 +417,5 @@ def action_download_tiles(window: "MainWindow") -> None:
         return
 
     window.hide_loading()
-    window.show_message(f"Offline tile indirildi: {layer_name}")
+    _report_tile_job(window, job)
     window.map_panel.refresh_map()
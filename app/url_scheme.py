@@ -0,0 +1,417 @@
+# app/url_scheme.py
+"""
+arcsys:// URL şeması.
+
+Harita sayfası ve tüm yerel içerik tek bir origin'den (arcsys://local)
+sunulur; böylece file:// erişimi ve --disable-web-security gerekmez.
+
+Yollar:
+  /web/<yol>               → WEB_DIR (Leaflet, JS, CSS)
+  /data/<yol>              → DATA_DIR (offline tile'lar, rasterler)
+  /layers/<id>/<dosya>     → map_layers'ta kayıtlı image / vector dosyası
+  /mbtiles/<id>/<z>/<x>/<y> → MBTiles katmanından tek tile
+  /cache/<id>/<z>/<x>/<y>   → paylaşılan tile önbelleğinden (tilecache katmanı)
+  /payload/<token>         → MapBridge'in büyük JSON mesajları (tek seferlik)
+
+Dosyalar belleğe alınmadan, seekable bir QFile ile akıtılır; Range
+isteklerini QtWebEngine bu cihaz üzerinden kendisi karşılar (handler yalnızca
+Accept-Ranges başlığını ekler). ETag / Last-Modified / Cache-Control
+başlıkları QWebEngineUrlRequestJob.setAdditionalResponseHeaders ile verilir;
+bu yüzden en az Qt MIN_QT_VERSION gerekir (bkz. unsupported_qt_reason).
+"""
+from __future__ import annotations
+
+import itertools
+import mimetypes
+from collections import OrderedDict
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PyQt6.QtCore import QBuffer, QByteArray, QFile, QIODevice, QObject, qVersion
+from PyQt6.QtWebEngineCore import (
+    QWebEngineProfile,
+    QWebEngineUrlRequestJob,
+    QWebEngineUrlScheme,
+    QWebEngineUrlSchemeHandler,
+)
+
+from core.db import get_data_revision
+from core.mbtiles import MBTiles, tile_content_type
+from core.services import get_cache_layer_source, get_layer_file_path
+from core.tile_cache import TileCache
+from core.utils import ARCSYS_HOST, ARCSYS_SCHEME, DATA_DIR, WEB_DIR, arcsys_url
+
+# Dosya türü → Cache-Control
+# JS/CSS değişiklikleri hemen görünsün diye web dosyaları her istekte doğrulanır
+_CACHE_WEB = "no-cache"
+_CACHE_DATA = "public, max-age=86400"
+_CACHE_NONE = "no-store"
+
+_CONTENT_TYPES = {
+    ".js": "text/javascript",
+    ".json": "application/json",
+    ".geojson": "application/geo+json",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+    ".css": "text/css",
+    ".html": "text/html",
+}
+
+# Bellekte tutulan en fazla payload (okunmayanlar en eskiden atılır)
+_MAX_PAYLOADS = 8
+
+# setAdditionalResponseHeaders ve FetchApiAllowed bu sürümle geldi
+MIN_QT_VERSION = "6.6"
+
+
+def unsupported_qt_reason() -> Optional[str]:
+    """
+    Kurulu QtWebEngine handler'ın yanıt başlıklarını veremeyecek kadar
+    eskiyse kullanıcıya gösterilecek açıklamayı, değilse None döner.
+    """
+    if hasattr(QWebEngineUrlRequestJob, "setAdditionalResponseHeaders"):
+        return None
+    return (
+        f"ArcSys haritası Qt {MIN_QT_VERSION} veya üstünü gerektirir "
+        f"(kurulu: {qVersion()}).\n"
+        "PyQt6 ve PyQt6-WebEngine paketlerini güncelleyin."
+    )
+
+
+def register_arcsys_scheme() -> None:
+    """
+    arcsys şemasını QtWebEngine'e tanıtır.
+    QApplication oluşturulmadan ÖNCE çağrılmalıdır.
+    """
+    scheme = QWebEngineUrlScheme(ARCSYS_SCHEME.encode())
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setDefaultPort(QWebEngineUrlScheme.SpecialPort.PortUnspecified)
+
+    flags = (
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.LocalAccessAllowed
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+    )
+    # fetch() ile GeoJSON / payload okumak için (Qt 6.6+; eski sürümü
+    # unsupported_qt_reason açıklamasıyla create_app durdurur)
+    fetch_flag = getattr(QWebEngineUrlScheme.Flag, "FetchApiAllowed", None)
+    if fetch_flag is not None:
+        flags |= fetch_flag
+    scheme.setFlags(flags)
+
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+# ---------------------------------------------------------------------------
+# Payload deposu (MapBridge → fetch)
+# ---------------------------------------------------------------------------
+
+_payloads: "OrderedDict[str, bytes]" = OrderedDict()
+_payload_ids = itertools.count(1)
+
+
+def publish_payload(data: bytes) -> str:
+    """
+    JSON verisini bellekte saklar ve onu bir kez sunacak URL'i döner.
+    GUI thread'inden çağrılır (şema handler'ı da orada çalışır).
+    """
+    token = str(next(_payload_ids))
+    _payloads[token] = data
+    while len(_payloads) > _MAX_PAYLOADS:
+        _payloads.popitem(last=False)
+    return arcsys_url("payload", token)
+
+
+# ---------------------------------------------------------------------------
+# Handler
+# ---------------------------------------------------------------------------
+
+
+def _safe_join(root: Path, rel: str) -> Optional[Path]:
+    """root altındaki dosyayı döner; dışarı çıkan (../) yollar için None."""
+    root = root.resolve()
+    try:
+        path = (root / rel).resolve()
+        path.relative_to(root)
+    except (OSError, ValueError):
+        return None
+    return path if path.is_file() else None
+
+
+def _content_type(path: Path) -> str:
+    ext = path.suffix.lower()
+    if ext in _CONTENT_TYPES:
+        return _CONTENT_TYPES[ext]
+    guessed, _ = mimetypes.guess_type(path.name)
+    return guessed or "application/octet-stream"
+
+
+class ArcsysSchemeHandler(QWebEngineUrlSchemeHandler):
+    """arcsys://local/... isteklerini yerel dosyalardan / bellekten yanıtlar."""
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        # layer_id → açık MBTiles okuyucu; veri sürümü değişince (katman
+        # başka dosyaya yönlendirilmiş olabilir) yeniden açılır
+        self._mbtiles: Dict[int, MBTiles] = {}
+        self._mbtiles_revision: Optional[int] = None
+        # Paylaşılan önbellek (okumalar erişim zamanını günceller) ve
+        # layer_id → kaynak id; veri sürümü değişince boşaltılır
+        self._cache: Optional[TileCache] = None
+        self._cache_sources: Dict[int, Optional[int]] = {}
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob) -> None:  # noqa: N802
+        url = job.requestUrl()
+        method = bytes(job.requestMethod()).decode("ascii", "replace").upper()
+        if method not in ("GET", "HEAD"):
+            job.fail(QWebEngineUrlRequestJob.Error.RequestDenied)
+            return
+        if url.host() != ARCSYS_HOST:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        route, _, rest = url.path().lstrip("/").partition("/")
+        head_only = method == "HEAD"
+
+        if route == "payload":
+            # Payload tek seferlik: GET sonrası bellekten atılır
+            data = _payloads.get(rest) if head_only else _payloads.pop(rest, None)
+            if data is None:
+                job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+                return
+            self._reply_bytes(job, data, "application/json", head_only)
+            return
+
+        if route == "mbtiles":
+            self._reply_mbtiles_tile(job, rest, head_only)
+            return
+
+        if route == "cache":
+            self._reply_cache_tile(job, rest, head_only)
+            return
+
+        path: Optional[Path] = None
+        cache_control = _CACHE_DATA
+        if route == "web":
+            path = _safe_join(WEB_DIR, rest)
+            cache_control = _CACHE_WEB
+        elif route == "data":
+            path = _safe_join(DATA_DIR, rest)
+        elif route == "layers":
+            layer_id, _, _name = rest.partition("/")
+            if layer_id.isdigit():
+                try:
+                    found = get_layer_file_path(int(layer_id))
+                except Exception:
+                    found = None
+                if found:
+                    path = Path(found)
+
+        if path is None or not path.is_file():
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        self._reply_file(job, path, cache_control, head_only)
+
+    # ------------------ MBTiles ------------------
+
+    def _check_revision(self) -> None:
+        revision = get_data_revision()
+        if revision != self._mbtiles_revision:
+            self.close_mbtiles()
+            self._cache_sources.clear()
+            self._mbtiles_revision = revision
+
+    def _mbtiles_reader(self, layer_id: int) -> Optional[MBTiles]:
+        self._check_revision()
+
+        reader = self._mbtiles.get(layer_id)
+        if reader is None:
+            path = get_layer_file_path(layer_id)
+            if not path or not path.lower().endswith(".mbtiles"):
+                return None
+            reader = MBTiles(path, readonly=True)
+            self._mbtiles[layer_id] = reader
+        return reader
+
+    def _reply_mbtiles_tile(
+        self,
+        job: QWebEngineUrlRequestJob,
+        rest: str,
+        head_only: bool,
+    ) -> None:
+        parts = rest.split("/")
+        if len(parts) != 4 or not all(p.isdigit() for p in parts):
+            job.fail(QWebEngineUrlRequestJob.Error.UrlInvalid)
+            return
+        layer_id, z, x, y = (int(p) for p in parts)
+
+        try:
+            reader = self._mbtiles_reader(layer_id)
+            found = reader.get_tile_with_id(z, x, y) if reader else None
+        except Exception:
+            found = None
+        if found is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        self._reply_tile(job, found, head_only)
+
+    # ------------------ Paylaşılan önbellek ------------------
+
+    def _cache_source_id(self, layer_id: int) -> Optional[int]:
+        self._check_revision()
+        if layer_id not in self._cache_sources:
+            template = get_cache_layer_source(layer_id)
+            source_id = None
+            if template:
+                if self._cache is None:
+                    self._cache = TileCache()
+                source_id = self._cache.source_id(template, create=False)
+            self._cache_sources[layer_id] = source_id
+        return self._cache_sources[layer_id]
+
+    def _reply_cache_tile(
+        self,
+        job: QWebEngineUrlRequestJob,
+        rest: str,
+        head_only: bool,
+    ) -> None:
+        parts = rest.split("/")
+        if len(parts) != 4 or not all(p.isdigit() for p in parts):
+            job.fail(QWebEngineUrlRequestJob.Error.UrlInvalid)
+            return
+        layer_id, z, x, y = (int(p) for p in parts)
+
+        try:
+            source_id = self._cache_source_id(layer_id)
+            found = (
+                self._cache.get_tile_with_id(source_id, z, x, y)
+                if source_id is not None
+                else None
+            )
+        except Exception:
+            found = None
+        if found is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        self._reply_tile(job, found, head_only)
+
+    def close_cache(self) -> None:
+        """Önbelleği kapatır; biriken erişim zamanları yazılır."""
+        cache, self._cache = self._cache, None
+        self._cache_sources.clear()
+        if cache is not None:
+            try:
+                cache.close()
+            except Exception:
+                pass
+
+    def close_mbtiles(self) -> None:
+        """Açık MBTiles okuyucularını kapatır."""
+        readers, self._mbtiles = self._mbtiles, {}
+        for reader in readers.values():
+            try:
+                reader.close()
+            except Exception:
+                pass
+
+    # ------------------ Yanıt yardımcıları ------------------
+
+    def _reply_tile(
+        self,
+        job: QWebEngineUrlRequestJob,
+        found: Tuple[bytes, str],
+        head_only: bool,
+    ) -> None:
+        data, tile_id = found
+        # İçerik adresli: tile_id verinin SHA-1'i → güçlü ETag
+        self._set_headers(
+            job, {"Cache-Control": _CACHE_DATA, "ETag": f'"{tile_id}"'}
+        )
+        body = b"" if head_only else data
+        job.reply(tile_content_type(data).encode(), self._buffer(job, body))
+
+    def _reply_file(
+        self,
+        job: QWebEngineUrlRequestJob,
+        path: Path,
+        cache_control: str,
+        head_only: bool,
+    ) -> None:
+        try:
+            st = path.stat()
+        except OSError:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        headers = {
+            "Cache-Control": cache_control,
+            "ETag": etag,
+            "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+        }
+        self._set_headers(job, headers)
+
+        content_type = _content_type(path).encode()
+        if head_only:
+            job.reply(content_type, self._buffer(job, b""))
+            return
+
+        # Cihaz job'a bağlı: job silinince dosya da kapanır
+        f = QFile(str(path), job)
+        if not f.open(QIODevice.OpenModeFlag.ReadOnly):
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+        job.reply(content_type, f)
+
+    def _reply_bytes(
+        self,
+        job: QWebEngineUrlRequestJob,
+        data: bytes,
+        content_type: str,
+        head_only: bool,
+    ) -> None:
+        self._set_headers(job, {"Cache-Control": _CACHE_NONE})
+        body = b"" if head_only else data
+        job.reply(content_type.encode(), self._buffer(job, body))
+
+    @staticmethod
+    def _buffer(job: QWebEngineUrlRequestJob, data: bytes) -> QBuffer:
+        buf = QBuffer(job)
+        buf.setData(QByteArray(data))
+        buf.open(QIODevice.OpenModeFlag.ReadOnly)
+        return buf
+
+    @staticmethod
+    def _set_headers(job: QWebEngineUrlRequestJob, headers: Dict[str, str]) -> None:
+        # QMultiMap<QByteArray, QByteArray>: her anahtar için değer listesi
+        job.setAdditionalResponseHeaders(
+            {
+                QByteArray(k.encode()): [QByteArray(v.encode())]
+                for k, v in headers.items()
+            }
+        )
+
+
+def install_arcsys_scheme_handler(
+    parent: QObject,
+    profile: Optional[QWebEngineProfile] = None,
+) -> ArcsysSchemeHandler:
+    """
+    Handler'ı (varsayılan) profile kurar; ömrü parent'a bağlıdır.
+    Önce unsupported_qt_reason() ile Qt sürümü kontrol edilmelidir.
+    """
+    handler = ArcsysSchemeHandler(parent)
+    profile = profile or QWebEngineProfile.defaultProfile()
+    profile.installUrlSchemeHandler(ARCSYS_SCHEME.encode(), handler)
+    # Uygulama kapanırken önbellek erişim zamanları kaybolmasın
+    about_to_quit = getattr(parent, "aboutToQuit", None)
+    if about_to_quit is not None:
+        about_to_quit.connect(handler.close_cache)
+    return handler
@@ -0,0 +1,136 @@
+# core/coords.py
+
+"""
+Toplu koordinat dönüşümü yardımcıları.
+
+Servisler (buluntular, açma köşeleri, raster köşeleri) noktaları tek tek
+Transformer.transform(x, y) ile çevirmek yerine önce x / y kolonlarını
+toplar, sonra bu modül üzerinden TEK bir pyproj çağrısıyla WGS84'e çevirir.
+
+Ayrıca Transformer nesneleri (kaynak EPSG, hedef EPSG) anahtarıyla süreç
+boyunca paylaşılan, sınırlı ve thread-safe bir cache'te tutulur; proje
+değişimlerinde proj.db'ye tekrar gidilmez.
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from pyproj import Transformer
+
+
+WGS84_EPSG = 4326
+
+# Cache'te en fazla bu kadar Transformer tutulur (LRU)
+TRANSFORMER_CACHE_SIZE = 16
+
+_transformer_cache: "OrderedDict[Tuple[int, int], Transformer]" = OrderedDict()
+_transformer_lock = threading.Lock()
+_transformer_hits = 0
+_transformer_misses = 0
+
+# get_transformer'ın WGS84'e kurduğu Transformer'lar (id → nesne). Cache'ten
+# atılsalar da kullanan oldukça tanınırlar (bkz. is_wgs84_transformer).
+_wgs84_transformers: "weakref.WeakValueDictionary[int, Transformer]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def get_transformer(src_epsg: int, dst_epsg: int = WGS84_EPSG) -> Transformer:
+    """
+    (src_epsg, dst_epsg) için always_xy=True bir Transformer döner.
+
+    - Daha önce kurulduysa cache'ten verir (hit)
+    - Yoksa Transformer.from_crs ile kurar, cache'e ekler (miss)
+    - Cache doluysa en uzun süredir kullanılmayan atılır
+    """
+    global _transformer_hits, _transformer_misses
+
+    key = (int(src_epsg), int(dst_epsg))
+
+    with _transformer_lock:
+        transformer = _transformer_cache.get(key)
+        if transformer is not None:
+            _transformer_cache.move_to_end(key)
+            _transformer_hits += 1
+            return transformer
+        _transformer_misses += 1
+
+    # Kurulum (proj.db okuması) kilit dışında yapılır; iki thread aynı anda
+    # kurarsa ikincisi cache'teki nesneyi kullanır.
+    transformer = Transformer.from_crs(
+        f"EPSG:{key[0]}", f"EPSG:{key[1]}", always_xy=True
+    )
+
+    with _transformer_lock:
+        existing = _transformer_cache.get(key)
+        if existing is not None:
+            _transformer_cache.move_to_end(key)
+            return existing
+        _transformer_cache[key] = transformer
+        if key[1] == WGS84_EPSG:
+            _wgs84_transformers[id(transformer)] = transformer
+        while len(_transformer_cache) > TRANSFORMER_CACHE_SIZE:
+            _transformer_cache.popitem(last=False)
+
+    return transformer
+
+
+def is_wgs84_transformer(transformer: Transformer) -> bool:
+    """
+    Transformer get_transformer(epsg) ile WGS84'e kurulmuş mu?
+
+    Servislerin lat_wgs84 / lon_wgs84 cache kolonları projenin CRS'inden
+    WGS84'e dönüşümdür; başka bir transformer için geçerli değildir.
+    """
+    return _wgs84_transformers.get(id(transformer)) is transformer
+
+
+def transformer_cache_stats() -> Dict[str, int]:
+    """Transformer cache sayaçları: {"hits", "misses", "size"}."""
+    with _transformer_lock:
+        return {
+            "hits": _transformer_hits,
+            "misses": _transformer_misses,
+            "size": len(_transformer_cache),
+        }
+
+
+def clear_transformer_cache() -> None:
+    """Cache'i ve sayaçları sıfırlar."""
+    global _transformer_hits, _transformer_misses
+
+    with _transformer_lock:
+        _transformer_cache.clear()
+        _transformer_hits = 0
+        _transformer_misses = 0
+
+
+def transform_xy(
+    transformer: Transformer,
+    xs: Sequence[float],
+    ys: Sequence[float],
+) -> Tuple[list[float], list[float]]:
+    """
+    x / y dizilerini NumPy dizilerine toplayıp tek çağrıda dönüştürür.
+
+    Dönüş:
+        (lons, lats) → JSON'a doğrudan yazılabilsin diye Python float listeleri.
+
+    NOT: Transformer always_xy=True ile kurulmuş olmalı (x=lon, y=lat sırası).
+    """
+    if len(xs) != len(ys):
+        raise ValueError("x ve y dizilerinin uzunluğu aynı olmalı.")
+    if not xs:
+        return [], []
+
+    x_arr = np.asarray(xs, dtype=np.float64)
+    y_arr = np.asarray(ys, dtype=np.float64)
+
+    lon_arr, lat_arr = transformer.transform(x_arr, y_arr)
+
+    return np.asarray(lon_arr).tolist(), np.asarray(lat_arr).tolist()
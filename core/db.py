@@ -3,16 +3,27 @@
 Veritabanı katmanı.
 
 Bu dosyanın görevi:
-- SQLite bağlantısını yönetmek
+- SQLite bağlantılarını yönetmek (thread başına bağlantı + okuma havuzu)
+- app_settings'te saklanan performans profilini (mmap, cache, synchronous,
+  temp_store, periyodik optimize) bağlantılara uygulamak
 - Temel tabloları (projects, app_settings) garantiye almak
+- Şema eklerini PRAGMA user_version tabanlı migration'larla uygulamak
+  (WGS84 cache kolonları, foreign key / covering index'ler, R*Tree, FTS5 ...)
 - Aktif proje bilgisini saklayıp okumak
+- Harita verisi için sürüm sayacı (data_revision) sağlamak
+- Harita / offline tile indirme ayarlarını (app_settings) okuyup yazmak
 - Genel SELECT / INSERT yardımcı fonksiyonları sağlamak
 - Uygulamayı kullanan diğer katmanlar için basit, UI'dan bağımsız bir API sunmak
 """
 
+import queue
 import sqlite3
+import threading
+import time
+import weakref
 from contextlib import contextmanager
-from typing import Any, Iterator, Optional, Sequence
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Sequence
 
 from .utils import DATA_DIR, ensure_dir
 
@@ -29,16 +40,142 @@ DB_PATH = DATA_DIR / "ArcSys.db"
 ACTIVE_PROJECT_ID: Optional[int] = None
 
 
-def get_connection() -> sqlite3.Connection:
+# Okuma havuzunda en fazla bu kadar boşta bağlantı tutulur
+READ_POOL_SIZE = 4
+
+
+@dataclass
+class DbPerformanceProfile:
+    """
+    Havuzdaki bağlantılara uygulanan SQLite performans ayarları.
+    app_settings tablosunda (db_* kolonları) saklanır.
+
+    mmap_size       : Bellek eşlemeli okuma için bayt (0 → kapalı)
+    cache_size_kb   : Bağlantı başına sayfa cache'i (KiB)
+    synchronous     : "NORMAL" (WAL altında güvenli ve hızlı) / "FULL" / "OFF"
+    temp_store      : "MEMORY" / "FILE" / "DEFAULT"
+    optimize_interval_s: Bu kadar saniyede bir PRAGMA optimize (0 → kapalı)
+    """
+
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kb: int = 64 * 1024
+    synchronous: str = "NORMAL"
+    temp_store: str = "MEMORY"
+    optimize_interval_s: int = 3600
+
+
+_SYNCHRONOUS_VALUES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_TEMP_STORE_VALUES = {"DEFAULT", "FILE", "MEMORY"}
+
+# Yüklenmiş profil (ilk bağlantıda app_settings'ten okunur) ve sürümü;
+# profil değişince havuzdaki bağlantılar bir sonraki checkout'ta günceller.
+_perf_profile: Optional[DbPerformanceProfile] = None
+_perf_profile_generation = 0
+_perf_lock = threading.Lock()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Havuzdan verilen SQLite bağlantısı.
+
+    Eski kod `con = get_connection() ... con.close()` kalıbını kullandığı için
+    close() bağlantıyı gerçekten kapatmaz, havuza iade eder:
+
+    - Aynı thread'de iç içe checkout'lar sayılır; en dıştaki iade bekleyen
+      (commit edilmemiş) değişiklikleri geri alır. Bu, eski "commit etmeden
+      close → değişiklik kaybolur" davranışıyla aynıdır.
+    - İç içe her checkout bir SAVEPOINT açar. İçerideki commit() yalnızca
+      kendi savepoint'ini RELEASE eder: dışta açık bir transaction varsa
+      değişiklikler ona katılır ve onunla birlikte commit / rollback olur
+      (içerideki commit dıştakinin yarım işini diske yazmaz). Dışta
+      transaction yoksa RELEASE eskisi gibi hemen commit eder. İçerideki
+      close() commit edilmemiş kendi değişikliklerini geri alır, dıştakine
+      dokunmaz.
+    - Gerçek kapatma için _close_for_real() kullanılır (close_all_connections).
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._checkouts = 0
+        # İç içe checkout'ların savepoint adları (derinlik 2'den başlar)
+        self._savepoints: list[str] = []
+        self._release: Optional[Callable[["PooledConnection"], None]] = None
+        self._is_closed = False
+        self._read_only = False
+        self._profile_generation = -1
+        self._last_optimize = time.monotonic()
+
+    def _checkout(self) -> None:
+        self._checkouts += 1
+        if self._checkouts > 1:
+            name = f"pooled_checkout_{self._checkouts}"
+            self.execute(f"SAVEPOINT {name}")
+            self._savepoints.append(name)
+
+    def commit(self) -> None:  # type: ignore[override]
+        if not self._savepoints:
+            super().commit()
+            return
+        # İç içe checkout: savepoint dıştaki transaction'a katılır; sonraki
+        # değişiklikler için yenisi açılır
+        name = self._savepoints[-1]
+        self.execute(f"RELEASE {name}")
+        self.execute(f"SAVEPOINT {name}")
+
+    def rollback(self) -> None:  # type: ignore[override]
+        if not self._savepoints:
+            super().rollback()
+            return
+        self._rollback_savepoint(self._savepoints[-1])
+
+    def _rollback_savepoint(self, name: str) -> None:
+        try:
+            self.execute(f"ROLLBACK TO {name}")
+        except sqlite3.OperationalError:
+            # SQLite hata sonrası transaction'ı zaten geri almış olabilir
+            pass
+
+    def close(self) -> None:  # type: ignore[override]
+        if self._is_closed:
+            return
+        self._checkouts = max(0, self._checkouts - 1)
+        if self._savepoints:
+            name = self._savepoints.pop()
+            self._rollback_savepoint(name)
+            try:
+                self.execute(f"RELEASE {name}")
+            except sqlite3.OperationalError:
+                pass
+        if self._checkouts:
+            return
+        if self.in_transaction:
+            self.rollback()
+        if self._release is not None:
+            self._release(self)
+
+    def _close_for_real(self) -> None:
+        if not self._is_closed:
+            self._is_closed = True
+            super().close()
+
+
+def _open_connection(read_only: bool = False) -> PooledConnection:
     """
-    Yeni bir SQLite bağlantısı döner.
+    Yeni bir fiziksel SQLite bağlantısı açar; PRAGMA'lar burada BİR KEZ uygulanır.
 
     - foreign_keys = ON
     - row_factory = sqlite3.Row (kolon isimleri ile erişim için)
     - busy_timeout = 5000 ms (5 sn boyunca kilidin açılmasını bekler)
     - journal_mode = WAL (daha az kilitlenme için)
+    - read_only=True ise query_only = ON (okuma havuzu)
     """
-    con = sqlite3.connect(DB_PATH, timeout=5.0)
+    con = sqlite3.connect(
+        DB_PATH,
+        timeout=5.0,
+        factory=PooledConnection,
+        # Okuma havuzu bağlantıları thread'ler arasında dolaşır
+        check_same_thread=not read_only,
+    )
     con.row_factory = sqlite3.Row
 
     # Kilit sorunlarını azalt
@@ -46,9 +183,256 @@ def get_connection() -> sqlite3.Connection:
     con.execute("PRAGMA busy_timeout = 5000;")
     con.execute("PRAGMA journal_mode = WAL;")
 
+    if read_only:
+        con.execute("PRAGMA query_only = ON;")
+    con._read_only = read_only
+
+    _apply_performance_profile(con)
+
+    with _registry_lock:
+        _all_connections.add(con)
+    return con
+
+
+# Her thread için tek, uzun ömürlü (yazma yapabilen) bağlantı
+_thread_local = threading.local()
+
+# Paylaşılan salt-okunur bağlantı havuzu
+_read_pool: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue(READ_POOL_SIZE)
+
+# close_all_connections için tüm açık bağlantılar
+_all_connections: "weakref.WeakSet[PooledConnection]" = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Bu thread'in uzun ömürlü SQLite bağlantısını döner (checkout).
+
+    Bağlantı thread başına bir kez açılır; sonraki çağrılar aynı bağlantıyı
+    verir. Dönen bağlantıda close() çağrısı onu kapatmaz, iade eder.
+    """
+    con: Optional[PooledConnection] = getattr(_thread_local, "con", None)
+    if con is None or con._is_closed:
+        con = _open_connection()
+        _thread_local.con = con
+
+    _apply_performance_profile(con)
+    _maybe_optimize(con)
+
+    con._checkout()
+    return con
+
+
+def _return_to_read_pool(con: PooledConnection) -> None:
+    try:
+        _read_pool.put_nowait(con)
+    except queue.Full:
+        con._close_for_real()
+
+
+def get_read_connection() -> sqlite3.Connection:
+    """
+    Paylaşılan havuzdan salt-okunur bir bağlantı döner (checkout).
+    close() ile havuza iade edilir.
+    """
+    con: Optional[PooledConnection] = None
+    while con is None:
+        try:
+            con = _read_pool.get_nowait()
+        except queue.Empty:
+            con = _open_connection(read_only=True)
+            con._release = _return_to_read_pool
+        if con._is_closed:
+            con = None
+
+    _apply_performance_profile(con)
+
+    con._checkouts = 1
     return con
 
 
+def close_all_connections() -> None:
+    """
+    Havuzdaki ve thread'lerdeki tüm bağlantıları gerçekten kapatır.
+    Uygulama kapanırken veya DB_PATH değiştiğinde kullanılır.
+    """
+    with _registry_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+
+    for con in connections:
+        try:
+            # Kapanışta istatistikleri tazele (SQLite önerisi)
+            if not con._read_only:
+                con.execute("PRAGMA optimize;")
+            con._close_for_real()
+        except sqlite3.Error:
+            pass
+
+    while True:
+        try:
+            _read_pool.get_nowait()
+        except queue.Empty:
+            break
+
+
+# ---------------------------------------------------------------------------
+# Performans profili (mmap, cache, synchronous, temp_store, optimize)
+# ---------------------------------------------------------------------------
+
+
+def _read_performance_profile(con: sqlite3.Connection) -> DbPerformanceProfile:
+    """app_settings'teki db_* kolonlarından profili okur; yoksa varsayılanlar."""
+    profile = DbPerformanceProfile()
+    try:
+        row = con.execute(
+            """
+            SELECT db_mmap_size, db_cache_size_kb, db_synchronous,
+                   db_temp_store, db_optimize_interval_s
+            FROM app_settings
+            WHERE id = 1
+            """
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Migration henüz uygulanmamış (kolonlar yok)
+        return profile
+
+    if row is None:
+        return profile
+
+    if row[0] is not None:
+        profile.mmap_size = int(row[0])
+    if row[1] is not None:
+        profile.cache_size_kb = int(row[1])
+    if row[2] and str(row[2]).upper() in _SYNCHRONOUS_VALUES:
+        profile.synchronous = str(row[2]).upper()
+    if row[3] and str(row[3]).upper() in _TEMP_STORE_VALUES:
+        profile.temp_store = str(row[3]).upper()
+    if row[4] is not None:
+        profile.optimize_interval_s = int(row[4])
+    return profile
+
+
+def _apply_performance_profile(con: PooledConnection) -> None:
+    """Profil bu bağlantıya henüz (veya değiştikten sonra) uygulanmadıysa uygular."""
+    global _perf_profile
+
+    with _perf_lock:
+        if _perf_profile is None:
+            _perf_profile = _read_performance_profile(con)
+        profile = _perf_profile
+        generation = _perf_profile_generation
+
+    if con._profile_generation == generation:
+        return
+
+    con.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)};")
+    # Negatif değer → KiB cinsinden
+    con.execute(f"PRAGMA cache_size = -{abs(int(profile.cache_size_kb))};")
+    con.execute(f"PRAGMA temp_store = {profile.temp_store};")
+
+    synchronous = profile.synchronous
+    if synchronous in ("NORMAL", "OFF"):
+        # NORMAL sadece WAL altında dayanıklı; WAL değilse FULL'da kal
+        journal_mode = con.execute("PRAGMA journal_mode;").fetchone()[0]
+        if str(journal_mode).lower() != "wal":
+            synchronous = "FULL"
+    if not con._read_only:
+        con.execute(f"PRAGMA synchronous = {synchronous};")
+
+    con._profile_generation = generation
+
+
+def _maybe_optimize(con: PooledConnection) -> None:
+    """Yazma bağlantısında periyodik PRAGMA optimize (ucuz; gerekmezse no-op)."""
+    if con._read_only or con.in_transaction:
+        return
+
+    interval = (_perf_profile or DbPerformanceProfile()).optimize_interval_s
+    if interval <= 0:
+        return
+
+    now = time.monotonic()
+    if now - con._last_optimize < interval:
+        return
+
+    con._last_optimize = now
+    try:
+        con.execute("PRAGMA optimize;")
+    except sqlite3.Error:
+        pass
+
+
+def get_performance_profile() -> DbPerformanceProfile:
+    """Geçerli performans profilini döner (kopya)."""
+    with read_connection() as con:
+        with _perf_lock:
+            profile = _perf_profile or _read_performance_profile(con)
+    return DbPerformanceProfile(**vars(profile))
+
+
+def set_performance_profile(
+    profile: DbPerformanceProfile,
+    con: sqlite3.Connection | None = None,
+) -> None:
+    """
+    Profili app_settings'e yazar. Havuzdaki bağlantılar yeni ayarları bir
+    sonraki checkout'ta uygular.
+    """
+    global _perf_profile, _perf_profile_generation
+
+    synchronous = profile.synchronous.upper()
+    temp_store = profile.temp_store.upper()
+    if synchronous not in _SYNCHRONOUS_VALUES:
+        raise ValueError(f"Geçersiz synchronous değeri: {profile.synchronous}")
+    if temp_store not in _TEMP_STORE_VALUES:
+        raise ValueError(f"Geçersiz temp_store değeri: {profile.temp_store}")
+
+    with db_connection(con) as c:
+        _ensure_base_tables(c)
+        c.execute(
+            """
+            INSERT INTO app_settings
+                (id, db_mmap_size, db_cache_size_kb, db_synchronous,
+                 db_temp_store, db_optimize_interval_s)
+            VALUES (1, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                db_mmap_size = excluded.db_mmap_size,
+                db_cache_size_kb = excluded.db_cache_size_kb,
+                db_synchronous = excluded.db_synchronous,
+                db_temp_store = excluded.db_temp_store,
+                db_optimize_interval_s = excluded.db_optimize_interval_s
+            """,
+            (
+                int(profile.mmap_size),
+                int(profile.cache_size_kb),
+                synchronous,
+                temp_store,
+                int(profile.optimize_interval_s),
+            ),
+        )
+
+    with _perf_lock:
+        _perf_profile = DbPerformanceProfile(
+            mmap_size=int(profile.mmap_size),
+            cache_size_kb=int(profile.cache_size_kb),
+            synchronous=synchronous,
+            temp_store=temp_store,
+            optimize_interval_s=int(profile.optimize_interval_s),
+        )
+        _perf_profile_generation += 1
+
+
+def reload_performance_profile() -> None:
+    """Profili bir sonraki bağlantı kullanımında app_settings'ten yeniden okur."""
+    global _perf_profile, _perf_profile_generation
+
+    with _perf_lock:
+        _perf_profile = None
+        _perf_profile_generation += 1
+
+
 @contextmanager
 def db_connection(
     con: Optional[sqlite3.Connection] = None,
@@ -58,7 +442,10 @@ def db_connection(
 
     - Eğer dışarıdan bir bağlantı verilirse (con != None), onu kullanır ve
       commit/close yapmaz.
-    - Eğer bağlantı verilmezse, kendisi açar; context çıkışında commit + close yapar.
+    - Eğer bağlantı verilmezse, thread'in havuzdaki bağlantısını alır;
+      context çıkışında commit yapar ve bağlantıyı havuza iade eder.
+      Başka bir checkout'un içinde açılırsa bu commit dıştaki transaction'a
+      katılır (bkz. PooledConnection).
 
     Örnek:
 
@@ -86,12 +473,33 @@ def db_connection(
             con.close()
 
 
+@contextmanager
+def read_connection(
+    con: Optional[sqlite3.Connection] = None,
+) -> Iterator[sqlite3.Connection]:
+    """
+    Salt-okunur sorgular için context manager.
+
+    - Dışarıdan bağlantı verilirse onu kullanır (dokunmaz).
+    - Verilmezse paylaşılan okuma havuzundan alır, çıkışta iade eder.
+    """
+    owns_con = con is None
+    if con is None:
+        con = get_read_connection()
+
+    try:
+        yield con
+    finally:
+        if owns_con:
+            con.close()
+
+
 # ---------------------------------------------------------------------------
 # Temel tablo kurulumları
 # ---------------------------------------------------------------------------
 
 
-def _ensure_base_tables(con: sqlite3.Connection) -> None:
+def _ensure_base_tables(con: sqlite3.Connection, commit: bool = True) -> None:
     """
     projects ve app_settings tabloları yoksa oluşturur.
     Bu fonksiyon, aktif proje ile ilgili fonksiyonlar tarafından kullanılır.
@@ -121,7 +529,818 @@ def _ensure_base_tables(con: sqlite3.Connection) -> None:
         """
     )
 
-    con.commit()
+    if commit:
+        con.commit()
+
+
+# ---------------------------------------------------------------------------
+# Şema migration'ları (PRAGMA user_version)
+# ---------------------------------------------------------------------------
+
+
+def _column_names(con: sqlite3.Connection, table: str) -> set[str]:
+    """Tablodaki kolon isimlerini döner (tablo yoksa boş küme)."""
+    return {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+
+
+class _MigrationDeferred(Exception):
+    """Migration'ın dayandığı tablolar henüz yok; user_version artırılmaz."""
+
+
+def _require_tables(con: sqlite3.Connection, *tables: str) -> None:
+    """
+    Tablolardan biri yoksa migration'ı erteler: run_migrations onu geri alır
+    ve sürümü artırmadan durur; tablolar oluşunca bir sonraki
+    ensure_schema / run_migrations çağrısı yeniden dener.
+    """
+    missing = [table for table in tables if not _column_names(con, table)]
+    if missing:
+        raise _MigrationDeferred(", ".join(missing))
+
+
+def _migration_001_wgs84_cache(con: sqlite3.Connection) -> None:
+    """
+    finds ve trench_vertices için WGS84 cache kolonlarını (lat_wgs84, lon_wgs84)
+    ve bunları geçersizleştiren trigger'ları kurar.
+
+    - Cache servisler tarafından (load_finds_for_project / load_trenches_for_project)
+      NULL olan satırlar için doldurulur.
+    - x_global / y_global değişince ilgili satırın cache'i silinir.
+    - Projenin coordinate_system_id'si (veya CRS'in EPSG kodu, açmanın projesi)
+      değişince o projeye ait tüm cache silinir.
+    """
+    _require_tables(con, "finds", "trench_vertices")
+    cur = con.cursor()
+
+    for table in ("finds", "trench_vertices"):
+        cols = _column_names(con, table)
+        if "lat_wgs84" not in cols:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN lat_wgs84 REAL")
+        if "lon_wgs84" not in cols:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN lon_wgs84 REAL")
+
+    # Nokta koordinatı değişti → sadece o satır
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_finds_wgs84_invalidate
+        AFTER UPDATE OF x_global, y_global ON finds
+        BEGIN
+            UPDATE finds SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE id = NEW.id;
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_trench_vertices_wgs84_invalidate
+        AFTER UPDATE OF x_global, y_global ON trench_vertices
+        BEGIN
+            UPDATE trench_vertices SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE id = NEW.id;
+        END
+        """
+    )
+
+    # Açma başka projeye taşındı → açmanın tüm noktaları
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_trenches_wgs84_invalidate
+        AFTER UPDATE OF project_id ON trenches
+        WHEN OLD.project_id IS NOT NEW.project_id
+        BEGIN
+            UPDATE finds SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE trench_id = NEW.id;
+            UPDATE trench_vertices SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE trench_id = NEW.id;
+        END
+        """
+    )
+
+    # Projenin koordinat sistemi değişti → projenin tüm noktaları
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_projects_wgs84_invalidate
+        AFTER UPDATE OF coordinate_system_id ON projects
+        WHEN OLD.coordinate_system_id IS NOT NEW.coordinate_system_id
+        BEGIN
+            UPDATE finds SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE trench_id IN (SELECT id FROM trenches WHERE project_id = NEW.id);
+            UPDATE trench_vertices SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE trench_id IN (SELECT id FROM trenches WHERE project_id = NEW.id);
+        END
+        """
+    )
+
+    # CRS kaydının EPSG kodu değişti → bu CRS'i kullanan tüm projeler
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_coordinate_systems_wgs84_invalidate
+        AFTER UPDATE OF epsg_code ON coordinate_systems
+        WHEN OLD.epsg_code IS NOT NEW.epsg_code
+        BEGIN
+            UPDATE finds SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE trench_id IN (
+                SELECT t.id FROM trenches t
+                JOIN projects p ON t.project_id = p.id
+                WHERE p.coordinate_system_id = NEW.id
+            );
+            UPDATE trench_vertices SET lat_wgs84 = NULL, lon_wgs84 = NULL
+            WHERE trench_id IN (
+                SELECT t.id FROM trenches t
+                JOIN projects p ON t.project_id = p.id
+                WHERE p.coordinate_system_id = NEW.id
+            );
+        END
+        """
+    )
+
+
+def _migration_002_hot_indexes(con: sqlite3.Connection) -> None:
+    """
+    Sık kullanılan foreign key'ler için index'ler ve core/services
+    sorgularına göre şekillendirilmiş covering index'ler.
+
+    - trenches(project_id, id, code, name):
+        load_trenches_for_project / tab sorguları: WHERE project_id = ?
+        ORDER BY id; code + name index'ten okunur.
+    - trench_vertices(trench_id, order_index, x_global, y_global, z_global,
+      lat_wgs84, lon_wgs84):
+        açma başına köşe okuması tablo satırına inmeden, sıralı yapılır.
+    - finds(trench_id), finds(level_id):
+        load_finds_for_project JOIN'i ve seviye sorguları.
+    - map_layers(project_id, is_active):
+        load_map_layers_for_project filtresi.
+    - levels(project_id)
+
+    Covering index'lerin ilk kolonu foreign key olduğu için ayrıca tek
+    kolonluk (trenches.project_id, trench_vertices.trench_id,
+    map_layers.project_id) index açılmaz.
+    """
+    statements = {
+        "trenches": [
+            "CREATE INDEX IF NOT EXISTS idx_trenches_project_cover "
+            "ON trenches(project_id, id, code, name)",
+        ],
+        "trench_vertices": [
+            "CREATE INDEX IF NOT EXISTS idx_trench_vertices_trench_cover "
+            "ON trench_vertices(trench_id, order_index, x_global, y_global, "
+            "z_global, lat_wgs84, lon_wgs84)",
+        ],
+        "finds": [
+            "CREATE INDEX IF NOT EXISTS idx_finds_trench_id ON finds(trench_id)",
+            "CREATE INDEX IF NOT EXISTS idx_finds_level_id ON finds(level_id)",
+        ],
+        "map_layers": [
+            "CREATE INDEX IF NOT EXISTS idx_map_layers_project_active "
+            "ON map_layers(project_id, is_active)",
+        ],
+        "levels": [
+            "CREATE INDEX IF NOT EXISTS idx_levels_project_id ON levels(project_id)",
+        ],
+    }
+
+    _require_tables(con, *statements)
+    for sqls in statements.values():
+        for sql in sqls:
+            con.execute(sql)
+
+    # Sorgu planlayıcının yeni index'leri doğru değerlendirmesi için
+    con.execute("ANALYZE")
+
+
+def _migration_003_perf_settings(con: sqlite3.Connection) -> None:
+    """
+    app_settings'e SQLite performans profili kolonlarını ekler
+    (bkz. DbPerformanceProfile). NULL → varsayılan değer kullanılır.
+    """
+    _ensure_base_tables(con, commit=False)
+
+    columns = {
+        "db_mmap_size": "INTEGER",
+        "db_cache_size_kb": "INTEGER",
+        "db_synchronous": "TEXT",
+        "db_temp_store": "TEXT",
+        "db_optimize_interval_s": "INTEGER",
+    }
+    existing = _column_names(con, "app_settings")
+    for name, col_type in columns.items():
+        if name not in existing:
+            con.execute(f"ALTER TABLE app_settings ADD COLUMN {name} {col_type}")
+
+
+def _migration_004_spatial_index(con: sqlite3.Connection) -> None:
+    """
+    Buluntular ve açma ayak izleri için R*Tree uzamsal index'leri.
+
+    - finds_rtree_xy / trenches_rtree_xy : proje CRS'inde (x_global, y_global)
+    - finds_rtree_ll / trenches_rtree_ll : WGS84 (lon_wgs84, lat_wgs84 cache)
+
+    Açmaların kutusu köşe noktalarından (trench_vertices) hesaplanır.
+    Tablolar trigger'larla finds / trench_vertices ile senkron tutulur;
+    WGS84 ağaçları, cache doldukça / silindikçe güncellenir.
+
+    NOT: R*Tree koordinatları 32-bit float saklar (kutu dışa doğru yuvarlanır);
+    kesin filtre sorgularda gerçek kolonlarla yapılır.
+    """
+    _require_tables(con, "finds", "trench_vertices")
+
+    for name, (a, b) in {
+        "finds_rtree_xy": ("x", "y"),
+        "finds_rtree_ll": ("lon", "lat"),
+        "trenches_rtree_xy": ("x", "y"),
+        "trenches_rtree_ll": ("lon", "lat"),
+    }.items():
+        con.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} "
+            f"USING rtree(id, min_{a}, max_{a}, min_{b}, max_{b})"
+        )
+
+    # --- Buluntular (nokta → sıfır alanlı kutu) ---
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_finds_rtree_insert
+        AFTER INSERT ON finds
+        BEGIN
+            INSERT OR REPLACE INTO finds_rtree_xy
+            SELECT NEW.id, NEW.x_global, NEW.x_global, NEW.y_global, NEW.y_global
+            WHERE NEW.x_global IS NOT NULL AND NEW.y_global IS NOT NULL;
+            INSERT OR REPLACE INTO finds_rtree_ll
+            SELECT NEW.id, NEW.lon_wgs84, NEW.lon_wgs84, NEW.lat_wgs84, NEW.lat_wgs84
+            WHERE NEW.lon_wgs84 IS NOT NULL AND NEW.lat_wgs84 IS NOT NULL;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_finds_rtree_update_xy
+        AFTER UPDATE OF x_global, y_global ON finds
+        BEGIN
+            DELETE FROM finds_rtree_xy WHERE id = OLD.id;
+            INSERT INTO finds_rtree_xy
+            SELECT NEW.id, NEW.x_global, NEW.x_global, NEW.y_global, NEW.y_global
+            WHERE NEW.x_global IS NOT NULL AND NEW.y_global IS NOT NULL;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_finds_rtree_update_ll
+        AFTER UPDATE OF lon_wgs84, lat_wgs84 ON finds
+        BEGIN
+            DELETE FROM finds_rtree_ll WHERE id = OLD.id;
+            INSERT INTO finds_rtree_ll
+            SELECT NEW.id, NEW.lon_wgs84, NEW.lon_wgs84, NEW.lat_wgs84, NEW.lat_wgs84
+            WHERE NEW.lon_wgs84 IS NOT NULL AND NEW.lat_wgs84 IS NOT NULL;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_finds_rtree_delete
+        AFTER DELETE ON finds
+        BEGIN
+            DELETE FROM finds_rtree_xy WHERE id = OLD.id;
+            DELETE FROM finds_rtree_ll WHERE id = OLD.id;
+        END
+        """
+    )
+
+    # --- Açmalar (köşe noktalarının kapsayan kutusu) ---
+    def refresh_trench_sql(ref: str) -> str:
+        return f"""
+            DELETE FROM trenches_rtree_xy WHERE id = {ref}.trench_id;
+            INSERT INTO trenches_rtree_xy
+            SELECT trench_id, MIN(x_global), MAX(x_global),
+                   MIN(y_global), MAX(y_global)
+            FROM trench_vertices
+            WHERE trench_id = {ref}.trench_id
+            GROUP BY trench_id;
+            DELETE FROM trenches_rtree_ll WHERE id = {ref}.trench_id;
+            INSERT INTO trenches_rtree_ll
+            SELECT trench_id, MIN(lon_wgs84), MAX(lon_wgs84),
+                   MIN(lat_wgs84), MAX(lat_wgs84)
+            FROM trench_vertices
+            WHERE trench_id = {ref}.trench_id
+            GROUP BY trench_id
+            HAVING COUNT(lat_wgs84) = COUNT(*) AND COUNT(lon_wgs84) = COUNT(*);
+        """
+
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trench_vertices_rtree_insert
+        AFTER INSERT ON trench_vertices
+        BEGIN {refresh_trench_sql("NEW")} END
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trench_vertices_rtree_update
+        AFTER UPDATE OF trench_id, x_global, y_global, lon_wgs84, lat_wgs84
+        ON trench_vertices
+        BEGIN {refresh_trench_sql("OLD")} {refresh_trench_sql("NEW")} END
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trench_vertices_rtree_delete
+        AFTER DELETE ON trench_vertices
+        BEGIN {refresh_trench_sql("OLD")} END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_trenches_rtree_delete
+        AFTER DELETE ON trenches
+        BEGIN
+            DELETE FROM trenches_rtree_xy WHERE id = OLD.id;
+            DELETE FROM trenches_rtree_ll WHERE id = OLD.id;
+        END
+        """
+    )
+
+    # --- Mevcut veriyi doldur ---
+    con.execute(
+        """
+        INSERT OR REPLACE INTO finds_rtree_xy
+        SELECT id, x_global, x_global, y_global, y_global
+        FROM finds
+        WHERE x_global IS NOT NULL AND y_global IS NOT NULL
+        """
+    )
+    con.execute(
+        """
+        INSERT OR REPLACE INTO finds_rtree_ll
+        SELECT id, lon_wgs84, lon_wgs84, lat_wgs84, lat_wgs84
+        FROM finds
+        WHERE lon_wgs84 IS NOT NULL AND lat_wgs84 IS NOT NULL
+        """
+    )
+    con.execute(
+        """
+        INSERT OR REPLACE INTO trenches_rtree_xy
+        SELECT trench_id, MIN(x_global), MAX(x_global), MIN(y_global), MAX(y_global)
+        FROM trench_vertices
+        GROUP BY trench_id
+        """
+    )
+    con.execute(
+        """
+        INSERT OR REPLACE INTO trenches_rtree_ll
+        SELECT trench_id, MIN(lon_wgs84), MAX(lon_wgs84),
+               MIN(lat_wgs84), MAX(lat_wgs84)
+        FROM trench_vertices
+        GROUP BY trench_id
+        HAVING COUNT(lat_wgs84) = COUNT(*) AND COUNT(lon_wgs84) = COUNT(*)
+        """
+    )
+
+
+def _migration_005_fulltext_search(con: sqlite3.Connection) -> None:
+    """
+    Harita filtresi ve Buluntular sekmesi için FTS5 tam metin index'leri.
+
+    - finds_fts    (rowid = finds.id)   : code, description, trench_code,
+                                          trench_name, level_name
+    - trenches_fts (rowid = trenches.id): code, name, project_name
+
+    Index'ler finds / trenches / levels / projects üzerindeki trigger'larla
+    güncel tutulur.
+    """
+    _require_tables(con, "finds", "trenches")
+
+    tokenize = "tokenize = 'unicode61 remove_diacritics 2'"
+    con.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS finds_fts USING fts5(
+            code, description, trench_code, trench_name, level_name,
+            {tokenize}
+        )
+        """
+    )
+    con.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS trenches_fts USING fts5(
+            code, name, project_name,
+            {tokenize}
+        )
+        """
+    )
+
+    # Tek bir buluntunun FTS satırını (yeniden) yazan SQL
+    def find_row_sql(where: str) -> str:
+        return f"""
+            INSERT INTO finds_fts
+                (rowid, code, description, trench_code, trench_name, level_name)
+            SELECT f.id, f.code, f.description, t.code, t.name, l.name
+            FROM finds f
+            JOIN trenches t ON f.trench_id = t.id
+            LEFT JOIN levels l ON f.level_id = l.id
+            WHERE {where};
+        """
+
+    def trench_row_sql(where: str) -> str:
+        return f"""
+            INSERT INTO trenches_fts (rowid, code, name, project_name)
+            SELECT t.id, t.code, t.name, p.name
+            FROM trenches t
+            LEFT JOIN projects p ON t.project_id = p.id
+            WHERE {where};
+        """
+
+    # --- finds ---
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_finds_fts_insert
+        AFTER INSERT ON finds
+        BEGIN {find_row_sql("f.id = NEW.id")} END
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_finds_fts_update
+        AFTER UPDATE OF code, description, trench_id, level_id ON finds
+        BEGIN
+            DELETE FROM finds_fts WHERE rowid = OLD.id;
+            {find_row_sql("f.id = NEW.id")}
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_finds_fts_delete
+        AFTER DELETE ON finds
+        BEGIN
+            DELETE FROM finds_fts WHERE rowid = OLD.id;
+        END
+        """
+    )
+
+    # --- trenches (kendi satırı + içindeki buluntuların açma alanları) ---
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trenches_fts_insert
+        AFTER INSERT ON trenches
+        BEGIN {trench_row_sql("t.id = NEW.id")} END
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trenches_fts_update
+        AFTER UPDATE OF code, name, project_id ON trenches
+        BEGIN
+            DELETE FROM trenches_fts WHERE rowid = OLD.id;
+            {trench_row_sql("t.id = NEW.id")}
+            DELETE FROM finds_fts
+            WHERE rowid IN (SELECT id FROM finds WHERE trench_id = NEW.id);
+            {find_row_sql("f.trench_id = NEW.id")}
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_trenches_fts_delete
+        AFTER DELETE ON trenches
+        BEGIN
+            DELETE FROM trenches_fts WHERE rowid = OLD.id;
+        END
+        """
+    )
+
+    # --- levels (seviye adı) ---
+    if _column_names(con, "levels"):
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_levels_fts_update
+            AFTER UPDATE OF name ON levels
+            BEGIN
+                DELETE FROM finds_fts
+                WHERE rowid IN (SELECT id FROM finds WHERE level_id = NEW.id);
+                {find_row_sql("f.level_id = NEW.id")}
+            END
+            """
+        )
+
+    # --- projects (proje adı açma index'inde) ---
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_projects_fts_update
+        AFTER UPDATE OF name ON projects
+        BEGIN
+            DELETE FROM trenches_fts
+            WHERE rowid IN (SELECT id FROM trenches WHERE project_id = NEW.id);
+            {trench_row_sql("t.project_id = NEW.id")}
+        END
+        """
+    )
+
+    # --- Mevcut veriyi doldur ---
+    con.execute("DELETE FROM finds_fts")
+    con.execute(find_row_sql("1 = 1"))
+    con.execute("DELETE FROM trenches_fts")
+    con.execute(trench_row_sql("1 = 1"))
+
+
+# Harita verisini etkileyen tablolar ve kolonlar (data_revision trigger'ları).
+# WGS84 cache kolonları bilerek dışarıda: cache doldurmak veriyi değiştirmez.
+_REVISION_TRACKED_COLUMNS: dict[str, tuple[str, ...]] = {
+    "projects": ("name", "coordinate_system_id"),
+    "coordinate_systems": ("epsg_code",),
+    "trenches": ("project_id", "code", "name"),
+    "trench_vertices": (
+        "trench_id",
+        "order_index",
+        "x_global",
+        "y_global",
+        "z_global",
+    ),
+    "finds": (
+        "trench_id",
+        "code",
+        "description",
+        "level_id",
+        "x_global",
+        "y_global",
+        "z_global",
+        "found_at",
+    ),
+    "levels": ("name",),
+    "map_layers": (
+        "project_id",
+        "name",
+        "type",
+        "file_path",
+        "url_template",
+        "attribution",
+        "is_active",
+    ),
+}
+
+
+def _migration_006_data_revision(con: sqlite3.Connection) -> None:
+    """
+    Tek satırlık data_revision sayacı ve onu artıran trigger'lar.
+
+    Harita verisini etkileyen her INSERT / UPDATE / DELETE sayacı bir artırır;
+    core.map_data bu değeri MapData cache'inin anahtarı olarak kullanır.
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_revision (
+            id    INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    con.execute("INSERT OR IGNORE INTO data_revision (id, value) VALUES (1, 0)")
+
+    _require_tables(con, *_REVISION_TRACKED_COLUMNS)
+    bump = "UPDATE data_revision SET value = value + 1 WHERE id = 1;"
+
+    for table, columns in _REVISION_TRACKED_COLUMNS.items():
+        existing = _column_names(con, table)
+        tracked = ", ".join(c for c in columns if c in existing)
+
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_insert
+            AFTER INSERT ON {table}
+            BEGIN {bump} END
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_delete
+            AFTER DELETE ON {table}
+            BEGIN {bump} END
+            """
+        )
+        if tracked:
+            con.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_update
+                AFTER UPDATE OF {tracked} ON {table}
+                BEGIN {bump} END
+                """
+            )
+
+
+def _migration_007_map_settings(con: sqlite3.Connection) -> None:
+    """
+    app_settings'e harita görüntüleme ayarlarını ekler.
+    NULL → varsayılan (bkz. MAP_CLUSTER_THRESHOLD_DEFAULT).
+    """
+    _ensure_base_tables(con, commit=False)
+
+    if "map_cluster_threshold" not in _column_names(con, "app_settings"):
+        con.execute("ALTER TABLE app_settings ADD COLUMN map_cluster_threshold INTEGER")
+
+
+def _migration_008_tile_download_settings(con: sqlite3.Connection) -> None:
+    """
+    app_settings'e offline tile indirme ayarlarını ekler
+    (bkz. TileDownloadSettings). NULL → varsayılan değer kullanılır.
+    """
+    _ensure_base_tables(con, commit=False)
+
+    columns = {
+        "tiles_max_workers": "INTEGER",
+        "tiles_rate_limit": "REAL",
+        "tiles_timeout_s": "REAL",
+    }
+    existing = _column_names(con, "app_settings")
+    for name, col_type in columns.items():
+        if name not in existing:
+            con.execute(f"ALTER TABLE app_settings ADD COLUMN {name} {col_type}")
+
+
+def _migration_009_tile_download_jobs(con: sqlite3.Connection) -> None:
+    """
+    Offline tile indirme işleri (bkz. core/tile_jobs.py):
+
+    - tile_download_jobs       : iş parametreleri, durum, toplam ilerleme
+    - tile_download_job_zooms  : zoom başına tile aralığı ve ilerleme
+    - tile_download_failures   : inemeyen tile'lar (deneme sayısı, son hata)
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tile_download_jobs (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id    INTEGER NOT NULL
+                          REFERENCES projects(id) ON DELETE CASCADE,
+            layer_name    TEXT NOT NULL,
+            tile_template TEXT NOT NULL,
+            storage       TEXT NOT NULL,
+            store_path    TEXT NOT NULL,
+            zoom_min      INTEGER NOT NULL,
+            zoom_max      INTEGER NOT NULL,
+            bounds        TEXT,
+            status        TEXT NOT NULL DEFAULT 'pending',
+            total_tiles   INTEGER NOT NULL DEFAULT 0,
+            done_tiles    INTEGER NOT NULL DEFAULT 0,
+            failed_tiles  INTEGER NOT NULL DEFAULT 0,
+            created_at    TEXT NOT NULL DEFAULT (datetime('now')),
+            updated_at    TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+    con.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tile_download_jobs_project_status
+            ON tile_download_jobs (project_id, status)
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tile_download_job_zooms (
+            job_id  INTEGER NOT NULL
+                    REFERENCES tile_download_jobs(id) ON DELETE CASCADE,
+            zoom    INTEGER NOT NULL,
+            x_min   INTEGER NOT NULL,
+            x_max   INTEGER NOT NULL,
+            y_min   INTEGER NOT NULL,
+            y_max   INTEGER NOT NULL,
+            total   INTEGER NOT NULL,
+            done    INTEGER NOT NULL DEFAULT 0,
+            failed  INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, zoom)
+        )
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tile_download_failures (
+            job_id     INTEGER NOT NULL
+                       REFERENCES tile_download_jobs(id) ON DELETE CASCADE,
+            z          INTEGER NOT NULL,
+            x          INTEGER NOT NULL,
+            y          INTEGER NOT NULL,
+            attempts   INTEGER NOT NULL DEFAULT 1,
+            last_error TEXT,
+            PRIMARY KEY (job_id, z, x, y)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _migration_010_tile_download_job_runs(con: sqlite3.Connection) -> None:
+    """
+    Kapsama planlı indirme işlerinin tile kümesi (bkz. core/tile_coverage.py).
+
+    Zoom başına dikdörtgen yerine satır aralıkları (y, x_min, x_max) tutulur;
+    satırı olmayan zoom'lar tile_download_job_zooms'taki dikdörtgenle çalışır.
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tile_download_job_runs (
+            job_id  INTEGER NOT NULL
+                    REFERENCES tile_download_jobs(id) ON DELETE CASCADE,
+            zoom    INTEGER NOT NULL,
+            y       INTEGER NOT NULL,
+            x_min   INTEGER NOT NULL,
+            x_max   INTEGER NOT NULL,
+            PRIMARY KEY (job_id, zoom, y, x_min)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _migration_011_tile_disk_budget(con: sqlite3.Connection) -> None:
+    """
+    app_settings'e offline tile deposunun disk bütçesini ekler
+    (TileDownloadSettings.disk_budget_mb). NULL → varsayılan değer.
+    """
+    _ensure_base_tables(con, commit=False)
+
+    if "tiles_disk_budget_mb" not in _column_names(con, "app_settings"):
+        con.execute("ALTER TABLE app_settings ADD COLUMN tiles_disk_budget_mb REAL")
+
+
+# Sıra önemli: index i → user_version i + 1
+MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _migration_001_wgs84_cache,
+    _migration_002_hot_indexes,
+    _migration_003_perf_settings,
+    _migration_004_spatial_index,
+    _migration_005_fulltext_search,
+    _migration_006_data_revision,
+    _migration_007_map_settings,
+    _migration_008_tile_download_settings,
+    _migration_009_tile_download_jobs,
+    _migration_010_tile_download_job_runs,
+    _migration_011_tile_disk_budget,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(con: sqlite3.Connection) -> int:
+    """PRAGMA user_version değerini döner."""
+    return int(con.execute("PRAGMA user_version").fetchone()[0])
+
+
+def run_migrations(con: sqlite3.Connection | None = None) -> int:
+    """
+    Veritabanını SCHEMA_VERSION'a kadar yükseltir.
+
+    - Her migration kendi transaction'ı içinde çalışır;
+      user_version aynı transaction'da güncellenir.
+    - Dayandığı tablolar henüz yoksa (bkz. _require_tables) migration geri
+      alınır ve sürüm artırılmadan durulur; sonraki çağrı yeniden dener.
+    - Hata olursa o migration geri alınır ve hata yukarı fırlatılır.
+
+    Dönüş:
+        Uygulanan migration sayısı.
+    """
+    applied = 0
+
+    with db_connection(con) as c:
+        # Bekleyen bir transaction varsa önce kapat
+        c.commit()
+        current = get_schema_version(c)
+
+        for version in range(current + 1, SCHEMA_VERSION + 1):
+            migration = MIGRATIONS[version - 1]
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                migration(c)
+                c.execute(f"PRAGMA user_version = {version}")
+                c.commit()
+            except _MigrationDeferred:
+                c.rollback()
+                break
+            except Exception:
+                c.rollback()
+                raise
+            applied += 1
+
+    if applied:
+        # Yeni kolonlar (ör. performans profili) okunabilsin
+        reload_performance_profile()
+
+    return applied
+
+
+def ensure_schema(con: sqlite3.Connection | None = None) -> None:
+    """
+    Uygulamanın ihtiyaç duyduğu tüm şema eklerini garantiye alır.
+    Uygulama açılışında bir kez çağrılır (app_factory.create_app).
+    """
+    with db_connection(con) as c:
+        _ensure_base_tables(c)
+        run_migrations(c)
+
+
+def get_data_revision(con: sqlite3.Connection | None = None) -> int:
+    """
+    Harita verisinin sürüm sayacını döner (data_revision tablosu).
+    Tablo yoksa (migration uygulanmamış) 0 döner.
+    """
+    with read_connection(con) as c:
+        try:
+            row = c.execute("SELECT value FROM data_revision WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+    return int(row[0]) if row else 0
 
 
 # ---------------------------------------------------------------------------
@@ -200,6 +1419,147 @@ def set_active_project_id(
     ACTIVE_PROJECT_ID = project_id
 
 
+# ---------------------------------------------------------------------------
+# Harita görüntüleme ayarları
+# ---------------------------------------------------------------------------
+
+# Bu sayının üzerinde buluntu varsa harita kümeleme (cluster) moduna geçer
+MAP_CLUSTER_THRESHOLD_DEFAULT = 5000
+
+
+def get_map_cluster_threshold(con: sqlite3.Connection | None = None) -> int:
+    """Kümeleme eşiğini app_settings'ten okur; tanımlı değilse varsayılan."""
+    with read_connection(con) as c:
+        try:
+            row = c.execute(
+                "SELECT map_cluster_threshold FROM app_settings WHERE id = 1"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # Migration henüz uygulanmamış
+            return MAP_CLUSTER_THRESHOLD_DEFAULT
+    if row is None or row[0] is None:
+        return MAP_CLUSTER_THRESHOLD_DEFAULT
+    return int(row[0])
+
+
+def set_map_cluster_threshold(
+    threshold: int | None,
+    con: sqlite3.Connection | None = None,
+) -> None:
+    """
+    Kümeleme eşiğini yazar. None → varsayılana dön; 0 → her zaman kümele.
+    """
+    if threshold is not None and int(threshold) < 0:
+        raise ValueError("Kümeleme eşiği negatif olamaz.")
+
+    with db_connection(con) as c:
+        _ensure_base_tables(c)
+        c.execute(
+            """
+            INSERT INTO app_settings (id, map_cluster_threshold)
+            VALUES (1, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                map_cluster_threshold = excluded.map_cluster_threshold
+            """,
+            (None if threshold is None else int(threshold),),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Offline tile indirme ayarları
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class TileDownloadSettings:
+    """
+    Offline tile indirme motorunun ayarları (app_settings.tiles_* kolonları).
+
+    max_workers    : Aynı anda açık istek sayısı (her worker kendi keep-alive
+                     bağlantısını tutar)
+    rate_limit     : Saniyedeki en fazla istek (tüm worker'lar toplamı;
+                     0 → sınırsız)
+    timeout_s      : Tek istek için zaman aşımı (saniye)
+    disk_budget_mb : Offline tile deposunun (data/tiles) toplam üst sınırı;
+                     aşacak işler başlatılmaz, çalışırken aşan iş durdurulur
+                     (0 → sınırsız; diskte ayrıca asgari boş alan bırakılır)
+    """
+
+    max_workers: int = 8
+    rate_limit: float = 20.0
+    timeout_s: float = 15.0
+    disk_budget_mb: float = 4096.0
+
+
+def get_tile_download_settings(
+    con: sqlite3.Connection | None = None,
+) -> TileDownloadSettings:
+    """İndirme ayarlarını app_settings'ten okur; tanımlı olmayanlar varsayılan."""
+    settings = TileDownloadSettings()
+    with read_connection(con) as c:
+        try:
+            row = c.execute(
+                """
+                SELECT tiles_max_workers, tiles_rate_limit, tiles_timeout_s,
+                       tiles_disk_budget_mb
+                FROM app_settings
+                WHERE id = 1
+                """
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # Migration henüz uygulanmamış
+            return settings
+
+    if row is None:
+        return settings
+    if row[0] is not None:
+        settings.max_workers = int(row[0])
+    if row[1] is not None:
+        settings.rate_limit = float(row[1])
+    if row[2] is not None:
+        settings.timeout_s = float(row[2])
+    if row[3] is not None:
+        settings.disk_budget_mb = float(row[3])
+    return settings
+
+
+def set_tile_download_settings(
+    settings: TileDownloadSettings,
+    con: sqlite3.Connection | None = None,
+) -> None:
+    """İndirme ayarlarını app_settings'e yazar."""
+    if int(settings.max_workers) < 1:
+        raise ValueError("max_workers en az 1 olmalı.")
+    if float(settings.rate_limit) < 0:
+        raise ValueError("rate_limit negatif olamaz.")
+    if float(settings.timeout_s) <= 0:
+        raise ValueError("timeout_s pozitif olmalı.")
+    if float(settings.disk_budget_mb) < 0:
+        raise ValueError("disk_budget_mb negatif olamaz.")
+
+    with db_connection(con) as c:
+        _ensure_base_tables(c)
+        c.execute(
+            """
+            INSERT INTO app_settings
+                (id, tiles_max_workers, tiles_rate_limit, tiles_timeout_s,
+                 tiles_disk_budget_mb)
+            VALUES (1, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                tiles_max_workers = excluded.tiles_max_workers,
+                tiles_rate_limit = excluded.tiles_rate_limit,
+                tiles_timeout_s = excluded.tiles_timeout_s,
+                tiles_disk_budget_mb = excluded.tiles_disk_budget_mb
+            """,
+            (
+                int(settings.max_workers),
+                float(settings.rate_limit),
+                float(settings.timeout_s),
+                float(settings.disk_budget_mb),
+            ),
+        )
+
+
 # ---------------------------------------------------------------------------
 # Genel SQL yardımcıları (SELECT / INSERT / UPDATE)
 # ---------------------------------------------------------------------------
@@ -219,7 +1579,7 @@ def fetch_all(
     if params is None:
         params = ()
 
-    with db_connection(con) as c:
+    with read_connection(con) as c:
         cur = c.execute(sql, params)
         return cur.fetchall()
 
@@ -235,7 +1595,7 @@ def fetch_one(
     if params is None:
         params = ()
 
-    with db_connection(con) as c:
+    with read_connection(con) as c:
         cur = c.execute(sql, params)
         return cur.fetchone()
 
@@ -4,10 +4,14 @@
 GeoTIFF içe aktarma modülü (core).
 
 Bu modül:
-- Verilen GeoTIFF dosyasını proje için rasters/ altına kopyalar
-- PNG + worldfile (.pgw) üretir
-- PNG + worldfile'dan WGS84 bbox hesaplar (ileride lazım olabilir)
-- map_layers tablosuna "image" katmanı olarak kaydeder
+- Verilen GeoTIFF'ten XYZ tile piramidi üretir (web mercator; en büyük zoom
+  kaynağın çözünürlüğünde, alt zoom'lar overview). Üretim çok süreçli
+  motordadır: core/geotiff_tiler.py
+- Piramidi proje için rasters/ altına tek bir .mbtiles dosyası olarak yazar
+- map_layers tablosuna "mbtiles" katmanı olarak kaydeder
+
+Böylece harita tüm görüntüyü değil, yalnızca görünen tile'ları o zoom'a uygun
+çözünürlükte yükler.
 
 NOT: Burada HİÇBİR Qt / UI kodu yok. Dosya seçtirme gibi işler app tarafında yapılmalı.
 """
@@ -15,48 +19,75 @@ NOT: Burada HİÇBİR Qt / UI kodu yok. Dosya seçtirme gibi işler app tarafın
 from __future__ import annotations
 
 import os
+import time
 from pathlib import Path
 from typing import Optional, Callable
 
-from PIL import Image
-from osgeo import gdal
-from pyproj import Transformer
-
-from core.utils import RASTERS_DIR, BASE_DIR, ensure_dir
 from core.db import get_connection
+from core.geotiff_tiler import DEFAULT_MEMORY_LIMIT_MB, build_tile_pyramid
+from core.mbtiles import MBTiles
+from core.utils import RASTERS_DIR, BASE_DIR, ensure_dir
 
 ProgressCallback = Callable[[int, int, str], None]
 # step, total, message
 
+GEOTIFF_ATTRIBUTION = "GeoTIFF kaynaklı raster"
 
 # -------------------------------------------------------------
-# Yardımcı: GeoTIFF → PNG + worldfile üret
+# Yardımcı: sürümlü piramit dosyaları
 # -------------------------------------------------------------
-def _export_png_and_worldfile(tiff_path: Path, out_png: Path, out_pgw: Path) -> None:
-    """
-    GDAL ile GeoTIFF içinden PNG üretir.
-    Worldfile (.pgw) dosyasını da oluşturur.
-    """
-    ds = gdal.Open(str(tiff_path))
-    if ds is None:
-        raise RuntimeError(f"GeoTIFF açılamadı: {tiff_path}")
+def _rel_to_base(path: Path) -> str:
+    """map_layers.file_path için BASE_DIR'e göre relatif yol."""
+    return os.path.relpath(path, BASE_DIR).replace("\\", "/")
 
-    # PNG export
-    driver = gdal.GetDriverByName("PNG")
-    driver.CreateCopy(str(out_png), ds, strict=0)
 
-    # GeoTIFF’den worldfile bilgisi al
-    gt = ds.GetGeoTransform()
-    # gt: (originX, pixelWidth, rot1, originY, rot2, pixelHeight)
-    # worldfile: A, D, B, E, C, F (basit senaryoda rot1=rot2=0)
+def _is_geotiff_version(folder: Path, layer_name: str, file_path: str) -> bool:
+    """
+    Dosya (mutlak ya da BASE_DIR'e göre relatif yol), katmanın bu klasördeki
+    bir piramit sürümü mü: <ad>.<sürüm>.mbtiles ya da eski <ad>.mbtiles.
+    """
+    if not file_path:
+        return False
+    path = BASE_DIR / file_path  # mutlak yol verilirse BASE_DIR yok sayılır
+    if path.parent.resolve() != folder.resolve():
+        return False
+    name = path.name
+    if name == f"{layer_name}.mbtiles":
+        return True
+    prefix, suffix = f"{layer_name}.", ".mbtiles"
+    return (
+        name.startswith(prefix)
+        and name.endswith(suffix)
+        and name[len(prefix) : -len(suffix)].isdigit()
+    )
+
+
+def _remove_stale_versions(folder: Path, layer_name: str) -> None:
+    """
+    Hiçbir katmanın kullanmadığı eski piramit sürümlerini siler. Harita
+    henüz açık tutuyorsa (Windows) silinemeyen dosya bir sonraki içe
+    aktarmada yeniden denenir.
+    """
+    con = get_connection()
+    try:
+        in_use = {
+            (BASE_DIR / r[0]).resolve()
+            for r in con.execute(
+                "SELECT file_path FROM map_layers WHERE file_path IS NOT NULL"
+            )
+        }
+    finally:
+        con.close()
 
-    with out_pgw.open("w", encoding="utf-8") as f:
-        f.write(f"{gt[1]}\n")  # pixel width (A)
-        f.write(f"{gt[2]}\n")  # rot1 (D)
-        f.write(f"{gt[4]}\n")  # rot2 (B)
-        f.write(f"{gt[5]}\n")  # pixel height (E)
-        f.write(f"{gt[0] + gt[1] / 2}\n")  # C (üst sol piksel merkez X)
-        f.write(f"{gt[3] + gt[5] / 2}\n")  # F (üst sol piksel merkez Y)
+    for entry in folder.iterdir():
+        if not _is_geotiff_version(folder, layer_name, str(entry)):
+            continue
+        if entry.resolve() in in_use:
+            continue
+        try:
+            entry.unlink()
+        except OSError:
+            pass
 
 
 # -------------------------------------------------------------
@@ -66,34 +97,38 @@ def import_geotiff_for_project(
     project_id: int,
     tiff_path: str | Path,
     progress_cb: Optional[ProgressCallback] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB,
 ) -> str:
     """
     Verilen proje için, verilen GeoTIFF dosyasını içe aktarır.
 
-    - GeoTIFF → PNG + worldfile
-    - Proje CRS'ine göre bbox hesabı
-    - WGS84 bbox (şimdilik sadece hesaplanıyor, istenirse map_layers'a eklenebilir)
-    - map_layers tablosuna 'image' katmanı eklenir
+    - GeoTIFF → XYZ tile piramidi (rasters/<proje kodu>/<ad>.mbtiles);
+      CRS tanımı yoksa projenin EPSG'si varsayılır
+    - Her içe aktarma yeni bir sürüm dosyasına (<ad>.<zaman>.mbtiles) yazılır;
+      aynı GeoTIFF'in katmanı varsa yeni dosyaya taşınıp etkinleştirilir,
+      yoksa map_layers tablosuna 'mbtiles' katmanı eklenir
 
     Parametreler:
         project_id: Projenin ID'si
         tiff_path : GeoTIFF dosyasının tam yolu
         progress_cb: İsteğe bağlı callback (step, total, message)
+        should_cancel: True dönerse üretim durdurulur (TilingCancelled);
+                       yarım piramit atılır, katman eklenmez
+        memory_limit_mb: Tile üretiminin (tüm süreçler) bellek tavanı
 
     Dönüş:
-        layer_name (png / layer ismi)
+        layer_name (dosya adı / layer ismi)
     """
     tiff_path = Path(tiff_path)
     if not tiff_path.exists():
         raise FileNotFoundError(f"GeoTIFF bulunamadı: {tiff_path}")
 
-    total_steps = 4
-
-    def emit(step: int, msg: str) -> None:
+    def emit(step: int, total: int, msg: str) -> None:
         if progress_cb:
-            progress_cb(step, total_steps, msg)
+            progress_cb(step, total, msg)
 
-    emit(0, "GeoTIFF işleniyor...")
+    emit(0, 1, "GeoTIFF işleniyor...")
 
     # --- Proje bilgilerini veritabanından çek ---
     con = get_connection()
@@ -109,94 +144,101 @@ def import_geotiff_for_project(
             (project_id,),
         )
         row = cur.fetchone()
-        if not row:
-            raise RuntimeError("Proje veya EPSG kodu bulunamadı.")
-
-        project_code, epsg_code = row
-        if not project_code:
-            raise RuntimeError("Proje kodu tanımlı değil.")
-        if not epsg_code:
-            raise RuntimeError("EPSG kodu tanımlı değil.")
-
-        # --- Proje klasörü ---
-        project_raster_dir = RASTERS_DIR / project_code
-        ensure_dir(project_raster_dir)
-
-        # Çıktı dosya adları
-        layer_name = tiff_path.stem
-        out_png = project_raster_dir / f"{layer_name}.png"
-        out_pgw = project_raster_dir / f"{layer_name}.pgw"
-
-        # 1) PNG + worldfile üret
-        emit(1, "PNG ve worldfile (.pgw) üretiliyor...")
-        _export_png_and_worldfile(tiff_path, out_png, out_pgw)
-
-        # PNG boyutları
-        img = Image.open(out_png)
-        width, height = img.size
-        img.close()
-
-        # Worldfile oku
-        with out_pgw.open("r", encoding="utf-8") as f:
-            vals = [float(v.strip()) for v in f.readlines()]
-        if len(vals) < 6:
-            raise RuntimeError("Worldfile bozuk.")
-
-        A, rot1, rot2, E, C, F = vals[:6]
-
-        # Proje CRS'inde köşe koordinatlarını hesapla
-        x_min = C - A / 2.0
-        y_max = F - E / 2.0
-        x_max = x_min + A * width
-        y_min = y_max + E * height
-
-        emit(2, "Koordinatlar hesaplanıyor...")
-
-        # Proje CRS → WGS84 dönüşümü için transformer
-        transformer = Transformer.from_crs(
-            f"EPSG:{epsg_code}", "EPSG:4326", always_xy=True
-        )
-
-        corners_xy = [
-            (x_min, y_min),
-            (x_min, y_max),
-            (x_max, y_min),
-            (x_max, y_max),
-        ]
-        lons: list[float] = []
-        lats: list[float] = []
-        for x, y in corners_xy:
-            lon, lat = transformer.transform(x, y)
-            lons.append(lon)
-            lats.append(lat)
-
-        min_lon, max_lon = min(lons), max(lons)
-        min_lat, max_lat = min(lats), max(lats)
-        # Şimdilik bu bbox sadece hesaplanıyor, istenirse map_layers'a eklenebilir
-
-        emit(3, "Veritabanına ortofoto katmanı ekleniyor...")
-
-        # Veritabanına yaz (BASE_DIR'e göre relatif path)
-        rel_path = os.path.relpath(out_png, BASE_DIR).replace("\\", "/")
+    finally:
+        con.close()
+    if not row:
+        raise RuntimeError("Proje veya EPSG kodu bulunamadı.")
+
+    project_code, epsg_code = row
+    if not project_code:
+        raise RuntimeError("Proje kodu tanımlı değil.")
+    if not epsg_code:
+        raise RuntimeError("EPSG kodu tanımlı değil.")
+
+    # --- Proje klasörü ---
+    project_raster_dir = RASTERS_DIR / project_code
+    ensure_dir(project_raster_dir)
+
+    layer_name = tiff_path.stem
+    # Her içe aktarma yeni (sürümlü) bir dosyaya yazılır: haritanın açık
+    # tuttuğu eski dosyanın üzerine yazılmaz (Windows'ta kullanımdaki dosya
+    # değiştirilemez). Eski sürümler katman yeni dosyaya geçince silinir.
+    version = time.strftime("%Y%m%d%H%M%S")
+    out_mbtiles = project_raster_dir / f"{layer_name}.{version}.mbtiles"
+    # Önce geçici dosyaya yazılır; yarıda kalan üretim geride dosya bırakmaz
+    tmp_mbtiles = out_mbtiles.with_name(out_mbtiles.name + ".part")
+    tmp_mbtiles.unlink(missing_ok=True)
+
+    emit(0, 1, "GeoTIFF tile piramidi hazırlanıyor...")
+    try:
+        with MBTiles(tmp_mbtiles) as mbt:
+            meta = build_tile_pyramid(
+                tiff_path,
+                epsg_code,
+                mbt,
+                progress_cb=progress_cb,
+                should_cancel=should_cancel,
+                memory_limit_mb=memory_limit_mb,
+            )
+            meta.update(
+                {
+                    "name": layer_name,
+                    "type": "overlay",
+                    "version": "1.1",
+                    "description": tiff_path.name,
+                    "attribution": GEOTIFF_ATTRIBUTION,
+                }
+            )
+            mbt.set_metadata(meta)
+    except BaseException:
+        tmp_mbtiles.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_mbtiles, out_mbtiles)
+
+    emit(1, 1, "Veritabanına ortofoto katmanı ekleniyor...")
+
+    # Veritabanına yaz (BASE_DIR'e göre relatif path)
+    rel_path = _rel_to_base(out_mbtiles)
 
+    con = get_connection()
+    try:
+        cur = con.cursor()
+        # Aynı GeoTIFF'in önceki içe aktarımı: katman yeni dosyaya taşınır
         cur.execute(
             """
-            INSERT INTO map_layers
-                (project_id, name, type, file_path, url_template, attribution, is_active)
-            VALUES
-                (?, ?, 'image', ?, NULL, ?, 1)
+            SELECT id, file_path FROM map_layers
+            WHERE project_id = ? AND name = ? AND type = 'mbtiles'
             """,
+            (project_id, layer_name),
+        )
+        existing = next(
             (
-                project_id,
-                layer_name,
-                rel_path,
-                "GeoTIFF kaynaklı raster",
+                r
+                for r in cur.fetchall()
+                if _is_geotiff_version(project_raster_dir, layer_name, r[1])
             ),
+            None,
         )
-
+        if existing:
+            cur.execute(
+                "UPDATE map_layers SET file_path = ?, is_active = 1 WHERE id = ?",
+                (rel_path, existing[0]),
+            )
+        else:
+            cur.execute(
+                """
+                INSERT INTO map_layers
+                    (project_id, name, type, file_path, url_template, attribution, is_active)
+                VALUES
+                    (?, ?, 'mbtiles', ?, NULL, ?, 1)
+                """,
+                (project_id, layer_name, rel_path, GEOTIFF_ATTRIBUTION),
+            )
         con.commit()
     finally:
         con.close()
 
-    emit(total_steps, "GeoTIFF ortofoto başarıyla eklendi.")
+    _remove_stale_versions(project_raster_dir, layer_name)
+
+    emit(1, 1, "GeoTIFF ortofoto başarıyla eklendi.")
     return layer_name
@@ -0,0 +1,568 @@
+# core/geotiff_tiler.py
+
+"""
+GeoTIFF → XYZ tile piramidi üretim motoru (çok süreçli).
+
+- GeoTIFF, EPSG:3857'ye yansıtan sanal bir VRT olarak açılır; görüntü hiçbir
+  zaman belleğe alınmaz, her tile yalnızca kapladığı pencereyi okur.
+- Çıktı ızgarası parçalara (chunk) bölünür: her parça, en büyük zoom'un
+  _CHUNK_DEPTH üstündeki bir tile ve onun alt ağacıdır. Parçalar
+  ProcessPoolExecutor'daki süreçlerde işlenir; her süreç kendi GDAL
+  bağlantısını açar, alt ağacın taban tile'larını okur ve overview'larını
+  kendi içinde küçülterek üretir.
+- Süreç sayısı ve süreç başına GDAL önbelleği bellek tavanına göre seçilir;
+  bekleyen parça sayısı sınırlı olduğundan ana süreçteki kuyruk da büyümez.
+- MBTiles'a yalnızca ana süreç yazar (tek yazarlı SQLite). Parçaların
+  altındaki zoom'lar en sonda ana süreçte MBTiles'tan üretilir.
+- İlerleme tek ProgressCallback(step, total, message) olarak toplanır;
+  should_cancel() True dönerse süreçler ortak bir olayla tile arasında
+  durdurulur ve TilingCancelled yükseltilir.
+
+NOT: Burada HİÇBİR Qt / UI kodu yok.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from PIL import Image
+from osgeo import gdal
+
+from core.mbtiles import MBTiles, tile_format
+
+ProgressCallback = Callable[[int, int, str], None]
+# step, total, message
+
+TILE_SIZE = 256
+
+# Web mercator dünya yarı genişliği (m) ve z0'daki piksel boyutu
+_MERC_HALF = 20037508.342789244
+_MERC_RES0 = 2 * _MERC_HALF / TILE_SIZE
+
+# Kaynak çözünürlüğü ne kadar ince olursa olsun aşılmayan zoom
+MAX_PYRAMID_ZOOM = 22
+
+# Tamamen opak tile'lar JPEG, kenar (saydam pikselli) tile'lar PNG yazılır
+_JPEG_QUALITY = 85
+
+# Parça = en büyük zoom'un bu kadar üstündeki tile'ın alt ağacı
+# (3 → 64 taban tile, toplam 85 tile)
+_CHUNK_DEPTH = 3
+
+# Bellek tavanı (MB) ve hesapta kullanılan kaba süreç maliyetleri
+DEFAULT_MEMORY_LIMIT_MB = 1024
+_MB = 1024 * 1024
+# Ana süreç: MBTiles yazma kuyruğu, Qt vb.
+_PARENT_RESERVE_BYTES = 192 * _MB
+# Süreç başına yorumlayıcı + GDAL + PIL
+_WORKER_BASE_BYTES = 96 * _MB
+_GDAL_CACHE_MAX_BYTES = 128 * _MB
+_GDAL_CACHE_MIN_BYTES = 16 * _MB
+# Bir tile için üst sınır (256×256 RGBA, sıkıştırılmamış)
+_TILE_MAX_BYTES = TILE_SIZE * TILE_SIZE * 4
+
+# İptal / ilerleme için bekleme aralığı (s)
+_POLL_INTERVAL_S = 0.25
+
+# Mercator sınırları: (min_x, min_y, max_x, max_y)
+MercatorBounds = Tuple[float, float, float, float]
+
+# Zoom başına XYZ tile aralığı: (x_min, x_max, y_min, y_max)
+TileRange = Tuple[int, int, int, int]
+
+
+class TilingCancelled(RuntimeError):
+    """Piramit üretimi kullanıcı isteğiyle durduruldu."""
+
+
+# -------------------------------------------------------------
+# GeoTIFF → web mercator VRT (8 bit, alfa bantlı)
+# -------------------------------------------------------------
+def _as_byte_rgb(ds: "gdal.Dataset") -> "gdal.Dataset":
+    """
+    Paletli görüntüyü RGB'ye açar, 8 bit dışı veriyi (UInt16, Float ...)
+    bant başına yaklaşık min / max'a göre 0–255'e ölçekler. Sonuç VRT'dir;
+    veri okunmaz.
+    """
+    band = ds.GetRasterBand(1)
+    if ds.RasterCount == 1 and band.GetColorTable() is not None:
+        ds = gdal.Translate("", ds, format="VRT", rgbExpand="rgb")
+        band = ds.GetRasterBand(1)
+
+    if band.DataType == gdal.GDT_Byte:
+        return ds
+
+    scale_params = []
+    for i in range(1, ds.RasterCount + 1):
+        b = ds.GetRasterBand(i)
+        if b.GetColorInterpretation() == gdal.GCI_AlphaBand:
+            scale_params.append([0, 255, 0, 255])
+            continue
+        lo, hi = b.ComputeRasterMinMax(True)
+        scale_params.append([lo, hi if hi > lo else lo + 1, 0, 255])
+    return gdal.Translate(
+        "", ds, format="VRT", outputType=gdal.GDT_Byte, scaleParams=scale_params
+    )
+
+
+def open_mercator(tiff_path: Path | str, fallback_epsg: int) -> "gdal.Dataset":
+    """
+    GeoTIFF'i EPSG:3857'ye yansıtan sanal (VRT) veri seti. Son bant alfadır;
+    nodata / görüntü dışı alanlar saydam olur. Görüntü belleğe alınmaz,
+    okunan her pencere o anda yansıtılır.
+
+    Dosyada CRS tanımı yoksa fallback_epsg (projenin EPSG'si) kullanılır.
+    """
+    src = gdal.Open(str(tiff_path))
+    if src is None:
+        raise RuntimeError(f"GeoTIFF açılamadı: {tiff_path}")
+    if src.RasterCount == 0:
+        raise RuntimeError(f"GeoTIFF'te bant yok: {tiff_path}")
+
+    src_srs = src.GetProjection() or f"EPSG:{fallback_epsg}"
+    src = _as_byte_rgb(src)
+    has_alpha = (
+        src.GetRasterBand(src.RasterCount).GetColorInterpretation()
+        == gdal.GCI_AlphaBand
+    )
+    ds = gdal.Warp(
+        "",
+        src,
+        format="VRT",
+        srcSRS=src_srs,
+        dstSRS="EPSG:3857",
+        dstAlpha=not has_alpha,
+        resampleAlg="bilinear",
+    )
+    if ds is None:
+        raise RuntimeError(f"GeoTIFF web mercator'a yansıtılamadı: {tiff_path}")
+    return ds
+
+
+def mercator_bounds(ds: "gdal.Dataset") -> MercatorBounds:
+    gt = ds.GetGeoTransform()
+    x_min = gt[0]
+    y_max = gt[3]
+    x_max = x_min + gt[1] * ds.RasterXSize
+    y_min = y_max + gt[5] * ds.RasterYSize
+    return x_min, y_min, x_max, y_max
+
+
+def mercator_to_lonlat(mx: float, my: float) -> Tuple[float, float]:
+    lon = mx / _MERC_HALF * 180.0
+    lat = math.degrees(math.atan(math.sinh(my / _MERC_HALF * math.pi)))
+    return lon, lat
+
+
+# -------------------------------------------------------------
+# Tile ızgarası
+# -------------------------------------------------------------
+def pyramid_zoom_range(ds: "gdal.Dataset") -> Tuple[int, int]:
+    """
+    (min_zoom, max_zoom). En büyük zoom, piksel boyutu kaynağınkine en yakın
+    olan seviyedir; en küçük zoom, görüntünün tek tile'a sığdığı seviyedir.
+    """
+    res = abs(ds.GetGeoTransform()[1])
+    max_zoom = int(round(math.log2(_MERC_RES0 / res))) if res > 0 else 0
+    max_zoom = min(max(max_zoom, 0), MAX_PYRAMID_ZOOM)
+
+    x_min, y_min, x_max, y_max = mercator_bounds(ds)
+    span = max(x_max - x_min, y_max - y_min)
+    min_zoom = int(math.floor(math.log2(2 * _MERC_HALF / span))) if span > 0 else 0
+    return min(max(min_zoom, 0), max_zoom), max_zoom
+
+
+def tile_range(bounds: MercatorBounds, zoom: int) -> TileRange:
+    """Sınırları kapsayan XYZ tile aralığı: (x_min, x_max, y_min, y_max)."""
+    x_min, y_min, x_max, y_max = bounds
+    n = 1 << zoom
+    size = 2 * _MERC_HALF / n
+    # Sınıra tam denk gelen kenar bir sonraki tile'a taşmasın
+    eps = size * 1e-9
+
+    def col(mx: float) -> int:
+        return min(max(int(math.floor((mx + _MERC_HALF) / size)), 0), n - 1)
+
+    def row(my: float) -> int:
+        return min(max(int(math.floor((_MERC_HALF - my) / size)), 0), n - 1)
+
+    return col(x_min), col(x_max - eps), row(y_max), row(y_min + eps)
+
+
+def _iter_range(rng: TileRange) -> Iterator[Tuple[int, int]]:
+    """(x, y) çiftleri; satır satır (kaynak blok önbelleği için)."""
+    x0, x1, y0, y1 = rng
+    for y in range(y0, y1 + 1):
+        for x in range(x0, x1 + 1):
+            yield x, y
+
+
+def _range_count(rng: TileRange) -> int:
+    x0, x1, y0, y1 = rng
+    return (x1 - x0 + 1) * (y1 - y0 + 1)
+
+
+def _in_range(rng: TileRange, x: int, y: int) -> bool:
+    return rng[0] <= x <= rng[1] and rng[2] <= y <= rng[3]
+
+
+def _subtree_count(
+    ranges: Dict[int, TileRange], z: int, x: int, y: int, max_zoom: int
+) -> int:
+    """(z, x, y) ve altındaki zoom'larda ızgaraya düşen tile sayısı."""
+    count = 0
+    for level in range(z, max_zoom + 1):
+        k = level - z
+        x0, x1, y0, y1 = ranges[level]
+        w = min(((x + 1) << k) - 1, x1) - max(x << k, x0) + 1
+        h = min(((y + 1) << k) - 1, y1) - max(y << k, y0) + 1
+        if w > 0 and h > 0:
+            count += w * h
+    return count
+
+
+# -------------------------------------------------------------
+# Tile üretimi
+# -------------------------------------------------------------
+def _to_rgba(bands) -> Image.Image:
+    """
+    Bant görüntülerinden (son bant alfa) RGBA: gri + alfa, RGB + alfa ya da
+    fazla bantlıysa ilk üç bant + alfa.
+    """
+    *color, alpha = bands
+    if len(color) >= 3:
+        r, g, b = color[:3]
+    else:
+        r = g = b = color[0]
+    return Image.merge("RGBA", (r, g, b, alpha))
+
+
+def render_base_tile(
+    ds: "gdal.Dataset", z: int, x: int, y: int
+) -> Optional[Image.Image]:
+    """
+    En büyük zoom'daki tile'ı kaynaktan okur: yalnızca tile'ın kapladığı
+    pencere okunur ve GDAL tarafından tile çözünürlüğüne örneklenir.
+    Görüntü dışında kalan / tamamen saydam tile için None.
+    """
+    gt = ds.GetGeoTransform()
+    size = 2 * _MERC_HALF / (1 << z)
+    tx_min = -_MERC_HALF + x * size
+    ty_max = _MERC_HALF - y * size
+
+    # Tile köşeleri kaynak piksel koordinatlarında
+    px0 = (tx_min - gt[0]) / gt[1]
+    py0 = (ty_max - gt[3]) / gt[5]
+    px_per_tile_px = size / TILE_SIZE / gt[1]
+    py_per_tile_px = size / TILE_SIZE / -gt[5]
+
+    # Kaynakla kesişim (piksel) ve tile içindeki karşılığı
+    rx0 = max(int(math.floor(px0)), 0)
+    ry0 = max(int(math.floor(py0)), 0)
+    rx1 = min(int(math.ceil(px0 + TILE_SIZE * px_per_tile_px)), ds.RasterXSize)
+    ry1 = min(int(math.ceil(py0 + TILE_SIZE * py_per_tile_px)), ds.RasterYSize)
+    if rx1 <= rx0 or ry1 <= ry0:
+        return None
+
+    dx0 = int(round((rx0 - px0) / px_per_tile_px))
+    dy0 = int(round((ry0 - py0) / py_per_tile_px))
+    dx1 = int(round((rx1 - px0) / px_per_tile_px))
+    dy1 = int(round((ry1 - py0) / py_per_tile_px))
+    dx0, dy0 = max(dx0, 0), max(dy0, 0)
+    dx1, dy1 = min(dx1, TILE_SIZE), min(dy1, TILE_SIZE)
+    bw, bh = dx1 - dx0, dy1 - dy0
+    if bw <= 0 or bh <= 0:
+        return None
+
+    bands = []
+    for i in range(1, ds.RasterCount + 1):
+        data = ds.GetRasterBand(i).ReadRaster(
+            rx0,
+            ry0,
+            rx1 - rx0,
+            ry1 - ry0,
+            buf_xsize=bw,
+            buf_ysize=bh,
+            buf_type=gdal.GDT_Byte,
+            resample_alg=gdal.GRIORA_Bilinear,
+        )
+        if data is None:
+            raise RuntimeError(f"GeoTIFF okunamadı (z{z} {x}/{y}).")
+        bands.append(Image.frombytes("L", (bw, bh), data))
+
+    if bands[-1].getextrema()[1] == 0:
+        return None
+
+    part = _to_rgba(bands)
+    if bw == TILE_SIZE and bh == TILE_SIZE:
+        return part
+    tile = Image.new("RGBA", (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0))
+    tile.paste(part, (dx0, dy0))
+    return tile
+
+
+def compose_overview(
+    children: Sequence[Optional[Image.Image]],
+) -> Optional[Image.Image]:
+    """
+    Alt zoom tile'ı: bir üst zoom'daki 4 çocuk (sol üst, sağ üst, sol alt,
+    sağ alt) birleştirilip yarıya küçültülür. Hiç çocuğu yoksa None.
+    """
+    if not any(child is not None for child in children):
+        return None
+    canvas = Image.new("RGBA", (2 * TILE_SIZE, 2 * TILE_SIZE), (0, 0, 0, 0))
+    for i, child in enumerate(children):
+        if child is not None:
+            canvas.paste(child, ((i % 2) * TILE_SIZE, (i // 2) * TILE_SIZE))
+    return canvas.resize((TILE_SIZE, TILE_SIZE), Image.LANCZOS)
+
+
+def encode_tile(tile: Image.Image) -> bytes:
+    """Opak tile → JPEG, saydam pikseli olan (kenar) tile → PNG."""
+    buf = io.BytesIO()
+    if tile.getextrema()[3][0] == 255:
+        tile.convert("RGB").save(buf, "JPEG", quality=_JPEG_QUALITY)
+    else:
+        tile.save(buf, "PNG", optimize=False)
+    return buf.getvalue()
+
+
+def _decode_tile(data: Optional[bytes]) -> Optional[Image.Image]:
+    if data is None:
+        return None
+    with Image.open(io.BytesIO(data)) as im:
+        return im.convert("RGBA")
+
+
+# -------------------------------------------------------------
+# Süreç tarafı (her süreç kendi veri setini açar)
+# -------------------------------------------------------------
+_worker_ds: Optional["gdal.Dataset"] = None
+_worker_cancel = None
+
+
+def _init_worker(
+    tiff_path: str, fallback_epsg: int, gdal_cache_bytes: int, cancel_event
+) -> None:
+    global _worker_ds, _worker_cancel
+    gdal.SetCacheMax(int(gdal_cache_bytes))
+    _worker_ds = open_mercator(tiff_path, fallback_epsg)
+    _worker_cancel = cancel_event
+
+
+def _render_subtree(
+    z: int,
+    x: int,
+    y: int,
+    max_zoom: int,
+    ranges: Dict[int, TileRange],
+    out: List[Tuple[int, int, int, bytes]],
+) -> Optional[Image.Image]:
+    """
+    Alt ağacı derinlik öncelikli üretir; bellekte seviye başına en fazla 4
+    çözülmüş tile tutulur. Üretilen tile'lar out'a (kodlanmış) eklenir.
+    """
+    if not _in_range(ranges[z], x, y):
+        return None
+    if z == max_zoom:
+        if _worker_cancel is not None and _worker_cancel.is_set():
+            raise TilingCancelled("İptal edildi")
+        tile = render_base_tile(_worker_ds, z, x, y)
+    else:
+        tile = compose_overview(
+            [
+                _render_subtree(z + 1, 2 * x + cx, 2 * y + cy, max_zoom, ranges, out)
+                for cy in (0, 1)
+                for cx in (0, 1)
+            ]
+        )
+    if tile is not None:
+        out.append((z, x, y, encode_tile(tile)))
+    return tile
+
+
+def _render_chunk(
+    z: int, x: int, y: int, max_zoom: int, ranges: Dict[int, TileRange]
+) -> List[Tuple[int, int, int, bytes]]:
+    """Süreçte çalışır: bir parçanın (alt ağacın) kodlanmış tile'ları."""
+    out: List[Tuple[int, int, int, bytes]] = []
+    _render_subtree(z, x, y, max_zoom, ranges, out)
+    return out
+
+
+# -------------------------------------------------------------
+# Bellek planı
+# -------------------------------------------------------------
+def plan_workers(
+    memory_limit_mb: float,
+    chunk_tiles: int,
+    max_workers: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Bellek tavanına sığan (süreç sayısı, süreç başına GDAL önbelleği bayt).
+
+    Süreç maliyeti: taban + GDAL önbelleği + iki parçalık tile (süreçte
+    üretilen ve ana süreçte yazılmayı bekleyen). Tavan tek süreç için bile
+    yetmiyorsa önbellek alt sınırına kadar küçültülür; en az bir süreç
+    her zaman çalışır.
+    """
+    cpu = max(1, max_workers or os.cpu_count() or 1)
+    budget = max(0.0, memory_limit_mb * _MB - _PARENT_RESERVE_BYTES)
+    chunk_bytes = chunk_tiles * _TILE_MAX_BYTES
+
+    per_worker = _WORKER_BASE_BYTES + _GDAL_CACHE_MAX_BYTES + 2 * chunk_bytes
+    workers = int(budget // per_worker)
+    if workers >= 1:
+        return min(workers, cpu), _GDAL_CACHE_MAX_BYTES
+
+    cache = budget - _WORKER_BASE_BYTES - 2 * chunk_bytes
+    return 1, int(max(_GDAL_CACHE_MIN_BYTES, min(cache, _GDAL_CACHE_MAX_BYTES)))
+
+
+# -------------------------------------------------------------
+# Ana süreç: parçaları dağıt, sonuçları MBTiles'a yaz
+# -------------------------------------------------------------
+def build_tile_pyramid(
+    tiff_path: Path | str,
+    fallback_epsg: int,
+    mbt: MBTiles,
+    progress_cb: Optional[ProgressCallback] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB,
+    max_workers: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    GeoTIFF'in XYZ piramidini MBTiles'a yazar ve metadata'sını (minzoom,
+    maxzoom, bounds, format) döner.
+
+    - Parçalar (bkz. modül açıklaması) süreçlerde işlenir; aynı anda en
+      fazla süreç sayısının iki katı parça bekler.
+    - should_cancel() True dönerse bekleyen parçalar iptal edilir, çalışan
+      süreçler bir sonraki tile'da durur ve TilingCancelled yükseltilir;
+      MBTiles'a o ana kadar yazılanlar yarım kalır (çağıran dosyayı atar).
+    """
+    tiff_path = str(tiff_path)
+    ds = open_mercator(tiff_path, fallback_epsg)
+    try:
+        min_zoom, max_zoom = pyramid_zoom_range(ds)
+        bounds = mercator_bounds(ds)
+    finally:
+        ds = None
+
+    ranges = {z: tile_range(bounds, z) for z in range(min_zoom, max_zoom + 1)}
+    total = sum(_range_count(r) for r in ranges.values())
+    chunk_zoom = max(min_zoom, max_zoom - _CHUNK_DEPTH)
+    chunk_tiles = sum(4**k for k in range(max_zoom - chunk_zoom + 1))
+    workers, gdal_cache = plan_workers(memory_limit_mb, chunk_tiles, max_workers)
+
+    done = 0
+    formats: Dict[str, int] = {}
+
+    def report(message: str) -> None:
+        if progress_cb:
+            progress_cb(done, total, f"{message} ({done}/{total})")
+
+    def put(z: int, x: int, y: int, data: bytes) -> None:
+        mbt.put_tile(z, x, y, data)
+        fmt = tile_format(data)
+        formats[fmt] = formats.get(fmt, 0) + 1
+
+    # Qt'nin (thread'li) ana sürecini fork'lamamak için her platformda spawn
+    ctx = multiprocessing.get_context("spawn")
+    cancel_event = ctx.Event()
+
+    def cancelled() -> bool:
+        if not cancel_event.is_set() and should_cancel and should_cancel():
+            cancel_event.set()
+        return cancel_event.is_set()
+
+    pending: Dict[Future, Tuple[int, int, int]] = {}
+    max_pending = workers * 2
+    label = f"Tile piramidi: z{chunk_zoom}–{max_zoom}, {workers} süreç"
+
+    def collect(fut: Future) -> None:
+        nonlocal done
+        z, x, y = pending.pop(fut)
+        for tz, tx, ty, data in fut.result():
+            put(tz, tx, ty, data)
+        done += _subtree_count(ranges, z, x, y, max_zoom)
+
+    def drain(block_until: int) -> None:
+        while len(pending) > block_until:
+            finished, _ = wait(
+                list(pending), timeout=_POLL_INTERVAL_S, return_when=FIRST_COMPLETED
+            )
+            for fut in finished:
+                collect(fut)
+            # Sonuç gelmese de ilerleme bildirilir; arayüz (ve Durdur) canlı kalır
+            report(label)
+            if cancelled():
+                raise TilingCancelled("GeoTIFF tile üretimi durduruldu.")
+
+    report("Tile piramidi hazırlanıyor")
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(tiff_path, fallback_epsg, gdal_cache, cancel_event),
+    )
+    try:
+        for x, y in _iter_range(ranges[chunk_zoom]):
+            if cancelled():
+                raise TilingCancelled("GeoTIFF tile üretimi durduruldu.")
+            fut = executor.submit(_render_chunk, chunk_zoom, x, y, max_zoom, ranges)
+            pending[fut] = (chunk_zoom, x, y)
+            if len(pending) >= max_pending:
+                drain(max_pending - 1)
+        drain(0)
+    except BrokenProcessPool as e:
+        raise RuntimeError(
+            "Tile üretim süreci beklenmedik şekilde sonlandı "
+            "(bellek yetersiz olabilir; bellek tavanını düşürün)."
+        ) from e
+    finally:
+        if pending:
+            cancel_event.set()
+            for fut in list(pending):
+                fut.cancel()
+        executor.shutdown(wait=True)
+
+    # Parçaların altındaki zoom'lar: az sayıda tile, MBTiles'tan küçültülür
+    for z in range(chunk_zoom - 1, min_zoom - 1, -1):
+        for x, y in _iter_range(ranges[z]):
+            if cancelled():
+                raise TilingCancelled("GeoTIFF tile üretimi durduruldu.")
+            tile = compose_overview(
+                [
+                    _decode_tile(mbt.get_tile(z + 1, 2 * x + cx, 2 * y + cy))
+                    for cy in (0, 1)
+                    for cx in (0, 1)
+                ]
+            )
+            if tile is not None:
+                put(z, x, y, encode_tile(tile))
+            done += 1
+            if done % 100 == 0:
+                report(f"Tile piramidi: z{z}")
+    mbt.flush()
+    report("Tile piramidi tamamlandı")
+
+    if not formats:
+        raise RuntimeError("GeoTIFF'ten hiç tile üretilemedi (görüntü boş).")
+
+    west, south = mercator_to_lonlat(bounds[0], bounds[1])
+    east, north = mercator_to_lonlat(bounds[2], bounds[3])
+    return {
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "bounds": f"{west:.7f},{south:.7f},{east:.7f},{north:.7f}",
+        # Karışık biçimde çoğunluk; okuyucu her tile'ın biçimini veriden anlar
+        "format": max(formats, key=formats.get),
+    }
@@ -1,11 +1,15 @@
 # core/map_data.py
 
+import base64
+import math
+import sys
+import threading
+from array import array
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from pyproj import Transformer
-
-from core.db import get_connection, get_active_project_id
+from core.coords import get_transformer
+from core.db import get_connection, get_active_project_id, get_data_revision
 from core.services import (
     load_trenches_for_project,
     load_finds_for_project,
@@ -30,9 +34,150 @@ class MapData:
     center_lat: float
     center_lon: float
     error_message: str  # Boş string ise hata yok.
+    project_id: Optional[int] = None
+
+    def finds_columnar(self) -> Dict[str, Any]:
+        """Buluntuların sütunlu aktarım formatı (bkz. encode_finds_columnar)."""
+        return encode_finds_columnar(self.finds)
+
+
+# ---------------------------------------------------------------------------
+# Sütunlu (columnar) aktarım formatı
+# ---------------------------------------------------------------------------
+# Web view'a giden buluntu listesi, her satırda anahtarları tekrar eden
+# dict'ler yerine paralel dizilerle gönderilir:
+#   - sayısal kolonlar → little-endian typed array baytları (base64)
+#       {"t": "i4" | "f8", "b": "<base64>"}   (JS: Int32Array / Float64Array)
+#   - açma / seviye adları → tekil tablolar + satır başına tablo indeksi
+#   - tekrar eden metinler (description, found_at) → {"table", "index"}
+#   - code → düz JSON dizisi (zaten tekil)
+# Boş (None) sayılar NaN, boş seviye indeksi -1 olarak yazılır.
+
+_WIRE_TYPES = {"i": "i4", "d": "f8"}
+
+
+def _pack_column(values: Iterable[Any], typecode: str) -> Dict[str, str]:
+    """Sayı dizisini little-endian baytlara çevirip base64 kolonu döner."""
+    # Taşma durumunda ikinci deneme aynı değerleri baştan okuyabilsin
+    values = list(values)
+    try:
+        arr = array(typecode, values)
+    except OverflowError:
+        # 32 bit'e sığmayan id → float64 (2^53'e kadar kayıpsız)
+        typecode = "d"
+        arr = array(typecode, values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return {
+        "t": _WIRE_TYPES[typecode],
+        "b": base64.b64encode(arr.tobytes()).decode("ascii"),
+    }
+
+
+def _float_or_nan(value: Any) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _string_table(values: Iterable[Any]) -> Dict[str, Any]:
+    """Metinleri tekil tablo + satır başına indeks olarak kodlar."""
+    index: Dict[Any, int] = {}
+    table: List[Any] = []
+    col: List[int] = []
+    for value in values:
+        idx = index.get(value)
+        if idx is None:
+            idx = index[value] = len(table)
+            table.append(value)
+        col.append(idx)
+    return {"table": table, "index": _pack_column(col, "i")}
+
+
+def encode_finds_columnar(finds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    load_finds_for_project formatındaki listeyi sütunlu formata çevirir.
+
+    Dönüş:
+        {
+          "count": n,
+          "id", "lat", "lon", "z": sayı kolonları,
+          "trench": kolon (→ "trenches" tablosunda indeks),
+          "level":  kolon (→ "levels" tablosunda indeks, yoksa -1),
+          "trenches": [[trench_id, code, name], ...],
+          "levels":   [[level_id, name], ...],
+          "code": metin dizisi,
+          "description", "found_at": {"table": [...], "index": kolon},
+        }
+    """
+    trench_index: Dict[Any, int] = {}
+    trench_table: List[list] = []
+    level_index: Dict[Any, int] = {}
+    level_table: List[list] = []
 
+    trench_col: List[int] = []
+    level_col: List[int] = []
+    for f in finds:
+        tkey = f["trench_id"]
+        idx = trench_index.get(tkey)
+        if idx is None:
+            idx = trench_index[tkey] = len(trench_table)
+            trench_table.append([tkey, f.get("trench_code"), f.get("trench_name")])
+        trench_col.append(idx)
 
-def load_map_data(project_id: Optional[int] = None) -> MapData:
+        lid = f.get("level_id")
+        if lid is None:
+            level_col.append(-1)
+            continue
+        idx = level_index.get(lid)
+        if idx is None:
+            idx = level_index[lid] = len(level_table)
+            level_table.append([lid, f.get("level_name")])
+        level_col.append(idx)
+
+    return {
+        "count": len(finds),
+        "id": _pack_column((f["id"] for f in finds), "i"),
+        "lat": _pack_column((_float_or_nan(f["lat"]) for f in finds), "d"),
+        "lon": _pack_column((_float_or_nan(f["lon"]) for f in finds), "d"),
+        "z": _pack_column((_float_or_nan(f["z"]) for f in finds), "d"),
+        "trench": _pack_column(trench_col, "i"),
+        "level": _pack_column(level_col, "i"),
+        "trenches": trench_table,
+        "levels": level_table,
+        "code": [f.get("code") for f in finds],
+        "description": _string_table(f.get("description") for f in finds),
+        "found_at": _string_table(f.get("found_at") for f in finds),
+    }
+
+
+# ---------------------------------------------------------------------------
+# MapData cache
+# ---------------------------------------------------------------------------
+# project_id → (data_revision, MapData)
+# data_revision, harita verisini etkileyen her yazmada trigger'larla artar
+# (bkz. core.db._migration_006_data_revision); değişmediyse cache'teki
+# MapData aynen döner. Dönen nesne paylaşılır, çağıranlar değiştirmemeli.
+_map_data_cache: Dict[int, Tuple[int, MapData]] = {}
+_map_data_lock = threading.Lock()
+
+
+def invalidate_map_data_cache(project_id: Optional[int] = None) -> None:
+    """
+    MapData cache'ini temizler (project_id verilirse sadece o projeyi).
+
+    DB dışı değişikliklerde (ör. diskteki GeoJSON / raster dosyası yerinde
+    değiştiğinde) kullanılır; DB yazmaları için çağırmaya gerek yoktur.
+    """
+    with _map_data_lock:
+        if project_id is None:
+            _map_data_cache.clear()
+        else:
+            _map_data_cache.pop(project_id, None)
+
+
+def load_map_data(
+    project_id: Optional[int] = None,
+    use_cache: bool = True,
+) -> MapData:
     """
     Veritabanından:
       - Açmalar (trenches + vertices)
@@ -40,13 +185,46 @@ def load_map_data(project_id: Optional[int] = None) -> MapData:
       - map_layers (tile + image + vector)
     okuyup Leaflet için hazır hale getirir.
 
+    Proje verisi son yüklemeden beri değişmediyse (data_revision aynıysa)
+    cache'teki MapData döner; servisler ve dönüşümler hiç çalışmaz.
+
     Parametreler:
         project_id: İsteğe bağlı proje ID'si.
                     Verilmezse aktif proje (get_active_project_id) kullanılır.
+        use_cache:  False ise cache atlanır ve veri yeniden yüklenir.
 
     Dönüş:
         MapData dataclass örneği.
     """
+    revision: Optional[int] = None
+    if use_cache:
+        try:
+            if project_id is None:
+                project_id = get_active_project_id()
+            if project_id:
+                revision = get_data_revision()
+        except Exception:
+            # Hata mesajını cache'siz yükleme üretsin
+            revision = None
+
+    if revision is not None:
+        with _map_data_lock:
+            cached = _map_data_cache.get(project_id)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+
+    map_data = _load_map_data_uncached(project_id)
+
+    # Hatalı sonuçlar cache'lenmez; bir sonraki çağrı yeniden dener.
+    if revision is not None and not map_data.error_message:
+        with _map_data_lock:
+            _map_data_cache[project_id] = (revision, map_data)
+
+    return map_data
+
+
+def _load_map_data_uncached(project_id: Optional[int]) -> MapData:
+    """load_map_data'nın cache'siz gövdesi."""
     center_lat = 37.0
     center_lon = 32.0
     trenches_data: List[Dict[str, Any]] = []
@@ -85,8 +263,7 @@ def load_map_data(project_id: Optional[int] = None) -> MapData:
         if not epsg_code:
             raise RuntimeError(f"Proje '{project_name}' için EPSG kodu tanımlı değil.")
 
-        src_crs = f"EPSG:{epsg_code}"
-        transformer = Transformer.from_crs(src_crs, "EPSG:4326", always_xy=True)
+        transformer = get_transformer(epsg_code)
 
         # Servislerden veriyi çek
         trenches_data = load_trenches_for_project(project_id, transformer)
@@ -114,4 +291,5 @@ def load_map_data(project_id: Optional[int] = None) -> MapData:
         center_lat=center_lat,
         center_lon=center_lon,
         error_message=error_message,
+        project_id=project_id or None,
     )
@@ -0,0 +1,280 @@
+# core/mbtiles.py
+"""
+MBTiles (tek SQLite dosyasında tile deposu) okuma / yazma.
+
+- Şema MBTiles 1.3 "deduplicated" düzenindedir: map (z/x/y → tile_id),
+  images (tile_id → veri) ve ikisini birleştiren tiles view'u. Aynı içerikli
+  tile'lar (deniz, boş alan ...) tek kez saklanır; tile_id verinin SHA-1'idir.
+- Yazmalar bellekte biriktirilip batch_size'lık transaction'larla yapılır.
+- Dışarıya XYZ (z, x, y) verilir; dosyada TMS satırı (tile_row) tutulur.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+ProgressCallback = Callable[[int, int, str], None]
+# step, total, message
+
+# Tek transaction'da yazılan en fazla tile
+DEFAULT_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS map (
+    zoom_level  INTEGER NOT NULL,
+    tile_column INTEGER NOT NULL,
+    tile_row    INTEGER NOT NULL,
+    tile_id     TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS map_index
+    ON map (zoom_level, tile_column, tile_row);
+CREATE TABLE IF NOT EXISTS images (
+    tile_id   TEXT PRIMARY KEY,
+    tile_data BLOB NOT NULL
+);
+CREATE VIEW IF NOT EXISTS tiles AS
+    SELECT map.zoom_level  AS zoom_level,
+           map.tile_column AS tile_column,
+           map.tile_row    AS tile_row,
+           images.tile_data AS tile_data
+    FROM map
+    JOIN images ON images.tile_id = map.tile_id;
+"""
+
+
+def tile_format(data: bytes) -> str:
+    """Tile verisinin biçimi (MBTiles 'format' değeri): png / jpg / webp."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return "png"
+
+
+def tile_content_type(data: bytes) -> str:
+    """Tile verisi için HTTP Content-Type."""
+    return {"jpg": "image/jpeg", "webp": "image/webp"}.get(
+        tile_format(data), "image/png"
+    )
+
+
+def _tms_row(z: int, y: int) -> int:
+    return (1 << z) - 1 - y
+
+
+class MBTiles:
+    """
+    Tek bir .mbtiles dosyası.
+
+    Yazma:
+        with MBTiles(path) as mbt:
+            mbt.put_tile(z, x, y, data)   # batch dolunca otomatik flush
+            mbt.set_metadata({...})
+        # çıkışta flush + close
+
+    Okuma:
+        mbt = MBTiles(path, readonly=True)
+        data = mbt.get_tile(z, x, y)
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        readonly: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.path = Path(path)
+        self.readonly = readonly
+        self.batch_size = max(1, int(batch_size))
+        # (z, x, y) → (tile_id, veri); flush'ta yazılır
+        self._pending: Dict[Tuple[int, int, int], Tuple[str, bytes]] = {}
+
+        if readonly:
+            uri = self.path.resolve().as_uri() + "?mode=ro"
+            self._con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._con = sqlite3.connect(str(self.path), check_same_thread=False)
+            # Tek yazar; dosya sahaya kopyalanabilsin diye WAL yerine
+            # klasik journal + NORMAL senkronizasyon
+            self._con.execute("PRAGMA synchronous = NORMAL")
+            self._con.executescript(_SCHEMA)
+            self._con.commit()
+
+    # ------------------ Yazma ------------------
+
+    def put_tile(self, z: int, x: int, y: int, data: bytes) -> None:
+        """Tile'ı yazma kuyruğuna ekler; batch_size dolunca diske yazar."""
+        tile_id = hashlib.sha1(data).hexdigest()
+        self._pending[(z, x, y)] = (tile_id, data)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Bekleyen tile'ları tek transaction'da yazar."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        images = {tile_id: data for tile_id, data in pending.values()}
+        with self._con:
+            self._con.executemany(
+                "INSERT OR IGNORE INTO images (tile_id, tile_data) VALUES (?, ?)",
+                images.items(),
+            )
+            self._con.executemany(
+                """
+                INSERT OR REPLACE INTO map
+                    (zoom_level, tile_column, tile_row, tile_id)
+                VALUES (?, ?, ?, ?)
+                """,
+                (
+                    (z, x, _tms_row(z, y), tile_id)
+                    for (z, x, y), (tile_id, _data) in pending.items()
+                ),
+            )
+
+    def set_metadata(self, values: Dict[str, object]) -> None:
+        """metadata tablosunu günceller (None değerler silinir)."""
+        with self._con:
+            for name, value in values.items():
+                if value is None:
+                    self._con.execute("DELETE FROM metadata WHERE name = ?", (name,))
+                else:
+                    self._con.execute(
+                        "INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+                        (name, str(value)),
+                    )
+
+    # ------------------ Okuma ------------------
+
+    def get_tile_with_id(self, z: int, x: int, y: int) -> Optional[Tuple[bytes, str]]:
+        """(veri, tile_id) ya da None. tile_id ETag olarak kullanılabilir."""
+        pending = self._pending.get((z, x, y))
+        if pending is not None:
+            return pending[1], pending[0]
+        row = self._con.execute(
+            """
+            SELECT images.tile_data, map.tile_id
+            FROM map
+            JOIN images ON images.tile_id = map.tile_id
+            WHERE map.zoom_level = ? AND map.tile_column = ? AND map.tile_row = ?
+            """,
+            (z, x, _tms_row(z, y)),
+        ).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0]), row[1]
+
+    def get_tile(self, z: int, x: int, y: int) -> Optional[bytes]:
+        found = self.get_tile_with_id(z, x, y)
+        return found[0] if found else None
+
+    def has_tile(self, z: int, x: int, y: int) -> bool:
+        if (z, x, y) in self._pending:
+            return True
+        row = self._con.execute(
+            """
+            SELECT 1 FROM map
+            WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?
+            """,
+            (z, x, _tms_row(z, y)),
+        ).fetchone()
+        return row is not None
+
+    def get_any_tile(self) -> Optional[bytes]:
+        """Biçim tespiti için herhangi bir tile (boşsa None)."""
+        row = self._con.execute("SELECT tile_data FROM images LIMIT 1").fetchone()
+        return bytes(row[0]) if row else None
+
+    def metadata(self) -> Dict[str, str]:
+        return dict(self._con.execute("SELECT name, value FROM metadata"))
+
+    def zoom_range(self) -> Optional[Tuple[int, int]]:
+        """Dosyadaki en küçük / en büyük zoom (boşsa None)."""
+        row = self._con.execute(
+            "SELECT MIN(zoom_level), MAX(zoom_level) FROM map"
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return int(row[0]), int(row[1])
+
+    def tile_count(self) -> int:
+        return int(self._con.execute("SELECT COUNT(*) FROM map").fetchone()[0])
+
+    # ------------------ Yaşam döngüsü ------------------
+
+    def close(self) -> None:
+        if not self.readonly:
+            self.flush()
+        self._con.close()
+
+    def __enter__(self) -> "MBTiles":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+# ---------------------------------------------------------------------------
+# Klasör ({z}/{x}/{y}.png) → MBTiles
+# ---------------------------------------------------------------------------
+
+_TILE_EXTS = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def iter_folder_tiles(folder: Path) -> Iterator[Tuple[int, int, int, Path]]:
+    """folder/{z}/{x}/{y}.<ext> dosyalarını (z, x, y, yol) olarak dolaşır."""
+    for z_entry in os.scandir(folder):
+        if not (z_entry.is_dir() and z_entry.name.isdigit()):
+            continue
+        for x_entry in os.scandir(z_entry.path):
+            if not (x_entry.is_dir() and x_entry.name.isdigit()):
+                continue
+            for y_entry in os.scandir(x_entry.path):
+                stem, ext = os.path.splitext(y_entry.name)
+                if ext.lower() in _TILE_EXTS and stem.isdigit() and y_entry.is_file():
+                    yield (
+                        int(z_entry.name),
+                        int(x_entry.name),
+                        int(stem),
+                        Path(y_entry.path),
+                    )
+
+
+def import_tile_folder(
+    folder: Path,
+    mbt: MBTiles,
+    progress_cb: Optional[ProgressCallback] = None,
+) -> Tuple[int, int]:
+    """
+    Klasör tile önbelleğini MBTiles'a aktarır. MBTiles'ta zaten olan tile'lar
+    üzerine yazılmaz.
+
+    Dönüş: (aktarılan, okunamayan) tile sayıları.
+    """
+    tiles = list(iter_folder_tiles(folder))
+    total = len(tiles)
+    imported = 0
+    failed = 0
+    for i, (z, x, y, path) in enumerate(tiles, start=1):
+        if not mbt.has_tile(z, x, y):
+            try:
+                mbt.put_tile(z, x, y, path.read_bytes())
+                imported += 1
+            except OSError:
+                failed += 1
+        if progress_cb and (i % 200 == 0 or i == total):
+            progress_cb(
+                i, total, f"Tile klasörü aktarılıyor: {folder.name} ({i}/{total})"
+            )
+    mbt.flush()
+    return imported, failed
@@ -2,10 +2,28 @@
 
 from .trenches_service import load_trenches_for_project
 from .finds_service import load_finds_for_project
-from .map_layers_service import load_map_layers_for_project
+from .map_layers_service import (
+    get_cache_layer_source,
+    get_layer_file_path,
+    load_map_layers_for_project,
+)
+from .spatial_service import (
+    fill_wgs84_cache,
+    query_finds_in_bbox,
+    query_trenches_in_bbox,
+)
+from .search_service import search_finds, search_trenches, search_project
 
 __all__ = [
     "load_trenches_for_project",
     "load_finds_for_project",
     "load_map_layers_for_project",
+    "get_layer_file_path",
+    "get_cache_layer_source",
+    "fill_wgs84_cache",
+    "query_finds_in_bbox",
+    "query_trenches_in_bbox",
+    "search_finds",
+    "search_trenches",
+    "search_project",
 ]
@@ -6,9 +6,36 @@ from typing import Any, Dict, List
 
 from pyproj import Transformer
 
+from core.coords import is_wgs84_transformer, transform_xy
 from core.db import get_connection
 
 
+# core/db.py migration 002 index'lerine göre şekillenmiştir
+# (bkz. tests/test_hot_indexes.py)
+FINDS_FOR_PROJECT_SQL = """
+    SELECT
+      f.id,
+      f.trench_id,
+      f.code,
+      f.description,
+      f.found_at,
+      f.x_global,
+      f.y_global,
+      f.z_global,
+      f.lat_wgs84,
+      f.lon_wgs84,
+      f.level_id,
+      l.name AS level_name,
+      t.code AS trench_code,
+      t.name AS trench_name
+    FROM finds f
+    JOIN trenches t ON f.trench_id = t.id
+    LEFT JOIN levels l ON f.level_id = l.id
+    WHERE t.project_id = ?
+    ORDER BY f.id
+    """
+
+
 def load_finds_for_project(
     project_id: int,
     transformer: Transformer,
@@ -16,6 +43,14 @@ def load_finds_for_project(
     """
     Verilen proje için buluntuları (WGS84'e çevrilmiş) döner.
 
+    lat/lon değerleri finds.lat_wgs84 / lon_wgs84 cache kolonlarından okunur.
+    Cache'i boş olan satırlar toplu dönüştürülür ve cache'e geri yazılır;
+    böylece değişmeyen veride yenileme saf okuma olur.
+
+    Cache yalnızca get_transformer(epsg) ile kurulmuş WGS84 dönüşümü için
+    kullanılır; başka bir transformer verilirse tüm noktalar onunla çevrilir
+    ve cache'e yazılmaz.
+
     Dönüş formatı:
     [
       {
@@ -40,31 +75,14 @@ def load_finds_for_project(
     con = get_connection()
     try:
         cur = con.cursor()
-        cur.execute(
-            """
-            SELECT
-              f.id,
-              f.trench_id,
-              f.code,
-              f.description,
-              f.found_at,
-              f.x_global,
-              f.y_global,
-              f.z_global,
-              f.level_id,
-              l.name AS level_name,
-              t.code AS trench_code,
-              t.name AS trench_name
-            FROM finds f
-            JOIN trenches t ON f.trench_id = t.id
-            LEFT JOIN levels l ON f.level_id = l.id
-            WHERE t.project_id = ?
-            ORDER BY f.id
-            """,
-            (project_id,),
-        )
+        cur.execute(FINDS_FOR_PROJECT_SQL, (project_id,))
         rows = cur.fetchall()
+        use_cache = is_wgs84_transformer(transformer)
 
+        # Cache'i boş olanları topla, sonra hepsini tek seferde çevir
+        missing: List[Dict[str, Any]] = []
+        xs: List[float] = []
+        ys: List[float] = []
         for (
             fid,
             trench_id,
@@ -74,6 +92,8 @@ def load_finds_for_project(
             xg,
             yg,
             zg,
+            lat_cached,
+            lon_cached,
             level_id,
             level_name,
             trench_code,
@@ -81,25 +101,42 @@ def load_finds_for_project(
         ) in rows:
             if xg is None or yg is None:
                 continue
+            if not use_cache:
+                lat_cached = lon_cached = None
+
+            item = {
+                "id": fid,
+                "trench_id": trench_id,
+                "trench_code": trench_code,
+                "trench_name": trench_name,
+                "code": code,
+                "description": desc,
+                "lat": lat_cached,
+                "lon": lon_cached,
+                "z": zg,
+                "level_id": level_id,
+                "level_name": level_name,
+                "found_at": found_at,
+            }
+            finds_data.append(item)
+
+            if lat_cached is None or lon_cached is None:
+                missing.append(item)
+                xs.append(xg)
+                ys.append(yg)
+
+        if missing:
+            lons, lats = transform_xy(transformer, xs, ys)
+            for item, lon, lat in zip(missing, lons, lats):
+                item["lat"] = lat
+                item["lon"] = lon
 
-            lon, lat = transformer.transform(xg, yg)
-
-            finds_data.append(
-                {
-                    "id": fid,
-                    "trench_id": trench_id,
-                    "trench_code": trench_code,
-                    "trench_name": trench_name,
-                    "code": code,
-                    "description": desc,
-                    "lat": lat,
-                    "lon": lon,
-                    "z": zg,
-                    "level_id": level_id,
-                    "level_name": level_name,
-                    "found_at": found_at,
-                }
+        if missing and use_cache:
+            cur.executemany(
+                "UPDATE finds SET lat_wgs84 = ?, lon_wgs84 = ? WHERE id = ?",
+                [(item["lat"], item["lon"], item["id"]) for item in missing],
             )
+            con.commit()
     finally:
         con.close()
 
@@ -3,13 +3,117 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List
+import sqlite3
+from typing import Any, Dict, List, Optional
 
 from PIL import Image
 from pyproj import Transformer
 
-from core.db import get_connection
-from core.utils import BASE_DIR, WEB_DIR
+from core.coords import transform_xy
+from core.db import get_connection, read_connection
+from core.mbtiles import MBTiles
+from core.tile_cache import source_zoom_range
+from core.utils import BASE_DIR, arcsys_url, localize_url_template
+
+
+def resolve_layer_file(ltype: str, file_path: Optional[str]) -> Optional[str]:
+    """
+    map_layers.file_path değerini mutlak dosya yoluna çevirir.
+
+    file_path hem relatif hem absolute olabilir. Vektörler ayrıca
+    BASE_DIR/data altında da aranır. Dosya yoksa None.
+    """
+    if not file_path:
+        return None
+    if os.path.isabs(file_path):
+        return file_path if os.path.exists(file_path) else None
+
+    cand_paths = [os.path.join(BASE_DIR, file_path)]
+    if (ltype or "").lower() == "vector":
+        # Örn: "data/vectors/..." veya "vectors/..."
+        cand_paths.append(os.path.join(BASE_DIR, "data", file_path))
+    for p in cand_paths:
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def get_layer_file_path(layer_id: int) -> Optional[str]:
+    """
+    Aktif image / vector / mbtiles katmanının dosyasının mutlak yolu
+    (yoksa None). arcsys://local/layers/<id>/... ve /mbtiles/<id>/...
+    istekleri bunu kullanır; böylece yalnızca map_layers'ta kayıtlı
+    dosyalar sunulur.
+    """
+    with read_connection() as con:
+        row = con.execute(
+            """
+            SELECT type, file_path
+            FROM map_layers
+            WHERE id = ?
+              AND is_active = 1
+            """,
+            (layer_id,),
+        ).fetchone()
+    if not row:
+        return None
+    ltype, file_path = row
+    if (ltype or "").lower() not in ("image", "vector", "mbtiles"):
+        return None
+    return resolve_layer_file(ltype, file_path)
+
+
+def get_cache_layer_source(layer_id: int) -> Optional[str]:
+    """
+    Aktif önbellek (tilecache) katmanının kaynak şablonu; paylaşılan tile
+    önbelleğindeki anahtardır. arcsys://local/cache/<id>/... istekleri
+    bunu kullanır. Katman yoksa / başka tipteyse None.
+    """
+    with read_connection() as con:
+        row = con.execute(
+            """
+            SELECT url_template
+            FROM map_layers
+            WHERE id = ?
+              AND is_active = 1
+              AND LOWER(type) = 'tilecache'
+            """,
+            (layer_id,),
+        ).fetchone()
+    return row[0] if row and row[0] else None
+
+
+def _mbtiles_info(path: str) -> tuple:
+    """
+    (zoom aralığı, sınırlar): MBTiles metadata'sındaki (yoksa verideki)
+    min / max zoom ve yalnızca bindirme (type=overlay, ör. GeoTIFF
+    piramidi) dosyalarında (min_lon, min_lat, max_lon, max_lat). Okunamazsa
+    ya da yoksa ilgili değer None.
+    """
+    try:
+        with MBTiles(path, readonly=True) as mbt:
+            meta = mbt.metadata()
+            if "minzoom" in meta and "maxzoom" in meta:
+                zooms = int(meta["minzoom"]), int(meta["maxzoom"])
+            else:
+                zooms = mbt.zoom_range()
+    except (sqlite3.Error, ValueError):
+        return None, None
+
+    bounds = None
+    if meta.get("type") == "overlay" and meta.get("bounds"):
+        try:
+            values = tuple(float(v) for v in meta["bounds"].split(","))
+        except ValueError:
+            values = ()
+        if len(values) == 4:
+            bounds = values
+    return zooms, bounds
+
+
+def _layer_file_url(layer_id: int, abs_path: str) -> str:
+    """Katman dosyasının arcsys URL'i (dosya adı uzantı / önbellek için)."""
+    return arcsys_url("layers", str(layer_id), os.path.basename(abs_path))
 
 
 def load_map_layers_for_project(
@@ -35,7 +139,7 @@ def load_map_layers_for_project(
           "name": ...,
           "kind": "image",
           "url_template": "",
-          "file_url": "<WEB_DIR'e göre relatif path>",
+          "file_url": "arcsys://local/layers/<id>/<dosya>",
           "min_lat": ...,
           "min_lon": ...,
           "max_lat": ...,
@@ -49,12 +153,38 @@ def load_map_layers_for_project(
           "name": ...,
           "kind": "vector",
           "url_template": "",
-          "file_url": "<WEB_DIR'e göre relatif path>",
+          "file_url": "arcsys://local/layers/<id>/<dosya>",
           "attribution": ...,
         }
+
+    Yerel (file://) tile şablonları arcsys://local/data/... adresine çevrilir.
+
+    MBTiles katmanlar tile katmanı olarak döner:
+        {
+          "kind": "tile",
+          "url_template": "arcsys://local/mbtiles/<id>/{z}/{x}/{y}",
+          "min_zoom": ..., "max_zoom": ...,   # MBTiles metadata'sından
+          ...
+        }
+    Bindirme MBTiles'larında (GeoTIFF tile piramidi) ayrıca
+    "min_lat", "min_lon", "max_lat", "max_lon" (WGS84) bulunur.
+
+    Önbellek (tilecache) katmanları da tile katmanıdır; url_template'teki
+    kaynak şablonuyla paylaşılan önbellekten sunulur:
+        {
+          "kind": "tile",
+          "url_template": "arcsys://local/cache/<id>/{z}/{x}/{y}",
+          "min_zoom": ..., "max_zoom": ...,   # önbellekteki zoom'lar
+          ...
+        }
     """
     layers_data: List[Dict[str, Any]] = []
 
+    # Image katmanların köşeleri: döngü sonunda tek seferde WGS84'e çevrilir
+    pending_images: List[Dict[str, Any]] = []
+    corner_xs: List[float] = []
+    corner_ys: List[float] = []
+
     con = get_connection()
     try:
         cur = con.cursor()
@@ -73,6 +203,29 @@ def load_map_layers_for_project(
             ltype = (ltype or "").lower()
             attr = attr or ""
 
+            # --------------------------------------------------
+            # 0) Paylaşılan önbellekteki offline tile'lar
+            #    (url_template kaynak anahtarıdır, ağdan çekilmez)
+            # --------------------------------------------------
+            if ltype == "tilecache":
+                if not url_tmpl:
+                    continue
+                zooms = source_zoom_range(url_tmpl)
+                layers_data.append(
+                    {
+                        "id": lid,
+                        "name": lname,
+                        "kind": "tile",
+                        "url_template": arcsys_url("cache", str(lid))
+                        + "/{z}/{x}/{y}",
+                        "file_url": "",
+                        "min_zoom": zooms[0] if zooms else None,
+                        "max_zoom": zooms[1] if zooms else None,
+                        "attribution": attr,
+                    }
+                )
+                continue
+
             # --------------------------------------------------
             # 1) URL tabanlı tile layer
             # --------------------------------------------------
@@ -82,24 +235,44 @@ def load_map_layers_for_project(
                         "id": lid,
                         "name": lname,
                         "kind": "tile",
-                        "url_template": url_tmpl,
+                        "url_template": localize_url_template(url_tmpl),
                         "file_url": "",
                         "attribution": attr,
                     }
                 )
                 continue
 
+            # --------------------------------------------------
+            # 1b) MBTiles (tek dosyada offline tile'lar)
+            # --------------------------------------------------
+            if ltype == "mbtiles" and file_path:
+                abs_mbtiles = resolve_layer_file(ltype, file_path)
+                if not abs_mbtiles:
+                    continue
+                zooms, bounds = _mbtiles_info(abs_mbtiles)
+                entry = {
+                    "id": lid,
+                    "name": lname,
+                    "kind": "tile",
+                    "url_template": arcsys_url("mbtiles", str(lid))
+                    + "/{z}/{x}/{y}",
+                    "file_url": "",
+                    "min_zoom": zooms[0] if zooms else None,
+                    "max_zoom": zooms[1] if zooms else None,
+                    "attribution": attr,
+                }
+                if bounds:
+                    entry["min_lon"], entry["min_lat"] = bounds[0], bounds[1]
+                    entry["max_lon"], entry["max_lat"] = bounds[2], bounds[3]
+                layers_data.append(entry)
+                continue
+
             # --------------------------------------------------
             # 2) Raster image (PNG/JPG + worldfile)
             # --------------------------------------------------
             if ltype == "image" and file_path:
-                # file_path hem relatif hem absolute olabilir
-                if os.path.isabs(file_path):
-                    abs_image = file_path
-                else:
-                    abs_image = os.path.join(BASE_DIR, file_path)
-
-                if not os.path.exists(abs_image):
+                abs_image = resolve_layer_file(ltype, file_path)
+                if not abs_image:
                     continue
 
                 # Görüntü boyutu
@@ -139,80 +312,55 @@ def load_map_layers_for_project(
                 x_max = x_min + width * a
                 y_min = y_max + height * e
 
-                corners_xy = [
-                    (x_min, y_min),
-                    (x_min, y_max),
-                    (x_max, y_min),
-                    (x_max, y_max),
-                ]
-                lons: list[float] = []
-                lats: list[float] = []
-                for x, y in corners_xy:
-                    lon, lat = transformer.transform(x, y)
-                    lons.append(lon)
-                    lats.append(lat)
-
-                min_lon = min(lons)
-                max_lon = max(lons)
-                min_lat = min(lats)
-                max_lat = max(lats)
-
-                # HTML'de kullanmak için: web/ klasörüne göre relatif path
-                rel_path = os.path.relpath(abs_image, WEB_DIR).replace("\\", "/")
+                corner_xs.extend([x_min, x_min, x_max, x_max])
+                corner_ys.extend([y_min, y_max, y_min, y_max])
 
-                layers_data.append(
-                    {
-                        "id": lid,
-                        "name": lname,
-                        "kind": "image",
-                        "url_template": "",
-                        "file_url": rel_path,
-                        "min_lat": min_lat,
-                        "min_lon": min_lon,
-                        "max_lat": max_lat,
-                        "max_lon": max_lon,
-                        "attribution": attr,
-                    }
-                )
+                entry = {
+                    "id": lid,
+                    "name": lname,
+                    "kind": "image",
+                    "url_template": "",
+                    "file_url": _layer_file_url(lid, abs_image),
+                    "min_lat": None,
+                    "min_lon": None,
+                    "max_lat": None,
+                    "max_lon": None,
+                    "attribution": attr,
+                }
+                layers_data.append(entry)
+                pending_images.append(entry)
                 continue
 
             # --------------------------------------------------
             # 3) Vector layer (GeoJSON)
             # --------------------------------------------------
             if ltype == "vector" and file_path:
-                # file_path relatif olabilir; BASE_DIR / file_path altında arıyoruz
-                if os.path.isabs(file_path):
-                    abs_vec = file_path
-                else:
-                    # Örn: "data/vectors/..." veya "vectors/..."
-                    cand_paths = [
-                        os.path.join(BASE_DIR, file_path),
-                        os.path.join(BASE_DIR, "data", file_path),
-                    ]
-                    abs_vec = None
-                    for p in cand_paths:
-                        if os.path.exists(p):
-                            abs_vec = p
-                            break
-
-                if not abs_vec or not os.path.exists(abs_vec):
+                abs_vec = resolve_layer_file(ltype, file_path)
+                if not abs_vec:
                     continue
 
-                # web köküne göre relatif path (QWebEngine fetch için)
-                rel_path = os.path.relpath(abs_vec, WEB_DIR).replace("\\", "/")
-
                 layers_data.append(
                     {
                         "id": lid,
                         "name": lname,
                         "kind": "vector",
                         "url_template": "",
-                        "file_url": rel_path,
+                        "file_url": _layer_file_url(lid, abs_vec),
                         "attribution": attr,
                     }
                 )
                 continue
 
+        # Tüm raster köşeleri tek pyproj çağrısıyla (katman başına 4 nokta)
+        lons, lats = transform_xy(transformer, corner_xs, corner_ys)
+        for i, entry in enumerate(pending_images):
+            layer_lons = lons[i * 4 : i * 4 + 4]
+            layer_lats = lats[i * 4 : i * 4 + 4]
+            entry["min_lon"] = min(layer_lons)
+            entry["max_lon"] = max(layer_lons)
+            entry["min_lat"] = min(layer_lats)
+            entry["max_lat"] = max(layer_lats)
+
     finally:
         con.close()
 
@@ -0,0 +1,104 @@
+# core/services/search_service.py
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional
+
+from core.db import read_connection
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_fts_query(raw_query: str) -> str:
+    """
+    Kullanıcının yazdığı metni güvenli bir FTS5 sorgusuna çevirir.
+
+    Her kelime önek (prefix) eşleşmesi olarak aranır ve hepsi birlikte
+    aranır (AND); haritadaki eski `tokens.every(t.includes)` davranışına
+    yakındır. FTS5 operatörleri kullanıcı girdisinden etkilenmesin diye her
+    kelime tırnak içine alınır.
+
+    Büyük/küçük harf ve aksanlar FTS tokenizer'ı (unicode61) tarafından
+    katlanır. Boş / kelimesiz girdi → "".
+    """
+    tokens = _TOKEN_RE.findall(raw_query or "")
+    return " ".join(f'"{tok}"*' for tok in tokens)
+
+
+def search_finds(
+    project_id: int,
+    raw_query: str,
+    limit: Optional[int] = None,
+) -> List[int]:
+    """
+    Buluntu kodu / açıklaması / açma kodu-adı / seviye adında eşleşen
+    buluntu id'lerini, alaka sırasına göre (bm25) döner.
+    """
+    match = build_fts_query(raw_query)
+    if not match:
+        return []
+
+    sql = """
+        SELECT f.id
+        FROM finds_fts
+        JOIN finds f ON f.id = finds_fts.rowid
+        JOIN trenches t ON f.trench_id = t.id
+        WHERE finds_fts MATCH ?
+          AND t.project_id = ?
+        ORDER BY finds_fts.rank
+    """
+    params: list = [match, project_id]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with read_connection() as con:
+        return [row[0] for row in con.execute(sql, params)]
+
+
+def search_trenches(
+    project_id: int,
+    raw_query: str,
+    limit: Optional[int] = None,
+) -> List[int]:
+    """Açma kodu / adı / proje adında eşleşen açma id'lerini (bm25 sırasıyla) döner."""
+    match = build_fts_query(raw_query)
+    if not match:
+        return []
+
+    sql = """
+        SELECT t.id
+        FROM trenches_fts
+        JOIN trenches t ON t.id = trenches_fts.rowid
+        WHERE trenches_fts MATCH ?
+          AND t.project_id = ?
+        ORDER BY trenches_fts.rank
+    """
+    params: list = [match, project_id]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with read_connection() as con:
+        return [row[0] for row in con.execute(sql, params)]
+
+
+def search_project(
+    project_id: int,
+    raw_query: str,
+    limit: Optional[int] = None,
+) -> Dict[str, List[int]]:
+    """
+    Harita filtresi için birleşik arama.
+
+    Dönüş:
+        {
+          "find_ids": [...],    # alaka sırasına göre
+          "trench_ids": [...],  # doğrudan eşleşen açmalar (alaka sırasına göre)
+        }
+    """
+    return {
+        "find_ids": search_finds(project_id, raw_query, limit),
+        "trench_ids": search_trenches(project_id, raw_query, limit),
+    }
@@ -0,0 +1,286 @@
+# core/services/spatial_service.py
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from core.coords import get_transformer, transform_xy
+from core.db import db_connection, get_data_revision
+
+# bbox: (min_x, min_y, max_x, max_y)
+#   crs="wgs84"   → (min_lon, min_lat, max_lon, max_lat)
+#   crs="project" → proje CRS'inde (min_x, min_y, max_x, max_y)
+BBox = Sequence[float]
+
+_RTREE_TABLES = {
+    ("finds", "wgs84"): ("finds_rtree_ll", "lon", "lat"),
+    ("finds", "project"): ("finds_rtree_xy", "x", "y"),
+    ("trenches", "wgs84"): ("trenches_rtree_ll", "lon", "lat"),
+    ("trenches", "project"): ("trenches_rtree_xy", "x", "y"),
+}
+
+
+def _rtree_for(kind: str, crs: str) -> tuple[str, str, str]:
+    try:
+        return _RTREE_TABLES[(kind, crs)]
+    except KeyError:
+        raise ValueError(f"Geçersiz crs: {crs!r} ('wgs84' veya 'project')") from None
+
+
+def _normalize_bbox(bbox: BBox) -> tuple[float, float, float, float]:
+    if len(bbox) != 4:
+        raise ValueError("bbox (min_x, min_y, max_x, max_y) olmalı.")
+    x1, y1, x2, y2 = (float(v) for v in bbox)
+    return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+
+def fill_wgs84_cache(project_id: int, con=None) -> int:
+    """
+    Projenin WGS84 cache'i boş olan buluntu ve köşe noktalarını toplu
+    dönüştürüp doldurur. WGS84 R*Tree'leri trigger'larla güncellenir.
+
+    Dönüş:
+        Doldurulan nokta sayısı.
+    """
+    with db_connection(con) as c:
+        cur = c.cursor()
+        cur.execute(
+            """
+            SELECT cs.epsg_code
+            FROM projects p
+            LEFT JOIN coordinate_systems cs ON p.coordinate_system_id = cs.id
+            WHERE p.id = ?
+            """,
+            (project_id,),
+        )
+        row = cur.fetchone()
+        if not row or not row[0]:
+            return 0
+
+        filled = 0
+        for table, join_sql in (
+            ("finds", "JOIN trenches t ON x.trench_id = t.id"),
+            ("trench_vertices", "JOIN trenches t ON x.trench_id = t.id"),
+        ):
+            cur.execute(
+                f"""
+                SELECT x.id, x.x_global, x.y_global
+                FROM {table} x
+                {join_sql}
+                WHERE t.project_id = ?
+                  AND x.x_global IS NOT NULL
+                  AND x.y_global IS NOT NULL
+                  AND (x.lat_wgs84 IS NULL OR x.lon_wgs84 IS NULL)
+                """,
+                (project_id,),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                continue
+
+            transformer = get_transformer(row[0])
+            lons, lats = transform_xy(
+                transformer, [r[1] for r in rows], [r[2] for r in rows]
+            )
+            cur.executemany(
+                f"UPDATE {table} SET lat_wgs84 = ?, lon_wgs84 = ? WHERE id = ?",
+                [(lat, lon, r[0]) for r, lon, lat in zip(rows, lons, lats)],
+            )
+            filled += len(rows)
+
+    return filled
+
+
+# project_id → WGS84 cache'inin son doldurulduğu data_revision.
+# Koordinatı değiştiren her yazma hem cache kolonlarını boşaltır (migration
+# 001 trigger'ları) hem sayacı artırır (migration 006); sayaç aynı kaldıkça
+# doldurulacak satır yoktur ve bbox sorguları yazma kilidi almaz.
+_wgs84_filled_at: Dict[int, int] = {}
+_wgs84_lock = threading.Lock()
+
+
+def _ensure_wgs84_cache(project_id: int) -> None:
+    """
+    Cache'i yalnızca son doldurmadan beri veri değiştiyse doldurur; aksi
+    halde maliyeti tek satırlık bir okumadır.
+    """
+    revision = get_data_revision()
+    with _wgs84_lock:
+        if _wgs84_filled_at.get(project_id) == revision:
+            return
+    fill_wgs84_cache(project_id)
+    with _wgs84_lock:
+        _wgs84_filled_at[project_id] = revision
+
+
+def query_finds_in_bbox(
+    project_id: int,
+    bbox: BBox,
+    limit: Optional[int] = None,
+    crs: str = "wgs84",
+) -> List[Dict[str, Any]]:
+    """
+    Verilen kutunun içindeki buluntuları R*Tree üzerinden döner
+    (viewport bazlı yükleme için).
+
+    Dönüş formatı load_finds_for_project ile aynıdır; sıralama f.id'ye göre.
+    Dönen lat / lon WGS84 cache kolonlarından okunur; veri son sorgudan beri
+    değiştiyse cache önce doldurulur (crs ne olursa olsun).
+    """
+    rtree, ax, ay = _rtree_for("finds", crs)
+    min_x, min_y, max_x, max_y = _normalize_bbox(bbox)
+    # Dönen satırlar her iki CRS'te de WGS84 lat / lon taşır
+    _ensure_wgs84_cache(project_id)
+    if crs == "wgs84":
+        col_x, col_y = "f.lon_wgs84", "f.lat_wgs84"
+    else:
+        col_x, col_y = "f.x_global", "f.y_global"
+
+    sql = f"""
+        SELECT
+          f.id,
+          f.trench_id,
+          f.code,
+          f.description,
+          f.found_at,
+          f.z_global,
+          f.lat_wgs84,
+          f.lon_wgs84,
+          f.level_id,
+          l.name AS level_name,
+          t.code AS trench_code,
+          t.name AS trench_name
+        FROM {rtree} r
+        JOIN finds f ON f.id = r.id
+        JOIN trenches t ON f.trench_id = t.id
+        LEFT JOIN levels l ON f.level_id = l.id
+        WHERE r.min_{ax} <= ? AND r.max_{ax} >= ?
+          AND r.min_{ay} <= ? AND r.max_{ay} >= ?
+          AND t.project_id = ?
+          AND {col_x} BETWEEN ? AND ?
+          AND {col_y} BETWEEN ? AND ?
+        ORDER BY f.id
+    """
+    params: list[Any] = [
+        max_x,
+        min_x,
+        max_y,
+        min_y,
+        project_id,
+        min_x,
+        max_x,
+        min_y,
+        max_y,
+    ]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    finds_data: List[Dict[str, Any]] = []
+    with db_connection() as con:
+        for (
+            fid,
+            trench_id,
+            code,
+            desc,
+            found_at,
+            zg,
+            lat,
+            lon,
+            level_id,
+            level_name,
+            trench_code,
+            trench_name,
+        ) in con.execute(sql, params):
+            finds_data.append(
+                {
+                    "id": fid,
+                    "trench_id": trench_id,
+                    "trench_code": trench_code,
+                    "trench_name": trench_name,
+                    "code": code,
+                    "description": desc,
+                    "lat": lat,
+                    "lon": lon,
+                    "z": zg,
+                    "level_id": level_id,
+                    "level_name": level_name,
+                    "found_at": found_at,
+                }
+            )
+
+    return finds_data
+
+
+def query_trenches_in_bbox(
+    project_id: int,
+    bbox: BBox,
+    limit: Optional[int] = None,
+    crs: str = "wgs84",
+) -> List[Dict[str, Any]]:
+    """
+    Ayak izi (köşe noktalarının kutusu) verilen kutuyla kesişen açmaları döner.
+
+    Dönüş formatı load_trenches_for_project ile aynıdır.
+    """
+    rtree, ax, ay = _rtree_for("trenches", crs)
+    min_x, min_y, max_x, max_y = _normalize_bbox(bbox)
+    # Köşeler her iki CRS'te de WGS84 lat / lon olarak döner
+    _ensure_wgs84_cache(project_id)
+
+    limit_sql = ""
+    params: list[Any] = [max_x, min_x, max_y, min_y, project_id]
+    if limit is not None:
+        limit_sql = "LIMIT ?"
+        params.append(int(limit))
+
+    sql = f"""
+        WITH hits AS (
+            SELECT t.id
+            FROM {rtree} r
+            JOIN trenches t ON t.id = r.id
+            WHERE r.min_{ax} <= ? AND r.max_{ax} >= ?
+              AND r.min_{ay} <= ? AND r.max_{ay} >= ?
+              AND t.project_id = ?
+            ORDER BY t.id
+            {limit_sql}
+        )
+        SELECT
+          t.id,
+          t.code,
+          t.name,
+          p.name,
+          v.order_index,
+          v.z_global,
+          v.lat_wgs84,
+          v.lon_wgs84
+        FROM hits h
+        JOIN trenches t ON t.id = h.id
+        JOIN projects p ON t.project_id = p.id
+        JOIN trench_vertices v ON v.trench_id = t.id
+        ORDER BY t.id, v.order_index
+    """
+
+    trenches_data: List[Dict[str, Any]] = []
+    with db_connection() as con:
+        current: Dict[str, Any] | None = None
+        for tid, tcode, tname, pname, order_idx, zg, lat, lon in con.execute(
+            sql, params
+        ):
+            if current is None or current["id"] != tid:
+                current = {
+                    "id": tid,
+                    "code": tcode,
+                    "name": tname,
+                    "project": pname,
+                    "vertices": [],
+                }
+                trenches_data.append(current)
+            if lat is None or lon is None:
+                continue
+            current["vertices"].append(
+                {"order": order_idx, "lat": lat, "lon": lon, "z": zg}
+            )
+
+    return [t for t in trenches_data if t["vertices"]]
@@ -6,9 +6,39 @@ from typing import Any, Dict, List
 
 from pyproj import Transformer
 
+from core.coords import is_wgs84_transformer, transform_xy
 from core.db import get_connection
 
 
+# core/db.py migration 002 index'lerine göre şekillenmiştir
+# (bkz. tests/test_hot_indexes.py). Açma bilgisi ve köşeler iki ayrı
+# sorguyla okunur: köşe satırlarında açma kodu / adı / proje adı tekrar
+# etmez (bkz. tests/bench_trench_loader.py).
+TRENCHES_FOR_PROJECT_SQL = """
+    SELECT t.id, t.code, t.name, p.name
+    FROM trenches t
+    JOIN projects p ON t.project_id = p.id
+    WHERE t.project_id = ?
+    ORDER BY t.id
+    """
+
+TRENCH_VERTICES_FOR_PROJECT_SQL = """
+    SELECT
+      v.trench_id,
+      v.order_index,
+      v.x_global,
+      v.y_global,
+      v.z_global,
+      v.lat_wgs84,
+      v.lon_wgs84,
+      v.id
+    FROM trenches t
+    JOIN trench_vertices v ON v.trench_id = t.id
+    WHERE t.project_id = ?
+    ORDER BY t.id, v.order_index
+    """
+
+
 def load_trenches_for_project(
     project_id: int,
     transformer: Transformer,
@@ -16,6 +46,12 @@ def load_trenches_for_project(
     """
     Verilen proje için açmaları ve köşe noktalarını (WGS84'e çevrilmiş) döner.
 
+    Köşelerin lat/lon değerleri trench_vertices.lat_wgs84 / lon_wgs84 cache
+    kolonlarından okunur; cache'i boş olanlar toplu dönüştürülüp geri yazılır.
+    Cache yalnızca get_transformer(epsg) ile kurulmuş WGS84 dönüşümü için
+    kullanılır; başka bir transformer verilirse tüm köşeler onunla çevrilir
+    ve cache'e yazılmaz.
+
     Dönüş formatı:
     [
       {
@@ -37,51 +73,68 @@ def load_trenches_for_project(
     try:
         cur = con.cursor()
 
-        # Açma temel bilgileri
-        cur.execute(
-            """
-            SELECT t.id, t.code, t.name, p.name
-            FROM trenches t
-            JOIN projects p ON t.project_id = p.id
-            WHERE t.project_id = ?
-            ORDER BY t.id
-            """,
-            (project_id,),
-        )
-        trench_rows = cur.fetchall()
-
-        for tid, tcode, tname, pname in trench_rows:
-            # Köşe noktaları (GLOBAL koordinatlar)
-            cur.execute(
+        # Açmalar ve tüm köşe noktaları (GLOBAL koordinatlar) birer sorguda;
+        # köşeler açma ve köşe sırasına göre geldiği için tek geçişte
+        # gruplanabiliyor, açma başına ayrı sorgu atılmıyor.
+        cur.execute(TRENCHES_FOR_PROJECT_SQL, (project_id,))
+        headers = {tid: (tcode, tname, pname) for tid, tcode, tname, pname in cur}
+        cur.execute(TRENCH_VERTICES_FOR_PROJECT_SQL, (project_id,))
+        rows = cur.fetchall()
+        use_cache = is_wgs84_transformer(transformer)
+
+        # Köşeler tek geçişte gruplanır; cache'i boş olanların lat/lon'u
+        # sonradan toplu dönüşümle dolar
+        current: Dict[str, Any] | None = None
+        missing: List[tuple[int, Dict[str, Any]]] = []
+        xs: List[float] = []
+        ys: List[float] = []
+        for tid, order_idx, xg, yg, zg, lat_cached, lon_cached, vid in rows:
+            if current is None or current["id"] != tid:
+                if current is not None and current["vertices"]:
+                    trenches_data.append(current)
+                tcode, tname, pname = headers[tid]
+                current = {
+                    "id": tid,
+                    "code": tcode,
+                    "name": tname,
+                    "project": pname,
+                    "vertices": [],
+                }
+
+            if xg is None or yg is None:
+                continue
+            if not use_cache:
+                lat_cached = lon_cached = None
+            vertex = {
+                "order": order_idx,
+                "lat": lat_cached,
+                "lon": lon_cached,
+                "z": zg,
+            }
+            current["vertices"].append(vertex)
+            if lat_cached is None or lon_cached is None:
+                missing.append((vid, vertex))
+                xs.append(xg)
+                ys.append(yg)
+
+        if current is not None and current["vertices"]:
+            trenches_data.append(current)
+
+        if missing:
+            lons, lats = transform_xy(transformer, xs, ys)
+            for (_vid, vertex), lon, lat in zip(missing, lons, lats):
+                vertex["lat"] = lat
+                vertex["lon"] = lon
+
+        if missing and use_cache:
+            cur.executemany(
                 """
-                SELECT order_index, x_global, y_global, z_global
-                FROM trench_vertices
-                WHERE trench_id = ?
-                ORDER BY order_index
+                UPDATE trench_vertices SET lat_wgs84 = ?, lon_wgs84 = ?
+                WHERE id = ?
                 """,
-                (tid,),
+                [(v["lat"], v["lon"], vid) for vid, v in missing],
             )
-            verts = cur.fetchall()
-
-            vertices_latlon = []
-            for order_idx, xg, yg, zg in verts:
-                if xg is None or yg is None:
-                    continue
-                lon, lat = transformer.transform(xg, yg)
-                vertices_latlon.append(
-                    {"order": order_idx, "lat": lat, "lon": lon, "z": zg}
-                )
-
-            if vertices_latlon:
-                trenches_data.append(
-                    {
-                        "id": tid,
-                        "code": tcode,
-                        "name": tname,
-                        "project": pname,
-                        "vertices": vertices_latlon,
-                    }
-                )
+            con.commit()
     finally:
         con.close()
 
@@ -232,26 +232,26 @@ def build_qt_stylesheet() -> str:
         background-color: {t['progress_chunk']};
     }}
 
-    /* Sol katman paneli (QTreeWidget) */
-    QTreeWidget {{
+    /* Sol katman paneli (LayerTreeWidget → QTreeView) */
+    QTreeView {{
         background: {t['tree_bg']};
         border: 1px solid {t['tree_border']};
         color: {t['tree_text']};
         font-size: 11px;
     }}
 
-    QTreeWidget::item {{
+    QTreeView::item {{
         padding: 4px 6px;
         color: {t['tree_text']};
         border-bottom: 1px solid {t['tree_item_border']};
     }}
 
-    QTreeWidget::item:selected {{
+    QTreeView::item:selected {{
         background: {t['tree_selected_bg']};
         color: {t['tree_text']};
     }}
 
-    QTreeWidget::item:hover {{
+    QTreeView::item:hover {{
         background: rgba(0, 0, 0, 0.04);
     }}
 
@@ -0,0 +1,452 @@
+# core/tile_cache.py
+"""
+Projeler arası paylaşılan offline tile önbelleği (data/tiles/tile_cache.db).
+
+- Tile'lar kaynak (URL şablonu) + z/x/y ile anahtarlanır; aynı alanı başka
+  katman adı / zoom aralığıyla yeniden indirmek tile'ları çoğaltmaz.
+- Veri içerik adreslidir: images tablosunda SHA-1 → veri; aynı içerikli
+  tile'lar (deniz, boş alan ...) kaynaklar arasında da tek kez saklanır.
+- Her tile'ın son erişim zamanı tutulur (okumalar bellekte biriktirilip
+  toplu yazılır). Toplam boyut kotayı aşınca en uzun süredir kullanılmayan
+  tile'lar silinir (LRU).
+- pins tablosundaki satır aralıkları (kaynak, z, y, x_min..x_max) silinmez;
+  aktif offline katmanların tile'ları buraya sabitlenir (bkz.
+  core.tiles_offline.sync_tile_cache_pins).
+
+Dosya WAL kipindedir: harita (okuyucu) ve indirme (yazar) aynı anda
+çalışabilir. auto_vacuum=INCREMENTAL ile silinen alan diske geri verilir.
+"""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from .utils import TILES_DIR
+
+CACHE_FILE_NAME = "tile_cache.db"
+CACHE_PATH = TILES_DIR / CACHE_FILE_NAME
+
+# Tek transaction'da yazılan en fazla tile
+DEFAULT_BATCH_SIZE = 500
+
+# Erişim zamanları bu kadar okumada ya da saniyede bir yazılır
+_TOUCH_FLUSH_COUNT = 256
+_TOUCH_FLUSH_INTERVAL_S = 30.0
+
+# Tahliyede tek seferde silinen tile sayısı
+_EVICT_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id           INTEGER PRIMARY KEY,
+    url_template TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tiles (
+    source_id   INTEGER NOT NULL,
+    z           INTEGER NOT NULL,
+    y           INTEGER NOT NULL,
+    x           INTEGER NOT NULL,
+    tile_id     TEXT NOT NULL,
+    accessed_at INTEGER NOT NULL,
+    PRIMARY KEY (source_id, z, y, x)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tiles_accessed ON tiles (accessed_at);
+CREATE INDEX IF NOT EXISTS tiles_tile_id ON tiles (tile_id);
+CREATE TABLE IF NOT EXISTS images (
+    tile_id   TEXT PRIMARY KEY,
+    tile_data BLOB NOT NULL,
+    size      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pins (
+    source_id INTEGER NOT NULL,
+    z         INTEGER NOT NULL,
+    y         INTEGER NOT NULL,
+    x_min     INTEGER NOT NULL,
+    x_max     INTEGER NOT NULL,
+    owner     TEXT NOT NULL,
+    PRIMARY KEY (source_id, z, y, x_min, owner)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    id    INTEGER PRIMARY KEY CHECK (id = 1),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (id, bytes) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS images_bytes_insert AFTER INSERT ON images
+BEGIN
+    UPDATE stats SET bytes = bytes + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS images_bytes_delete AFTER DELETE ON images
+BEGIN
+    UPDATE stats SET bytes = bytes - OLD.size WHERE id = 1;
+END;
+"""
+
+# Sabitlenmemiş tile koşulu (t: tiles)
+_NOT_PINNED = """
+    NOT EXISTS (
+        SELECT 1 FROM pins p
+        WHERE p.source_id = t.source_id AND p.z = t.z AND p.y = t.y
+          AND t.x BETWEEN p.x_min AND p.x_max
+    )
+"""
+
+# (y, x_min, x_max)
+PinRun = Tuple[int, int, int]
+
+
+class TileCache:
+    """
+    Paylaşılan tile önbelleği.
+
+        cache = TileCache()
+        store = cache.source_store(url_template)   # download_tiles deposu
+        ...
+        cache.evict(quota_bytes)
+        cache.close()
+
+    Bir örnek tek thread'den kullanılmalıdır; harita ve indirme ayrı
+    örnekler açar.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path | str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.path = Path(path) if path else CACHE_PATH
+        self.batch_size = max(1, int(batch_size))
+        # (source_id, z, x, y) → (tile_id, veri); flush'ta yazılır
+        self._pending: Dict[Tuple[int, int, int, int], Tuple[str, bytes]] = {}
+        # (source_id, z, x, y) → erişim zamanı
+        self._touched: Dict[Tuple[int, int, int, int], int] = {}
+        self._last_touch_flush = time.monotonic()
+        self._source_ids: Dict[str, int] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(
+            str(self.path), timeout=10.0, check_same_thread=False
+        )
+        # auto_vacuum yalnızca tablolar oluşturulmadan önce ayarlanabilir
+        self._con.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._con.execute("PRAGMA journal_mode = WAL")
+        self._con.execute("PRAGMA synchronous = NORMAL")
+        self._con.executescript(_SCHEMA)
+
+    # ------------------ Kaynaklar ------------------
+
+    def source_id(self, url_template: str, create: bool = True) -> Optional[int]:
+        """Kaynak şablonunun id'si; yoksa (create=True ise) eklenir."""
+        source_id = self._source_ids.get(url_template)
+        if source_id is not None:
+            return source_id
+        row = self._con.execute(
+            "SELECT id FROM sources WHERE url_template = ?", (url_template,)
+        ).fetchone()
+        if row is None:
+            if not create:
+                return None
+            with self._con:
+                cur = self._con.execute(
+                    "INSERT INTO sources (url_template) VALUES (?)", (url_template,)
+                )
+            source_id = int(cur.lastrowid)
+        else:
+            source_id = int(row[0])
+        self._source_ids[url_template] = source_id
+        return source_id
+
+    def source_store(self, url_template: str) -> "SourceTileStore":
+        """Tek kaynağa yazan depo (core.tiles_offline.TileStore)."""
+        return SourceTileStore(self, self.source_id(url_template))
+
+    # ------------------ Yazma ------------------
+
+    def put_tile(self, source_id: int, z: int, x: int, y: int, data: bytes) -> None:
+        """Tile'ı yazma kuyruğuna ekler; batch_size dolunca diske yazar."""
+        tile_id = hashlib.sha1(data).hexdigest()
+        self._pending[(source_id, z, x, y)] = (tile_id, data)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Bekleyen tile'ları ve erişim zamanlarını tek transaction'da yazar."""
+        if not self._pending and not self._touched:
+            return
+        pending, self._pending = self._pending, {}
+        touched, self._touched = self._touched, {}
+        self._last_touch_flush = time.monotonic()
+        now = int(time.time())
+        images = {tile_id: data for tile_id, data in pending.values()}
+        with self._con:
+            self._con.executemany(
+                """
+                INSERT OR IGNORE INTO images (tile_id, tile_data, size)
+                VALUES (?, ?, ?)
+                """,
+                ((tile_id, data, len(data)) for tile_id, data in images.items()),
+            )
+            self._con.executemany(
+                """
+                INSERT OR REPLACE INTO tiles
+                    (source_id, z, y, x, tile_id, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (s, z, y, x, tile_id, now)
+                    for (s, z, x, y), (tile_id, _data) in pending.items()
+                ),
+            )
+            self._con.executemany(
+                """
+                UPDATE tiles SET accessed_at = ?
+                WHERE source_id = ? AND z = ? AND y = ? AND x = ?
+                """,
+                ((ts, s, z, y, x) for (s, z, x, y), ts in touched.items()),
+            )
+
+    # ------------------ Okuma ------------------
+
+    def _touch(self, key: Tuple[int, int, int, int]) -> None:
+        self._touched[key] = int(time.time())
+        if (
+            len(self._touched) >= _TOUCH_FLUSH_COUNT
+            or time.monotonic() - self._last_touch_flush >= _TOUCH_FLUSH_INTERVAL_S
+        ):
+            self.flush()
+
+    def get_tile_with_id(
+        self, source_id: int, z: int, x: int, y: int
+    ) -> Optional[Tuple[bytes, str]]:
+        """(veri, tile_id) ya da None; erişim zamanı güncellenir."""
+        key = (source_id, z, x, y)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending[1], pending[0]
+        row = self._con.execute(
+            """
+            SELECT images.tile_data, tiles.tile_id
+            FROM tiles
+            JOIN images ON images.tile_id = tiles.tile_id
+            WHERE tiles.source_id = ? AND tiles.z = ? AND tiles.y = ? AND tiles.x = ?
+            """,
+            (source_id, z, y, x),
+        ).fetchone()
+        if row is None:
+            return None
+        self._touch(key)
+        return bytes(row[0]), row[1]
+
+    def has_tile(self, source_id: int, z: int, x: int, y: int) -> bool:
+        """Tile önbellekte mi; varsa erişim zamanı güncellenir."""
+        key = (source_id, z, x, y)
+        if key in self._pending:
+            return True
+        row = self._con.execute(
+            """
+            SELECT 1 FROM tiles
+            WHERE source_id = ? AND z = ? AND y = ? AND x = ?
+            """,
+            (source_id, z, y, x),
+        ).fetchone()
+        if row is None:
+            return False
+        self._touch(key)
+        return True
+
+    def zoom_range(self, source_id: int) -> Optional[Tuple[int, int]]:
+        """Kaynağın önbellekteki en küçük / en büyük zoom'u (boşsa None)."""
+        row = self._con.execute(
+            "SELECT MIN(z), MAX(z) FROM tiles WHERE source_id = ?", (source_id,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return int(row[0]), int(row[1])
+
+    # ------------------ Boyut / sabitleme / tahliye ------------------
+
+    def total_bytes(self) -> int:
+        """Önbellekteki tile verisinin toplam boyutu (yazılmamışlar hariç)."""
+        row = self._con.execute("SELECT bytes FROM stats WHERE id = 1").fetchone()
+        return int(row[0])
+
+    def pinned_bytes(self) -> int:
+        """Sabitlenmiş tile'ların kullandığı (tekil) veri boyutu."""
+        row = self._con.execute(
+            """
+            SELECT COALESCE(SUM(size), 0) FROM images
+            WHERE tile_id IN (
+                SELECT t.tile_id
+                FROM pins p
+                JOIN tiles t
+                  ON t.source_id = p.source_id AND t.z = p.z AND t.y = p.y
+                 AND t.x BETWEEN p.x_min AND p.x_max
+            )
+            """
+        ).fetchone()
+        return int(row[0])
+
+    def set_pins(
+        self,
+        pins: Iterable[Tuple[str, int, int, Iterable[PinRun]]],
+    ) -> None:
+        """
+        Sabitlemeleri baştan yazar.
+        pins: (sahip, kaynak id, zoom, [(y, x_min, x_max), ...]) dizisi.
+        """
+        with self._con:
+            self._con.execute("DELETE FROM pins")
+            self._con.executemany(
+                """
+                INSERT OR REPLACE INTO pins (source_id, z, y, x_min, x_max, owner)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (source_id, z, y, x_min, x_max, owner)
+                    for owner, source_id, z, runs in pins
+                    for y, x_min, x_max in runs
+                ),
+            )
+
+    def evict(self, quota_bytes: int) -> Tuple[int, int]:
+        """
+        Toplam boyut quota_bytes'a inene kadar en uzun süredir kullanılmayan
+        sabitlenmemiş tile'ları siler; boşalan sayfalar diske geri verilir.
+
+        Dönüş: (silinen tile sayısı, serbest kalan bayt). Sabitlenmiş tile'lar
+        kotayı tek başına aşıyorsa toplam kotanın üstünde kalabilir.
+        """
+        self.flush()
+        before = self.total_bytes()
+        evicted = 0
+        self._delete_orphan_images()
+
+        while True:
+            excess = self.total_bytes() - quota_bytes
+            if excess <= 0:
+                break
+            candidates = self._con.execute(
+                f"""
+                SELECT t.source_id, t.z, t.y, t.x, t.tile_id, i.size
+                FROM tiles t
+                JOIN images i ON i.tile_id = t.tile_id
+                WHERE {_NOT_PINNED}
+                ORDER BY t.accessed_at
+                LIMIT ?
+                """,
+                (_EVICT_BATCH,),
+            ).fetchall()
+            if not candidates:
+                break
+            # Yalnızca fazlalığı karşılayacak kadarı silinir; paylaşılan
+            # veriler boşalmayabilir, döngü boyutu yeniden ölçer
+            rows = []
+            for row in candidates:
+                rows.append(row)
+                excess -= row[5]
+                if excess <= 0:
+                    break
+            with self._con:
+                self._con.executemany(
+                    """
+                    DELETE FROM tiles
+                    WHERE source_id = ? AND z = ? AND y = ? AND x = ?
+                    """,
+                    (r[:4] for r in rows),
+                )
+                # Başka tile'ın kullanmadığı veriler
+                self._con.executemany(
+                    """
+                    DELETE FROM images
+                    WHERE tile_id = ?
+                      AND NOT EXISTS (SELECT 1 FROM tiles WHERE tile_id = ?)
+                    """,
+                    ((r[4], r[4]) for r in {r[4]: r for r in rows}.values()),
+                )
+            evicted += len(rows)
+
+        freed = before - self.total_bytes()
+        if freed > 0:
+            # execute() pragmayı tek adım (tek sayfa) yürütür; executescript
+            # sonuna kadar götürür. WAL da kısaltılır ki alan diske dönsün.
+            self._con.executescript(
+                "PRAGMA incremental_vacuum; PRAGMA wal_checkpoint(TRUNCATE);"
+            )
+        return evicted, freed
+
+    def _delete_orphan_images(self) -> None:
+        """İçeriği değişmiş tile'lardan kalan, kullanılmayan verileri siler."""
+        with self._con:
+            self._con.execute(
+                """
+                DELETE FROM images
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM tiles WHERE tiles.tile_id = images.tile_id
+                )
+                """
+            )
+
+    # ------------------ Yaşam döngüsü ------------------
+
+    def close(self) -> None:
+        self.flush()
+        self._con.close()
+
+    def __enter__(self) -> "TileCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class SourceTileStore:
+    """TileCache'in tek bir kaynağa bakan yüzü (download_tiles deposu)."""
+
+    def __init__(self, cache: TileCache, source_id: int):
+        self.cache = cache
+        self.source_id = source_id
+
+    def has_tile(self, z: int, x: int, y: int) -> bool:
+        return self.cache.has_tile(self.source_id, z, x, y)
+
+    def put_tile(self, z: int, x: int, y: int, data: bytes) -> None:
+        self.cache.put_tile(self.source_id, z, x, y, data)
+
+    def flush(self) -> None:
+        self.cache.flush()
+
+
+def source_zoom_range(
+    url_template: str,
+    path: Optional[Path | str] = None,
+) -> Optional[Tuple[int, int]]:
+    """
+    Kaynağın önbellekteki zoom aralığı; önbellek dosyası yoksa oluşturmadan
+    None döner (harita katman listesi için).
+    """
+    path = Path(path) if path else CACHE_PATH
+    if not path.exists():
+        return None
+    try:
+        con = sqlite3.connect(path.resolve().as_uri() + "?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        row = con.execute(
+            """
+            SELECT MIN(t.z), MAX(t.z)
+            FROM tiles t
+            JOIN sources s ON s.id = t.source_id
+            WHERE s.url_template = ?
+            """,
+            (url_template,),
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        con.close()
+    if row is None or row[0] is None:
+        return None
+    return int(row[0]), int(row[1])
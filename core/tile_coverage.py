@@ -0,0 +1,389 @@
+# core/tile_coverage.py
+"""
+Offline tile kapsama planlayıcısı.
+
+Proje merkezi etrafındaki kare yerine, açma ayak izlerinin ve vektör
+katman sınırlarının birleşimine buffer eklenerek gerçekten gereken tile'lar
+zoom başına hesaplanır. Derin zoom'larda (tile sayısının patladığı yer)
+daha dar bir buffer kullanılabilir.
+
+Hesaplar Web Mercator (EPSG:3857) metre cinsinden yapılır; tile ızgarası da
+aynı projeksiyonda olduğu için tile kutuları ile kesişim birebirdir.
+Sonuç zoom başına satır aralıkları (y, x_min, x_max) olarak tutulur;
+milyonlarca tile için de bellek kullanımı küçük kalır.
+"""
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from shapely.geometry import LineString, Point, Polygon, box
+from shapely.ops import unary_union
+from shapely.prepared import prep
+
+from .coords import get_transformer
+from .db import read_connection
+from .services import load_trenches_for_project
+from .services.map_layers_service import resolve_layer_file
+
+# Web Mercator dünya yarı genişliği (metre)
+_MERC_EXTENT = 20037508.342789244
+_MAX_LAT = 85.05112878
+
+# Bu zoom ve üstünde deep_buffer_m kullanılır
+DEEP_ZOOM_DEFAULT = 17
+
+# Tile boyutu tahmini (örneklem yoksa): uydu görüntüsü JPEG ~20 KB
+ESTIMATED_TILE_BYTES = 20 * 1024
+
+# (y, x_min, x_max)
+TileRun = Tuple[int, int, int]
+
+
+def lonlat_to_mercator(lon: float, lat: float) -> Tuple[float, float]:
+    lat = max(-_MAX_LAT, min(_MAX_LAT, lat))
+    mx = lon * _MERC_EXTENT / 180.0
+    my = math.log(math.tan(math.radians(90.0 + lat) / 2.0)) * _MERC_EXTENT / math.pi
+    return mx, my
+
+
+def mercator_to_lonlat(mx: float, my: float) -> Tuple[float, float]:
+    lon = mx / _MERC_EXTENT * 180.0
+    lat = math.degrees(2.0 * math.atan(math.exp(my / _MERC_EXTENT * math.pi))) - 90.0
+    return lon, lat
+
+
+def _tile_size(z: int) -> float:
+    return 2.0 * _MERC_EXTENT / (1 << z)
+
+
+def _tile_box(z: int, x: int, y: int):
+    size = _tile_size(z)
+    x0 = -_MERC_EXTENT + x * size
+    y1 = _MERC_EXTENT - y * size
+    return box(x0, y1 - size, x0 + size, y1)
+
+
+def _tile_xy(z: int, mx: float, my: float) -> Tuple[int, int]:
+    """Mercator noktasını içeren tile (dünya sınırına kırpılmış)."""
+    size = _tile_size(z)
+    n = (1 << z) - 1
+    x = int((mx + _MERC_EXTENT) // size)
+    y = int((_MERC_EXTENT - my) // size)
+    return min(max(x, 0), n), min(max(y, 0), n)
+
+
+# ---------------------------------------------------------------------------
+# Plan
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class ZoomCoverage:
+    """Tek zoom'daki tile kümesi (satır aralıkları)."""
+
+    zoom: int
+    runs: List[TileRun] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return sum(x_max - x_min + 1 for _y, x_min, x_max in self.runs)
+
+    @property
+    def tile_range(self) -> Optional[Tuple[int, int, int, int]]:
+        """(x_min, x_max, y_min, y_max); boşsa None."""
+        if not self.runs:
+            return None
+        return (
+            min(r[1] for r in self.runs),
+            max(r[2] for r in self.runs),
+            min(r[0] for r in self.runs),
+            max(r[0] for r in self.runs),
+        )
+
+    def iter_tiles(self) -> Iterator[Tuple[int, int, int]]:
+        for y, x_min, x_max in self.runs:
+            for x in range(x_min, x_max + 1):
+                yield self.zoom, x, y
+
+
+@dataclass
+class CoveragePlan:
+    """
+    Zoom başına indirilecek tile'lar.
+
+    source: "features" (açmalar + vektörler) veya "center" (hiç geometri
+    yoksa proje merkezi)
+    bounds: WGS84 (lon_min, lat_min, lon_max, lat_max), en geniş buffer ile
+    """
+
+    zooms: List[ZoomCoverage]
+    bounds: Tuple[float, float, float, float]
+    source: str = "features"
+    tile_bytes: int = ESTIMATED_TILE_BYTES
+
+    @property
+    def total_tiles(self) -> int:
+        return sum(z.count for z in self.zooms)
+
+    @property
+    def estimated_bytes(self) -> int:
+        return self.total_tiles * self.tile_bytes
+
+    def describe(self) -> str:
+        """Onay penceresi için çok satırlı özet."""
+        lines = [f"z{z.zoom}: {_fmt_count(z.count)} tile" for z in self.zooms]
+        mb = self.estimated_bytes / (1024 * 1024)
+        lines.append("")
+        lines.append(
+            f"Toplam: {_fmt_count(self.total_tiles)} tile, tahmini ~{mb:.1f} MB"
+        )
+        return "\n".join(lines)
+
+
+def _fmt_count(n: int) -> str:
+    return f"{n:,}".replace(",", " ")
+
+
+def zoom_coverage(geometry, z: int) -> ZoomCoverage:
+    """Mercator geometrisiyle kesişen z seviyesindeki tile'lar."""
+    coverage = ZoomCoverage(zoom=z)
+    if geometry.is_empty:
+        return coverage
+
+    min_x, min_y, max_x, max_y = geometry.bounds
+    _x0, y_top = _tile_xy(z, min_x, max_y)
+    _x1, y_bottom = _tile_xy(z, max_x, min_y)
+    size = _tile_size(z)
+    prepared = prep(geometry)
+
+    for y in range(y_top, y_bottom + 1):
+        row_top = _MERC_EXTENT - y * size
+        strip = box(min_x - size, row_top - size, max_x + size, row_top)
+        part = geometry.intersection(strip)
+        if part.is_empty:
+            continue
+
+        # Şeritteki parçaların x aralığı aday tile'ları verir; girintili
+        # şekillerde her aday ayrıca test edilir
+        pieces = getattr(part, "geoms", [part])
+        candidates = set()
+        for piece in pieces:
+            p_min_x, _py0, p_max_x, _py1 = piece.bounds
+            x_start, _ = _tile_xy(z, p_min_x, row_top - size / 2)
+            x_end, _ = _tile_xy(z, p_max_x, row_top - size / 2)
+            candidates.update(range(x_start, x_end + 1))
+
+        run_start: Optional[int] = None
+        previous: Optional[int] = None
+        for x in sorted(candidates):
+            hit = prepared.intersects(_tile_box(z, x, y))
+            if hit and run_start is not None and x == previous + 1:
+                previous = x
+                continue
+            if run_start is not None:
+                coverage.runs.append((y, run_start, previous))
+                run_start = None
+            if hit:
+                run_start = previous = x
+        if run_start is not None:
+            coverage.runs.append((y, run_start, previous))
+
+    return coverage
+
+
+# ---------------------------------------------------------------------------
+# Proje geometrileri
+# ---------------------------------------------------------------------------
+
+
+def _walk_coordinates(coords, out_lons: list, out_lats: list) -> None:
+    """GeoJSON 'coordinates' dizisindeki tüm (lon, lat) çiftlerini toplar."""
+    if not coords:
+        return
+    if isinstance(coords[0], (int, float)):
+        out_lons.append(float(coords[0]))
+        out_lats.append(float(coords[1]))
+        return
+    for c in coords:
+        _walk_coordinates(c, out_lons, out_lats)
+
+
+def _geojson_extent(path: str) -> Optional[Tuple[float, float, float, float]]:
+    """GeoJSON dosyasının WGS84 sınırları (lon_min, lat_min, lon_max, lat_max)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    lons: list = []
+    lats: list = []
+    if data.get("type") == "FeatureCollection":
+        features = data.get("features")
+    else:
+        features = [data]
+    for feat in features or []:
+        geom = feat.get("geometry") if feat.get("type") == "Feature" else feat
+        if not geom:
+            continue
+        if geom.get("type") == "GeometryCollection":
+            for g in geom.get("geometries", []):
+                _walk_coordinates(g.get("coordinates"), lons, lats)
+        else:
+            _walk_coordinates(geom.get("coordinates"), lons, lats)
+
+    if not lons:
+        return None
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def _project_info(project_id: int):
+    with read_connection() as con:
+        row = con.execute(
+            """
+            SELECT p.center_x, p.center_y, cs.epsg_code
+            FROM projects p
+            LEFT JOIN coordinate_systems cs
+              ON p.coordinate_system_id = cs.id
+            WHERE p.id = ?
+            """,
+            (project_id,),
+        ).fetchone()
+    if not row:
+        raise RuntimeError("Proje kaydı bulunamadı.")
+    return row[0], row[1], row[2]
+
+
+def project_geometries(project_id: int) -> Tuple[list, Optional[Tuple[float, float]]]:
+    """
+    Projenin kapsama kaynakları (Mercator geometrileri) ve proje merkezi
+    (lon, lat; tanımlı değilse None).
+
+    - Açmalar: köşe noktalarından poligon (2 köşe → çizgi, 1 → nokta)
+    - Vektör katmanlar: GeoJSON sınır kutusu
+    """
+    center_x, center_y, epsg_code = _project_info(project_id)
+    geometries: list = []
+    center: Optional[Tuple[float, float]] = None
+
+    if epsg_code:
+        transformer = get_transformer(epsg_code)
+        if center_x is not None and center_y is not None:
+            center = transformer.transform(center_x, center_y)
+
+        for trench in load_trenches_for_project(project_id, transformer):
+            pts = [
+                lonlat_to_mercator(v["lon"], v["lat"])
+                for v in trench.get("vertices", [])
+                if v.get("lat") is not None and v.get("lon") is not None
+            ]
+            if len(pts) >= 3:
+                geometries.append(Polygon(pts).buffer(0))
+            elif len(pts) == 2:
+                geometries.append(LineString(pts))
+            elif pts:
+                geometries.append(Point(pts[0]))
+
+    with read_connection() as con:
+        rows = con.execute(
+            """
+            SELECT type, file_path
+            FROM map_layers
+            WHERE project_id = ?
+              AND is_active = 1
+              AND LOWER(type) = 'vector'
+            """,
+            (project_id,),
+        ).fetchall()
+    for ltype, file_path in rows:
+        path = resolve_layer_file(ltype, file_path)
+        extent = _geojson_extent(path) if path else None
+        if extent:
+            x0, y0 = lonlat_to_mercator(extent[0], extent[1])
+            x1, y1 = lonlat_to_mercator(extent[2], extent[3])
+            geometries.append(box(x0, y0, x1, y1))
+
+    return geometries, center
+
+
+def plan_coverage(
+    project_id: int,
+    zoom_min: int,
+    zoom_max: int,
+    buffer_m: float,
+    deep_buffer_m: Optional[float] = None,
+    deep_zoom: int = DEEP_ZOOM_DEFAULT,
+    tile_bytes: int = ESTIMATED_TILE_BYTES,
+    use_features: bool = True,
+) -> CoveragePlan:
+    """
+    Açma ayak izleri + vektör sınırlarının birleşimine buffer ekleyip
+    zoom başına tile kümesini hesaplar.
+
+    buffer_m      : zemin üzerindeki metre cinsinden buffer
+    deep_buffer_m : deep_zoom ve üstünde kullanılacak (genelde daha küçük)
+                    buffer; None → buffer_m
+    use_features  : False → eski davranış, proje merkezi etrafında kenarı
+                    2 × buffer_m olan kare
+    Geometri yoksa da proje merkezi etrafındaki kare kullanılır.
+    """
+    if zoom_max < zoom_min:
+        raise ValueError("zoom_max, zoom_min'den küçük olamaz.")
+    if buffer_m < 0 or (deep_buffer_m is not None and deep_buffer_m < 0):
+        raise ValueError("Buffer negatif olamaz.")
+
+    if use_features:
+        geometries, center = project_geometries(project_id)
+    else:
+        center_x, center_y, epsg_code = _project_info(project_id)
+        geometries, center = [], None
+        if epsg_code and center_x is not None and center_y is not None:
+            center = get_transformer(epsg_code).transform(center_x, center_y)
+
+    source = "features"
+    # Yuvarlak buffer (açma çevresi) / kare (merkez; bbox_from_center gibi)
+    cap_style = 1
+    if not geometries:
+        if center is None:
+            raise RuntimeError(
+                "Projede açma / vektör katman yok ve proje merkezi "
+                "(center_x / center_y, EPSG) tanımlı değil."
+            )
+        geometries = [Point(lonlat_to_mercator(*center))]
+        source = "center"
+        cap_style = 3
+
+    base = unary_union(geometries)
+
+    # Mercator ölçeği enlemle büyür: zemindeki metreyi Mercator metresine çevir
+    _lon, lat = mercator_to_lonlat(base.centroid.x, base.centroid.y)
+    scale = 1.0 / max(math.cos(math.radians(lat)), 1e-6)
+
+    buffered = {}
+
+    def area_for(z: int):
+        meters = buffer_m
+        if deep_buffer_m is not None and z >= deep_zoom:
+            meters = deep_buffer_m
+        if meters not in buffered:
+            buffered[meters] = (
+                base.buffer(meters * scale, cap_style=cap_style) if meters > 0 else base
+            )
+        return buffered[meters]
+
+    zooms = [zoom_coverage(area_for(z), z) for z in range(zoom_min, zoom_max + 1)]
+
+    # En geniş alanın sınırları (iki buffer da kullanılmış olabilir)
+    min_x, min_y, max_x, max_y = unary_union(list(buffered.values()) or [base]).bounds
+    lon_min, lat_min = mercator_to_lonlat(min_x, min_y)
+    lon_max, lat_max = mercator_to_lonlat(max_x, max_y)
+
+    return CoveragePlan(
+        zooms=zooms,
+        bounds=(lon_min, lat_min, lon_max, lat_max),
+        source=source,
+        tile_bytes=tile_bytes,
+    )
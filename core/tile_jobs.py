@@ -0,0 +1,347 @@
+# core/tile_jobs.py
+"""
+Offline tile indirme işlerinin kaydı.
+
+Bir iş; parametreleri (kaynak şablonu, depo, zoom aralığı, sınırlar),
+zoom başına tile aralıklarını (dikdörtgen ya da kapsama planından gelen
+satır aralıkları) ve ilerlemeyi, inemeyen tile listesini
+veritabanında tutar. Böylece yarıda kalan (kapatılan, iptal edilen,
+çöken) bir indirme kaldığı yerden sürdürülebilir.
+
+Durumlar:
+  pending    : oluşturuldu, henüz çalışmadı
+  running    : çalışıyor (uygulama çökerse bu durumda kalır → yarım iş)
+  paused     : kullanıcı durdurdu
+  incomplete : bitti ama inemeyen tile'lar var
+  completed  : tüm tile'lar depoda
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .db import db_connection, read_connection
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_PAUSED = "paused"
+JOB_STATUS_INCOMPLETE = "incomplete"
+JOB_STATUS_COMPLETED = "completed"
+
+
+@dataclass
+class TileJobZoom:
+    """
+    Bir işin tek zoom seviyesi: tile aralığı ve ilerleme.
+
+    runs verilmişse tile kümesi bu satır aralıklarıdır (y, x_min, x_max);
+    x/y min-max yalnızca kapsayan dikdörtgendir. None → dikdörtgenin tamamı.
+    """
+
+    zoom: int
+    x_min: int
+    x_max: int
+    y_min: int
+    y_max: int
+    total: int
+    done: int = 0
+    failed: int = 0
+    runs: Optional[List[Tuple[int, int, int]]] = None
+
+
+@dataclass
+class TileDownloadJob:
+    id: int
+    project_id: int
+    layer_name: str
+    tile_template: str
+    storage: str
+    store_path: str
+    zoom_min: int
+    zoom_max: int
+    bounds: Optional[Tuple[float, float, float, float]]
+    status: str
+    total_tiles: int
+    done_tiles: int
+    failed_tiles: int
+    updated_at: str = ""
+    zooms: List[TileJobZoom] = field(default_factory=list)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status == JOB_STATUS_COMPLETED
+
+    def summary(self) -> str:
+        """Arayüzde gösterilecek tek satırlık özet."""
+        text = (
+            f"#{self.id} {self.layer_name} (z{self.zoom_min}–{self.zoom_max}): "
+            f"{self.done_tiles}/{self.total_tiles}"
+        )
+        if self.failed_tiles:
+            text += f", {self.failed_tiles} hatalı"
+        return text
+
+
+def _bounds_to_text(bounds: Optional[Tuple[float, float, float, float]]):
+    if bounds is None:
+        return None
+    return ",".join(f"{v:.7f}" for v in bounds)
+
+
+def _bounds_from_text(text: Optional[str]):
+    if not text:
+        return None
+    try:
+        values = tuple(float(v) for v in text.split(","))
+    except ValueError:
+        return None
+    return values if len(values) == 4 else None
+
+
+_JOB_COLUMNS = """
+    id, project_id, layer_name, tile_template, storage, store_path,
+    zoom_min, zoom_max, bounds, status, total_tiles, done_tiles,
+    failed_tiles, updated_at
+"""
+
+
+def _job_from_row(row) -> TileDownloadJob:
+    return TileDownloadJob(
+        id=row[0],
+        project_id=row[1],
+        layer_name=row[2],
+        tile_template=row[3],
+        storage=row[4],
+        store_path=row[5],
+        zoom_min=row[6],
+        zoom_max=row[7],
+        bounds=_bounds_from_text(row[8]),
+        status=row[9],
+        total_tiles=row[10],
+        done_tiles=row[11],
+        failed_tiles=row[12],
+        updated_at=row[13] or "",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Oluşturma / okuma
+# ---------------------------------------------------------------------------
+
+
+def create_job(
+    project_id: int,
+    layer_name: str,
+    tile_template: str,
+    storage: str,
+    store_path: str,
+    zooms: Iterable[TileJobZoom],
+    bounds: Optional[Tuple[float, float, float, float]] = None,
+) -> int:
+    """Yeni iş kaydı oluşturur ve id'sini döner."""
+    zooms = list(zooms)
+    if not zooms:
+        raise ValueError("İş en az bir zoom seviyesi içermeli.")
+
+    with db_connection() as con:
+        cur = con.execute(
+            """
+            INSERT INTO tile_download_jobs
+                (project_id, layer_name, tile_template, storage, store_path,
+                 zoom_min, zoom_max, bounds, status, total_tiles)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                project_id,
+                layer_name,
+                tile_template,
+                storage,
+                store_path,
+                min(z.zoom for z in zooms),
+                max(z.zoom for z in zooms),
+                _bounds_to_text(bounds),
+                JOB_STATUS_PENDING,
+                sum(z.total for z in zooms),
+            ),
+        )
+        job_id = int(cur.lastrowid)
+        con.executemany(
+            """
+            INSERT INTO tile_download_job_zooms
+                (job_id, zoom, x_min, x_max, y_min, y_max, total)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (job_id, z.zoom, z.x_min, z.x_max, z.y_min, z.y_max, z.total)
+                for z in zooms
+            ],
+        )
+        con.executemany(
+            """
+            INSERT INTO tile_download_job_runs (job_id, zoom, y, x_min, x_max)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                (job_id, z.zoom, y, x_min, x_max)
+                for z in zooms
+                if z.runs
+                for y, x_min, x_max in z.runs
+            ),
+        )
+    return job_id
+
+
+def get_job(job_id: int) -> Optional[TileDownloadJob]:
+    """İşi zoom satırları (ve varsa satır aralıkları) ile döner; yoksa None."""
+    with read_connection() as con:
+        row = con.execute(
+            f"SELECT {_JOB_COLUMNS} FROM tile_download_jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = _job_from_row(row)
+        job.zooms = [
+            TileJobZoom(*r)
+            for r in con.execute(
+                """
+                SELECT zoom, x_min, x_max, y_min, y_max, total, done, failed
+                FROM tile_download_job_zooms
+                WHERE job_id = ?
+                ORDER BY zoom
+                """,
+                (job_id,),
+            )
+        ]
+        by_zoom = {zm.zoom: zm for zm in job.zooms}
+        for zoom, y, x_min, x_max in con.execute(
+            """
+            SELECT zoom, y, x_min, x_max
+            FROM tile_download_job_runs
+            WHERE job_id = ?
+            ORDER BY zoom, y, x_min
+            """,
+            (job_id,),
+        ):
+            zm = by_zoom.get(zoom)
+            if zm is not None:
+                if zm.runs is None:
+                    zm.runs = []
+                zm.runs.append((y, x_min, x_max))
+    return job
+
+
+def list_unfinished_jobs(project_id: int) -> List[TileDownloadJob]:
+    """Projenin tamamlanmamış işleri (yeniden eskiye; zoom satırları yok)."""
+    with read_connection() as con:
+        rows = con.execute(
+            f"""
+            SELECT {_JOB_COLUMNS}
+            FROM tile_download_jobs
+            WHERE project_id = ?
+              AND status != ?
+            ORDER BY id DESC
+            """,
+            (project_id, JOB_STATUS_COMPLETED),
+        ).fetchall()
+    return [_job_from_row(r) for r in rows]
+
+
+def failed_tiles(job_id: int) -> List[Tuple[int, int, int, int, str]]:
+    """İnemeyen tile'lar: (z, x, y, deneme sayısı, son hata)."""
+    with read_connection() as con:
+        return [
+            tuple(r)
+            for r in con.execute(
+                """
+                SELECT z, x, y, attempts, last_error
+                FROM tile_download_failures
+                WHERE job_id = ?
+                ORDER BY z, x, y
+                """,
+                (job_id,),
+            )
+        ]
+
+
+# ---------------------------------------------------------------------------
+# İlerleme / durum
+# ---------------------------------------------------------------------------
+
+
+def set_job_status(job_id: int, status: str) -> None:
+    with db_connection() as con:
+        con.execute(
+            """
+            UPDATE tile_download_jobs
+            SET status = ?, updated_at = datetime('now')
+            WHERE id = ?
+            """,
+            (status, job_id),
+        )
+
+
+def checkpoint_job(
+    job_id: int,
+    zoom_progress: Dict[int, Tuple[int, int]],
+    failures: Iterable[Tuple[int, int, int, str]] = (),
+    recovered: Iterable[Tuple[int, int, int]] = (),
+) -> None:
+    """
+    İlerlemeyi tek transaction'da yazar.
+
+    zoom_progress : {zoom: (done, failed)} (o çalıştırmadaki güncel değerler)
+    failures      : bu aralıkta inemeyen tile'lar (z, x, y, hata)
+    recovered     : daha önce hatalı olup bu kez inen tile'lar (z, x, y)
+
+    Çağıran, depoyu (MBTiles / klasör) bundan ÖNCE flush etmelidir; böylece
+    kayıtta "inmiş" görünen tile diskte de vardır.
+    """
+    with db_connection() as con:
+        con.executemany(
+            """
+            UPDATE tile_download_job_zooms
+            SET done = ?, failed = ?
+            WHERE job_id = ? AND zoom = ?
+            """,
+            [(d, f, job_id, z) for z, (d, f) in zoom_progress.items()],
+        )
+        con.executemany(
+            """
+            INSERT INTO tile_download_failures (job_id, z, x, y, attempts, last_error)
+            VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT(job_id, z, x, y) DO UPDATE SET
+                attempts = attempts + 1,
+                last_error = excluded.last_error
+            """,
+            [(job_id, z, x, y, err) for z, x, y, err in failures],
+        )
+        con.executemany(
+            "DELETE FROM tile_download_failures WHERE job_id = ? AND z = ? "
+            "AND x = ? AND y = ?",
+            [(job_id, z, x, y) for z, x, y in recovered],
+        )
+        con.execute(
+            """
+            UPDATE tile_download_jobs
+            SET done_tiles = (
+                    SELECT COALESCE(SUM(done), 0)
+                    FROM tile_download_job_zooms WHERE job_id = ?
+                ),
+                failed_tiles = (
+                    SELECT COUNT(*) FROM tile_download_failures WHERE job_id = ?
+                ),
+                updated_at = datetime('now')
+            WHERE id = ?
+            """,
+            (job_id, job_id, job_id),
+        )
+
+
+def delete_job(job_id: int) -> None:
+    """İş kaydını (zoom satırları ve hata listesiyle) siler; depoya dokunmaz."""
+    with db_connection() as con:
+        con.execute("DELETE FROM tile_download_job_runs WHERE job_id = ?", (job_id,))
+        con.execute("DELETE FROM tile_download_failures WHERE job_id = ?", (job_id,))
+        con.execute("DELETE FROM tile_download_job_zooms WHERE job_id = ?", (job_id,))
+        con.execute("DELETE FROM tile_download_jobs WHERE id = ?", (job_id,))
@@ -2,19 +2,83 @@
 from __future__ import annotations
 import re
 import math
-import urllib.request
+import http.client
+import os
+import shutil
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Optional
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+from urllib.parse import urljoin, urlsplit
 
-from pyproj import Transformer
+from .coords import get_transformer
+from .db import (
+    TileDownloadSettings,
+    get_active_project_id,
+    get_connection,
+    get_tile_download_settings,
+)
+from .mbtiles import MBTiles, import_tile_folder, tile_format
+from .tile_cache import CACHE_FILE_NAME, PinRun, TileCache
+from .tile_jobs import (
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_INCOMPLETE,
+    JOB_STATUS_PAUSED,
+    JOB_STATUS_RUNNING,
+    TileDownloadJob,
+    TileJobZoom,
+    checkpoint_job,
+    create_job,
+    failed_tiles,
+    get_job,
+    set_job_status,
+)
+from .utils import BASE_DIR, TILES_DIR, ensure_dir, local_tile_dir
 
-from .db import get_connection, get_active_project_id
-from .utils import TILES_DIR, ensure_dir
+if TYPE_CHECKING:
+    from .tile_coverage import CoveragePlan
 
 
 ProgressCallback = Callable[[int, int, str], None]
 # step, total, message
 
+# (z, x, y)
+TileIndex = Tuple[int, int, int]
+
+# Tile sunucuları (özellikle OSM) tanımlayıcı bir User-Agent ister
+USER_AGENT = "ArcSys/1.0 (offline tile cache)"
+
+# Yönlendirme zincirinde izlenecek en fazla adım
+_MAX_REDIRECTS = 3
+
+# Geçici hatalarda (bağlantı, 429, 5xx) tile başına yeniden deneme ve
+# üstel bekleme (Retry-After varsa o kullanılır, üst sınır _RETRY_MAX_DELAY_S)
+_MAX_RETRIES = 3
+_RETRY_BASE_DELAY_S = 1.0
+_RETRY_MAX_DELAY_S = 30.0
+_TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Tile sonucu: "downloaded" | "skipped" | "failed"
+TILE_DOWNLOADED = "downloaded"
+TILE_SKIPPED = "skipped"
+TILE_FAILED = "failed"
+
+# z, x, y, sonuç, hata mesajı
+TileResultCallback = Callable[[int, int, int, str, str], None]
+
 
 def bbox_from_center(lat: float, lon: float, buffer_km: float):
     buffer_m = buffer_km * 1000.0
@@ -36,6 +100,666 @@ def deg2num(lat_deg: float, lon_deg: float, zoom: int):
     return xtile, ytile
 
 
+# ---------------------------------------------------------------------------
+# Eşzamanlı indirme motoru
+# ---------------------------------------------------------------------------
+
+
+class _RateLimiter:
+    """
+    Tüm worker'lar için ortak istek hızı sınırı (saniyede en fazla `rate`).
+    Her istek bir sonraki boş zaman dilimini rezerve eder ve ona kadar bekler.
+    """
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _ConnectionPool:
+    """
+    Thread başına, host başına tek keep-alive HTTP(S) bağlantısı.
+
+    Worker thread'leri bağlantılarını tekrar tekrar kullanır; böylece her tile
+    için yeni TCP/TLS el sıkışması yapılmaz. close_all() indirme sonunda
+    bütün bağlantıları kapatır.
+    """
+
+    def __init__(self, timeout_s: float):
+        self._timeout = timeout_s
+        self._local = threading.local()
+        self._all: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conns: Dict[Tuple[str, str], http.client.HTTPConnection] = getattr(
+            self._local, "conns", None
+        ) or {}
+        self._local.conns = conns
+
+        conn = conns.get((scheme, netloc))
+        if conn is None:
+            cls = (
+                http.client.HTTPSConnection
+                if scheme == "https"
+                else http.client.HTTPConnection
+            )
+            conn = cls(netloc, timeout=self._timeout)
+            conns[(scheme, netloc)] = conn
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    def _drop(self, scheme: str, netloc: str) -> None:
+        conn = self._local.conns.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def get(self, url: str) -> Tuple[int, bytes, Optional[str], Optional[str]]:
+        """
+        GET isteği yapar.
+        Dönüş: (status, gövde, Location başlığı, Retry-After başlığı).
+
+        Sunucunun kapattığı (bayat) keep-alive bağlantısı bir kez yeniden
+        açılarak denenir.
+        """
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive"}
+
+        for attempt in (0, 1):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+                # Bağlantının yeniden kullanılabilmesi için gövde hep okunur
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                self._drop(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+                continue
+            if resp.will_close:
+                self._drop(parts.scheme, parts.netloc)
+            return (
+                resp.status,
+                body,
+                resp.getheader("Location"),
+                resp.getheader("Retry-After"),
+            )
+        raise RuntimeError("unreachable")
+
+    def close_all(self) -> None:
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class _TileFetchError(Exception):
+    """Tile inemedi. transient → yeniden denemeye değer (bağlantı, 429, 5xx)."""
+
+    def __init__(
+        self,
+        message: str,
+        transient: bool,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.transient = transient
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After (saniye biçimi); tarih biçimi / geçersiz → None."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def _fetch_tile(pool: _ConnectionPool, url: str) -> bytes:
+    """Tile'ı indirir (yönlendirmeleri izler); başarısızsa _TileFetchError."""
+    for _ in range(_MAX_REDIRECTS + 1):
+        try:
+            status, body, location, retry_after = pool.get(url)
+        except (http.client.HTTPException, OSError) as e:
+            raise _TileFetchError(f"Bağlantı hatası: {e}", transient=True) from e
+        if status in (301, 302, 303, 307, 308) and location:
+            url = urljoin(url, location)
+            continue
+        if status == 200 and body:
+            return body
+        if status == 200:
+            raise _TileFetchError("Boş yanıt", transient=False)
+        raise _TileFetchError(
+            f"HTTP {status}",
+            transient=status in _TRANSIENT_STATUS,
+            retry_after=_parse_retry_after(retry_after),
+        )
+    raise _TileFetchError("Çok fazla yönlendirme", transient=False)
+
+
+# ---------------------------------------------------------------------------
+# Tile depoları (klasör / MBTiles)
+# ---------------------------------------------------------------------------
+
+
+class TileStore(Protocol):
+    """download_tiles'ın yazdığı depo (FolderTileStore veya MBTiles)."""
+
+    def has_tile(self, z: int, x: int, y: int) -> bool: ...
+
+    def put_tile(self, z: int, x: int, y: int, data: bytes) -> None: ...
+
+    def flush(self) -> None: ...
+
+
+class FolderTileStore:
+    """Eski düzen: root/{z}/{x}/{y}.png dosyaları."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, z: int, x: int, y: int) -> Path:
+        return self.root / str(z) / str(x) / f"{y}.png"
+
+    def has_tile(self, z: int, x: int, y: int) -> bool:
+        return self._path(z, x, y).exists()
+
+    def put_tile(self, z: int, x: int, y: int, data: bytes) -> None:
+        # Önce geçici dosyaya yaz; yarım kalan dosya "var" sayılmasın
+        out_path = self._path(z, x, y)
+        ensure_dir(out_path.parent)
+        tmp_path = out_path.with_name(out_path.name + ".part")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, out_path)
+
+    def flush(self) -> None:
+        pass
+
+
+@dataclass
+class TileDownloadStats:
+    """download_tiles sonucu."""
+
+    total: int = 0
+    downloaded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    cancelled: bool = False
+    # Depoya yazılan bayt; max_bytes aşılınca budget_exceeded (ve cancelled)
+    bytes_written: int = 0
+    budget_exceeded: bool = False
+
+
+def download_tiles(
+    tiles: Iterable[TileIndex],
+    total: int,
+    tile_template: str,
+    store: TileStore,
+    progress_cb: Optional[ProgressCallback] = None,
+    settings: Optional[TileDownloadSettings] = None,
+    on_result: Optional[TileResultCallback] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    max_bytes: Optional[int] = None,
+) -> TileDownloadStats:
+    """
+    Verilen tile'ları eşzamanlı indirip store'a yazar.
+
+    - settings.max_workers kadar thread, her biri host başına tek keep-alive
+      bağlantı kullanır; settings.rate_limit tüm thread'ler için ortak sınırdır.
+    - Depoda zaten olan tile'lar ağa çıkılmadan atlanır.
+    - Worker'lar sadece indirir; store'a yazma ve progress_cb çağıran
+      thread'de yapılır (MBTiles tek yazarlı SQLite bağlantısı kullanır).
+    - Kuyrukta en fazla max_workers * 4 iş bekler; milyonlarca tile için bile
+      bellek kullanımı sabit kalır.
+    - Geçici hatalar tile başına _MAX_RETRIES kez, üstel beklemeyle denenir.
+    - on_result(z, x, y, sonuç, hata) her tile için çağıran thread'den
+      çağrılır (iş kaydı / checkpoint için).
+    - should_cancel() True dönerse yeni tile gönderilmez, bekleyenler iptal
+      edilir ve stats.cancelled işaretlenir; o ana kadar inenler yazılır.
+    - max_bytes verilirse yazılan toplam bu sınıra ulaşınca indirme aynı
+      şekilde durdurulur ve stats.budget_exceeded işaretlenir.
+    """
+    settings = settings or get_tile_download_settings()
+    max_workers = max(1, int(settings.max_workers))
+    limiter = _RateLimiter(float(settings.rate_limit))
+    pool = _ConnectionPool(float(settings.timeout_s))
+    stats = TileDownloadStats(total=total)
+
+    cancel_event = threading.Event()
+
+    def worker(z: int, x: int, y: int) -> Tuple[Optional[bytes], str]:
+        url = tile_template.format(z=z, x=x, y=y)
+        delay = _RETRY_BASE_DELAY_S
+        error = ""
+        for attempt in range(_MAX_RETRIES + 1):
+            if cancel_event.is_set():
+                return None, "İptal edildi"
+            limiter.acquire()
+            try:
+                return _fetch_tile(pool, url), ""
+            except _TileFetchError as e:
+                error = str(e)
+                if not e.transient or attempt == _MAX_RETRIES:
+                    break
+                wait_s = e.retry_after if e.retry_after is not None else delay
+                # İptal edilirse beklemeyi hemen bırak
+                cancel_event.wait(min(wait_s, _RETRY_MAX_DELAY_S))
+                delay *= 2
+        return None, error
+
+    def cancelled() -> bool:
+        if not cancel_event.is_set() and should_cancel and should_cancel():
+            cancel_event.set()
+        return cancel_event.is_set()
+
+    def report(z: int, x: int, y: int, outcome: str, error: str = "") -> None:
+        if on_result:
+            on_result(z, x, y, outcome, error)
+        if progress_cb:
+            done = stats.downloaded + stats.skipped + stats.failed
+            progress_cb(
+                done,
+                total,
+                f"Tile indiriliyor: z={z}, x={x}, y={y} ({done}/{total})",
+            )
+
+    pending: Dict[Future, TileIndex] = {}
+    max_pending = max_workers * 4
+
+    def collect(fut: Future) -> None:
+        z, x, y = pending.pop(fut)
+        try:
+            data, error = fut.result()
+            if data is not None:
+                store.put_tile(z, x, y, data)
+        except Exception as e:
+            # Hata durumunda o tile'ı atla, süreci durdurma
+            data, error = None, str(e)
+        if data is not None:
+            stats.downloaded += 1
+            stats.bytes_written += len(data)
+            if max_bytes is not None and stats.bytes_written >= max_bytes:
+                stats.budget_exceeded = True
+                cancel_event.set()
+            report(z, x, y, TILE_DOWNLOADED)
+        elif not cancel_event.is_set():
+            stats.failed += 1
+            report(z, x, y, TILE_FAILED, error)
+        # İptal sırasında inemeyenler hata sayılmaz; sonraki çalıştırmada denenir
+
+    def drain(block_until: int) -> None:
+        while len(pending) > block_until and not cancelled():
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                collect(fut)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="tile-download"
+    )
+    try:
+        for z, x, y in tiles:
+            if cancelled():
+                break
+            if store.has_tile(z, x, y):
+                stats.skipped += 1
+                report(z, x, y, TILE_SKIPPED)
+                continue
+
+            fut = executor.submit(worker, z, x, y)
+            pending[fut] = (z, x, y)
+            if len(pending) >= max_pending:
+                drain(max_pending - 1)
+
+        drain(0)
+    finally:
+        if pending:
+            cancel_event.set()
+            for fut in list(pending):
+                fut.cancel()
+        executor.shutdown(wait=True)
+        # Çalışmakta olanlardan inmiş olanları kaybetme
+        for fut in list(pending):
+            if fut.cancelled():
+                pending.pop(fut)
+            else:
+                collect(fut)
+        pool.close_all()
+        store.flush()
+
+    stats.cancelled = cancel_event.is_set()
+
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Ön tahmin (dry-run) ve disk bütçesi
+# ---------------------------------------------------------------------------
+
+_MB = 1024 * 1024
+
+# Disk bütçesinden bağımsız olarak diskte her zaman boş bırakılan alan
+_MIN_FREE_BYTES = 512 * _MB
+
+# Boyut / süre tahmini için indirilen örnek tile sayısı
+_SAMPLES_PER_ZOOM = 2
+_MAX_SAMPLES = 16
+
+
+class TileBudgetError(RuntimeError):
+    """İş disk bütçesini ya da diskteki boş alanı aşıyor."""
+
+
+def tile_storage_bytes(root: Optional[Path] = None) -> int:
+    """Offline tile deposunun (varsayılan data/tiles) diskteki toplam boyutu."""
+    total = 0
+    stack = [root or TILES_DIR]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    return total
+
+
+def _free_disk_bytes(path: Path) -> int:
+    # Depo klasörü henüz yoksa bulunduğu diske bakılır
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return shutil.disk_usage(path).free
+
+
+@dataclass
+class DiskBudget:
+    """Tile deposunun disk durumu."""
+
+    used_bytes: int
+    budget_bytes: int  # 0 → sınırsız
+    free_bytes: int
+    # Paylaşılan önbellekte sabitlenmemiş (tahliye edilebilir) veri
+    reclaimable_bytes: int = 0
+
+    @property
+    def available_bytes(self) -> int:
+        """
+        Bütçe ve asgari boş alan gözetilerek yazılabilecek bayt (önbellekten
+        tahliye edilebilecekler dahil).
+        """
+        room = self.free_bytes - _MIN_FREE_BYTES + self.reclaimable_bytes
+        if self.budget_bytes:
+            room = min(
+                room, self.budget_bytes - self.used_bytes + self.reclaimable_bytes
+            )
+        return max(0, room)
+
+    def budget_needed_for(self, nbytes: int) -> Optional[int]:
+        """
+        nbytes'ın sığması için gereken bütçe (bayt); diskteki boş alan
+        yetmiyorsa None (bütçeyi artırmak çözüm değil).
+        """
+        if nbytes > self.free_bytes - _MIN_FREE_BYTES + self.reclaimable_bytes:
+            return None
+        return self.used_bytes - self.reclaimable_bytes + nbytes
+
+    def describe(self) -> str:
+        used = self.used_bytes / _MB
+        if self.budget_bytes:
+            text = (
+                f"Tile deposu: {_fmt_num(used, 1)} / "
+                f"{_fmt_num(self.budget_bytes / _MB, 1)} MB"
+            )
+        else:
+            text = f"Tile deposu: {_fmt_num(used, 1)} MB (bütçe sınırsız)"
+        return text + f", diskte boş: {_fmt_num(self.free_bytes / _MB)} MB"
+
+
+def get_disk_budget(
+    settings: Optional[TileDownloadSettings] = None,
+    pin_job_ids: Iterable[int] = (),
+) -> DiskBudget:
+    """
+    Deponun kullandığı alan, ayarlardaki bütçe, diskteki boş alan ve
+    paylaşılan önbellekten tahliye edilebilecek veri. Önbellek sabitlemeleri
+    bu sırada güncellenir (pin_job_ids: ayrıca sabitlenecek işler).
+    """
+    settings = settings or get_tile_download_settings()
+    reclaimable = 0
+    if _cache_path().exists():
+        with TileCache(_cache_path()) as cache:
+            sync_tile_cache_pins(cache, pin_job_ids)
+            reclaimable = max(0, cache.total_bytes() - cache.pinned_bytes())
+    return DiskBudget(
+        used_bytes=tile_storage_bytes(),
+        budget_bytes=int(float(settings.disk_budget_mb) * _MB),
+        free_bytes=_free_disk_bytes(TILES_DIR),
+        reclaimable_bytes=reclaimable,
+    )
+
+
+def check_disk_budget(
+    estimated_bytes: int,
+    settings: Optional[TileDownloadSettings] = None,
+) -> DiskBudget:
+    """
+    estimated_bytes bütçeye ve boş alana sığmıyorsa TileBudgetError;
+    sığıyorsa disk durumunu döner.
+    """
+    budget = get_disk_budget(settings)
+    if estimated_bytes > budget.available_bytes:
+        raise TileBudgetError(
+            f"Tahmini {estimated_bytes / _MB:.1f} MB yer gerekiyor, "
+            f"kullanılabilir {budget.available_bytes / _MB:.1f} MB.\n"
+            f"{budget.describe()}"
+        )
+    return budget
+
+
+@dataclass
+class TileDownloadEstimate:
+    """
+    estimate_tile_download sonucu: zoom başına tile sayısı, örnek tile'lardan
+    ölçülen boyut / süre ve disk durumu. Hiçbir şey depoya yazılmaz.
+    """
+
+    zoom_counts: List[Tuple[int, int]]
+    # zoom → ortalama tile boyutu (örneklenmeyen zoom'lar en yakın örnekten)
+    zoom_tile_bytes: Dict[int, int]
+    sampled: int
+    # Tek isteğin tipik süresi (örnek yoksa None)
+    seconds_per_tile: Optional[float]
+    max_workers: int
+    rate_limit: float
+    disk: DiskBudget
+    sample_errors: List[str] = field(default_factory=list)
+
+    @property
+    def total_tiles(self) -> int:
+        return sum(count for _z, count in self.zoom_counts)
+
+    @property
+    def estimated_bytes(self) -> int:
+        return sum(count * self.zoom_tile_bytes[z] for z, count in self.zoom_counts)
+
+    @property
+    def estimated_seconds(self) -> Optional[float]:
+        if self.seconds_per_tile is None:
+            return None
+        throughput = self.max_workers / max(self.seconds_per_tile, 1e-3)
+        if self.rate_limit > 0:
+            throughput = min(throughput, self.rate_limit)
+        return self.total_tiles / throughput
+
+    @property
+    def fits_budget(self) -> bool:
+        return self.estimated_bytes <= self.disk.available_bytes
+
+    def describe(self) -> str:
+        """Onay penceresi için çok satırlı özet."""
+        lines = [
+            f"z{z}: {_fmt_num(count)} tile, "
+            f"~{_fmt_num(count * self.zoom_tile_bytes[z] / _MB, 1)} MB"
+            for z, count in self.zoom_counts
+        ]
+        lines.append("")
+        lines.append(
+            f"Toplam: {_fmt_num(self.total_tiles)} tile, "
+            f"tahmini ~{_fmt_num(self.estimated_bytes / _MB, 1)} MB"
+        )
+        seconds = self.estimated_seconds
+        if seconds is None:
+            lines.append("Süre tahmin edilemedi (örnek tile indirilemedi).")
+        else:
+            limit = ""
+            if self.rate_limit > 0:
+                limit = f", en fazla {self.rate_limit:g} istek/sn"
+            lines.append(
+                f"Tahmini süre: ~{_format_duration(seconds)} "
+                f"({self.max_workers} bağlantı{limit})"
+            )
+        if self.sample_errors:
+            lines.append(f"Örnek hataları: {', '.join(self.sample_errors[:3])}")
+        lines.append(self.disk.describe())
+        return "\n".join(lines)
+
+
+def _fmt_num(value: float, decimals: int = 0) -> str:
+    """Binlik ayırıcı olarak boşluk (12 345 / 1 234.5)."""
+    return f"{value:,.{decimals}f}".replace(",", " ")
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours} sa {minutes} dk"
+    if minutes:
+        return f"{minutes} dk {secs} sn"
+    return f"{secs} sn"
+
+
+def _sample_tiles(plan: "CoveragePlan") -> List[TileIndex]:
+    """Zoom başına birkaç tile; tile sayısı çok olan (derin) zoom'lar önce."""
+    samples: List[TileIndex] = []
+    for zc in sorted(plan.zooms, key=lambda zc: zc.count, reverse=True):
+        runs = zc.runs
+        if not runs:
+            continue
+        k = min(_SAMPLES_PER_ZOOM, len(runs), _MAX_SAMPLES - len(samples))
+        for i in range(k):
+            # Satırlara yayılmış, satırın ortasındaki tile
+            y, x_min, x_max = runs[(2 * i + 1) * len(runs) // (2 * k)]
+            samples.append((zc.zoom, (x_min + x_max) // 2, y))
+        if len(samples) >= _MAX_SAMPLES:
+            break
+    return samples
+
+
+def estimate_tile_download(
+    plan: "CoveragePlan",
+    tile_template: str,
+    settings: Optional[TileDownloadSettings] = None,
+) -> TileDownloadEstimate:
+    """
+    İndirme öncesi tahmin (dry-run): planın zoom başına tile sayıları,
+    birkaç örnek tile indirilerek ölçülen ortalama boyut ve istek süresi,
+    ayarlardaki eşzamanlılıkla tahmini süre ve disk bütçesi durumu.
+
+    Örnekler depoya yazılmaz. Hiç örnek inemezse boyut için planın
+    varsayılan tile boyutu kullanılır.
+    """
+    settings = settings or get_tile_download_settings()
+    samples = _sample_tiles(plan)
+    sizes: Dict[int, List[int]] = {}
+    durations: List[float] = []
+    errors: List[str] = []
+
+    pool = _ConnectionPool(float(settings.timeout_s))
+    limiter = _RateLimiter(float(settings.rate_limit))
+
+    def fetch(z: int, x: int, y: int) -> Tuple[int, Optional[int], float, str]:
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            data = _fetch_tile(pool, tile_template.format(z=z, x=x, y=y))
+        except _TileFetchError as e:
+            return z, None, 0.0, str(e)
+        return z, len(data), time.monotonic() - started, ""
+
+    workers = max(1, min(int(settings.max_workers), len(samples) or 1))
+    try:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="tile-estimate"
+        ) as executor:
+            for z, size, elapsed, error in executor.map(lambda t: fetch(*t), samples):
+                if size is None:
+                    errors.append(error)
+                    continue
+                sizes.setdefault(z, []).append(size)
+                durations.append(elapsed)
+    finally:
+        pool.close_all()
+
+    zoom_tile_bytes: Dict[int, int] = {}
+    for zc in plan.zooms:
+        if zc.zoom in sizes:
+            zoom_tile_bytes[zc.zoom] = int(statistics.mean(sizes[zc.zoom]))
+        elif sizes:
+            nearest = min(sizes, key=lambda z: abs(z - zc.zoom))
+            zoom_tile_bytes[zc.zoom] = int(statistics.mean(sizes[nearest]))
+        else:
+            zoom_tile_bytes[zc.zoom] = plan.tile_bytes
+
+    return TileDownloadEstimate(
+        zoom_counts=[(zc.zoom, zc.count) for zc in plan.zooms],
+        zoom_tile_bytes=zoom_tile_bytes,
+        sampled=len(durations),
+        # İlk istekler bağlantı kurulumunu da içerir; medyan daha temsilî
+        seconds_per_tile=statistics.median(durations) if durations else None,
+        max_workers=max(1, int(settings.max_workers)),
+        rate_limit=float(settings.rate_limit),
+        disk=get_disk_budget(settings),
+        sample_errors=errors,
+    )
+
+
+def _iter_tiles(
+    zoom_ranges: List[Tuple[int, int, int, int, int]],
+) -> Iterator[TileIndex]:
+    for z, x_min, x_max, y_min, y_max in zoom_ranges:
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                yield z, x, y
+
+
 DEFAULT_ARCGIS_URL = (
     "https://services.arcgisonline.com/ArcGIS/rest/services/"
     "World_Imagery/MapServer/tile/{z}/{y}/{x}"
@@ -49,55 +773,135 @@ def download_osm_tiles_for_active_project(
     progress_cb=None,
     tile_template: str = DEFAULT_ARCGIS_URL,
     layer_name: str = "OSM Offline",
-):
+    settings: Optional[TileDownloadSettings] = None,
+    storage: str = "cache",
+    should_cancel: Optional[Callable[[], bool]] = None,
+    coverage: Optional["CoveragePlan"] = None,
+    estimate: Optional[TileDownloadEstimate] = None,
+) -> TileDownloadJob:
     """
     Aktif proje için, kazı merkezine buffer ekleyip verilen zoom aralığındaki
     tile'ları indirir ve map_layers tablosuna 'layer_name' ile kaydeder.
 
     progress_cb(step, total, message) şeklindedir.
+    settings verilmezse app_settings'teki indirme ayarları kullanılır.
+    storage: "cache" (projeler arası paylaşılan önbellek, varsayılan; bkz.
+    core/tile_cache.py), "mbtiles" (katmana özel, taşınabilir .mbtiles
+    dosyası) veya "folder" (eski {z}/{x}/{y}.png klasör düzeni).
+    coverage verilirse (bkz. core/tile_coverage.plan_coverage) merkez kare
+    yerine planın zoom başına tile kümesi indirilir; buffer_km, zoom_min ve
+    zoom_max bu durumda plandan gelir.
+    estimate verilirse (bkz. estimate_tile_download) tahmini boyut disk
+    bütçesini aşan iş hiç oluşturulmaz (TileBudgetError). Bütçe indirme
+    sırasında da izlenir; dolarsa iş durdurulur.
+
+    İndirme bir iş olarak kaydedilir (bkz. core/tile_jobs.py); iptal edilen
+    veya yarıda kalan iş run_tile_download_job ile sürdürülebilir.
     """
+    if coverage is not None:
+        zoom_min = coverage.zooms[0].zoom
+        zoom_max = coverage.zooms[-1].zoom
     if zoom_max < zoom_min:
         raise ValueError("zoom_max, zoom_min'den küçük olamaz.")
+    if storage not in ("cache", "mbtiles", "folder"):
+        raise ValueError(f"Geçersiz tile deposu: {storage}")
 
     con = get_connection()
-    cur = con.cursor()
-
     project_id = get_active_project_id(con)
     if not project_id:
         con.close()
         raise RuntimeError("Aktif proje bulunamadı.")
 
-    cur.execute(
+    if coverage is not None:
+        con.close()
+        zooms, bounds = _job_zooms_from_plan(coverage)
+    else:
+        try:
+            zooms, bounds = _job_zooms_from_center(
+                con, project_id, buffer_km, zoom_min, zoom_max
+            )
+        finally:
+            con.close()
+
+    if sum(zm.total for zm in zooms) == 0:
+        raise RuntimeError("Belirlenen alan için tile bulunamadı.")
+
+    settings = settings or get_tile_download_settings()
+    if estimate is not None:
+        check_disk_budget(estimate.estimated_bytes, settings)
+
+    # Katman adı slug + zoom etiketi → her kombinasyon için ayrı depo
+    safe_layer_slug = re.sub(r"[^a-zA-Z0-9_-]+", "_", layer_name).lower()
+    zoom_suffix = f"z{zoom_min}_{zoom_max}"
+    tiles_root = (
+        TILES_DIR / f"project_{project_id}" / f"{safe_layer_slug}_{zoom_suffix}"
+    )
+
+    # ---- İş kaydı (yarıda kalırsa kaldığı yerden sürdürülür) ----
+    if storage == "cache":
+        store_path = _cache_path()
+    elif storage == "folder":
+        store_path = tiles_root
+    else:
+        store_path = _mbtiles_path_for_folder(tiles_root)
+        # Aynı katmanın eski klasör önbelleği varsa önce içeri al;
+        # indirilmiş tile'lar tekrar indirilmez
+        if tiles_root.is_dir():
+            with MBTiles(store_path) as mbt:
+                import_tile_folder(tiles_root, mbt, progress_cb)
+
+    job_id = create_job(
+        project_id=project_id,
+        layer_name=layer_name,
+        tile_template=tile_template,
+        storage=storage,
+        store_path=_rel_to_base(store_path),
+        zooms=zooms,
+        bounds=bounds,
+    )
+
+    return run_tile_download_job(
+        job_id,
+        progress_cb=progress_cb,
+        settings=settings,
+        should_cancel=should_cancel,
+    )
+
+
+def _job_zooms_from_center(
+    con,
+    project_id: int,
+    buffer_km: float,
+    zoom_min: int,
+    zoom_max: int,
+) -> Tuple[List[TileJobZoom], Tuple[float, float, float, float]]:
+    """Proje merkezi etrafındaki kare için zoom başına tile dikdörtgenleri."""
+    row = con.execute(
         """
-        SELECT p.center_x, p.center_y, cs.epsg_code, p.code
+        SELECT p.center_x, p.center_y, cs.epsg_code
         FROM projects p
         LEFT JOIN coordinate_systems cs
           ON p.coordinate_system_id = cs.id
         WHERE p.id = ?
         """,
         (project_id,),
-    )
-    row = cur.fetchone()
+    ).fetchone()
     if not row:
-        con.close()
         raise RuntimeError("Proje kaydı bulunamadı.")
 
-    center_x, center_y, epsg_code, project_code = row
+    center_x, center_y, epsg_code = row
 
     if center_x is None or center_y is None:
-        con.close()
         raise RuntimeError(
             "Bu proje için center_x / center_y tanımlı değil.\n"
             "Lütfen veritabanında center_x, center_y değerlerini doldurun."
         )
 
     if not epsg_code:
-        con.close()
         raise RuntimeError("Proje için EPSG kodu tanımlı değil.")
 
     # Proje CRS → WGS84 (lon, lat)
-    src_crs = f"EPSG:{epsg_code}"
-    transformer = Transformer.from_crs(src_crs, "EPSG:4326", always_xy=True)
+    transformer = get_transformer(epsg_code)
     center_lon, center_lat = transformer.transform(center_x, center_y)
 
     # Tek bir bbox: tüm zoom seviyelerinde aynı coğrafi alan kullanılacak
@@ -105,76 +909,415 @@ def download_osm_tiles_for_active_project(
         center_lat, center_lon, buffer_km
     )
 
-    # Katman adı slug + zoom etiketi → her kombinasyon için ayrı klasör
-    safe_layer_slug = re.sub(r"[^a-zA-Z0-9_-]+", "_", layer_name).lower()
-    zoom_suffix = f"z{zoom_min}_{zoom_max}"
-    tiles_root = (
-        TILES_DIR / f"project_{project_id}" / f"{safe_layer_slug}_{zoom_suffix}"
-    )
-    ensure_dir(tiles_root)
-
-    # ---- Tile sayısını ve aralıkları hesapla ----
-    total_tiles = 0
-    zoom_ranges: list[tuple[int, int, int, int, int]] = []
-
+    zooms: List[TileJobZoom] = []
     for z in range(zoom_min, zoom_max + 1):
         # Aynı bbox, her zoom için yeniden tile index'e çevriliyor
         x1, y1 = deg2num(lat_max, lon_min, z)
         x2, y2 = deg2num(lat_min, lon_max, z)
-        x_min = min(x1, x2)
-        x_max = max(x1, x2)
-        y_min = min(y1, y2)
-        y_max = max(y1, y2)
-        zoom_ranges.append((z, x_min, x_max, y_min, y_max))
-        total_tiles += (x_max - x_min + 1) * (y_max - y_min + 1)
-
-    if total_tiles == 0:
+        x_min, x_max = min(x1, x2), max(x1, x2)
+        y_min, y_max = min(y1, y2), max(y1, y2)
+        zooms.append(
+            TileJobZoom(
+                zoom=z,
+                x_min=x_min,
+                x_max=x_max,
+                y_min=y_min,
+                y_max=y_max,
+                total=(x_max - x_min + 1) * (y_max - y_min + 1),
+            )
+        )
+    return zooms, (lon_min, lat_min, lon_max, lat_max)
+
+
+def _job_zooms_from_plan(
+    plan: "CoveragePlan",
+) -> Tuple[List[TileJobZoom], Tuple[float, float, float, float]]:
+    """Kapsama planı → satır aralıklı iş zoom'ları (boş zoom'lar atlanır)."""
+    zooms: List[TileJobZoom] = []
+    for zc in plan.zooms:
+        tile_range = zc.tile_range
+        if tile_range is None:
+            continue
+        x_min, x_max, y_min, y_max = tile_range
+        zooms.append(
+            TileJobZoom(
+                zoom=zc.zoom,
+                x_min=x_min,
+                x_max=x_max,
+                y_min=y_min,
+                y_max=y_max,
+                total=zc.count,
+                runs=list(zc.runs),
+            )
+        )
+    return zooms, plan.bounds
+
+
+# ---------------------------------------------------------------------------
+# Paylaşılan tile önbelleği (sabitleme / kota)
+# ---------------------------------------------------------------------------
+
+
+def _cache_path() -> Path:
+    return TILES_DIR / CACHE_FILE_NAME
+
+
+def _job_pin_runs(job: TileDownloadJob) -> Iterator[Tuple[int, List[PinRun]]]:
+    """İşin zoom başına satır aralıkları; dikdörtgenler satırlara açılır."""
+    for zm in job.zooms:
+        if zm.runs is not None:
+            yield zm.zoom, zm.runs
+        else:
+            yield zm.zoom, [
+                (y, zm.x_min, zm.x_max) for y in range(zm.y_min, zm.y_max + 1)
+            ]
+
+
+def sync_tile_cache_pins(cache: TileCache, extra_job_ids: Iterable[int] = ()) -> None:
+    """
+    Aktif (is_active = 1) önbellek katmanlarını oluşturan işlerin tile'larını
+    (ve extra_job_ids, ör. çalışan iş) önbellekte sabitler; diğer tüm
+    sabitlemeler kaldırılır. Sabitlenen tile'lar kotada tahliye edilmez.
+    """
+    con = get_connection()
+    try:
+        rows = con.execute(
+            """
+            SELECT j.id
+            FROM tile_download_jobs j
+            JOIN map_layers l
+              ON l.project_id = j.project_id AND l.name = j.layer_name
+            WHERE j.storage = 'cache'
+              AND LOWER(l.type) = 'tilecache'
+              AND l.is_active = 1
+            """
+        ).fetchall()
+    finally:
         con.close()
-        raise RuntimeError("Belirlenen alan için tile bulunamadı.")
 
+    job_ids = {r[0] for r in rows} | set(extra_job_ids)
+    pins = []
+    for job_id in sorted(job_ids):
+        job = get_job(job_id)
+        if job is None:
+            continue
+        source_id = cache.source_id(job.tile_template)
+        for zoom, runs in _job_pin_runs(job):
+            pins.append((f"job:{job_id}", source_id, zoom, runs))
+    cache.set_pins(pins)
+
+
+def _enforce_cache_quota(
+    cache: TileCache,
+    budget: DiskBudget,
+    other_bytes: int,
+) -> int:
+    """
+    Önbelleği bütçeye (diğer tile depoları düşüldükten sonra kalan pay) ve
+    diskte asgari boş alana sığacak kadar LRU tahliye eder.
+    Tahliyeden sonra hâlâ aşılan bayt miktarını döner (sabitlenenler yüzünden).
+    """
+    cache.flush()
+    total = cache.total_bytes()
+    target: Optional[int] = None
+    if budget.budget_bytes:
+        target = budget.budget_bytes - other_bytes
+    shortage = _MIN_FREE_BYTES - _free_disk_bytes(TILES_DIR)
+    if shortage > 0:
+        target = min(target if target is not None else total, total - shortage)
+    if target is None or total <= target:
+        return 0
+    cache.evict(max(0, target))
+    return max(0, cache.total_bytes() - target)
+
+
+def trim_tile_cache(settings: Optional[TileDownloadSettings] = None) -> int:
+    """
+    Paylaşılan önbelleği disk bütçesine göre kırpar (ör. bütçe
+    düşürüldükten ya da katmanlar kapatıldıktan sonra).
+    Serbest kalan bayt sayısını döner.
+    """
+    if not _cache_path().exists():
+        return 0
+    # Sabitlemeler get_disk_budget içinde güncellenir
+    budget = get_disk_budget(settings)
+    other = budget.used_bytes - _cache_file_bytes()
+    with TileCache(_cache_path()) as cache:
+        before = cache.total_bytes()
+        _enforce_cache_quota(cache, budget, other)
+        return before - cache.total_bytes()
+
+
+def _cache_file_bytes() -> int:
+    """Önbellek dosyalarının (.db, -wal, -shm) diskteki boyutu."""
+    total = 0
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            total += os.path.getsize(str(_cache_path()) + suffix)
+        except OSError:
+            pass
+    return total
+
+
+# ---------------------------------------------------------------------------
+# İş çalıştırma / sürdürme
+# ---------------------------------------------------------------------------
+
+# Bu kadar tile ya da saniyede bir ilerleme veritabanına yazılır
+_CHECKPOINT_TILES = 1000
+_CHECKPOINT_INTERVAL_S = 2.0
+
+
+def _iter_job_tiles(job: TileDownloadJob) -> Iterator[TileIndex]:
+    for zm in job.zooms:
+        if zm.runs is None:
+            yield from _iter_tiles([(zm.zoom, zm.x_min, zm.x_max, zm.y_min, zm.y_max)])
+            continue
+        for y, x_min, x_max in zm.runs:
+            for x in range(x_min, x_max + 1):
+                yield zm.zoom, x, y
+
+
+def _job_store_path(job: TileDownloadJob) -> Path:
+    path = Path(job.store_path)
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def run_tile_download_job(
+    job_id: int,
+    progress_cb: Optional[ProgressCallback] = None,
+    settings: Optional[TileDownloadSettings] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+) -> TileDownloadJob:
+    """
+    Kayıtlı bir indirme işini çalıştırır veya kaldığı yerden sürdürür.
+
+    - Depoda olan tile'lar ağa çıkılmadan atlanır; yalnızca eksik ve daha
+      önce hatalı olan tile'lar indirilir (geçici hatalarda üstel bekleme).
+    - İlerleme, zoom başına sayaçlar ve hata listesi düzenli aralıklarla
+      (depo flush edildikten sonra) veritabanına yazılır.
+    - İş sonunda katman map_layers'a eklenir / güncellenir.
+    - Disk bütçesinde (TileDownloadSettings.disk_budget_mb) ya da diskte yer
+      yoksa iş başlatılmaz; çalışırken dolarsa iş duraklatılır, katman o ana
+      kadar inenlerle kaydedilir. İki durumda da TileBudgetError fırlatılır.
+    - Paylaşılan önbelleğe yazan işte bütçe kota olarak uygulanır: yer
+      açmak için sabitlenmemiş tile'lar LRU sırasıyla tahliye edilir; işin
+      kendi tile'ları çalışırken sabitlenir.
+
+    Güncel iş kaydını (status: completed / incomplete / paused) döner.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise RuntimeError(f"Tile indirme işi bulunamadı: #{job_id}")
+
+    settings = settings or get_tile_download_settings()
+    budget = get_disk_budget(settings, pin_job_ids=[job_id])
+    if budget.available_bytes <= 0:
+        raise TileBudgetError(
+            f"İş #{job_id} başlatılmadı: tile deposu için yer kalmadı.\n"
+            f"{budget.describe()}"
+        )
+    # Önbellek dışındaki depoların payı (kota = bütçe - bu)
+    other_bytes = budget.used_bytes - _cache_file_bytes()
+
+    previously_failed = {(z, x, y) for z, x, y, _n, _err in failed_tiles(job_id)}
+    zoom_done = {zm.zoom: 0 for zm in job.zooms}
+    zoom_failed = {zm.zoom: 0 for zm in job.zooms}
+    zoom_total = {zm.zoom: zm.total for zm in job.zooms}
+    failures: List[Tuple[int, int, int, str]] = []
+    recovered: List[Tuple[int, int, int]] = []
+    processed = 0
+    last_checkpoint = [time.monotonic(), 0]
+
+    store_path = _job_store_path(job)
+    cache: Optional[TileCache] = None
+    if job.storage == "cache":
+        cache = TileCache(store_path)
+        store: TileStore = cache.source_store(job.tile_template)
+    elif job.storage == "folder":
+        ensure_dir(store_path)
+        store = FolderTileStore(store_path)
+    else:
+        store = MBTiles(store_path)
+
+    def checkpoint() -> None:
+        store.flush()
+        if cache is not None:
+            _enforce_cache_quota(cache, budget, other_bytes)
+        checkpoint_job(
+            job_id,
+            {z: (zoom_done[z], zoom_failed[z]) for z in zoom_done},
+            failures,
+            recovered,
+        )
+        failures.clear()
+        recovered.clear()
+        last_checkpoint[:] = [time.monotonic(), processed]
+
+    def on_result(z: int, x: int, y: int, outcome: str, error: str) -> None:
+        nonlocal processed
+        processed += 1
+        if outcome == TILE_FAILED:
+            zoom_failed[z] += 1
+            failures.append((z, x, y, error))
+        else:
+            zoom_done[z] += 1
+            if (z, x, y) in previously_failed:
+                recovered.append((z, x, y))
+
+        if progress_cb:
+            failed_total = sum(zoom_failed.values())
+            message = (
+                f"İş #{job_id} • z={z}: {zoom_done[z]}/{zoom_total[z]} • "
+                f"toplam {processed}/{job.total_tiles}"
+            )
+            if failed_total:
+                message += f" • hatalı: {failed_total}"
+            progress_cb(processed, job.total_tiles, message)
+
+        if (
+            processed - last_checkpoint[1] >= _CHECKPOINT_TILES
+            or time.monotonic() - last_checkpoint[0] >= _CHECKPOINT_INTERVAL_S
+        ):
+            checkpoint()
+
+    set_job_status(job_id, JOB_STATUS_RUNNING)
     if progress_cb:
-        progress_cb(0, total_tiles, "Offline tile indirme başlatılıyor...")
+        progress_cb(0, job.total_tiles, f"İş #{job_id} başlatılıyor...")
 
-    # ---- İndirme döngüsü ----
-    downloaded = 0
+    try:
+        stats = download_tiles(
+            _iter_job_tiles(job),
+            job.total_tiles,
+            job.tile_template,
+            store,
+            settings=settings,
+            on_result=on_result,
+            should_cancel=should_cancel,
+            max_bytes=budget.available_bytes,
+        )
+        checkpoint()
+        if isinstance(store, MBTiles):
+            _write_mbtiles_metadata(store, job.layer_name, job.bounds)
+    except BaseException:
+        # Çökme / beklenmeyen hata: o ana kadarki ilerlemeyi sakla
+        try:
+            checkpoint()
+            set_job_status(job_id, JOB_STATUS_PAUSED)
+        except Exception:
+            pass
+        raise
+    finally:
+        if isinstance(store, MBTiles):
+            store.close()
+        if cache is not None:
+            cache.close()
 
-    for z, x_min, x_max, y_min, y_max in zoom_ranges:
-        for x in range(x_min, x_max + 1):
-            for y in range(y_min, y_max + 1):
-                msg = (
-                    f"Tile indiriliyor: z={z}, x={x}, y={y} "
-                    f"({downloaded + 1}/{total_tiles})"
+    if stats.cancelled:
+        status = JOB_STATUS_PAUSED
+    elif sum(zoom_failed.values()):
+        status = JOB_STATUS_INCOMPLETE
+    else:
+        status = JOB_STATUS_COMPLETED
+    set_job_status(job_id, status)
+
+    # Katman kaydı: yarım iş de o ana kadar inenleri gösterebilsin
+    if stats.downloaded or stats.skipped:
+        con = get_connection()
+        try:
+            if job.storage == "cache":
+                # Kaynak şablonu önbellekteki anahtardır; katman arcsys://
+                # üzerinden önbellekten sunulur (bkz. map_layers_service)
+                _upsert_offline_layer(
+                    con.cursor(),
+                    job.project_id,
+                    job.layer_name,
+                    layer_type="tilecache",
+                    file_path=None,
+                    url_template=job.tile_template,
+                )
+            elif job.storage == "folder":
+                _upsert_offline_layer(
+                    con.cursor(),
+                    job.project_id,
+                    job.layer_name,
+                    layer_type="tile",
+                    file_path=None,
+                    url_template=store_path.as_uri() + "/{z}/{x}/{y}.png",
                 )
+            else:
+                _upsert_offline_layer(
+                    con.cursor(),
+                    job.project_id,
+                    job.layer_name,
+                    layer_type="mbtiles",
+                    file_path=job.store_path,
+                    url_template=None,
+                )
+            con.commit()
+        finally:
+            con.close()
+
+    if stats.budget_exceeded:
+        raise TileBudgetError(
+            f"İş #{job_id} disk bütçesi dolduğu için durduruldu "
+            f"({stats.bytes_written / _MB:.1f} MB yazıldı). İnen tile'lar "
+            "katmana eklendi; bütçeyi artırıp işi sürdürebilirsiniz.\n"
+            f"{get_disk_budget(settings).describe()}"
+        )
+
+    return get_job(job_id)
 
-                if progress_cb:
-                    progress_cb(downloaded, total_tiles, msg)
 
-                z_dir = tiles_root / str(z)
-                x_dir = z_dir / str(x)
-                ensure_dir(x_dir)
-                out_path = x_dir / f"{y}.png"
+# ---------------------------------------------------------------------------
+# MBTiles yardımcıları / klasör önbelleklerinin taşınması
+# ---------------------------------------------------------------------------
 
-                if not out_path.exists():
-                    url = tile_template.format(z=z, x=x, y=y)
-                    try:
-                        with urllib.request.urlopen(url, timeout=5) as resp:
-                            if resp.status == 200:
-                                data = resp.read()
-                                out_path.write_bytes(data)
-                    except Exception:
-                        # Hata durumunda o tile'ı atla, süreci durdurma
-                        pass
+OFFLINE_ATTRIBUTION = "© OpenStreetMap katkıcıları (offline kopya)"
 
-                downloaded += 1
 
-                if progress_cb:
-                    progress_cb(downloaded, total_tiles, msg)
+def _mbtiles_path_for_folder(folder: Path) -> Path:
+    """<klasör>/ → <klasör>.mbtiles (aynı üst klasörde)."""
+    return folder.with_name(folder.name + ".mbtiles")
 
-    # ---- Layer kaydını güncelle / ekle ----
-    tiles_root_uri = tiles_root.as_uri()
-    url_template = tiles_root_uri + "/{z}/{x}/{y}.png"
 
-    # Aynı proje + aynı isimde katman varsa güncelle, yoksa ekle
+def _rel_to_base(path: Path) -> str:
+    """map_layers.file_path için BASE_DIR'e göre relatif yol."""
+    return os.path.relpath(path, BASE_DIR).replace("\\", "/")
+
+
+def _write_mbtiles_metadata(
+    mbt: MBTiles,
+    name: str,
+    bounds: Optional[Tuple[float, float, float, float]] = None,
+) -> None:
+    """Standart MBTiles metadata'sını (ad, biçim, zoom, sınırlar) yazar."""
+    mbt.flush()
+    zooms = mbt.zoom_range()
+    sample = mbt.get_any_tile()
+    values: Dict[str, object] = {
+        "name": name,
+        "type": "baselayer",
+        "version": "1.1",
+        "format": tile_format(sample) if sample else "png",
+        "attribution": OFFLINE_ATTRIBUTION,
+    }
+    if zooms:
+        values["minzoom"], values["maxzoom"] = zooms
+    if bounds:
+        values["bounds"] = ",".join(f"{v:.7f}" for v in bounds)
+    mbt.set_metadata(values)
+
+
+def _upsert_offline_layer(
+    cur,
+    project_id: int,
+    layer_name: str,
+    layer_type: str,
+    file_path: Optional[str],
+    url_template: Optional[str],
+) -> None:
+    """Aynı proje + aynı isimde katman varsa güncelle, yoksa ekle."""
     cur.execute(
         """
         SELECT id FROM map_layers
@@ -185,28 +1328,107 @@ def download_osm_tiles_for_active_project(
     row = cur.fetchone()
 
     if row:
-        layer_id = row[0]
         cur.execute(
             """
             UPDATE map_layers
-            SET type = 'tile',
-                file_path = NULL,
+            SET type = ?,
+                file_path = ?,
                 url_template = ?,
-                attribution = '© OpenStreetMap katkıcıları (offline kopya)',
+                attribution = ?,
                 is_active = 1
             WHERE id = ?
             """,
-            (url_template, layer_id),
+            (layer_type, file_path, url_template, OFFLINE_ATTRIBUTION, row[0]),
         )
     else:
         cur.execute(
             """
             INSERT INTO map_layers
                 (project_id, name, type, file_path, url_template, attribution, is_active)
-            VALUES (?, ?, 'tile', NULL, ?, '© OpenStreetMap katkıcıları (offline kopya)', 1)
+            VALUES (?, ?, ?, ?, ?, ?, 1)
             """,
-            (project_id, layer_name, url_template),
+            (
+                project_id,
+                layer_name,
+                layer_type,
+                file_path,
+                url_template,
+                OFFLINE_ATTRIBUTION,
+            ),
         )
 
-    con.commit()
-    con.close()
+
+def list_folder_tile_layers(
+    project_id: Optional[int] = None,
+) -> List[Tuple[int, str, Path]]:
+    """
+    Klasör ({z}/{x}/{y}.png) önbellekli tile katmanları: (id, ad, klasör).
+    project_id None ise tüm projeler.
+    """
+    sql = """
+        SELECT id, name, url_template
+        FROM map_layers
+        WHERE url_template LIKE 'file:%'
+    """
+    params: tuple = ()
+    if project_id is not None:
+        sql += " AND project_id = ?"
+        params = (project_id,)
+
+    con = get_connection()
+    try:
+        rows = con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+
+    layers: List[Tuple[int, str, Path]] = []
+    for layer_id, name, url_template in rows:
+        folder = local_tile_dir(url_template)
+        if folder is not None and folder.is_dir():
+            layers.append((layer_id, name, folder))
+    return layers
+
+
+def migrate_folder_layers_to_mbtiles(
+    project_id: Optional[int] = None,
+    progress_cb: Optional[ProgressCallback] = None,
+    remove_source: bool = False,
+) -> int:
+    """
+    Klasör önbellekli tile katmanlarını MBTiles'a taşır.
+
+    - project_id None ise tüm projelerin katmanları taşınır.
+    - Katman kaydı 'mbtiles' tipine çevrilir (file_path = .mbtiles dosyası).
+    - remove_source=True ise tüm tile'lar sorunsuz aktarıldıysa klasör silinir.
+
+    Taşınan katman sayısını döner.
+    """
+    layers = list_folder_tile_layers(project_id)
+
+    con = get_connection()
+    try:
+        migrated = 0
+        for layer_id, name, folder in layers:
+            mbtiles_path = _mbtiles_path_for_folder(folder)
+            with MBTiles(mbtiles_path) as mbt:
+                _imported, failed = import_tile_folder(folder, mbt, progress_cb)
+                _write_mbtiles_metadata(mbt, name)
+
+            con.execute(
+                """
+                UPDATE map_layers
+                SET type = 'mbtiles', file_path = ?, url_template = NULL
+                WHERE id = ?
+                """,
+                (_rel_to_base(mbtiles_path), layer_id),
+            )
+            con.commit()
+            migrated += 1
+
+            # Okunamayan tile kaldıysa klasör elle kontrol edilsin diye kalır
+            if remove_source and not failed:
+                shutil.rmtree(folder, ignore_errors=True)
+    finally:
+        con.close()
+
+    return migrated
@@ -1,5 +1,8 @@
 # core/utils.py
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import Optional
+from urllib.parse import quote, urlparse
+from urllib.request import url2pathname
 
 
 # Proje kökü (ArcSys klasörü)
@@ -17,3 +20,69 @@ WEB_DIR = BASE_DIR / "web"
 def ensure_dir(path: Path) -> None:
     """Klasör yoksa oluştur."""
     path.mkdir(parents=True, exist_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# arcsys:// URL'leri (app/url_scheme.py tarafından sunulur)
+# ---------------------------------------------------------------------------
+
+ARCSYS_SCHEME = "arcsys"
+ARCSYS_HOST = "local"
+ARCSYS_ORIGIN = f"{ARCSYS_SCHEME}://{ARCSYS_HOST}"
+
+
+def arcsys_url(*parts: str) -> str:
+    """arcsys://local/<parts...> URL'i üretir (parçalar yüzde-kodlanır)."""
+    return ARCSYS_ORIGIN + "/" + "/".join(quote(str(p), safe="/") for p in parts)
+
+
+def data_path_to_url(path) -> Optional[str]:
+    """
+    DATA_DIR altındaki bir dosya / klasör için arcsys://local/data/... URL'i.
+    DATA_DIR dışındaysa None.
+    """
+    try:
+        rel = Path(path).resolve().relative_to(DATA_DIR.resolve())
+    except ValueError:
+        return None
+    return arcsys_url("data", rel.as_posix())
+
+
+def local_tile_dir(url_template: str) -> Optional[Path]:
+    """
+    file:// tile şablonunun ({z}/{x}/{y} öncesi) işaret ettiği DATA_DIR
+    altındaki klasör. Yerel değilse / DATA_DIR'de bulunamazsa None.
+    """
+    if not url_template.lower().startswith("file:"):
+        return None
+
+    # Yer tutuculardan önceki kısım gerçek klasör yoludur
+    head = url_template.partition("{")[0]
+    local_dir = Path(url2pathname(urlparse(head.rpartition("/")[0]).path))
+    if data_path_to_url(local_dir) is not None:
+        return local_dir
+
+    # Kurulum taşınmışsa (ör. başka sürücüde kaydedilmiş yol) "data/"
+    # sonrasını güncel DATA_DIR altında ara
+    parts = PurePosixPath(local_dir.as_posix()).parts
+    if "data" in parts:
+        rel = parts[len(parts) - parts[::-1].index("data") :]
+        candidate = DATA_DIR.joinpath(*rel)
+        if rel and candidate.is_dir():
+            return candidate
+    return None
+
+
+def localize_url_template(url_template: str) -> str:
+    """
+    file:// ile başlayan (DATA_DIR altındaki) tile şablonunu arcsys URL'ine
+    çevirir; {z}/{x}/{y} yer tutucuları korunur. Diğer URL'ler aynen döner.
+    """
+    local_dir = local_tile_dir(url_template)
+    base = data_path_to_url(local_dir) if local_dir is not None else None
+    if base is None:
+        return url_template
+
+    head, brace, tail = url_template.partition("{")
+    last = head.rpartition("/")[2]
+    return f"{base}/{last}{brace}{tail}"
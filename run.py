@@ -3,20 +3,14 @@
 ArcSys uygulamasının giriş noktası.
 
 Bu dosya sadece:
-- QtWebEngine için gerekli ortam değişkenini ayarlar
 - app.app_factory içindeki create_app() fonksiyonunu çağırır
 - Qt event loop'unu (app.exec()) başlatır
 """
 
-import os
-
-# UYARI:
-# Bu bayrak, QtWebEngine içinden hem HTTP(S) hem de file:/// yoluyla
-# içerik yükleyebilmek için kullanılıyor. Web güvenlik kısıtlarını gevşetir.
-# Geliştirme / saha ortamı için uygundur; genel amaçlı bir tarayıcı gibi
-# kullanılmamalıdır.
-os.environ.setdefault("QTWEBENGINE_CHROMIUM_FLAGS", "--disable-web-security")
+import multiprocessing
 
+# Yerel içerik (harita sayfası, tile'lar, rasterler) arcsys:// şemasıyla
+# sunulur (app/url_scheme.py); --disable-web-security gerekmez.
 from app.app_factory import create_app
 
 
@@ -42,4 +36,7 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # GeoTIFF tile üretimi süreç havuzu kullanır (core/geotiff_tiler.py);
+    # paketlenmiş (frozen) uygulamada alt süreçler buradan başlar
+    multiprocessing.freeze_support()
     main()
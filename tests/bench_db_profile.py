@@ -0,0 +1,121 @@
+# tests/bench_db_profile.py
+"""
+DbPerformanceProfile PRAGMA'ları için küçük ölçüm betiği (pytest toplamaz).
+
+Sentetik bir veritabanında (geçici dosya, WAL, migration'lar uygulanmış)
+aynı iş yükünü SQLite varsayılanlarıyla ve varsayılan profille çalıştırır:
+
+  okuma   : her turda yeni bağlantı; açma + köşe ve buluntu yükleyici SQL'i
+  sıralama: indekssiz kolona göre ORDER BY (geçici B-tree → temp_store)
+  yazma   : satır başına bir commit (synchronous)
+
+Kullanım:
+    python tests/bench_db_profile.py [açma sayısı]
+"""
+from __future__ import annotations
+
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_trench_loader import headers_and_vertices, seed_trenches  # noqa: E402
+from core.db import DbPerformanceProfile, run_migrations  # noqa: E402
+from core.services.finds_service import FINDS_FOR_PROJECT_SQL  # noqa: E402
+
+FINDS_PER_TRENCH = 10
+ROUNDS = 5
+
+
+def _configure(con: sqlite3.Connection, profile: DbPerformanceProfile | None) -> None:
+    con.execute("PRAGMA journal_mode = WAL")
+    if profile is None:
+        return
+    con.execute(f"PRAGMA mmap_size = {profile.mmap_size}")
+    con.execute(f"PRAGMA cache_size = -{profile.cache_size_kb}")
+    con.execute(f"PRAGMA synchronous = {profile.synchronous}")
+    con.execute(f"PRAGMA temp_store = {profile.temp_store}")
+
+
+def _seed(path: Path, trench_count: int) -> None:
+    from tests.conftest import BASE_SCHEMA
+
+    con = sqlite3.connect(path)
+    con.executescript(BASE_SCHEMA)
+    run_migrations(con)
+    seed_trenches(con, trench_count, 8)
+    con.execute(
+        f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n
+                                WHERE i < {FINDS_PER_TRENCH})
+        INSERT INTO finds (trench_id, code, description, x_global, y_global)
+        SELECT t.id, 'B' || n.i, hex(randomblob(24)), 500000.0, 4000000.0
+        FROM trenches t, n
+        """
+    )
+    con.commit()
+    con.close()
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _run(path: Path, profile: DbPerformanceProfile | None) -> dict[str, float]:
+    def read_round() -> None:
+        con = sqlite3.connect(path)
+        _configure(con, profile)
+        headers_and_vertices(con, 1)
+        con.execute(FINDS_FOR_PROJECT_SQL, (1,)).fetchall()
+        con.close()
+
+    con = sqlite3.connect(path)
+    _configure(con, profile)
+
+    def sort() -> None:
+        con.execute("SELECT * FROM finds ORDER BY description").fetchall()
+
+    def write() -> None:
+        for i in range(300):
+            con.execute(
+                "INSERT INTO finds (trench_id, code) VALUES (1, ?)", (f"Y{i}",)
+            )
+            con.commit()
+
+    result = {
+        "okuma": min(_timed(read_round) for _ in range(ROUNDS)),
+        "sıralama": min(_timed(sort) for _ in range(ROUNDS)),
+        "yazma": _timed(write),
+    }
+    con.close()
+    return result
+
+
+def main(trench_count: int = 5000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        _seed(path, trench_count)
+
+        rows = {
+            "SQLite varsayılanı": _run(path, None),
+            "DbPerformanceProfile": _run(path, DbPerformanceProfile()),
+        }
+
+    print(
+        f"{trench_count} açma, {trench_count * FINDS_PER_TRENCH} buluntu "
+        f"(okuma / sıralama: en iyi / {ROUNDS}; yazma: 300 commit)"
+    )
+    for name, result in rows.items():
+        cells = "  ".join(f"{k} {v * 1000:8.1f} ms" for k, v in result.items())
+        print(f"  {name:<22} {cells}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,146 @@
+# tests/bench_trench_loader.py
+"""
+Açma yükleyicisinin SQL'i için küçük ölçüm betiği (pytest toplamaz).
+
+Sentetik bir veritabanında (geçici dosya, migration'lar uygulanmış) üç
+okuma biçimini karşılaştırır; hepsi yükleyicinin bugün okuduğu kolonları
+getirir:
+
+  açma başına  : açma listesi + açma başına bir köşe sorgusu (baseline)
+  tek JOIN     : açma bilgisi her köşe satırında tekrar eden tek sorgu
+  açma + köşe  : core.services.trenches_service'in iki sorgusu
+
+Kullanım:
+    python tests/bench_trench_loader.py [açma sayısı] [açma başına köşe]
+"""
+from __future__ import annotations
+
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.db import run_migrations  # noqa: E402
+from core.services.trenches_service import (  # noqa: E402
+    TRENCH_VERTICES_FOR_PROJECT_SQL,
+    TRENCHES_FOR_PROJECT_SQL,
+)
+
+PER_TRENCH_VERTICES_SQL = """
+    SELECT order_index, x_global, y_global, z_global, lat_wgs84, lon_wgs84, id
+    FROM trench_vertices
+    WHERE trench_id = ?
+    ORDER BY order_index
+    """
+
+SINGLE_JOIN_SQL = """
+    SELECT
+      t.id, t.code, t.name, p.name,
+      v.order_index, v.x_global, v.y_global, v.z_global,
+      v.lat_wgs84, v.lon_wgs84, v.id
+    FROM trenches t
+    JOIN projects p ON t.project_id = p.id
+    JOIN trench_vertices v ON v.trench_id = t.id
+    WHERE t.project_id = ?
+    ORDER BY t.id, v.order_index
+    """
+
+
+def seed_trenches(
+    con: sqlite3.Connection,
+    trench_count: int,
+    vertices_per_trench: int,
+    project_count: int = 2,
+) -> None:
+    """
+    project_count proje (EPSG:32635), her birinde trench_count açma ve açma
+    başına vertices_per_trench köşe. Köşeler sıra numarası tersten eklenir.
+    """
+    con.execute(
+        "INSERT INTO coordinate_systems (id, name, epsg_code) "
+        "VALUES (1, 'UTM 35N', 32635)"
+    )
+    trench_id = 0
+    vertices = []
+    for pid in range(1, project_count + 1):
+        con.execute(
+            "INSERT INTO projects (id, name, code, coordinate_system_id) "
+            "VALUES (?, ?, ?, 1)",
+            (pid, f"Proje {pid}", f"P{pid}"),
+        )
+        for n in range(trench_count):
+            trench_id += 1
+            con.execute(
+                "INSERT INTO trenches (id, project_id, code, name) "
+                "VALUES (?, ?, ?, ?)",
+                (trench_id, pid, f"T{n}", f"Açma {n}"),
+            )
+            for i in reversed(range(vertices_per_trench)):
+                vertices.append(
+                    (trench_id, i + 1, 500000.0 + n + i, 4000000.0 + i, 1.0)
+                )
+    con.executemany(
+        "INSERT INTO trench_vertices "
+        "(trench_id, order_index, x_global, y_global, z_global) "
+        "VALUES (?, ?, ?, ?, ?)",
+        vertices,
+    )
+    con.commit()
+    con.execute("ANALYZE")
+
+
+def per_trench_loop(con: sqlite3.Connection, project_id: int) -> list:
+    """Baseline: açma listesi + açma başına bir köşe sorgusu."""
+    out = []
+    for header in con.execute(TRENCHES_FOR_PROJECT_SQL, (project_id,)).fetchall():
+        rows = con.execute(PER_TRENCH_VERTICES_SQL, (header[0],)).fetchall()
+        out.append((header, rows))
+    return out
+
+
+def single_join(con: sqlite3.Connection, project_id: int) -> list:
+    return con.execute(SINGLE_JOIN_SQL, (project_id,)).fetchall()
+
+
+def headers_and_vertices(con: sqlite3.Connection, project_id: int) -> list:
+    headers = con.execute(TRENCHES_FOR_PROJECT_SQL, (project_id,)).fetchall()
+    rows = con.execute(TRENCH_VERTICES_FOR_PROJECT_SQL, (project_id,)).fetchall()
+    return [headers, rows]
+
+
+STRATEGIES = {
+    "açma başına": per_trench_loop,
+    "tek JOIN": single_join,
+    "açma + köşe": headers_and_vertices,
+}
+
+
+def main(trench_count: int = 5000, vertices_per_trench: int = 8) -> None:
+    from tests.conftest import BASE_SCHEMA
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        con = sqlite3.connect(path)
+        con.executescript(BASE_SCHEMA)
+        run_migrations(con)
+        seed_trenches(con, trench_count, vertices_per_trench)
+        # Havuzdaki bağlantılar gibi
+        con.row_factory = sqlite3.Row
+
+        print(f"{trench_count} açma x {vertices_per_trench} köşe (en iyi / 7)")
+        for name, fn in STRATEGIES.items():
+            best = float("inf")
+            for _ in range(7):
+                start = time.perf_counter()
+                fn(con, 1)
+                best = min(best, time.perf_counter() - start)
+            print(f"  {name:<12} {best * 1000:8.1f} ms")
+        con.close()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
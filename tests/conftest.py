@@ -0,0 +1,104 @@
+# tests/conftest.py
+"""
+Testler için ortak veritabanı fixture'ları.
+
+base_con : bellekte, data/ArcSys.db'nin migration öncesi şeması (yalnızca
+           testlerin ihtiyaç duyduğu kolonlar); migration uygulanmamış
+temp_db  : aynı şemayla geçici bir dosya; core.db havuzu bu dosyaya
+           yönlendirilir ve tüm migration'lar uygulanır
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from core import db
+
+BASE_SCHEMA = """
+CREATE TABLE coordinate_systems (
+  id        INTEGER PRIMARY KEY AUTOINCREMENT,
+  name      TEXT NOT NULL,
+  epsg_code INTEGER
+);
+CREATE TABLE projects (
+  id                   INTEGER PRIMARY KEY AUTOINCREMENT,
+  name                 TEXT NOT NULL,
+  code                 TEXT,
+  coordinate_system_id INTEGER,
+  center_x REAL, center_y REAL, center_z REAL
+);
+CREATE TABLE app_settings (
+  id                INTEGER PRIMARY KEY CHECK (id = 1),
+  active_project_id INTEGER
+);
+CREATE TABLE levels (
+  id         INTEGER PRIMARY KEY AUTOINCREMENT,
+  project_id INTEGER NOT NULL,
+  name       TEXT NOT NULL
+);
+CREATE TABLE map_layers (
+  id           INTEGER PRIMARY KEY AUTOINCREMENT,
+  project_id   INTEGER NOT NULL,
+  name         TEXT NOT NULL,
+  type         TEXT NOT NULL,
+  file_path    TEXT,
+  url_template TEXT,
+  attribution  TEXT,
+  is_active    INTEGER DEFAULT 0
+);
+CREATE TABLE trenches (
+  id          INTEGER PRIMARY KEY AUTOINCREMENT,
+  project_id  INTEGER NOT NULL,
+  code        TEXT NOT NULL,
+  name        TEXT,
+  description TEXT,
+  level_id    INTEGER
+);
+CREATE TABLE trench_vertices (
+  id          INTEGER PRIMARY KEY AUTOINCREMENT,
+  trench_id   INTEGER NOT NULL,
+  order_index INTEGER NOT NULL,
+  x_global    REAL NOT NULL,
+  y_global    REAL NOT NULL,
+  z_global    REAL,
+  level_id    INTEGER,
+  notes       TEXT
+);
+CREATE TABLE finds (
+  id          INTEGER PRIMARY KEY AUTOINCREMENT,
+  trench_id   INTEGER NOT NULL,
+  code        TEXT NOT NULL,
+  description TEXT,
+  level_id    INTEGER,
+  x_global    REAL,
+  y_global    REAL,
+  z_global    REAL,
+  found_at    TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+@pytest.fixture()
+def base_con():
+    c = sqlite3.connect(":memory:")
+    c.executescript(BASE_SCHEMA)
+    yield c
+    c.close()
+
+
+@pytest.fixture()
+def temp_db(tmp_path, monkeypatch):
+    path = tmp_path / "ArcSys.db"
+    c = sqlite3.connect(path)
+    c.executescript(BASE_SCHEMA)
+    c.close()
+
+    db.close_all_connections()
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.reload_performance_profile()
+    db.ensure_schema()
+    yield path
+
+    db.close_all_connections()
+    db.reload_performance_profile()
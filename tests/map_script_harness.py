@@ -0,0 +1,97 @@
+# tests/map_script_harness.py
+"""
+web/map_script.js'i node'da çalıştıran yardımcı (pytest toplamaz).
+
+Leaflet ve DOM her çağrıyı kaydeden boş bir Proxy ile taklit edilir;
+senaryo sayfayla aynı kapsamda çalışır ve döndürdüğü değer JSON olarak
+geri gelir. Senaryo __env üzerinden kayıtlara erişir:
+  calls       : stub'lara yapılan çağrılar ([ad, argümanlar])
+  sent        : arcsysBridge.searchProject'e giden sorgular
+  filterInput : filtre kutusu ({value})
+"""
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+MAP_SCRIPT = Path(__file__).resolve().parents[1] / "web" / "map_script.js"
+
+requires_node = pytest.mark.skipif(
+    shutil.which("node") is None, reason="node bulunamadı"
+)
+
+# Sayfayı boş bir Leaflet / DOM ile yükler, ardından stdin'deki senaryoyu
+# aynı kapsamda çalıştırıp sonucu JSON olarak yazar.
+_HARNESS = r"""
+const fs = require("fs");
+const vm = require("vm");
+
+const calls = [];
+function stub(name) {
+  const fn = function () {};
+  return new Proxy(fn, {
+    get(_t, prop) {
+      if (prop === Symbol.iterator) return function* () {};
+      if (prop === Symbol.toPrimitive) return () => 0;
+      if (prop === "then" || typeof prop === "symbol") return undefined;
+      if (prop === "length") return 0;
+      return stub(String(prop));
+    },
+    apply(_t, _this, args) {
+      calls.push([name, args]);
+      return stub(name + "()");
+    },
+    construct() {
+      return stub("new " + name);
+    },
+  });
+}
+
+const filterInput = { value: "", addEventListener() {} };
+const sent = [];
+const ctx = {
+  L: stub("L"),
+  console,
+  requestAnimationFrame: (cb) => cb(),
+  atob,
+  arcsysBridge: { searchProject: (q) => sent.push(q) },
+  document: new Proxy(
+    {
+      getElementById: (id) => {
+        if (id === "filter-input") return filterInput;
+        // Tarih / derinlik filtresi yok
+        if (/^(date|depth)-/.test(id)) return null;
+        return stub("#" + id);
+      },
+    },
+    { get: (t, p) => (p in t ? t[p] : stub("document." + String(p))) }
+  ),
+};
+ctx.window = ctx;
+ctx.__env = { calls, sent, filterInput };
+vm.createContext(ctx);
+
+const src = fs.readFileSync(process.argv[process.argv.length - 1], "utf8");
+const scenario = fs.readFileSync(0, "utf8");
+const out = vm.runInContext(src + "\n;(() => {" + scenario + "})()", ctx);
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def run_map_script(scenario: str) -> Any:
+    """Sayfayı yükler, senaryoyu çalıştırır ve dönüş değerini verir."""
+    proc = subprocess.run(
+        ["node", "-e", _HARNESS, "--", str(MAP_SCRIPT)],
+        input=scenario,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout)
@@ -0,0 +1,85 @@
+# tests/test_coords.py
+"""
+core.coords: paylaşılan Transformer cache'inin hit / miss sayaçları, LRU
+sınırı ve thread'ler arasında tek nesne; transform_xy'nin toplu dönüşümü.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import coords
+from core.coords import (
+    clear_transformer_cache,
+    get_transformer,
+    transform_xy,
+    transformer_cache_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_transformer_cache()
+    yield
+    clear_transformer_cache()
+
+
+def test_hits_and_misses():
+    first = get_transformer(32635)
+    assert transformer_cache_stats() == {"hits": 0, "misses": 1, "size": 1}
+
+    assert get_transformer(32635) is first
+    assert get_transformer("32635", 4326) is first
+    assert transformer_cache_stats() == {"hits": 2, "misses": 1, "size": 1}
+
+    # Hedef CRS anahtarın parçası
+    assert get_transformer(32635, 3857) is not first
+    assert transformer_cache_stats() == {"hits": 2, "misses": 2, "size": 2}
+
+
+def test_least_recently_used_is_evicted(monkeypatch):
+    monkeypatch.setattr(coords, "TRANSFORMER_CACHE_SIZE", 2)
+
+    a = get_transformer(32635)
+    get_transformer(32636)
+    assert get_transformer(32635) is a  # 32636 artık en eski
+    get_transformer(32637)
+
+    assert transformer_cache_stats()["size"] == 2
+    assert get_transformer(32635) is a
+    get_transformer(32636)
+    assert transformer_cache_stats() == {"hits": 2, "misses": 4, "size": 2}
+
+
+def test_threads_share_one_transformer():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        got = list(pool.map(lambda _: get_transformer(32635), range(64)))
+
+    assert all(t is got[0] for t in got)
+    stats = transformer_cache_stats()
+    assert stats["size"] == 1
+    assert stats["hits"] + stats["misses"] == 64
+
+
+def test_clear_resets_counters():
+    get_transformer(32635)
+    get_transformer(32635)
+    clear_transformer_cache()
+
+    assert transformer_cache_stats() == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_transform_xy_matches_single_point_calls():
+    transformer = get_transformer(32635)
+    xs = [500000.0, 510000.0, 495000.5]
+    ys = [4000000.0, 4010000.0, 3999000.25]
+
+    lons, lats = transform_xy(transformer, xs, ys)
+
+    assert isinstance(lons, list) and isinstance(lons[0], float)
+    for x, y, lon, lat in zip(xs, ys, lons, lats):
+        assert (lon, lat) == pytest.approx(transformer.transform(x, y))
+    assert transform_xy(transformer, [], []) == ([], [])
+    with pytest.raises(ValueError):
+        transform_xy(transformer, [1.0], [])
@@ -0,0 +1,166 @@
+# tests/test_db_pool.py
+"""
+core.db bağlantı havuzu: aynı thread'de iç içe checkout'ların transaction
+davranışı (SAVEPOINT) ve bağlantılara uygulanan performans profili.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from core.db import (
+    DbPerformanceProfile,
+    db_connection,
+    get_connection,
+    get_performance_profile,
+    read_connection,
+    reload_performance_profile,
+    set_performance_profile,
+)
+
+
+@pytest.fixture()
+def table(temp_db):
+    c = sqlite3.connect(temp_db)
+    c.execute("CREATE TABLE t (v TEXT)")
+    c.commit()
+    c.close()
+    return temp_db
+
+
+def _committed(path) -> list[str]:
+    """Havuzdan bağımsız bir bağlantıyla diskteki satırlar."""
+    c = sqlite3.connect(path)
+    try:
+        return [r[0] for r in c.execute("SELECT v FROM t ORDER BY rowid")]
+    finally:
+        c.close()
+
+
+def test_inner_commit_does_not_commit_outer_work(table):
+    outer = get_connection()
+    outer.execute("INSERT INTO t VALUES ('outer')")
+
+    inner = get_connection()
+    assert inner is outer
+    inner.execute("INSERT INTO t VALUES ('inner')")
+    inner.commit()
+    inner.close()
+
+    assert _committed(table) == []
+
+    # Dıştaki çağıran başarısız: commit etmeden iade → ikisi de geri alınır
+    outer.close()
+    assert _committed(table) == []
+
+
+def test_inner_commit_lands_with_outer_commit(table):
+    outer = get_connection()
+    outer.execute("INSERT INTO t VALUES ('outer')")
+    with db_connection() as inner:
+        inner.execute("INSERT INTO t VALUES ('inner')")
+    outer.commit()
+    outer.close()
+
+    assert _committed(table) == ["outer", "inner"]
+
+
+def test_inner_close_without_commit_keeps_outer_work(table):
+    outer = get_connection()
+    outer.execute("INSERT INTO t VALUES ('outer')")
+
+    inner = get_connection()
+    inner.execute("INSERT INTO t VALUES ('inner')")
+    inner.close()
+
+    outer.commit()
+    outer.close()
+    assert _committed(table) == ["outer"]
+
+
+def test_inner_failure_in_db_connection_rolls_back_only_inner(table):
+    with db_connection() as outer:
+        outer.execute("INSERT INTO t VALUES ('outer')")
+        with pytest.raises(RuntimeError):
+            with db_connection() as inner:
+                inner.execute("INSERT INTO t VALUES ('inner')")
+                raise RuntimeError
+
+    assert _committed(table) == ["outer"]
+
+
+def test_inner_commit_without_outer_transaction_is_durable(table):
+    outer = get_connection()
+
+    inner = get_connection()
+    inner.execute("INSERT INTO t VALUES ('inner')")
+    inner.commit()
+    inner.close()
+
+    assert _committed(table) == ["inner"]
+    outer.close()
+    assert _committed(table) == ["inner"]
+
+
+# ---------------------------------------------------------------------------
+# Performans profili
+# ---------------------------------------------------------------------------
+
+
+def _pragmas(con) -> dict[str, int]:
+    return {
+        name: con.execute(f"PRAGMA {name}").fetchone()[0]
+        for name in ("mmap_size", "cache_size", "synchronous", "temp_store")
+    }
+
+
+def test_default_profile_applied_to_pooled_connections(temp_db):
+    default = DbPerformanceProfile()
+
+    con = get_connection()
+    try:
+        assert _pragmas(con) == {
+            "mmap_size": default.mmap_size,
+            "cache_size": -default.cache_size_kb,
+            "synchronous": 1,  # NORMAL
+            "temp_store": 2,  # MEMORY
+        }
+    finally:
+        con.close()
+
+    with read_connection() as ro:
+        values = _pragmas(ro)
+    assert values["mmap_size"] == default.mmap_size
+    assert values["cache_size"] == -default.cache_size_kb
+    assert values["temp_store"] == 2
+
+
+def test_changed_profile_applied_on_next_checkout(temp_db):
+    con = get_connection()
+    con.close()
+
+    set_performance_profile(
+        DbPerformanceProfile(
+            mmap_size=0,
+            cache_size_kb=1024,
+            synchronous="FULL",
+            temp_store="FILE",
+            optimize_interval_s=0,
+        )
+    )
+
+    con = get_connection()
+    try:
+        assert _pragmas(con) == {
+            "mmap_size": 0,
+            "cache_size": -1024,
+            "synchronous": 2,  # FULL
+            "temp_store": 1,  # FILE
+        }
+    finally:
+        con.close()
+
+    # app_settings'e de yazıldı: yeniden okununca aynı profil gelir
+    reload_performance_profile()
+    assert get_performance_profile().synchronous == "FULL"
@@ -0,0 +1,114 @@
+# tests/test_finds_columnar.py
+"""
+encode_finds_columnar: sütunlu paket, web/map_script.js'teki
+decodeFindsColumnar ile çözülünce load_finds_for_project satırlarını aynen
+verir; 32 bit'e sığmayan id'ler float64 kolona geçer.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import math
+from array import array
+
+from core.map_data import _pack_column, encode_finds_columnar
+from map_script_harness import requires_node, run_map_script
+
+FIELDS = (
+    "id",
+    "trench_id",
+    "trench_code",
+    "trench_name",
+    "code",
+    "description",
+    "lat",
+    "lon",
+    "z",
+    "level_id",
+    "level_name",
+    "found_at",
+)
+
+
+def _find(id, trench_id=1, level_id=None, **extra):
+    row = {
+        "id": id,
+        "trench_id": trench_id,
+        "trench_code": f"A{trench_id}",
+        "trench_name": f"Açma {trench_id}",
+        "code": f"B{id}",
+        "description": "seramik",
+        "lat": 37.5 + id / 1000,
+        "lon": 27.25,
+        "z": 12.125,
+        "level_id": level_id,
+        "level_name": f"Seviye {level_id}" if level_id is not None else None,
+        "found_at": "2024-07-01",
+    }
+    row.update(extra)
+    return row
+
+
+FINDS = [
+    _find(1, level_id=3),
+    _find(2, trench_id=2, description=None, z=None),
+    _find(3, level_id=3, lat=None, lon=None, found_at=None),
+    _find(4, trench_id=2, level_id=5, code="Ş-1", description="çanak ağzı"),
+]
+
+
+def _decode(col) -> list:
+    """Kolonu JS'teki Int32Array / Float64Array gibi okur."""
+    typecode = {"i4": "i", "f8": "d"}[col["t"]]
+    arr = array(typecode, base64.b64decode(col["b"]))
+    return arr.tolist()
+
+
+def _js_decode(columnar) -> list:
+    return run_map_script(f"return decodeFindsColumnar({json.dumps(columnar)});")
+
+
+def test_tables_are_deduplicated():
+    cols = encode_finds_columnar(FINDS)
+
+    assert cols["count"] == 4
+    assert cols["trenches"] == [[1, "A1", "Açma 1"], [2, "A2", "Açma 2"]]
+    assert cols["levels"] == [[3, "Seviye 3"], [5, "Seviye 5"]]
+    assert _decode(cols["trench"]) == [0, 1, 0, 1]
+    assert _decode(cols["level"]) == [0, -1, 0, 1]
+    assert cols["description"]["table"] == ["seramik", None, "çanak ağzı"]
+    assert _decode(cols["description"]["index"]) == [0, 1, 0, 2]
+    # Boş sayılar NaN olarak gider
+    assert math.isnan(_decode(cols["z"])[1])
+    assert math.isnan(_decode(cols["lat"])[2])
+
+
+@requires_node
+def test_round_trip_through_map_script():
+    assert _js_decode(encode_finds_columnar(FINDS)) == [
+        {k: f[k] for k in FIELDS} for f in FINDS
+    ]
+
+
+@requires_node
+def test_empty_list_round_trip():
+    assert _js_decode(encode_finds_columnar([])) == []
+
+
+def test_pack_column_falls_back_to_float64_on_overflow():
+    assert _pack_column(iter([1, 2]), "i")["t"] == "i4"
+
+    big = 2**31
+    col = _pack_column((n for n in (1, big, 2**53)), "i")
+    assert col["t"] == "f8"
+    # Üreteç ikinci denemede baştan okunmuş olmalı
+    assert _decode(col) == [1.0, float(big), float(2**53)]
+
+
+@requires_node
+def test_large_ids_round_trip():
+    finds = [_find(1), _find(2**31 + 7), _find(2**40)]
+    cols = encode_finds_columnar(finds)
+
+    assert cols["id"]["t"] == "f8"
+    assert [f["id"] for f in _js_decode(cols)] == [1, 2**31 + 7, 2**40]
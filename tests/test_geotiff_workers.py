@@ -0,0 +1,76 @@
+# tests/test_geotiff_workers.py
+"""
+GeoTIFF tile'lama bellek planı: plan_workers'ın süreç sayısı ve GDAL
+önbelleği bellek tavanına sığar, CPU / max_workers ile sınırlanır.
+"""
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("osgeo.gdal")
+
+from core import geotiff_tiler  # noqa: E402
+from core.geotiff_tiler import (  # noqa: E402
+    _GDAL_CACHE_MAX_BYTES,
+    _GDAL_CACHE_MIN_BYTES,
+    _MB,
+    _PARENT_RESERVE_BYTES,
+    _TILE_MAX_BYTES,
+    _WORKER_BASE_BYTES,
+    plan_workers,
+)
+
+# _CHUNK_DEPTH = 3: parça başına 1 + 4 + 16 + 64 tile
+CHUNK_TILES = 85
+
+
+def _worker_bytes(chunk_tiles: int, cache: int) -> int:
+    return _WORKER_BASE_BYTES + cache + 2 * chunk_tiles * _TILE_MAX_BYTES
+
+
+def test_memory_bound():
+    # 1 GB: 832 MB bütçe, süreç başına 96 + 128 + 2 × 21.25 MB → 3 süreç
+    assert plan_workers(1024, CHUNK_TILES, max_workers=16) == (
+        3,
+        _GDAL_CACHE_MAX_BYTES,
+    )
+
+
+def test_cpu_bound(monkeypatch):
+    assert plan_workers(64 * 1024, CHUNK_TILES, max_workers=4) == (
+        4,
+        _GDAL_CACHE_MAX_BYTES,
+    )
+    monkeypatch.setattr(geotiff_tiler.os, "cpu_count", lambda: 2)
+    assert plan_workers(64 * 1024, CHUNK_TILES)[0] == 2
+    monkeypatch.setattr(geotiff_tiler.os, "cpu_count", lambda: None)
+    assert plan_workers(64 * 1024, CHUNK_TILES)[0] == 1
+
+
+def test_single_worker_shrinks_gdal_cache():
+    # 400 MB: 208 MB bütçe tek tam süreç (266.5 MB) için yetmez
+    workers, cache = plan_workers(400, CHUNK_TILES, max_workers=8)
+    assert workers == 1
+    assert cache == 208 * _MB - _WORKER_BASE_BYTES - 2 * CHUNK_TILES * _TILE_MAX_BYTES
+    assert _worker_bytes(CHUNK_TILES, cache) == 400 * _MB - _PARENT_RESERVE_BYTES
+
+    # Tavan ana süreç payının da altında: yine bir süreç, önbellek alt sınırda
+    assert plan_workers(100, CHUNK_TILES, max_workers=8) == (1, _GDAL_CACHE_MIN_BYTES)
+
+
+@pytest.mark.parametrize("chunk_tiles", [1, 21, CHUNK_TILES, 341])
+def test_plan_fits_memory_limit(chunk_tiles):
+    previous = 0
+    for memory_mb in range(256, 16 * 1024, 64):
+        workers, cache = plan_workers(memory_mb, chunk_tiles, max_workers=64)
+        budget = memory_mb * _MB - _PARENT_RESERVE_BYTES
+
+        assert 1 <= workers <= 64
+        assert _GDAL_CACHE_MIN_BYTES <= cache <= _GDAL_CACHE_MAX_BYTES
+        if cache > _GDAL_CACHE_MIN_BYTES:
+            assert workers * _worker_bytes(chunk_tiles, cache) <= budget
+        # Bir süreç daha sığmıyor
+        if workers < 64 and cache == _GDAL_CACHE_MAX_BYTES:
+            assert (workers + 1) * _worker_bytes(chunk_tiles, cache) > budget
+        assert workers >= previous
+        previous = workers
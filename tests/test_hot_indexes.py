@@ -0,0 +1,113 @@
+# tests/test_hot_indexes.py
+"""
+Migration 002 index'lerinin açma / buluntu yükleyicilerinde kullanıldığını
+EXPLAIN QUERY PLAN ile doğrular.
+
+Bellekteki temel şemaya (conftest.BASE_SCHEMA) tüm migration'lar
+çalıştırılır ve yükleyicilerin kendi SQL'inin planı incelenir.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from core.db import SCHEMA_VERSION, get_schema_version, run_migrations
+from core.services.finds_service import FINDS_FOR_PROJECT_SQL
+from core.services.trenches_service import (
+    TRENCH_VERTICES_FOR_PROJECT_SQL,
+    TRENCHES_FOR_PROJECT_SQL,
+)
+
+
+def _seed(con: sqlite3.Connection) -> None:
+    """Birkaç proje: planlayıcı ANALYZE istatistiklerini gerçekçi görsün."""
+    con.execute(
+        "INSERT INTO coordinate_systems (name, epsg_code) VALUES ('UTM', 32635)"
+    )
+    for p in range(1, 6):
+        con.execute(
+            "INSERT INTO projects (id, name, code, coordinate_system_id) "
+            "VALUES (?, ?, ?, 1)",
+            (p, f"P{p}", f"P{p}"),
+        )
+        con.execute(
+            "INSERT INTO levels (project_id, name) VALUES (?, 'Seviye 1')", (p,)
+        )
+        for t in range(20):
+            tid = con.execute(
+                "INSERT INTO trenches (project_id, code, name) VALUES (?, ?, ?)",
+                (p, f"T{t}", f"Açma {t}"),
+            ).lastrowid
+            for i in range(4):
+                con.execute(
+                    "INSERT INTO trench_vertices "
+                    "(trench_id, order_index, x_global, y_global) "
+                    "VALUES (?, ?, ?, ?)",
+                    (tid, i + 1, 500000.0 + i, 4000000.0 + i),
+                )
+            for f in range(10):
+                con.execute(
+                    "INSERT INTO finds (trench_id, code, x_global, y_global) "
+                    "VALUES (?, ?, ?, ?)",
+                    (tid, f"F{f}", 500000.5, 4000000.5),
+                )
+    con.commit()
+
+
+@pytest.fixture()
+def con(base_con):
+    _seed(base_con)
+    run_migrations(base_con)
+    base_con.execute("ANALYZE")
+    return base_con
+
+
+def _plan(con: sqlite3.Connection, sql: str) -> list[str]:
+    return [row[3] for row in con.execute("EXPLAIN QUERY PLAN " + sql, (1,))]
+
+
+def _assert_no_full_scan(plan: list[str], table_alias: str) -> None:
+    for detail in plan:
+        # "SCAN v" tam tarama; "SCAN v USING (COVERING) INDEX" ise sıralı
+        # index taramasıdır ve yine tablonun tamamını dolaşır
+        assert not detail.startswith(f"SCAN {table_alias}"), plan
+
+
+def test_migrations_reach_schema_version(con):
+    assert get_schema_version(con) == SCHEMA_VERSION
+
+
+def _assert_trenches_by_project(plan: list[str]) -> None:
+    assert any(
+        d.startswith("SEARCH t USING")
+        and "idx_trenches_project_cover" in d
+        and "project_id=?" in d
+        for d in plan
+    ), plan
+    _assert_no_full_scan(plan, "t")
+
+
+def test_trench_loader_uses_indexes(con):
+    _assert_trenches_by_project(_plan(con, TRENCHES_FOR_PROJECT_SQL))
+
+    plan = _plan(con, TRENCH_VERTICES_FOR_PROJECT_SQL)
+    _assert_trenches_by_project(plan)
+    assert any(
+        d.startswith("SEARCH v USING COVERING INDEX idx_trench_vertices_trench_cover")
+        for d in plan
+    ), plan
+    _assert_no_full_scan(plan, "v")
+
+
+def test_find_loader_uses_indexes(con):
+    plan = _plan(con, FINDS_FOR_PROJECT_SQL)
+
+    assert any(
+        d.startswith("SEARCH f USING INDEX idx_finds_trench_id") for d in plan
+    ), plan
+    assert any(
+        d.startswith("SEARCH t USING") and "idx_trenches_project_cover" in d
+        for d in plan
+    ), plan
+    _assert_no_full_scan(plan, "f")
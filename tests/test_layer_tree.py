@@ -0,0 +1,91 @@
+# tests/test_layer_tree.py
+"""
+LayerTreeModel.replace_children: ağaç yeniden kurulurken kullanıcının
+gizlediği kökler ve anahtarlar gizli kalır, haritaya yeniden bildirilir.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+from app.layer_tree import LayerTreeModel  # noqa: E402
+
+
+@dataclass
+class Node:
+    # app.map_loader.TreeNode ile aynı nitelikler (o modül WebEngine ister)
+    label: str
+    layer_key: str
+    payload: tuple | None = None
+    children: list["Node"] = field(default_factory=list)
+
+
+@pytest.fixture()
+def model():
+    m = LayerTreeModel()
+    m.add_entry(-1, "Açmalar", "group_trenches")
+    m.add_entry(-1, "Buluntular", "group_finds")
+    return m
+
+
+def _record(model) -> list[dict[str, bool]]:
+    emitted: list[dict[str, bool]] = []
+    model.layersVisibilityChanged.connect(emitted.append)
+    return emitted
+
+
+def _visible_by_key(model) -> dict[str, bool]:
+    return {
+        model._keys[e]: model.is_visible(e)
+        for e in range(len(model._labels))
+        if model._keys[e]
+    }
+
+
+def test_children_of_hidden_root_are_built_hidden(model):
+    model.set_visible_recursive(0, False)
+    emitted = _record(model)
+
+    model.replace_children(
+        {
+            0: [Node("A", "trench_1", children=[Node("B1", "find_1")])],
+            1: [Node("B2", "find_2")],
+        }
+    )
+
+    assert _visible_by_key(model) == {
+        "group_trenches": False,
+        "trench_1": False,
+        "find_1": False,
+        "group_finds": True,
+        "find_2": True,
+    }
+    assert emitted == [{"trench_1": False, "find_1": False}]
+
+
+def test_hidden_keys_survive_rebuild(model):
+    model.replace_children({0: [Node("A", "trench_1"), Node("B", "trench_2")]})
+    model.set_visible_recursive(2, False)  # trench_1
+    emitted = _record(model)
+
+    model.replace_children(
+        {0: [Node("B", "trench_2"), Node("A", "trench_1"), Node("C", "trench_3")]}
+    )
+
+    visible = _visible_by_key(model)
+    assert visible["trench_1"] is False
+    assert visible["trench_2"] is True
+    assert visible["trench_3"] is True
+    assert emitted == [{"trench_1": False}]
+
+
+def test_rebuild_without_hidden_keys_emits_nothing(model):
+    emitted = _record(model)
+
+    model.replace_children({0: [Node("A", "trench_1")]})
+
+    assert _visible_by_key(model)["trench_1"] is True
+    assert emitted == []
@@ -0,0 +1,86 @@
+# tests/test_map_filter.py
+"""
+web/map_script.js filtre akışı: metin araması köprüye (searchProject)
+gider, "search" mesajı gelince marker'lar dönen id kümesine göre süzülür.
+
+Sayfa node'da çalıştırılır (bkz. map_script_harness); node yoksa testler
+atlanır.
+"""
+from __future__ import annotations
+
+from map_script_harness import requires_node, run_map_script
+
+pytestmark = requires_node
+
+# İki buluntu; yalnızca 2 numara "Seviye 2"de
+_SETUP = """
+const { calls, sent, filterInput } = __env;
+[1, 2].forEach((id) => {
+  findsById[id] = { id, trench_id: null, code: "B" + id };
+  findLayers[id] = { marker: id };
+});
+const added = () =>
+  calls.filter(([n]) => n === "addMarker").map(([, a]) => a[0].marker);
+"""
+
+
+def _run(scenario: str):
+    return run_map_script(_SETUP + scenario)
+
+
+def test_level_click_filters_markers():
+    # Qt seviye tıklaması: filtre kutusu boşken applyFilter(seviyeAdı)
+    out = _run(
+        """
+        applyFilter("Seviye 2");
+        const before = added();
+        calls.length = 0;
+        handleBridgeMessage({
+          op: "search", query: "Seviye 2", find_ids: [2], trench_ids: [],
+        });
+        return { sent, before, after: added(), box: filterInput.value };
+        """
+    )
+    assert out["sent"] == ["Seviye 2"]
+    assert out["before"] == []
+    assert out["after"] == [2]
+    assert out["box"] == ""
+
+
+def test_stale_search_result_is_ignored():
+    out = _run(
+        """
+        filterInput.value = "ser";
+        applyFilter("ser");
+        filterInput.value = "seram";
+        applyFilter("seram");
+        calls.length = 0;
+        handleBridgeMessage({
+          op: "search", query: "ser", find_ids: [1], trench_ids: [],
+        });
+        const stale = added();
+        handleBridgeMessage({
+          op: "search", query: "seram", find_ids: [2], trench_ids: [],
+        });
+        return { sent, stale, after: added() };
+        """
+    )
+    assert out["sent"] == ["ser", "seram"]
+    assert out["stale"] == []
+    assert out["after"] == [2]
+
+
+def test_cleared_filter_drops_pending_result():
+    # Seviye tıklamasından hemen sonra açma seçildi: applyFilter('')
+    out = _run(
+        """
+        applyFilter("Seviye 2");
+        applyFilter("");
+        calls.length = 0;
+        handleBridgeMessage({
+          op: "search", query: "Seviye 2", find_ids: [2], trench_ids: [],
+        });
+        return { after: added() };
+        """
+    )
+    assert out["after"] == []
@@ -0,0 +1,83 @@
+# tests/test_migrations.py
+"""
+run_migrations / ensure_schema idempotent: ikinci çalıştırma hiçbir şey
+uygulamaz; user_version geri alınıp yeniden çalıştırılan migration'lar
+(ör. yarıda kalmış bir yükseltme) şemayı ve veriyi değiştirmez.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from core.db import (
+    SCHEMA_VERSION,
+    db_connection,
+    ensure_schema,
+    get_schema_version,
+    run_migrations,
+)
+
+
+def _schema(con: sqlite3.Connection) -> list[tuple]:
+    return sorted(
+        con.execute("SELECT type, name, tbl_name, sql FROM sqlite_master"),
+        key=lambda row: (row[0], row[1]),
+    )
+
+
+def _rows(con: sqlite3.Connection) -> dict[str, list[tuple]]:
+    return {
+        table: con.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+        for table in ("projects", "trenches", "trench_vertices", "finds")
+    }
+
+
+@pytest.fixture()
+def migrated(base_con):
+    assert run_migrations(base_con) == SCHEMA_VERSION
+    base_con.execute("INSERT INTO projects (id, name, code) VALUES (1, 'Proje', 'P1')")
+    base_con.execute("INSERT INTO trenches (id, project_id, code) VALUES (1, 1, 'A')")
+    base_con.execute(
+        "INSERT INTO trench_vertices (trench_id, order_index, x_global, y_global) "
+        "VALUES (1, 1, 500000.0, 4000000.0)"
+    )
+    base_con.execute(
+        "INSERT INTO finds (trench_id, code, description) "
+        "VALUES (1, 'B1', 'seramik parçası')"
+    )
+    base_con.commit()
+    return base_con
+
+
+def test_second_run_applies_nothing(migrated):
+    schema = _schema(migrated)
+
+    assert run_migrations(migrated) == 0
+    assert get_schema_version(migrated) == SCHEMA_VERSION
+    assert _schema(migrated) == schema
+
+
+@pytest.mark.parametrize("version", range(SCHEMA_VERSION))
+def test_reapplied_migrations_keep_schema_and_data(migrated, version):
+    schema = _schema(migrated)
+    rows = _rows(migrated)
+
+    migrated.execute(f"PRAGMA user_version = {version}")
+    migrated.commit()
+
+    assert run_migrations(migrated) == SCHEMA_VERSION - version
+    assert get_schema_version(migrated) == SCHEMA_VERSION
+    assert _schema(migrated) == schema
+    assert _rows(migrated) == rows
+
+
+def test_ensure_schema_is_idempotent(temp_db):
+    with db_connection() as con:
+        schema = _schema(con)
+
+    ensure_schema()
+
+    with db_connection() as con:
+        assert get_schema_version(con) == SCHEMA_VERSION
+        assert _schema(con) == schema
@@ -0,0 +1,112 @@
+# tests/test_search_service.py
+"""
+FTS5 araması: build_fts_query'nin kullanıcı girdisini güvenli önek
+sorgusuna çevirmesi; search_finds / search_trenches / search_project'in
+proje sınırı, aksan katlama, AND eşleşme, bm25 sırası ve trigger'larla
+güncel kalan index.
+"""
+from __future__ import annotations
+
+import pytest
+
+from core.db import db_connection
+from core.services.search_service import (
+    build_fts_query,
+    search_finds,
+    search_project,
+    search_trenches,
+)
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("amfora", '"amfora"*'),
+        ("  Kırmızı   amfora ", '"Kırmızı"* "amfora"*'),
+        # FTS5 operatörleri ve tırnaklar kelime olarak kalmaz
+        ('amfora OR "x" NOT -y*', '"amfora"* "OR"* "x"* "NOT"* "y"*'),
+        ("B-12", '"B"* "12"*'),
+        ("", ""),
+        ("  ", ""),
+        ("()*-", ""),
+        (None, ""),
+    ],
+)
+def test_build_fts_query(raw, expected):
+    assert build_fts_query(raw) == expected
+
+
+@pytest.fixture()
+def project(temp_db):
+    with db_connection() as con:
+        con.executemany(
+            "INSERT INTO projects (id, name, code) VALUES (?, ?, ?)",
+            [(1, "Kale Kazısı", "P1"), (2, "Liman", "P2")],
+        )
+        con.executemany(
+            "INSERT INTO levels (id, project_id, name) VALUES (?, ?, ?)",
+            [(1, 1, "Roma"), (2, 1, "Bizans")],
+        )
+        con.executemany(
+            "INSERT INTO trenches (id, project_id, code, name) VALUES (?, ?, ?, ?)",
+            [
+                (1, 1, "A1", "Kuzey Sur"),
+                (2, 1, "B2", "Güney Amfora Deposu"),
+                (3, 2, "C3", "İskele"),
+            ],
+        )
+        con.executemany(
+            "INSERT INTO finds (id, trench_id, code, description, level_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (1, 1, "F1", "amfora kulpu, uzun ve kırık bir gövde parçası", 1),
+                (2, 1, "F2", "amfora amfora ağız", 2),
+                (3, 2, "F3", "sikke", 1),
+                (4, 1, "F4", "Şişe ve kırmızı astarlı çanak", None),
+                (5, 3, "F5", "amfora", None),
+            ],
+        )
+    return 1
+
+
+def test_search_finds_ranks_by_relevance(project):
+    # bm25: F2'de terim iki kez geçiyor; F3 kısa açma adında eşleşiyor;
+    # F1'in uzun açıklaması en sona kalır
+    assert search_finds(project, "amfora") == [2, 3, 1]
+
+
+def test_search_finds_scope_and_matching(project):
+    # Başka projedeki F5 gelmez
+    assert 5 not in search_finds(project, "amfora")
+    # Önek, büyük/küçük harf ve aksan katlama
+    assert search_finds(project, "ÇAN") == [4]
+    assert search_finds(project, "sise canak") == [4]
+    # Kelimelerin hepsi aranır (AND); seviye adı da index'te
+    assert search_finds(project, "amfora bizans") == [2]
+    assert sorted(search_finds(project, "roma")) == [1, 3]
+    assert search_finds(project, "") == []
+    assert search_finds(project, "amfora", limit=1) == [2]
+
+
+def test_search_trenches_and_project(project):
+    assert search_trenches(project, "amfora") == [2]
+    assert sorted(search_trenches(project, "kazısı")) == [1, 2]
+    assert search_trenches(2, "iskele") == [3]
+
+    # Buluntular açmalarının adıyla da bulunur
+    result = search_project(project, "sur")
+    assert result["trench_ids"] == [1]
+    assert sorted(result["find_ids"]) == [1, 2, 4]
+
+
+def test_index_follows_edits(project):
+    with db_connection() as con:
+        con.execute("UPDATE finds SET description = 'mühür' WHERE id = 3")
+        con.execute("UPDATE levels SET name = 'Geç Roma' WHERE id = 2")
+        con.execute("UPDATE trenches SET name = 'Batı Sur' WHERE id = 2")
+        con.execute("DELETE FROM finds WHERE id = 1")
+
+    assert search_finds(project, "mühür") == [3]
+    assert search_finds(project, "geç") == [2]
+    assert search_finds(project, "amfora") == [2]
+    assert search_trenches(project, "batı") == [2]
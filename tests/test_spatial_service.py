@@ -0,0 +1,113 @@
+# tests/test_spatial_service.py
+"""
+core.services.spatial_service: R*Tree bbox sorguları ve WGS84 cache'inin
+yalnızca veri değiştiğinde doldurulması.
+"""
+from __future__ import annotations
+
+import pytest
+
+from core.db import db_connection
+from core.services import spatial_service
+from core.services.spatial_service import (
+    query_finds_in_bbox,
+    query_trenches_in_bbox,
+)
+
+# UTM 35N (EPSG:32635): (500000, 4000000) ≈ 27.0°E 36.14°N
+NEAR = (500000.0, 4000000.0)
+FAR = (600000.0, 4100000.0)
+WGS84_BOX = (26.99, 36.13, 27.01, 36.15)
+
+
+@pytest.fixture()
+def project(temp_db, monkeypatch):
+    monkeypatch.setattr(spatial_service, "_wgs84_filled_at", {})
+    with db_connection() as con:
+        con.execute(
+            "INSERT INTO coordinate_systems (id, name, epsg_code) "
+            "VALUES (1, 'UTM 35N', 32635)"
+        )
+        con.execute(
+            "INSERT INTO projects (id, name, code, coordinate_system_id) "
+            "VALUES (1, 'Proje', 'P1', 1)"
+        )
+        con.execute(
+            "INSERT INTO trenches (id, project_id, code, name) "
+            "VALUES (1, 1, 'A1', 'Kuzey')"
+        )
+        for i, (dx, dy) in enumerate([(0, 0), (10, 0), (10, 10), (0, 10)]):
+            con.execute(
+                "INSERT INTO trench_vertices "
+                "(trench_id, order_index, x_global, y_global) VALUES (1, ?, ?, ?)",
+                (i + 1, NEAR[0] + dx, NEAR[1] + dy),
+            )
+        con.executemany(
+            "INSERT INTO finds (id, trench_id, code, x_global, y_global) "
+            "VALUES (?, 1, ?, ?, ?)",
+            [(1, "B1", *NEAR), (2, "B2", *FAR)],
+        )
+    return 1
+
+
+@pytest.fixture()
+def fill_calls(monkeypatch):
+    calls = []
+    real_fill = spatial_service.fill_wgs84_cache
+
+    def counting_fill(project_id, con=None):
+        calls.append(project_id)
+        return real_fill(project_id, con)
+
+    monkeypatch.setattr(spatial_service, "fill_wgs84_cache", counting_fill)
+    return calls
+
+
+def test_finds_in_wgs84_bbox(project):
+    finds = query_finds_in_bbox(project, WGS84_BOX)
+
+    assert [f["id"] for f in finds] == [1]
+    assert finds[0]["lon"] == pytest.approx(27.0, abs=1e-3)
+    assert finds[0]["trench_code"] == "A1"
+
+
+def test_finds_in_project_bbox(project):
+    box = (NEAR[0] - 1, NEAR[1] - 1, FAR[0] + 1, FAR[1] + 1)
+
+    finds = query_finds_in_bbox(project, box, crs="project")
+
+    assert [f["id"] for f in finds] == [1, 2]
+    assert all(f["lat"] is not None for f in finds)
+
+
+def test_finds_in_bbox_limit_and_invalid_crs(project):
+    world = (-180.0, -90.0, 180.0, 90.0)
+    assert [f["id"] for f in query_finds_in_bbox(project, world, limit=1)] == [1]
+    with pytest.raises(ValueError):
+        query_finds_in_bbox(project, world, crs="mercator")
+
+
+def test_trenches_in_bbox(project):
+    trenches = query_trenches_in_bbox(project, WGS84_BOX)
+
+    assert [t["id"] for t in trenches] == [1]
+    assert [v["order"] for v in trenches[0]["vertices"]] == [1, 2, 3, 4]
+    assert query_trenches_in_bbox(project, (0.0, 0.0, 1.0, 1.0)) == []
+
+
+def test_cache_filled_once_per_data_revision(project, fill_calls):
+    query_finds_in_bbox(project, WGS84_BOX)
+    query_trenches_in_bbox(project, WGS84_BOX)
+    query_finds_in_bbox(project, WGS84_BOX, crs="project")
+    assert fill_calls == [project]
+
+    # Koordinat değişti: cache boşaldı, sayaç arttı → bir kez yeniden dolar
+    with db_connection() as con:
+        con.execute(
+            "UPDATE finds SET x_global = ?, y_global = ? WHERE id = 2", NEAR
+        )
+    finds = query_finds_in_bbox(project, WGS84_BOX)
+    query_finds_in_bbox(project, WGS84_BOX)
+
+    assert fill_calls == [project, project]
+    assert [f["id"] for f in finds] == [1, 2]
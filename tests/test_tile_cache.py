@@ -0,0 +1,109 @@
+# tests/test_tile_cache.py
+"""
+TileCache.evict: kotaya inene kadar en uzun süredir kullanılmayan
+sabitlenmemiş tile'lar silinir; sabitlenmiş aralıklar ve paylaşılan
+içerik korunur.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from core.tile_cache import TileCache
+
+SOURCE = "https://tile.example/{z}/{x}/{y}.png"
+SIZE = 100
+
+
+def _data(n: int) -> bytes:
+    return bytes([n]) * SIZE
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    c = TileCache(tmp_path / "tile_cache.db")
+    yield c
+    c.close()
+
+
+def _fill(cache: TileCache, tiles: dict[tuple[int, int, int], bytes]) -> int:
+    """Tile'ları yazar; erişim sırası verilen sıradır (ilk = en eski)."""
+    source_id = cache.source_id(SOURCE)
+    for z, x, y in tiles:
+        cache.put_tile(source_id, z, x, y, tiles[(z, x, y)])
+    cache.flush()
+    con = sqlite3.connect(cache.path)
+    with con:
+        con.executemany(
+            "UPDATE tiles SET accessed_at = ? "
+            "WHERE source_id = ? AND z = ? AND x = ? AND y = ?",
+            [(n, source_id, *key) for n, key in enumerate(tiles)],
+        )
+    con.close()
+    return source_id
+
+
+def _keys(cache: TileCache, source_id: int) -> list[tuple[int, int, int]]:
+    """Kalan tile'lar (has_tile erişim zamanını değiştirir: ayrı bağlantı)."""
+    con = sqlite3.connect(cache.path)
+    try:
+        return con.execute(
+            "SELECT z, x, y FROM tiles WHERE source_id = ? ORDER BY z, x, y",
+            (source_id,),
+        ).fetchall()
+    finally:
+        con.close()
+
+
+def test_evicts_least_recently_used_down_to_quota(cache):
+    sid = _fill(cache, {(1, x, 0): _data(x) for x in range(4)})
+    assert cache.total_bytes() == 4 * SIZE
+
+    assert cache.evict(4 * SIZE) == (0, 0)
+    # Bir tile'lık fazlalık: yalnızca en eskisi gider
+    assert cache.evict(4 * SIZE - 1) == (1, SIZE)
+    assert _keys(cache, sid) == [(1, 1, 0), (1, 2, 0), (1, 3, 0)]
+
+    assert cache.evict(SIZE) == (2, 2 * SIZE)
+    assert _keys(cache, sid) == [(1, 3, 0)]
+    assert cache.total_bytes() == SIZE
+
+
+def test_pinned_tiles_are_kept(cache):
+    tiles = {(1, x, 0): _data(x) for x in range(4)}
+    tiles[(2, 0, 1)] = _data(9)
+    sid = _fill(cache, tiles)
+    # En eski iki tile (x 0..1) ve z=2 sabit
+    cache.set_pins(
+        [
+            ("katman-1", sid, 1, [(0, 0, 1)]),
+            ("katman-2", sid, 2, [(1, 0, 0)]),
+        ]
+    )
+    assert cache.pinned_bytes() == 3 * SIZE
+
+    assert cache.evict(4 * SIZE) == (1, SIZE)
+    assert _keys(cache, sid) == [(1, 0, 0), (1, 1, 0), (1, 3, 0), (2, 0, 1)]
+
+    # Kota sabitlenmişlerin altında: onlar kalır, toplam kotanın üstünde biter
+    assert cache.evict(0) == (1, SIZE)
+    assert _keys(cache, sid) == [(1, 0, 0), (1, 1, 0), (2, 0, 1)]
+    assert cache.total_bytes() == 3 * SIZE
+
+    # Sabitleme kalkınca silinebilirler
+    cache.set_pins([])
+    assert cache.evict(0) == (3, 3 * SIZE)
+    assert cache.total_bytes() == 0
+
+
+def test_shared_content_is_freed_with_its_last_tile(cache):
+    same = _data(7)
+    sid = _fill(cache, {(1, 0, 0): same, (1, 1, 0): _data(1), (1, 2, 0): same})
+    assert cache.total_bytes() == 2 * SIZE
+
+    # En eski tile'ın verisi başka tile'da da var: silinmesi yer açmaz,
+    # döngü sıradakine geçer
+    assert cache.evict(SIZE) == (2, SIZE)
+    assert _keys(cache, sid) == [(1, 2, 0)]
+    assert cache.get_tile_with_id(sid, 1, 2, 0)[0] == same
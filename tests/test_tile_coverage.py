@@ -0,0 +1,210 @@
+# tests/test_tile_coverage.py
+"""
+Offline tile kapsama planı: zoom_coverage'ın satır aralıkları kaba kuvvetle
+bulunan kesişen tile kümesine eşit; plan_coverage açma ayak izlerini
+buffer'la kapsar, derin zoom'da dar buffer'ı, geometri yoksa proje
+merkezindeki kareyi kullanır.
+"""
+from __future__ import annotations
+
+import pytest
+from shapely.geometry import LineString, Point, Polygon, box
+
+from core.coords import get_transformer
+from core.db import db_connection
+from core.tile_coverage import (
+    _tile_box,
+    _tile_xy,
+    lonlat_to_mercator,
+    mercator_to_lonlat,
+    plan_coverage,
+    zoom_coverage,
+)
+
+# Ege kıyısı, UTM 35N
+ORIGIN = (500000.0, 4200000.0)
+
+
+def _brute_force(geometry, z: int) -> set[tuple[int, int, int]]:
+    min_x, min_y, max_x, max_y = geometry.bounds
+    x0, y0 = _tile_xy(z, min_x, max_y)
+    x1, y1 = _tile_xy(z, max_x, min_y)
+    return {
+        (z, x, y)
+        for x in range(x0, x1 + 1)
+        for y in range(y0, y1 + 1)
+        if geometry.intersects(_tile_box(z, x, y))
+    }
+
+
+def _tiles(coverage) -> set[tuple[int, int, int]]:
+    tiles = list(coverage.iter_tiles())
+    assert len(tiles) == len(set(tiles)) == coverage.count
+    return set(tiles)
+
+
+def test_mercator_round_trip():
+    mx, my = lonlat_to_mercator(27.0, 37.9)
+    assert mercator_to_lonlat(mx, my) == pytest.approx((27.0, 37.9))
+    # Kutuplar Web Mercator sınırına kırpılır
+    assert lonlat_to_mercator(0.0, 90.0)[1] == pytest.approx(20037508.34, abs=1.0)
+
+
+def _l_shape():
+    x, y = lonlat_to_mercator(27.0, 37.9)
+    step = 3000.0
+    return Polygon(
+        [
+            (x, y),
+            (x + 3 * step, y),
+            (x + 3 * step, y + step),
+            (x + step, y + step),
+            (x + step, y + 3 * step),
+            (x, y + 3 * step),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        _l_shape(),
+        # Aynı satırlarda iki ayrı parça: aradaki tile'lar atlanır
+        box(*lonlat_to_mercator(27.0, 37.9), *lonlat_to_mercator(27.01, 37.91)).union(
+            box(*lonlat_to_mercator(27.05, 37.9), *lonlat_to_mercator(27.06, 37.91))
+        ),
+        LineString([lonlat_to_mercator(27.0, 37.9), lonlat_to_mercator(27.1, 38.0)]),
+        Point(lonlat_to_mercator(27.0, 37.9)),
+    ],
+    ids=["concave", "multipart", "line", "point"],
+)
+@pytest.mark.parametrize("z", [12, 14, 15])
+def test_zoom_coverage_matches_brute_force(geometry, z):
+    coverage = zoom_coverage(geometry, z)
+
+    assert _tiles(coverage) == _brute_force(geometry, z)
+    # Satırlar yukarıdan aşağıya sıralı (aralıkların çakışmadığını _tiles bakar)
+    rows = [r[0] for r in coverage.runs]
+    assert rows == sorted(rows)
+
+
+def test_zoom_coverage_of_empty_geometry():
+    coverage = zoom_coverage(Polygon(), 10)
+    assert coverage.count == 0
+    assert coverage.tile_range is None
+
+
+# ---------------------------------------------------------------------------
+# plan_coverage
+# ---------------------------------------------------------------------------
+
+
+def _square(x: float, y: float, side: float) -> list[tuple[float, float]]:
+    return [(x, y), (x + side, y), (x + side, y + side), (x, y + side)]
+
+
+@pytest.fixture()
+def project(temp_db):
+    """İki küçük açma, aralarında 6 km; proje merkezi ilk açmada."""
+    with db_connection() as con:
+        con.execute(
+            "INSERT INTO coordinate_systems (id, name, epsg_code) "
+            "VALUES (1, 'UTM 35N', 32635)"
+        )
+        con.execute(
+            "INSERT INTO projects (id, name, code, coordinate_system_id, "
+            "center_x, center_y) VALUES (1, 'Proje', 'P1', 1, ?, ?)",
+            ORIGIN,
+        )
+        con.execute(
+            "INSERT INTO projects (id, name, code, coordinate_system_id, "
+            "center_x, center_y) VALUES (2, 'Boş', 'P2', 1, ?, ?)",
+            ORIGIN,
+        )
+        con.execute("INSERT INTO projects (id, name, code) VALUES (3, 'Yersiz', 'P3')")
+        for tid, dx in ((1, 0.0), (2, 6000.0)):
+            con.execute(
+                "INSERT INTO trenches (id, project_id, code) VALUES (?, 1, ?)",
+                (tid, f"A{tid}"),
+            )
+            con.executemany(
+                "INSERT INTO trench_vertices "
+                "(trench_id, order_index, x_global, y_global) VALUES (?, ?, ?, ?)",
+                [
+                    (tid, i, x, y)
+                    for i, (x, y) in enumerate(
+                        _square(ORIGIN[0] + dx, ORIGIN[1], 20.0), 1
+                    )
+                ],
+            )
+    return 1
+
+
+def _tile_of(z: int, easting: float, northing: float) -> tuple[int, int, int]:
+    lon, lat = get_transformer(32635).transform(easting, northing)
+    return (z, *_tile_xy(z, *lonlat_to_mercator(lon, lat)))
+
+
+def test_plan_covers_trenches_with_buffer(project):
+    plan = plan_coverage(project, 14, 17, buffer_m=200.0)
+
+    assert plan.source == "features"
+    assert [zc.zoom for zc in plan.zooms] == [14, 15, 16, 17]
+    tiles = set().union(*(_tiles(zc) for zc in plan.zooms))
+    for z in range(14, 18):
+        for dx in (0.0, 6000.0):
+            assert _tile_of(z, ORIGIN[0] + dx, ORIGIN[1]) in tiles
+            # buffer içinde kalan nokta da kapsanır
+            assert _tile_of(z, ORIGIN[0] + dx - 150.0, ORIGIN[1]) in tiles
+    # Açmaların arası (z17'de) kapsanmaz
+    assert _tile_of(17, ORIGIN[0] + 3000.0, ORIGIN[1]) not in tiles
+
+    counts = [zc.count for zc in plan.zooms]
+    assert counts == sorted(counts)
+    assert plan.total_tiles == sum(counts)
+    assert plan.estimated_bytes == plan.total_tiles * plan.tile_bytes
+    assert "Toplam" in plan.describe()
+
+    lon_min, lat_min, lon_max, lat_max = plan.bounds
+    for dx in (0.0, 6000.0):
+        lon, lat = get_transformer(32635).transform(ORIGIN[0] + dx, ORIGIN[1])
+        assert lon_min < lon < lon_max and lat_min < lat < lat_max
+
+
+def test_deep_zoom_uses_narrow_buffer(project):
+    wide = plan_coverage(project, 15, 18, buffer_m=300.0)
+    narrow = plan_coverage(
+        project, 15, 18, buffer_m=300.0, deep_buffer_m=20.0, deep_zoom=17
+    )
+
+    assert [zc.count for zc in narrow.zooms[:2]] == [zc.count for zc in wide.zooms[:2]]
+    for deep_wide, deep_narrow in zip(wide.zooms[2:], narrow.zooms[2:]):
+        assert _tiles(deep_narrow) < _tiles(deep_wide)
+    # Sınırlar en geniş buffer'dan
+    assert narrow.bounds == pytest.approx(wide.bounds)
+
+
+def test_center_square_without_features(project):
+    for plan in (
+        plan_coverage(2, 16, 16, buffer_m=500.0),
+        plan_coverage(project, 16, 16, buffer_m=500.0, use_features=False),
+    ):
+        assert plan.source == "center"
+        coverage = plan.zooms[0]
+        x_min, x_max, y_min, y_max = coverage.tile_range
+        # Kare: her satır aynı x aralığını kapsar
+        assert {(r[1], r[2]) for r in coverage.runs} == {(x_min, x_max)}
+        assert len(coverage.runs) == y_max - y_min + 1
+        assert _tile_of(16, *ORIGIN) in _tiles(coverage)
+
+
+def test_invalid_arguments(project):
+    with pytest.raises(ValueError):
+        plan_coverage(project, 15, 14, buffer_m=100.0)
+    with pytest.raises(ValueError):
+        plan_coverage(project, 14, 15, buffer_m=-1.0)
+    with pytest.raises(ValueError):
+        plan_coverage(project, 14, 15, buffer_m=100.0, deep_buffer_m=-1.0)
+    # Ne geometri ne merkez
+    with pytest.raises(RuntimeError):
+        plan_coverage(3, 14, 15, buffer_m=100.0)
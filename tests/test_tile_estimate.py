@@ -0,0 +1,174 @@
+# tests/test_tile_estimate.py
+"""
+İndirme öncesi tahmin ve disk bütçesi: DiskBudget / TileDownloadEstimate
+aritmetiği, örnek tile seçimi ve örnek indiren estimate_tile_download
+(ağ yerine sahte bir _fetch_tile ile).
+"""
+from __future__ import annotations
+
+import pytest
+
+from core import tiles_offline
+from core.db import TileDownloadSettings
+from core.tile_coverage import CoveragePlan, ZoomCoverage
+from core.tiles_offline import (
+    _MAX_SAMPLES,
+    _MB,
+    _MIN_FREE_BYTES,
+    DiskBudget,
+    TileBudgetError,
+    TileDownloadEstimate,
+    _sample_tiles,
+    _TileFetchError,
+    check_disk_budget,
+    estimate_tile_download,
+)
+
+GB = 1024 * _MB
+
+
+@pytest.mark.parametrize(
+    "budget, expected",
+    [
+        # Bütçe sınırlı: 1 GB - 600 MB kullanılmış + 100 MB tahliye edilebilir
+        (DiskBudget(600 * _MB, GB, 10 * GB, 100 * _MB), 524 * _MB),
+        # Disk sınırlı: boş alandan asgari pay düşülür
+        (DiskBudget(0, 10 * GB, _MIN_FREE_BYTES + 50 * _MB), 50 * _MB),
+        # Sınırsız bütçe
+        (DiskBudget(5 * GB, 0, GB, 10 * _MB), GB - _MIN_FREE_BYTES + 10 * _MB),
+        # Bütçe zaten aşılmış
+        (DiskBudget(2 * GB, GB, 10 * GB), 0),
+    ],
+)
+def test_available_bytes(budget, expected):
+    assert budget.available_bytes == expected
+
+
+def test_budget_needed_for():
+    budget = DiskBudget(600 * _MB, GB, _MIN_FREE_BYTES + GB, 100 * _MB)
+
+    assert budget.budget_needed_for(800 * _MB) == 1300 * _MB
+    # Diskte yer yok: bütçeyi artırmak çözüm değil
+    assert budget.budget_needed_for(2 * GB) is None
+
+
+def test_check_disk_budget(monkeypatch):
+    budget = DiskBudget(0, 100 * _MB, 10 * GB)
+    monkeypatch.setattr(tiles_offline, "get_disk_budget", lambda settings: budget)
+
+    assert check_disk_budget(100 * _MB, TileDownloadSettings()) is budget
+    with pytest.raises(TileBudgetError):
+        check_disk_budget(100 * _MB + 1, TileDownloadSettings())
+
+
+def _estimate(**kwargs) -> TileDownloadEstimate:
+    values = dict(
+        zoom_counts=[(15, 100), (16, 400)],
+        zoom_tile_bytes={15: 10_000, 16: 20_000},
+        sampled=4,
+        seconds_per_tile=0.5,
+        max_workers=4,
+        rate_limit=0.0,
+        disk=DiskBudget(0, 0, 10 * GB),
+    )
+    values.update(kwargs)
+    return TileDownloadEstimate(**values)
+
+
+def test_estimate_arithmetic():
+    estimate = _estimate()
+
+    assert estimate.total_tiles == 500
+    assert estimate.estimated_bytes == 100 * 10_000 + 400 * 20_000
+    # 4 bağlantı / 0.5 sn → 8 tile/sn
+    assert estimate.estimated_seconds == pytest.approx(500 / 8)
+    # Hız sınırı bağlantılardan darsa o belirler
+    assert _estimate(rate_limit=2.0).estimated_seconds == pytest.approx(250)
+    assert _estimate(seconds_per_tile=None).estimated_seconds is None
+    assert estimate.fits_budget
+    assert not _estimate(disk=DiskBudget(0, 8 * _MB, 10 * GB)).fits_budget
+    assert "Toplam: 500 tile" in estimate.describe()
+
+
+def _plan() -> CoveragePlan:
+    return CoveragePlan(
+        zooms=[
+            ZoomCoverage(14, [(10, 5, 6)]),
+            ZoomCoverage(15, [(20, 10, 13), (21, 10, 13)]),
+            ZoomCoverage(16, [(y, 20, 27) for y in range(40, 44)]),
+            ZoomCoverage(17, [(y, 40, 55) for y in range(80, 88)]),
+        ],
+        bounds=(27.0, 37.9, 27.1, 38.0),
+        tile_bytes=5_000,
+    )
+
+
+def test_samples_deep_zooms_first_and_within_runs():
+    plan = _plan()
+    samples = _sample_tiles(plan)
+
+    assert [z for z, _x, _y in samples] == [17, 17, 16, 16, 15, 15, 14]
+    covered = {t for zc in plan.zooms for t in zc.iter_tiles()}
+    assert set(samples) <= covered
+
+    many = CoveragePlan(
+        zooms=[ZoomCoverage(z, [(0, 0, 9), (1, 0, 9)]) for z in range(10, 20)],
+        bounds=(0.0, 0.0, 1.0, 1.0),
+    )
+    assert len(_sample_tiles(many)) == _MAX_SAMPLES
+
+
+def test_estimate_tile_download_with_stub_fetcher(monkeypatch):
+    requested = []
+
+    def fake_fetch(pool, url):
+        requested.append(url)
+        z = int(url.split("/")[-3])
+        if z == 17:
+            raise _TileFetchError("HTTP 404", transient=False)
+        return b"x" * (1000 * z)
+
+    disk = DiskBudget(0, 0, 10 * GB)
+    monkeypatch.setattr(tiles_offline, "_fetch_tile", fake_fetch)
+    monkeypatch.setattr(tiles_offline, "get_disk_budget", lambda settings: disk)
+
+    plan = _plan()
+    estimate = estimate_tile_download(
+        plan,
+        "https://tile.example/{z}/{x}/{y}.png",
+        TileDownloadSettings(max_workers=2, rate_limit=0.0),
+    )
+
+    assert len(requested) == len(_sample_tiles(plan))
+    assert estimate.sampled == len(requested) - 2
+    assert estimate.sample_errors == ["HTTP 404", "HTTP 404"]
+    assert estimate.zoom_counts == [(14, 2), (15, 8), (16, 32), (17, 128)]
+    # z17 örnekleri inemedi: en yakın örneklenen zoom (16) kullanılır
+    assert estimate.zoom_tile_bytes == {
+        14: 14_000,
+        15: 15_000,
+        16: 16_000,
+        17: 16_000,
+    }
+    assert estimate.seconds_per_tile is not None
+    assert estimate.max_workers == 2
+    assert estimate.disk is disk
+
+
+def test_estimate_without_samples_uses_plan_tile_size(monkeypatch):
+    def failing_fetch(pool, url):
+        raise _TileFetchError("Bağlantı hatası", transient=True)
+
+    monkeypatch.setattr(tiles_offline, "_fetch_tile", failing_fetch)
+    monkeypatch.setattr(
+        tiles_offline, "get_disk_budget", lambda settings: DiskBudget(0, 0, 10 * GB)
+    )
+
+    estimate = estimate_tile_download(
+        _plan(), "https://tile.example/{z}/{x}/{y}.png", TileDownloadSettings()
+    )
+
+    assert estimate.sampled == 0
+    assert estimate.seconds_per_tile is None
+    assert set(estimate.zoom_tile_bytes.values()) == {5_000}
+    assert "Süre tahmin edilemedi" in estimate.describe()
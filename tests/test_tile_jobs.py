@@ -0,0 +1,149 @@
+# tests/test_tile_jobs.py
+"""
+Sürdürülebilir tile indirme işleri: run_tile_download_job yarıda kesilen
+işi kaldığı yerden sürdürür. Depodaki tile'lar yeniden indirilmez, hatalı
+tile'lar yeniden denenir; ilerleme ve hata listesi iş kaydına yazılır.
+
+Ağ yerine sahte bir _fetch_tile kullanılır.
+"""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from core import tiles_offline
+from core.db import TileDownloadSettings, db_connection
+from core.mbtiles import MBTiles
+from core.tile_jobs import (
+    JOB_STATUS_COMPLETED,
+    JOB_STATUS_INCOMPLETE,
+    JOB_STATUS_PAUSED,
+    TileJobZoom,
+    create_job,
+    failed_tiles,
+    get_job,
+)
+from core.tiles_offline import DiskBudget, _TileFetchError, run_tile_download_job
+
+TEMPLATE = "https://tile.example/{z}/{x}/{y}.png"
+PNG = b"\x89PNG\r\n\x1a\n"
+
+# z10: 3×2 dikdörtgen; z11: iki satır aralığı
+ZOOMS = [
+    TileJobZoom(10, 100, 102, 200, 201, 6),
+    TileJobZoom(11, 200, 205, 400, 401, 7, runs=[(400, 200, 203), (401, 203, 205)]),
+]
+ALL_TILES = (
+    {(10, x, y) for x in range(100, 103) for y in (200, 201)}
+    | {(11, x, 400) for x in range(200, 204)}
+    | {(11, x, 401) for x in range(203, 206)}
+)
+FIRST_TILE = (10, 100, 200)
+
+
+class StubFetcher:
+    """_fetch_tile yerine: istenen tile'ları kaydeder, bazılarında hata verir."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requested: list[tuple[int, int, int]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, pool, url):
+        z, x, y = (int(p) for p in url.rsplit(".", 1)[0].split("/")[-3:])
+        with self._lock:
+            self.requested.append((z, x, y))
+        if (z, x, y) in self.failing:
+            raise _TileFetchError("HTTP 404", transient=False)
+        return PNG + f"{z}/{x}/{y}".encode()
+
+
+@pytest.fixture()
+def job(temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        tiles_offline,
+        "get_disk_budget",
+        lambda *args, **kwargs: DiskBudget(0, 0, 10 * 1024**3),
+    )
+    with db_connection() as con:
+        con.execute("INSERT INTO projects (id, name, code) VALUES (1, 'Proje', 'P1')")
+    return create_job(
+        1,
+        "Uydu (offline)",
+        TEMPLATE,
+        "mbtiles",
+        str(tmp_path / "uydu.mbtiles"),
+        ZOOMS,
+        bounds=(27.0, 37.9, 27.1, 38.0),
+    )
+
+
+def _run(job_id, fetcher, monkeypatch, should_cancel=None):
+    monkeypatch.setattr(tiles_offline, "_fetch_tile", fetcher)
+    # Tek worker: iptal noktası belirli olsun
+    settings = TileDownloadSettings(max_workers=1, rate_limit=0.0)
+    return run_tile_download_job(job_id, settings=settings, should_cancel=should_cancel)
+
+
+def _stored(job_id) -> set[tuple[int, int, int]]:
+    mbt = MBTiles(get_job(job_id).store_path, readonly=True)
+    try:
+        return {t for t in ALL_TILES if mbt.has_tile(*t)}
+    finally:
+        mbt.close()
+
+
+def test_cancelled_job_resumes_where_it_stopped(job, monkeypatch):
+    first = StubFetcher(failing=[FIRST_TILE])
+    paused = _run(job, first, monkeypatch, lambda: len(first.requested) >= 5)
+
+    assert paused.status == JOB_STATUS_PAUSED
+    stored = _stored(job)
+    assert stored and stored < ALL_TILES
+    assert FIRST_TILE not in stored
+    assert paused.done_tiles == len(stored)
+    assert [t[:4] for t in failed_tiles(job)] == [(*FIRST_TILE, 1)]
+
+    second = StubFetcher()
+    done = _run(job, second, monkeypatch)
+
+    # Depodakiler ağa çıkmadan atlandı; eksikler ve hatalı tile indirildi
+    assert set(second.requested) == ALL_TILES - stored
+    assert len(second.requested) == len(set(second.requested))
+    assert FIRST_TILE in second.requested
+    assert done.status == JOB_STATUS_COMPLETED
+    assert done.done_tiles == done.total_tiles == len(ALL_TILES)
+    assert [(zm.zoom, zm.done, zm.failed) for zm in done.zooms] == [
+        (10, 6, 0),
+        (11, 7, 0),
+    ]
+    assert failed_tiles(job) == []
+    assert _stored(job) == ALL_TILES
+
+    with db_connection() as con:
+        layers = con.execute(
+            "SELECT name, type FROM map_layers WHERE project_id = 1"
+        ).fetchall()
+    assert [tuple(r) for r in layers] == [("Uydu (offline)", "mbtiles")]
+
+    # Tamamlanmış iş yeniden çalıştırılırsa ağa hiç çıkılmaz
+    third = StubFetcher()
+    assert _run(job, third, monkeypatch).status == JOB_STATUS_COMPLETED
+    assert third.requested == []
+
+
+def test_persistent_failures_leave_job_incomplete(job, monkeypatch):
+    broken = {(11, 205, 401), FIRST_TILE}
+
+    for attempt in (1, 2):
+        result = _run(job, StubFetcher(failing=broken), monkeypatch)
+
+        assert result.status == JOB_STATUS_INCOMPLETE
+        assert result.done_tiles == len(ALL_TILES) - 2
+        assert result.failed_tiles == 2
+        assert [(t[:3], t[3]) for t in failed_tiles(job)] == [
+            (FIRST_TILE, attempt),
+            ((11, 205, 401), attempt),
+        ]
+    assert _stored(job) == ALL_TILES - broken
@@ -0,0 +1,68 @@
+# tests/test_trench_loader.py
+"""
+Açma yükleyicisi: iki sorguluk okumanın (açma + tüm köşeler) eski açma
+başına sorgu döngüsüyle aynı veriyi verdiği ve sorgu sayısının açma
+sayısından bağımsız olduğu doğrulanır. Süre ölçümü için bkz.
+tests/bench_trench_loader.py.
+"""
+from __future__ import annotations
+
+import pytest
+
+from bench_trench_loader import per_trench_loop, seed_trenches
+from core.coords import get_transformer
+from core.db import db_connection, get_connection, read_connection
+from core.services.trenches_service import load_trenches_for_project
+
+TRENCH_COUNT = 300
+VERTICES_PER_TRENCH = 6
+
+
+@pytest.fixture()
+def project(temp_db):
+    with db_connection() as con:
+        seed_trenches(con, TRENCH_COUNT, VERTICES_PER_TRENCH)
+    return 1
+
+
+def test_loader_matches_per_trench_loop(project):
+    transformer = get_transformer(32635)
+    trenches = load_trenches_for_project(project, transformer)
+
+    with read_connection() as con:
+        expected = per_trench_loop(con, project)
+
+    assert len(trenches) == len(expected) == TRENCH_COUNT
+    for trench, (header, rows) in zip(trenches, expected):
+        tid, tcode, tname, pname = header
+        assert (trench["id"], trench["code"], trench["name"], trench["project"]) == (
+            tid,
+            tcode,
+            tname,
+            pname,
+        )
+        assert [(v["order"], v["z"]) for v in trench["vertices"]] == [
+            (r[0], r[3]) for r in rows
+        ]
+        lon, lat = transformer.transform(rows[0][1], rows[0][2])
+        assert trench["vertices"][0]["lon"] == pytest.approx(lon)
+        assert trench["vertices"][0]["lat"] == pytest.approx(lat)
+
+
+def test_loader_query_count_does_not_grow_with_trenches(project):
+    transformer = get_transformer(32635)
+    # İlk yükleme WGS84 cache'ini doldurur (UPDATE'ler)
+    load_trenches_for_project(project, transformer)
+
+    statements: list[str] = []
+    con = get_connection()
+    con.set_trace_callback(statements.append)
+    try:
+        trenches = load_trenches_for_project(project, transformer)
+    finally:
+        con.set_trace_callback(None)
+        con.close()
+
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(trenches) == TRENCH_COUNT
+    assert len(selects) == 2
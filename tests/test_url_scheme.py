@@ -0,0 +1,129 @@
+# tests/test_url_scheme.py
+"""
+arcsys:// handler'ının yolları: requestStarted doğrudan, QWebEngine'in
+job'unu taklit eden bir QObject ile çağrılır (sayfa yüklenmez).
+"""
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWebEngineCore")
+
+from PyQt6.QtCore import QObject, QUrl  # noqa: E402
+from PyQt6.QtWebEngineCore import QWebEngineUrlRequestJob  # noqa: E402
+
+from app.url_scheme import (  # noqa: E402
+    ArcsysSchemeHandler,
+    publish_payload,
+    unsupported_qt_reason,
+)
+from core.utils import WEB_DIR, arcsys_url  # noqa: E402
+
+Error = QWebEngineUrlRequestJob.Error
+
+
+class FakeJob(QObject):
+    """QWebEngineUrlRequestJob'un handler'ın kullandığı kısmı."""
+
+    def __init__(self, url: str, method: str = "GET"):
+        super().__init__()
+        self._url = QUrl(url)
+        self._method = method.encode()
+        self.error = None
+        self.content_type = None
+        self.device = None
+        self.headers: dict[str, list[str]] = {}
+
+    def requestUrl(self):  # noqa: N802
+        return self._url
+
+    def requestMethod(self):  # noqa: N802
+        return self._method
+
+    def fail(self, error):
+        self.error = error
+
+    def reply(self, content_type, device):
+        self.content_type = bytes(content_type).decode()
+        self.device = device
+
+    def setAdditionalResponseHeaders(self, headers):  # noqa: N802
+        self.headers = {
+            bytes(k).decode(): [bytes(v).decode() for v in values]
+            for k, values in headers.items()
+        }
+
+    def body(self) -> bytes:
+        return bytes(self.device.readAll())
+
+
+def _request(url: str, method: str = "GET") -> FakeJob:
+    job = FakeJob(url, method)
+    ArcsysSchemeHandler().requestStarted(job)
+    return job
+
+
+def test_installed_qt_is_supported():
+    assert unsupported_qt_reason() is None
+
+
+def test_web_file_is_streamed_with_cache_headers():
+    job = _request(arcsys_url("web", "map_script.js"))
+
+    assert job.error is None
+    assert job.content_type == "text/javascript"
+    # Range istekleri için cihaz seekable olmalı
+    assert not job.device.isSequential()
+    assert job.body() == (WEB_DIR / "map_script.js").read_bytes()
+    assert job.headers["Cache-Control"] == ["no-cache"]
+    assert job.headers["Accept-Ranges"] == ["bytes"]
+    assert {"ETag", "Last-Modified"} <= job.headers.keys()
+
+
+def test_head_replies_without_body():
+    job = _request(arcsys_url("web", "map_script.js"), "HEAD")
+
+    assert job.error is None
+    assert job.body() == b""
+    assert "ETag" in job.headers
+
+
+@pytest.mark.parametrize(
+    "url, method, error",
+    [
+        (arcsys_url("web", "map_script.js"), "POST", Error.RequestDenied),
+        ("arcsys://other/web/map_script.js", "GET", Error.UrlNotFound),
+        (arcsys_url("web", "../core/db.py"), "GET", Error.UrlNotFound),
+        (arcsys_url("web", "yok.js"), "GET", Error.UrlNotFound),
+        (arcsys_url("mbtiles", "1/2/3"), "GET", Error.UrlInvalid),
+        (arcsys_url("cache", "1/a/2/3"), "GET", Error.UrlInvalid),
+    ],
+)
+def test_rejected_requests(url, method, error):
+    job = _request(url, method)
+
+    assert job.error == error
+    assert job.device is None
+
+
+def test_payload_is_served_once():
+    url = publish_payload(b'{"op": "sync"}')
+
+    head = _request(url, "HEAD")
+    assert head.error is None
+    assert head.headers["Cache-Control"] == ["no-store"]
+
+    first = _request(url)
+    assert first.content_type == "application/json"
+    assert first.body() == b'{"op": "sync"}'
+
+    assert _request(url).error == Error.UrlNotFound
+
+
+def test_unknown_layers_and_tiles_are_not_found(temp_db):
+    for url in (
+        arcsys_url("layers", "99", "a.png"),
+        arcsys_url("mbtiles", "99", "1", "2", "3"),
+        arcsys_url("cache", "99", "1", "2", "3"),
+    ):
+        assert _request(url).error == Error.UrlNotFound
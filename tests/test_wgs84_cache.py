@@ -0,0 +1,110 @@
+# tests/test_wgs84_cache.py
+"""
+WGS84 cache kolonları (migration 001): tablolar sonradan oluşan
+veritabanında migration'ın ertelenmesi ve yükleyicilerin cache'i yalnızca
+projenin WGS84 dönüşümü için kullanması.
+"""
+from __future__ import annotations
+
+import pytest
+from pyproj import Transformer
+
+from core.coords import get_transformer, is_wgs84_transformer
+from core.db import (
+    SCHEMA_VERSION,
+    db_connection,
+    get_schema_version,
+    read_connection,
+    run_migrations,
+)
+from core.services.finds_service import load_finds_for_project
+from core.services.trenches_service import load_trenches_for_project
+
+FINDS_TABLE = """
+CREATE TABLE finds (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, trench_id INTEGER NOT NULL,
+  code TEXT NOT NULL, description TEXT, level_id INTEGER,
+  x_global REAL, y_global REAL, z_global REAL, found_at TEXT
+)
+"""
+
+
+def _columns(con, table):
+    return {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+
+
+def test_migrations_wait_for_missing_tables(base_con):
+    base_con.execute("DROP TABLE finds")
+
+    assert run_migrations(base_con) == 0
+    assert get_schema_version(base_con) == 0
+
+    # Tablo sonradan oluştu: bir sonraki çalıştırma hepsini uygular
+    base_con.execute(FINDS_TABLE)
+    base_con.commit()
+    assert run_migrations(base_con) == SCHEMA_VERSION
+    assert {"lat_wgs84", "lon_wgs84"} <= _columns(base_con, "finds")
+    assert {"lat_wgs84", "lon_wgs84"} <= _columns(base_con, "trench_vertices")
+
+
+def test_is_wgs84_transformer():
+    assert is_wgs84_transformer(get_transformer(32635))
+    assert not is_wgs84_transformer(get_transformer(32635, 3857))
+    assert not is_wgs84_transformer(
+        Transformer.from_crs("EPSG:32635", "EPSG:4326", always_xy=True)
+    )
+
+
+@pytest.fixture()
+def project(temp_db):
+    with db_connection() as con:
+        con.execute(
+            "INSERT INTO coordinate_systems (id, name, epsg_code) "
+            "VALUES (1, 'UTM 35N', 32635)"
+        )
+        con.execute(
+            "INSERT INTO projects (id, name, code, coordinate_system_id) "
+            "VALUES (1, 'Proje', 'P1', 1)"
+        )
+        con.execute("INSERT INTO trenches (id, project_id, code) VALUES (1, 1, 'A')")
+        con.executemany(
+            "INSERT INTO trench_vertices "
+            "(trench_id, order_index, x_global, y_global) VALUES (1, ?, ?, ?)",
+            [(1, 500000.0, 4000000.0), (2, 500010.0, 4000000.0)],
+        )
+        con.execute(
+            "INSERT INTO finds (trench_id, code, x_global, y_global) "
+            "VALUES (1, 'B1', 500000.0, 4000000.0)"
+        )
+    return 1
+
+
+def _cached(table):
+    with read_connection() as con:
+        return [
+            tuple(r)
+            for r in con.execute(f"SELECT lat_wgs84, lon_wgs84 FROM {table}")
+        ]
+
+
+def test_finds_cache_ignored_for_other_target_crs(project):
+    wgs84 = load_finds_for_project(project, get_transformer(32635))
+    cached = _cached("finds")
+    assert wgs84[0]["lon"] == pytest.approx(27.0, abs=1e-3)
+
+    mercator = load_finds_for_project(project, get_transformer(32635, 3857))
+
+    # EPSG:3857 metre cinsinden; cache'teki WGS84 değeri dönmedi ve
+    # cache değişmedi
+    assert mercator[0]["lon"] == pytest.approx(3005626.8, abs=1.0)
+    assert _cached("finds") == cached
+
+
+def test_trenches_cache_ignored_for_other_target_crs(project):
+    load_trenches_for_project(project, get_transformer(32635))
+    cached = _cached("trench_vertices")
+
+    trenches = load_trenches_for_project(project, get_transformer(32635, 3857))
+
+    assert trenches[0]["vertices"][0]["lon"] == pytest.approx(3005626.8, abs=1.0)
+    assert _cached("trench_vertices") == cached
@@ -1,13 +1,15 @@
 const trenchLayers = {};
 const findLayers = {};
 
+// Python'dan (QWebChannel) gelen güncel veri: id → obje
+const trenchesById = {};
+const findsById = {};
+
 // =====================================
 // MAP
 // =====================================
-const map = L.map("map", { zoomControl: false }).setView(
-  [centerLat, centerLon],
-  17
-);
+// Sayfa bir kez yüklenir; veri ve merkez ilk "sync" mesajıyla gelir.
+const map = L.map("map", { zoomControl: false }).setView([37.0, 32.0], 17);
 
 // Zoom level label
 const zoomLevelLabel = document.getElementById("zoom-level-label");
@@ -41,16 +43,16 @@ function applyQtVisibilityToLayers() {
     }
   });
 
-  // Buluntular
+  // Buluntular (findsLayer üzerinden; kümeleme modunda tek yeniden çizim)
   Object.entries(findLayers).forEach(([idStr, layer]) => {
     const id = parseInt(idStr, 10);
     const key = `find_${id}`;
     const selfVisible = layerVisibility[key] !== false;
     const finalVisible = groupFindsVisible && selfVisible;
     if (finalVisible) {
-      if (!map.hasLayer(layer)) layer.addTo(map);
-    } else if (map.hasLayer(layer)) {
-      map.removeLayer(layer);
+      findsLayer.addMarker(layer);
+    } else {
+      findsLayer.removeMarker(layer);
     }
   });
 
@@ -81,12 +83,27 @@ function applyQtVisibilityToLayers() {
   }
 }
 
+function isQtLayerVisible(groupKey, layerKey) {
+  return (
+    layerVisibility[groupKey] !== false && layerVisibility[layerKey] !== false
+  );
+}
+
 function setLayerVisibilityFromQt(layerKey, visible) {
   layerVisibility[layerKey] = visible;
   applyQtVisibilityToLayers();
 }
 
+// Toplu sürüm: { layer_key: visible, ... } → tek geçişte uygulanır
+function setLayersVisibilityFromQt(changes) {
+  Object.entries(changes || {}).forEach(([key, visible]) => {
+    layerVisibility[key] = visible;
+  });
+  applyQtVisibilityToLayers();
+}
+
 window.setLayerVisibilityFromQt = setLayerVisibilityFromQt;
+window.setLayersVisibilityFromQt = setLayersVisibilityFromQt;
 window._applyQtVisibilityToLayers = applyQtVisibilityToLayers;
 
 // =====================================
@@ -145,7 +162,8 @@ let currentBaseLayer = baseLayers.osm;
 currentBaseLayer.addTo(map);
 
 const overlayEntries = [];
-let firstImageBounds = null;
+// overlay anahtarı (id, yoksa ad) → entry
+const overlayByKey = {};
 
 function parseZoomRangeFromUrlTemplate(urlTemplate) {
   const re = /_z(\d+)_(\d+)\/\{z\}\/\{x\}\/\{y\}\.png$/;
@@ -157,8 +175,25 @@ function parseZoomRangeFromUrlTemplate(urlTemplate) {
   };
 }
 
-// extraLayers: map_template.html içindeki const extraLayers = __LAYERS_JSON__;
-extraLayers.forEach((l) => {
+function overlayKey(l) {
+  return l.id != null ? l.id : l.name;
+}
+
+function showOverlayIfVisible(entry) {
+  const key = entry.id != null ? `overlay_${entry.id}` : `overlay_${entry.name}`;
+  if (isQtLayerVisible("group_layers", key)) entry.layer.addTo(map);
+}
+
+function addOverlay(l) {
+  const key = overlayKey(l);
+  const entry = {
+    id: l.id ?? null,
+    name: l.name,
+    layer: null,
+    kind: l.kind,
+    bounds: null,
+  };
+
   if (l.kind === "tile" && l.url_template) {
     const zoomInfo = parseZoomRangeFromUrlTemplate(l.url_template);
     const opts = {
@@ -166,43 +201,84 @@ extraLayers.forEach((l) => {
       noWrap: true,
       pane: "rasterPane",
     };
-    if (zoomInfo) {
+    // MBTiles katmanlarında zoom aralığı metadata'dan gelir
+    if (l.max_zoom != null) {
+      opts.maxNativeZoom = l.max_zoom;
+    } else if (zoomInfo) {
       opts.maxNativeZoom = zoomInfo.maxZoom;
     }
-    const layer = L.tileLayer(l.url_template, opts).addTo(map);
-    overlayEntries.push({
-      id: l.id ?? null,
-      name: l.name,
-      layer,
-      kind: "tile",
-    });
+    // Bindirme piramitleri (GeoTIFF ortofoto): yalnızca sınır içi istenir,
+    // en küçük zoom'un altında o seviyenin tile'ları küçültülerek gösterilir
+    if (l.min_lat != null) {
+      entry.bounds = [
+        [l.min_lat, l.min_lon],
+        [l.max_lat, l.max_lon],
+      ];
+      opts.bounds = entry.bounds;
+      opts.opacity = 0.8;
+      if (l.min_zoom != null) opts.minNativeZoom = l.min_zoom;
+    }
+    entry.layer = L.tileLayer(l.url_template, opts);
   } else if (l.kind === "image" && l.file_url) {
-    const bounds = [
+    entry.bounds = [
       [l.min_lat, l.min_lon],
       [l.max_lat, l.max_lon],
     ];
-    const layer = L.imageOverlay(l.file_url, bounds, {
+    entry.layer = L.imageOverlay(l.file_url, entry.bounds, {
       opacity: 0.8,
       pane: "rasterPane",
-    }).addTo(map);
-    overlayEntries.push({
-      id: l.id ?? null,
-      name: l.name,
-      layer,
-      kind: "image",
     });
-    if (!firstImageBounds) firstImageBounds = bounds;
+  } else if (l.kind === "vector" && l.file_url) {
+    // GeoJSON asenkron gelir; bu arada katman silinir/güncellenirse atılır
+    overlayByKey[key] = entry;
+    fetch(l.file_url)
+      .then((r) => r.json())
+      .then((geo) => {
+        if (overlayByKey[key] !== entry) return;
+        entry.layer = L.geoJSON(geo);
+        overlayEntries.push(entry);
+        showOverlayIfVisible(entry);
+        buildLayerPanel();
+        updateLayerOrderFromDom();
+      })
+      .catch((err) => {
+        console.error("Vektör layer yüklenemedi:", l.name, err);
+      });
+    return;
+  } else {
+    return;
   }
-});
 
-if (firstImageBounds) {
-  map.fitBounds(firstImageBounds, { padding: [20, 20] });
+  overlayByKey[key] = entry;
+  overlayEntries.push(entry);
+  showOverlayIfVisible(entry);
+}
+
+function removeOverlay(key) {
+  const entry = overlayByKey[key];
+  if (!entry) return;
+  delete overlayByKey[key];
+
+  const idx = overlayEntries.indexOf(entry);
+  if (idx !== -1) overlayEntries.splice(idx, 1);
+  if (entry.layer && map.hasLayer(entry.layer)) map.removeLayer(entry.layer);
+}
+
+function fitToData(center) {
+  map.setView(center, 17);
+  const firstImage = overlayEntries.find(
+    (e) => (e.kind === "image" || e.kind === "tile") && e.bounds
+  );
+  if (firstImage) {
+    map.fitBounds(firstImage.bounds, { padding: [20, 20] });
+  }
 }
 
-if (errorMsg && errorMsg.trim().length > 0) {
+function showMapError(message, center) {
+  if (!message || !message.trim().length) return;
   L.popup()
-    .setLatLng([centerLat, centerLon])
-    .setContent("Harita verisi yüklenirken hata: " + errorMsg)
+    .setLatLng(center)
+    .setContent("Harita verisi yüklenirken hata: " + message)
     .openOn(map);
 }
 
@@ -211,11 +287,21 @@ if (errorMsg && errorMsg.trim().length > 0) {
 // =====================================
 let zMin = null;
 let zMax = null;
-findsData.forEach((f) => {
-  if (f.z == null) return;
-  if (zMin === null || f.z < zMin) zMin = f.z;
-  if (zMax === null || f.z > zMax) zMax = f.z;
-});
+
+// Z aralığını buluntulardan yeniden hesaplar; değiştiyse true döner.
+function recomputeZRange() {
+  let newMin = null;
+  let newMax = null;
+  Object.values(findsById).forEach((f) => {
+    if (f.z == null) return;
+    if (newMin === null || f.z < newMin) newMin = f.z;
+    if (newMax === null || f.z > newMax) newMax = f.z;
+  });
+  const changed = newMin !== zMin || newMax !== zMax;
+  zMin = newMin;
+  zMax = newMax;
+  return changed;
+}
 
 function getColorForZ(z) {
   if (z == null || zMin === null || zMax === null) {
@@ -243,7 +329,8 @@ function getColorForZ(z) {
 // =====================================
 // TRENCHES
 // =====================================
-trenchesData.forEach((t) => {
+function addTrench(t) {
+  trenchesById[t.id] = t;
   if (!t.vertices || !t.vertices.length) return;
 
   const latlngs = t.vertices.map((v) => [v.lat, v.lon]);
@@ -252,7 +339,8 @@ trenchesData.forEach((t) => {
     fillColor: "#4c9be8",
     weight: 2,
     fillOpacity: 0.15,
-  }).addTo(map);
+  });
+  if (isQtLayerVisible("group_trenches", `trench_${t.id}`)) poly.addTo(map);
 
   const popupText =
     "<b>Açma: </b>" +
@@ -265,25 +353,149 @@ trenchesData.forEach((t) => {
 
   poly.bindPopup(popupText);
   trenchLayers[t.id] = poly;
-});
+}
+
+function removeTrench(id) {
+  delete trenchesById[id];
+  const layer = trenchLayers[id];
+  if (!layer) return;
+  delete trenchLayers[id];
+  if (map.hasLayer(layer)) map.removeLayer(layer);
+}
 
 // =====================================
-// FINDS
+// FINDS (canvas + kümeleme)
 // =====================================
-findsData.forEach((f) => {
-  if (f.lat == null || f.lon == null) return;
+// Tüm buluntu noktaları tek bir canvas'a çizilir (nokta başına SVG yok)
+const findsRenderer = L.canvas({ padding: 0.5 });
+
+// Buluntu sayısı bu eşiği aşarsa kümeleme açılır (Python "config" ile gelir)
+let FIND_CLUSTER_THRESHOLD = 5000;
+// Bu zoom ve üstünde kümeleme yapılmaz; tüm noktalar tek tek çizilir
+const CLUSTER_MAX_ZOOM = 19;
+// Kümeleme ızgarasının piksel boyutu
+const CLUSTER_GRID_PX = 60;
+
+// Gösterilmesi istenen buluntu marker'larını tutar. Kümeleme kapalıyken
+// marker'lar doğrudan haritaya eklenir; açıkken her zoom / pan sonrası
+// görünür alandaki marker'lar ızgara hücrelerine toplanır ve kalabalık
+// hücreler tek bir sayı ikonuyla çizilir.
+const FindClusterLayer = L.Layer.extend({
+  initialize: function () {
+    this._markers = new Set();
+    this._rendered = L.layerGroup();
+    this._clustering = false;
+    this._renderPending = false;
+  },
+
+  onAdd: function (map) {
+    this._rendered.addTo(map);
+    map.on("zoomend moveend", this._scheduleRender, this);
+    this._render();
+  },
+
+  onRemove: function (map) {
+    map.off("zoomend moveend", this._scheduleRender, this);
+    map.removeLayer(this._rendered);
+  },
+
+  hasMarker: function (marker) {
+    return this._markers.has(marker);
+  },
+
+  addMarker: function (marker) {
+    if (this._markers.has(marker)) return;
+    this._markers.add(marker);
+    if (this._clustering) this._scheduleRender();
+    else this._rendered.addLayer(marker);
+  },
+
+  removeMarker: function (marker) {
+    if (!this._markers.delete(marker)) return;
+    if (this._clustering) this._scheduleRender();
+    else this._rendered.removeLayer(marker);
+  },
+
+  setClustering: function (enabled) {
+    if (enabled === this._clustering) return;
+    this._clustering = enabled;
+    this._render();
+  },
+
+  _scheduleRender: function () {
+    if (!this._clustering || this._renderPending) return;
+    this._renderPending = true;
+    requestAnimationFrame(() => {
+      this._renderPending = false;
+      this._render();
+    });
+  },
 
-  const color = getColorForZ(f.z);
+  _render: function () {
+    const map = this._map;
+    if (!map) return;
+    this._rendered.clearLayers();
 
-  const marker = L.circleMarker([f.lat, f.lon], {
-    radius: 5,
-    weight: 1,
-    color: color,
-    fillColor: color,
-    fillOpacity: 0.9,
-  }).addTo(map);
+    const zoom = map.getZoom();
+    if (!this._clustering || zoom >= CLUSTER_MAX_ZOOM) {
+      this._markers.forEach((m) => this._rendered.addLayer(m));
+      return;
+    }
 
-  const popupText =
+    const bounds = map.getBounds().pad(0.5);
+    const cells = new Map();
+    this._markers.forEach((m) => {
+      const ll = m.getLatLng();
+      if (!bounds.contains(ll)) return;
+      const p = map.project(ll, zoom);
+      const key =
+        Math.floor(p.x / CLUSTER_GRID_PX) + ":" + Math.floor(p.y / CLUSTER_GRID_PX);
+      let cell = cells.get(key);
+      if (!cell) {
+        cell = { markers: [], x: 0, y: 0 };
+        cells.set(key, cell);
+      }
+      cell.markers.push(m);
+      cell.x += p.x;
+      cell.y += p.y;
+    });
+
+    cells.forEach((cell) => {
+      const n = cell.markers.length;
+      if (n === 1) {
+        this._rendered.addLayer(cell.markers[0]);
+        return;
+      }
+      const center = map.unproject([cell.x / n, cell.y / n], zoom);
+      const size = n < 100 ? 30 : n < 1000 ? 36 : 42;
+      const cluster = L.marker(center, {
+        icon: L.divIcon({
+          className: "find-cluster",
+          html: `<span>${n}</span>`,
+          iconSize: [size, size],
+        }),
+        keyboard: false,
+      });
+      cluster.on("click", () => {
+        const b = L.latLngBounds(cell.markers.map((m) => m.getLatLng()));
+        map.fitBounds(b, { padding: [30, 30], maxZoom: CLUSTER_MAX_ZOOM });
+      });
+      this._rendered.addLayer(cluster);
+    });
+  },
+});
+
+const findsLayer = new FindClusterLayer().addTo(map);
+
+function updateFindClustering() {
+  findsLayer.setClustering(
+    Object.keys(findsById).length > FIND_CLUSTER_THRESHOLD
+  );
+}
+
+// Popup içeriği tıklanınca üretilir (bindPopup fonksiyon kabul eder)
+function buildFindPopup(f) {
+  return (
     "<b>Buluntu: </b>" +
     f.code +
     "<br><b>Açma: </b>" +
@@ -293,11 +505,47 @@ findsData.forEach((f) => {
     (f.level_name ? "<b>Seviye: </b>" + f.level_name + "<br>" : "") +
     (f.description ? "Açıklama: " + f.description + "<br>" : "") +
     (f.z != null ? "Z: " + f.z + " m<br>" : "") +
-    (f.found_at ? "Tarih: " + f.found_at : "");
+    (f.found_at ? "Tarih: " + f.found_at : "")
+  );
+}
 
-  marker.bindPopup(popupText);
+function addFindMarker(f) {
+  if (f.lat == null || f.lon == null) return;
+
+  const color = getColorForZ(f.z);
+
+  const marker = L.circleMarker([f.lat, f.lon], {
+    renderer: findsRenderer,
+    radius: 5,
+    weight: 1,
+    color: color,
+    fillColor: color,
+    fillOpacity: 0.9,
+  });
+  marker.bindPopup(() => buildFindPopup(f));
   findLayers[f.id] = marker;
-});
+
+  if (isQtLayerVisible("group_finds", `find_${f.id}`)) {
+    findsLayer.addMarker(marker);
+  }
+}
+
+function removeFind(id) {
+  delete findsById[id];
+  const layer = findLayers[id];
+  if (!layer) return;
+  delete findLayers[id];
+  findsLayer.removeMarker(layer);
+}
+
+function recolorFindMarkers() {
+  Object.entries(findLayers).forEach(([id, marker]) => {
+    const f = findsById[id];
+    if (!f) return;
+    const color = getColorForZ(f.z);
+    marker.setStyle({ color: color, fillColor: color });
+  });
+}
 
 // =====================================
 // LEGEND
@@ -330,14 +578,7 @@ legend.onAdd = function () {
 
         <div class="legend-scale-bar"></div>
 
-        ${
-          zMin !== null && zMax !== null
-            ? `<div class="legend-z-text" style="color: var(--legend-z-text);">
-               Z min: ${zMin.toFixed(2)} m<br>
-               Z max: ${zMax.toFixed(2)} m
-             </div>`
-            : ""
-        }
+        <div class="legend-z-text" style="color: var(--legend-z-text);"></div>
 
       </div>
     </div>
@@ -355,6 +596,20 @@ legend.onAdd = function () {
 };
 legend.addTo(map);
 
+function updateLegendZText() {
+  const el = document.querySelector(".legend-z-text");
+  if (!el) return;
+  if (zMin !== null && zMax !== null) {
+    el.innerHTML =
+      "Z min: " + zMin.toFixed(2) + " m<br>Z max: " + zMax.toFixed(2) + " m";
+    el.style.display = "";
+  } else {
+    el.innerHTML = "";
+    el.style.display = "none";
+  }
+}
+updateLegendZText();
+
 // =====================================
 // LAYER PANEL
 // =====================================
@@ -474,25 +729,6 @@ function buildLayerPanel() {
   });
 }
 
-// Vektör katmanlar (varsa)
-(window.vectorLayers || []).forEach((v) => {
-  fetch(v.file_url)
-    .then((r) => r.json())
-    .then((geo) => {
-      const layer = L.geoJSON(geo).addTo(map);
-      overlayEntries.push({
-        id: v.id ?? null,
-        name: v.name,
-        layer,
-        kind: "vector",
-      });
-      updateLayerOrderFromDom();
-    })
-    .catch((err) => {
-      console.error("Vektör layer yüklenemedi:", v.name, err);
-    });
-});
-
 function updateLayerOrderFromDom() {
   const items = Array.from(layerListEl.querySelectorAll(".layer-item"));
   const total = items.length;
@@ -520,8 +756,12 @@ updateLayerOrderFromDom();
 let DEPTH_MIN = null;
 let DEPTH_MAX = null;
 
-(function initDepthRangeFromFinds() {
-  if (zMin === null || zMax === null) return;
+function initDepthRangeFromFinds() {
+  if (zMin === null || zMax === null) {
+    DEPTH_MIN = null;
+    DEPTH_MAX = null;
+    return;
+  }
   DEPTH_MIN = zMin;
   DEPTH_MAX = zMax;
 
@@ -545,7 +785,7 @@ let DEPTH_MAX = null;
 
     updateDepthBarBackground(DEPTH_MIN, DEPTH_MAX);
   }
-})();
+}
 
 function updateDepthBarBackground(zFrom, zTo) {
   const row = document.getElementById("depth-slider-row");
@@ -702,65 +942,78 @@ function findMatchesDepthRange(find, zFrom, zTo) {
   return true;
 }
 
+// Metin araması Python tarafında (FTS, bridge.searchProject) yapılır;
+// son sonuç burada tutulur: { query, findIds: Set, trenchIds: Set }
+let searchResult = null;
+// Son istenen sorgu. Filtre kutusundan ya da Qt'den (seviye tıklaması,
+// applyFilter(seviyeAdı)) gelebilir; sonuç bununla eşleştirilir.
+let pendingQuery = null;
+
+function requestSearch(q) {
+  pendingQuery = q;
+  const bridge = window.arcsysBridge;
+  if (bridge && bridge.searchProject) bridge.searchProject(q);
+}
+
+function applySearchResult(msg) {
+  // Yazma sürerken gelen eski sorgunun sonucu atlanır
+  if (msg.query !== pendingQuery) return;
+  searchResult = {
+    query: msg.query,
+    findIds: new Set(msg.find_ids || []),
+    trenchIds: new Set(msg.trench_ids || []),
+  };
+  applyFilter(msg.query);
+}
+
 function applyFilter(rawQuery) {
-  const q = (rawQuery || "").trim().toLowerCase();
+  const q = (rawQuery || "").trim();
   const { from, to } = getDateRangeFromInputs();
   const { zFrom, zTo } = getDepthRangeFromSliders();
 
   const hasDateFilter = !!(from || to);
   const hasDepthFilter = zFrom != null && zTo != null;
 
+  // Bu metnin sonucu henüz yok: istenir, gelince filtre yeniden uygulanır
+  if (q && (!searchResult || searchResult.query !== q)) {
+    requestSearch(q);
+    return;
+  }
+  // Şimdi uygulanan filtre, yolda olan eski bir aramanın yerini alır
+  pendingQuery = null;
+
   Object.values(trenchLayers).forEach((l) => map.removeLayer(l));
-  Object.values(findLayers).forEach((l) => map.removeLayer(l));
+  Object.values(findLayers).forEach((l) => findsLayer.removeMarker(l));
 
   if (!q && !hasDateFilter && !hasDepthFilter) {
     Object.values(trenchLayers).forEach((l) => l.addTo(map));
-    Object.values(findLayers).forEach((l) => l.addTo(map));
+    Object.values(findLayers).forEach((l) => findsLayer.addMarker(l));
     return;
   }
 
-  const tokens = q.split(/\s+/).filter(Boolean);
+  const matchedFindIds = q ? searchResult.findIds : null;
 
   const visibleFindIds = [];
   const visibleTrenchIds = new Set();
 
-  findsData.forEach((f) => {
+  Object.values(findsById).forEach((f) => {
+    if (matchedFindIds && !matchedFindIds.has(f.id)) return;
     if (!findMatchesDateRange(f, from, to)) return;
     if (!findMatchesDepthRange(f, zFrom, zTo)) return;
 
-    let text = "";
-    if (f.code) text += " " + f.code;
-    if (f.description) text += " " + f.description;
-    if (f.trench_code) text += " " + f.trench_code;
-    if (f.trench_name) text += " " + f.trench_name;
-    if (f.level_name) text += " " + f.level_name;
-
-    const t = text.toLowerCase();
-    const textOk = !tokens.length || tokens.every((tok) => t.includes(tok));
-
-    if (textOk) {
-      visibleFindIds.push(f.id);
-      if (f.trench_id != null) visibleTrenchIds.add(f.trench_id);
-    }
+    visibleFindIds.push(f.id);
+    if (f.trench_id != null) visibleTrenchIds.add(f.trench_id);
   });
 
-  trenchesData.forEach((tData) => {
-    let text = "";
-    if (tData.code) text += " " + tData.code;
-    if (tData.name) text += " " + tData.name;
-    if (tData.project) text += " " + tData.project;
-
-    const tt = text.toLowerCase();
-    const textOk = !tokens.length || tokens.every((tok) => tt.includes(tok));
-
-    if (textOk) {
-      visibleTrenchIds.add(tData.id);
-    }
-  });
+  if (q) {
+    searchResult.trenchIds.forEach((tid) => visibleTrenchIds.add(tid));
+  } else {
+    Object.values(trenchesById).forEach((tData) => visibleTrenchIds.add(tData.id));
+  }
 
   if (!visibleFindIds.length && !visibleTrenchIds.size) {
     if (!hasDateFilter && !hasDepthFilter) {
-      Object.values(findLayers).forEach((l) => l.addTo(map));
+      Object.values(findLayers).forEach((l) => findsLayer.addMarker(l));
       Object.values(trenchLayers).forEach((l) => l.addTo(map));
     }
     return;
@@ -768,7 +1021,7 @@ function applyFilter(rawQuery) {
 
   visibleFindIds.forEach((id) => {
     const layer = findLayers[id];
-    if (layer) layer.addTo(map);
+    if (layer) findsLayer.addMarker(layer);
   });
 
   visibleTrenchIds.forEach((tid) => {
@@ -879,9 +1132,11 @@ window.focusOnTrench = function (trenchId) {
 
 window.focusOnFind = function (findId) {
   const layer = findLayers[findId];
-  if (layer) {
+  const f = findsById[findId];
+  if (layer && f) {
+    // Kümeleme modunda marker o an haritada olmayabilir; popup ayrı açılır
     map.setView(layer.getLatLng(), 19);
-    layer.openPopup();
+    L.popup().setLatLng(layer.getLatLng()).setContent(buildFindPopup(f)).openOn(map);
   }
 };
 
@@ -912,3 +1167,188 @@ window.focusOnAllFinds = function () {
 };
 
 window.applyFilter = applyFilter;
+
+// =====================================
+// SÜTUNLU FORMAT (core/map_data.encode_finds_columnar)
+// =====================================
+// {"t": "i4" | "f8", "b": base64} → Int32Array / Float64Array
+function decodeColumn(col) {
+  const bin = atob((col && col.b) || "");
+  const bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  return col && col.t === "i4"
+    ? new Int32Array(bytes.buffer)
+    : new Float64Array(bytes.buffer);
+}
+
+function numOrNull(v) {
+  return Number.isNaN(v) ? null : v;
+}
+
+// {"table": [...], "index": kolon} → i. satırın metni
+function decodeStringTable(st) {
+  if (!st) return () => null;
+  const idx = decodeColumn(st.index);
+  return (i) => st.table[idx[i]];
+}
+
+// Sütunlu buluntu paketini buluntu nesnelerine çevirir.
+// Dizi gelirse (eski satır formatı) olduğu gibi döner.
+function decodeFindsColumnar(cols) {
+  if (!cols) return [];
+  if (Array.isArray(cols)) return cols;
+
+  const n = cols.count || 0;
+  if (!n) return [];
+
+  const id = decodeColumn(cols.id);
+  const lat = decodeColumn(cols.lat);
+  const lon = decodeColumn(cols.lon);
+  const z = decodeColumn(cols.z);
+  const trench = decodeColumn(cols.trench);
+  const level = decodeColumn(cols.level);
+  const description = decodeStringTable(cols.description);
+  const foundAt = decodeStringTable(cols.found_at);
+
+  const out = new Array(n);
+  for (let i = 0; i < n; i++) {
+    const t = cols.trenches[trench[i]] || [null, null, null];
+    const lv = level[i] >= 0 ? cols.levels[level[i]] : null;
+    out[i] = {
+      id: id[i],
+      trench_id: t[0],
+      trench_code: t[1],
+      trench_name: t[2],
+      code: cols.code[i],
+      description: description(i),
+      lat: numOrNull(lat[i]),
+      lon: numOrNull(lon[i]),
+      z: numOrNull(z[i]),
+      level_id: lv ? lv[0] : null,
+      level_name: lv ? lv[1] : null,
+      found_at: foundAt(i),
+    };
+  }
+  return out;
+}
+
+// =====================================
+// QT BRIDGE (QWebChannel)
+// =====================================
+function hasTextOrDateFilter() {
+  const q = filterInput ? filterInput.value.trim() : "";
+  const { from, to } = getDateRangeFromInputs();
+  return !!(q || from || to);
+}
+
+// Python'dan gelen artımlı güncelleme:
+// { op: "sync", fit, center, error,
+//   finds/trenches/layers: { add: [...], update: [...], remove: [id] } }
+function applyMapUpdate(msg) {
+  if (!msg || msg.op !== "sync") return;
+
+  // Sol ağaç Python tarafında yeniden kurulurken gizli anahtarlar korunur
+  // (yeni gizlenenler bu mesajdan önce "visibility" ile gelir); bu yüzden
+  // layerVisibility kayıtları silinmez, ağaçla aynı kalır.
+
+  const finds = msg.finds || {};
+  const trenches = msg.trenches || {};
+  const layers = msg.layers || {};
+  const addedFinds = decodeFindsColumnar(finds.add);
+  const updatedFinds = decodeFindsColumnar(finds.update);
+  const changedFinds = addedFinds.concat(updatedFinds);
+  const changedTrenches = (trenches.add || []).concat(trenches.update || []);
+
+  // --- Buluntular ---
+  (finds.remove || []).forEach(removeFind);
+  updatedFinds.forEach((f) => removeFind(f.id));
+  changedFinds.forEach((f) => {
+    findsById[f.id] = f;
+  });
+  const zChanged = recomputeZRange();
+  if (zChanged) recolorFindMarkers();
+  changedFinds.forEach(addFindMarker);
+  updateFindClustering();
+
+  // --- Açmalar ---
+  (trenches.remove || []).forEach(removeTrench);
+  (trenches.update || []).forEach((t) => removeTrench(t.id));
+  changedTrenches.forEach(addTrench);
+
+  // --- Harita katmanları ---
+  (layers.remove || []).forEach(removeOverlay);
+  (layers.update || []).forEach((l) => removeOverlay(overlayKey(l)));
+  (layers.add || []).concat(layers.update || []).forEach(addOverlay);
+  buildLayerPanel();
+  updateLayerOrderFromDom();
+
+  if (zChanged) {
+    updateLegendZText();
+    initDepthRangeFromFinds();
+  }
+
+  // Eklenen / güncellenen katmanlar ağaçtaki görünürlüğe uyar
+  applyQtVisibilityToLayers();
+
+  if (msg.fit && msg.center) fitToData(msg.center);
+  if (msg.error) showMapError(msg.error, msg.center || map.getCenter());
+
+  // Kullanıcının açık filtresi yeni verilere de uygulanır; veritabanı
+  // değiştiği için metin araması yeniden yapılır
+  searchResult = null;
+  if (hasTextOrDateFilter()) {
+    applyFilter(filterInput ? filterInput.value : "");
+  }
+}
+
+window.applyMapUpdate = applyMapUpdate;
+
+function applyMapConfig(config) {
+  if (!config) return;
+  if (typeof config.find_cluster_threshold === "number") {
+    FIND_CLUSTER_THRESHOLD = config.find_cluster_threshold;
+    updateFindClustering();
+  }
+}
+
+window.applyMapConfig = applyMapConfig;
+
+let messageQueue = Promise.resolve();
+
+function handleBridgeMessage(msg) {
+  if (msg.op === "fetch") {
+    return fetch(msg.url)
+      .then((r) => {
+        if (!r.ok) throw new Error(`HTTP ${r.status}: ${msg.url}`);
+        return r.json();
+      })
+      .then(handleBridgeMessage);
+  }
+  if (msg.op === "visibility") {
+    setLayersVisibilityFromQt(msg.changes);
+  } else if (msg.op === "search") {
+    applySearchResult(msg);
+  } else if (msg.op === "config") {
+    applyMapConfig(msg.config);
+  } else {
+    applyMapUpdate(msg);
+  }
+  return null;
+}
+
+if (typeof QWebChannel !== "undefined" && window.qt && qt.webChannelTransport) {
+  new QWebChannel(qt.webChannelTransport, (channel) => {
+    const bridge = channel.objects.arcsysBridge;
+    window.arcsysBridge = bridge;
+    bridge.mapMessage.connect((payload) => {
+      // Mesajlar geliş sırasıyla uygulanır; "fetch" (büyük sync mesajı
+      // arcsys:// üzerinden) bitmeden sonraki mesajlar bekler.
+      messageQueue = messageQueue
+        .then(() => handleBridgeMessage(JSON.parse(payload)))
+        .catch((err) => {
+          console.error("Harita mesajı işlenemedi:", err);
+        });
+    });
+    bridge.pageReady();
+  });
+}